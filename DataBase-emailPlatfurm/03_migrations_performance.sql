@@ -0,0 +1,187 @@
+-- ============================================
+-- MIGRATIONS PERFORMANCE
+-- 03_migrations_performance.sql
+-- Exécutez ce fichier APRÈS 00_correction_base_existante.sql
+-- ============================================
+
+USE email_template_platform;
+
+-- ============================================
+-- MIGRATION 1 : Époque de révocation des tokens
+-- (access tokens sans état - JWT_STATELESS_ACCESS_TOKENS)
+-- ============================================
+
+ALTER TABLE users
+    ADD COLUMN token_epoch INT NOT NULL DEFAULT 0;
+
+-- ============================================
+-- MIGRATION 2 : Index de pagination par curseur
+-- Listes de templates triées par (updated_at, id) pour un utilisateur.
+-- (users, activity_logs: idx_created_at suffit, InnoDB ajoute l'id
+--  à chaque index secondaire)
+-- ============================================
+
+CREATE INDEX idx_user_active_updated
+    ON email_templates (user_id, is_active, updated_at, id);
+
+-- ============================================
+-- MIGRATION 3 : Index de recherche plein texte
+-- Texte du HTML sans balises + tags/catégorie, maintenu par l'application.
+-- Remplir ensuite avec: flask rebuild-search-index
+-- ============================================
+
+CREATE TABLE template_search_documents (
+    template_id INT PRIMARY KEY,
+    user_id INT NOT NULL,
+    is_active BOOLEAN NOT NULL DEFAULT TRUE,
+    nom VARCHAR(255) NOT NULL,
+    sujet VARCHAR(500) NOT NULL,
+    meta TEXT,
+    body TEXT,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    FOREIGN KEY (template_id) REFERENCES email_templates(id) ON DELETE CASCADE,
+    INDEX idx_search_user_active (user_id, is_active),
+    FULLTEXT ft_template_search (nom, sujet, meta, body)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+-- ============================================
+-- MIGRATION 4 : Versions stockées en instantanés + deltas
+-- delta_base_id NULL: contenu complet; sinon html_content/css_content
+-- contiennent un delta de la version delta_base_id (même template).
+-- html_size/css_size: taille du contenu complet (octets).
+-- Compacter ensuite l'historique existant avec: flask pack-versions
+-- (espace gagné: flask version-storage-report)
+-- ============================================
+
+ALTER TABLE template_versions
+    ADD COLUMN delta_base_id INT NULL,
+    ADD COLUMN html_size INT NULL,
+    ADD COLUMN css_size INT NULL,
+    ADD INDEX idx_delta_base (delta_base_id);
+
+-- ============================================
+-- MIGRATION 5 : Contenus HTML/CSS compressés
+-- Colonnes binaires (LONGBLOB: plus de limite à 64 Ko pour css_content),
+-- valeurs précédées d'un marqueur de format (zlib, zstd ou brut).
+-- Les textes existants restent lisibles tels quels: l'application peut
+-- être redéployée avant la reprise, puis: flask compress-content
+-- (par lots, en service). Sur de grosses tables, passer ces ALTER avec
+-- pt-online-schema-change (ALTER ... MODIFY recopie la table).
+-- ============================================
+
+ALTER TABLE email_templates
+    MODIFY html_content LONGBLOB NOT NULL,
+    MODIFY css_content LONGBLOB NULL;
+
+ALTER TABLE template_versions
+    MODIFY html_content LONGBLOB NOT NULL,
+    MODIFY css_content LONGBLOB NULL;
+
+-- ============================================
+-- MIGRATION 6 : Contenus stockés par empreinte
+-- Un contenu d'au moins CONTENT_BLOB_MIN_SIZE caractères est stocké une
+-- fois dans content_blobs (clé: SHA-256, compteur de références); la ligne
+-- du template ou de l'instantané garde un contenu vide et son empreinte.
+-- tier 'cold': contenu en LZMA (cold_data), voir flask tier-content.
+-- Reprise des lignes existantes (en service): flask externalize-content
+-- Contenus sans référence: flask gc-blobs (--recount après des
+-- suppressions faites directement en SQL, ON DELETE CASCADE compris)
+-- ============================================
+
+CREATE TABLE content_blobs (
+    hash CHAR(64) PRIMARY KEY,
+    size INT NOT NULL,
+    ref_count INT NOT NULL DEFAULT 0,
+    tier VARCHAR(4) NOT NULL DEFAULT 'hot',
+    data LONGBLOB NULL,
+    cold_data LONGBLOB NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    INDEX idx_blob_tier (tier),
+    INDEX idx_blob_ref_count (ref_count)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+ALTER TABLE email_templates
+    ADD COLUMN html_blob CHAR(64) NULL,
+    ADD COLUMN css_blob CHAR(64) NULL;
+
+ALTER TABLE template_versions
+    ADD COLUMN html_blob CHAR(64) NULL,
+    ADD COLUMN css_blob CHAR(64) NULL;
+
+-- ============================================
+-- MIGRATION 7 : Compteur de versions par template
+-- Dernier numéro de version attribué, incrémenté dans la transaction qui
+-- crée la version (plus de MAX(version_number) à chaque modification, ni
+-- de conflit sur unique_template_version entre deux modifications
+-- simultanées). Initialisé sur le plus grand numéro existant.
+-- ============================================
+
+ALTER TABLE email_templates
+    ADD COLUMN version_counter INT NOT NULL DEFAULT 1;
+
+UPDATE email_templates t
+    SET version_counter = GREATEST(1, (
+        SELECT COALESCE(MAX(v.version_number), 0)
+        FROM template_versions v
+        WHERE v.template_id = t.id
+    )),
+    updated_at = t.updated_at;
+
+-- ============================================
+-- MIGRATION 8 : Rétention des versions
+-- restored_from: numéro de la version restaurée (points de restauration,
+-- toujours conservés par la rétention), repris des descriptions des
+-- restaurations déjà faites. retention_policy: surcharge par template de
+-- VERSION_RETENTION (NULL: politique globale). Élagage: flask compact-versions.
+-- ============================================
+
+ALTER TABLE template_versions
+    ADD COLUMN restored_from INT NULL;
+
+UPDATE template_versions
+    SET restored_from = CAST(SUBSTRING_INDEX(change_description, ' ', -1) AS UNSIGNED)
+    WHERE change_description REGEXP '^Restauration de la version [0-9]+$';
+
+ALTER TABLE template_metadata
+    ADD COLUMN retention_policy JSON NULL;
+
+-- ============================================
+-- MIGRATION 9 : Empreintes du contenu des versions
+-- SHA-256 du HTML et du CSS complets, renvoyés par l'historique à la
+-- place du contenu (comparaison et cache côté client sans le lire).
+-- Le contenu stocké étant compressé ou en delta, les versions existantes
+-- sont complétées à leur première lecture dans l'historique, ou d'avance
+-- par flask fill-version-stats (sans réécrire le stockage).
+-- ============================================
+
+ALTER TABLE template_versions
+    ADD COLUMN html_hash CHAR(64) NULL,
+    ADD COLUMN css_hash CHAR(64) NULL;
+
+-- ============================================
+-- MIGRATION 10 : Index des références de contenus
+-- flask gc-blobs --recount recompte chaque contenu dans l'UPDATE qui
+-- écrit son compteur, et ne supprime un contenu que si aucune ligne ne
+-- le référence: une recherche par empreinte dans chaque table.
+-- ============================================
+
+ALTER TABLE email_templates
+    ADD INDEX idx_template_html_blob (html_blob),
+    ADD INDEX idx_template_css_blob (css_blob);
+
+ALTER TABLE template_versions
+    ADD INDEX idx_version_html_blob (html_blob),
+    ADD INDEX idx_version_css_blob (css_blob);
+
+-- ============================================
+-- MIGRATION 11 : Pertinence pondérée par colonne
+-- Le score de recherche additionne MATCH ... AGAINST sur chaque colonne
+-- (nom > sujet > tags/catégorie > contenu); InnoDB exige un index
+-- FULLTEXT par liste de colonnes interrogée.
+-- ============================================
+
+ALTER TABLE template_search_documents
+    ADD FULLTEXT INDEX ft_search_nom (nom),
+    ADD FULLTEXT INDEX ft_search_sujet (sujet),
+    ADD FULLTEXT INDEX ft_search_meta (meta),
+    ADD FULLTEXT INDEX ft_search_body (body);
@@ -25,6 +25,7 @@ CREATE TABLE users (
     last_login TIMESTAMP NULL,
     is_active BOOLEAN DEFAULT TRUE,
     role ENUM('user', 'admin') DEFAULT 'user',
+    token_epoch INT NOT NULL DEFAULT 0,
     INDEX idx_email (email),
     INDEX idx_created_at (created_at),
     INDEX idx_is_active (is_active)
@@ -39,17 +40,23 @@ CREATE TABLE email_templates (
     user_id INT NOT NULL,
     nom VARCHAR(255) NOT NULL,
     sujet VARCHAR(500) NOT NULL,
-    html_content LONGTEXT NOT NULL,
-    css_content TEXT,
+    html_content LONGBLOB NOT NULL,
+    css_content LONGBLOB,
+    html_blob CHAR(64) NULL,
+    css_blob CHAR(64) NULL,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
     is_active BOOLEAN DEFAULT TRUE,
+    version_counter INT NOT NULL DEFAULT 1,
     FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE,
     INDEX idx_user_id (user_id),
     INDEX idx_nom (nom),
     INDEX idx_created_at (created_at),
     INDEX idx_updated_at (updated_at),
     INDEX idx_user_active (user_id, is_active),
+    INDEX idx_user_active_updated (user_id, is_active, updated_at, id),
+    INDEX idx_template_html_blob (html_blob),
+    INDEX idx_template_css_blob (css_blob),
     FULLTEXT idx_search (nom, sujet)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
 
@@ -61,9 +68,17 @@ CREATE TABLE template_versions (
     id INT AUTO_INCREMENT PRIMARY KEY,
     template_id INT NOT NULL,
     version_number INT NOT NULL,
-    html_content LONGTEXT NOT NULL,
-    css_content TEXT,
+    html_content LONGBLOB NOT NULL,
+    css_content LONGBLOB,
+    html_blob CHAR(64) NULL,
+    css_blob CHAR(64) NULL,
+    delta_base_id INT NULL,
+    html_size INT NULL,
+    css_size INT NULL,
+    html_hash CHAR(64) NULL,
+    css_hash CHAR(64) NULL,
     change_description VARCHAR(500),
+    restored_from INT NULL,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     created_by INT NOT NULL,
     ip_address VARCHAR(45),
@@ -74,7 +89,10 @@ CREATE TABLE template_versions (
     INDEX idx_template_id (template_id),
     INDEX idx_version_number (version_number),
     INDEX idx_created_at (created_at),
-    INDEX idx_created_by (created_by)
+    INDEX idx_created_by (created_by),
+    INDEX idx_delta_base (delta_base_id),
+    INDEX idx_version_html_blob (html_blob),
+    INDEX idx_version_css_blob (css_blob)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
 
 -- ============================================
@@ -91,6 +109,7 @@ CREATE TABLE template_metadata (
     favorite BOOLEAN DEFAULT FALSE,
     shared BOOLEAN DEFAULT FALSE,
     shared_with JSON,
+    retention_policy JSON NULL,
     FOREIGN KEY (template_id) REFERENCES email_templates(id) ON DELETE CASCADE,
     INDEX idx_category (category),
     INDEX idx_last_used (last_used),
@@ -157,7 +176,45 @@ CREATE TABLE activity_logs (
     INDEX idx_action (action),
     INDEX idx_entity (entity_type, entity_id),
     INDEX idx_created_at (created_at)
-) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci; 
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+-- ============================================
+-- TABLE 8 : template_search_documents
+-- Texte indexé pour la recherche plein texte
+-- ============================================
+CREATE TABLE template_search_documents (
+    template_id INT PRIMARY KEY,
+    user_id INT NOT NULL,
+    is_active BOOLEAN NOT NULL DEFAULT TRUE,
+    nom VARCHAR(255) NOT NULL,
+    sujet VARCHAR(500) NOT NULL,
+    meta TEXT,
+    body TEXT,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    FOREIGN KEY (template_id) REFERENCES email_templates(id) ON DELETE CASCADE,
+    INDEX idx_search_user_active (user_id, is_active),
+    FULLTEXT ft_template_search (nom, sujet, meta, body),
+    FULLTEXT ft_search_nom (nom),
+    FULLTEXT ft_search_sujet (sujet),
+    FULLTEXT ft_search_meta (meta),
+    FULLTEXT ft_search_body (body)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+-- ============================================
+-- TABLE 9 : content_blobs
+-- Contenus HTML/CSS stockés une fois par empreinte SHA-256
+-- ============================================
+CREATE TABLE content_blobs (
+    hash CHAR(64) PRIMARY KEY,
+    size INT NOT NULL,
+    ref_count INT NOT NULL DEFAULT 0,
+    tier VARCHAR(4) NOT NULL DEFAULT 'hot',
+    data LONGBLOB NULL,
+    cold_data LONGBLOB NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    INDEX idx_blob_tier (tier),
+    INDEX idx_blob_ref_count (ref_count)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
 SHOW DATABASES;
 USE email_template_platform;
 SHOW TABLES;
@@ -174,3 +231,5 @@ SHOW CREATE TABLE template_metadata;
 SHOW CREATE TABLE validation_results;
 SHOW CREATE TABLE sessions;
 SHOW CREATE TABLE activity_logs;
+SHOW CREATE TABLE template_search_documents;
+SHOW CREATE TABLE content_blobs;
@@ -33,6 +33,47 @@ def create_app(env='development'):
     # Initialiser les extensions
     db.init_app(app)
 
+    # Format des colonnes de contenu (avant toute lecture ou écriture)
+    from app.utils.compressed_text import content_codec
+    content_codec.init_app(app)
+
+    from app.utils.blob_store import blob_store
+    blob_store.init_app(app)
+
+    # Compression: enregistrée en premier, exécutée après tous les autres after_request
+    from app.utils.compression import response_compressor
+    response_compressor.init_app(app)
+
+    from app.utils.auth_cache import auth_cache
+    auth_cache.init_app(app)
+
+    from app.utils.activity_writer import activity_writer
+    activity_writer.init_app(app)
+
+    from app.utils.version_compactor import version_compactor
+    version_compactor.init_app(app)
+
+    from app.utils.rate_limiter import rate_limiter
+    rate_limiter.init_app(app)
+
+    from app.utils.password_hasher import password_hasher
+    password_hasher.init_app(app)
+
+    from app.utils.preview_cache import preview_cache
+    preview_cache.init_app(app)
+
+    from app.utils.render_cache import render_cache
+    render_cache.init_app(app)
+
+    from app.utils.css_inliner import stylesheet_cache
+    stylesheet_cache.init_app(app)
+
+    from app.utils.diff_cache import diff_cache
+    diff_cache.init_app(app)
+
+    from app.utils.version_delta import version_content_cache
+    version_content_cache.init_app(app)
+
     # ============================================
     # CORRECTION MAJEURE: Configuration CORS COMPLÈTE
     # ============================================
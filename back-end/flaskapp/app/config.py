@@ -35,6 +35,38 @@ class Config:
     JWT_SECRET_KEY = os.environ.get('JWT_SECRET_KEY') or SECRET_KEY
     JWT_ACCESS_TOKEN_EXPIRES = timedelta(hours=24)
 
+    # Access tokens sans état (optionnel): le token de session devient un
+    # refresh token et des access tokens courts portent l'époque de l'utilisateur
+    JWT_STATELESS_ACCESS_TOKENS = os.environ.get('JWT_STATELESS_ACCESS_TOKENS', 'false').lower() == 'true'
+    JWT_STATELESS_ACCESS_EXPIRES = timedelta(minutes=15)
+
+    # Cache d'authentification (token_required)
+    AUTH_CACHE_ENABLED = True
+    AUTH_CACHE_TTL = 30  # secondes - borne le délai de propagation entre workers
+    AUTH_CACHE_MAX_ENTRIES = 10000
+
+    # Logs d'activité - écriture différée par lots
+    ACTIVITY_LOG_ASYNC = True
+    ACTIVITY_LOG_QUEUE_SIZE = 10000
+    ACTIVITY_LOG_BATCH_SIZE = 200
+    ACTIVITY_LOG_FLUSH_INTERVAL = 1.0  # secondes
+    ACTIVITY_LOG_BACKPRESSURE = 'sync'  # sync | block | drop
+    ACTIVITY_LOG_BLOCK_TIMEOUT = 0.5  # secondes (politique 'block')
+
+    # Limitation de débit (@rate_limit)
+    RATE_LIMIT_ENABLED = True
+    RATE_LIMIT_BACKEND = os.environ.get('RATE_LIMIT_BACKEND', 'memory')  # memory | sqlite (partagé entre workers)
+    RATE_LIMIT_SQLITE_PATH = os.environ.get('RATE_LIMIT_SQLITE_PATH', '/tmp/email_platform_rate_limits.sqlite')
+    RATE_LIMIT_MAX_KEYS = 100000
+    RATE_LIMIT_IDLE_TTL = 3600  # secondes sans requête avant suppression d'une clé (sqlite)
+
+    # Hachage des mots de passe (pool borné, 429 si saturé)
+    PASSWORD_HASH_METHOD = os.environ.get('PASSWORD_HASH_METHOD', 'scrypt:32768:8:1')
+    PASSWORD_HASH_WORKERS = int(os.environ.get('PASSWORD_HASH_WORKERS', 4))
+    PASSWORD_HASH_QUEUE_SIZE = 16  # demandes en attente au-delà des workers
+    PASSWORD_HASH_TIMEOUT = 10.0  # secondes
+    PASSWORD_ALLOW_PLAINTEXT_LEGACY = True  # anciens mots de passe en clair, rehashés à la connexion
+
     # CORS - Autoriser toutes les origines en développement
     CORS_ORIGINS = os.environ.get('CORS_ORIGINS', 'http://localhost:4200,http://127.0.0.1:4200').split(',')
 
@@ -44,6 +76,99 @@ class Config:
     # Pagination
     DEFAULT_PAGE_SIZE = 20
     MAX_PAGE_SIZE = 100
+    PAGINATION_ESTIMATE_CAP = 10000  # count=estimate: COUNT arrêté au-delà
+
+    # Opérations groupées (/api/templates/bulk)
+    BULK_MAX_OPERATIONS = 500  # par requête (voir aussi MAX_CONTENT_LENGTH)
+
+    # Import ZIP / NDJSON (/api/templates/import, flask import-templates)
+    IMPORT_CHUNK_SIZE = 500  # entrées par transaction
+    # Route HTTP: validation sur place (pas de fork d'un worker web multi-threadé)
+    IMPORT_WORKERS = int(os.environ.get('IMPORT_WORKERS', 0))
+    IMPORT_CLI_WORKERS = int(os.environ.get('IMPORT_CLI_WORKERS', os.cpu_count() or 1))  # flask import-templates
+    IMPORT_MP_CONTEXT = os.environ.get('IMPORT_MP_CONTEXT')  # fork, spawn, forkserver (None: défaut OS)
+    IMPORT_MAX_ENTRY_BYTES = 2 * 1024 * 1024  # par fichier HTML/CSS/JSON d'un ZIP
+
+    # Export ZIP / NDJSON (/api/templates/export, flask export-templates)
+    EXPORT_BATCH_SIZE = 200  # templates lus par requête
+    EXPORT_VERSION_BATCH_SIZE = 100  # versions lues par aller-retour (curseur serveur)
+
+    # Recherche plein texte (FULLTEXT MySQL / FTS5 SQLite)
+    SEARCH_FULLTEXT_ENABLED = True
+    SEARCH_BODY_MAX_CHARS = 20000  # texte du HTML indexé par template
+    SEARCH_MYSQL_MIN_TOKEN_SIZE = 3  # = innodb_ft_min_token_size
+
+    # Cache des aperçus (HTML complet indexé par hash du contenu)
+    PREVIEW_CACHE_ENABLED = True
+    PREVIEW_CACHE_MAX_ENTRIES = 500
+    PREVIEW_CACHE_MAX_BYTES = 32 * 1024 * 1024
+    PREVIEW_CACHE_CONTROL = 'private, no-cache'  # revalidation systématique (304 via ETag)
+
+    # Cache des templates compilés (POST /api/templates/<id>/render)
+    RENDER_CACHE_ENABLED = True
+    RENDER_CACHE_MAX_ENTRIES = 1000
+    RENDER_CACHE_MAX_BYTES = 64 * 1024 * 1024
+
+    # Feuilles de style analysées pour la mise en ligne du CSS (par SHA-256 du CSS)
+    CSS_INLINE_CACHE_ENABLED = True
+    CSS_INLINE_CACHE_MAX_ENTRIES = 200
+    CSS_INLINE_CACHE_MAX_BYTES = 16 * 1024 * 1024  # CSS source cumulé
+
+    # Comparaison de versions (GET /api/templates/<id>/versions/compare)
+    DIFF_CACHE_ENABLED = True
+    DIFF_CACHE_MAX_ENTRIES = 500
+    DIFF_CACHE_MAX_BYTES = 32 * 1024 * 1024
+    DIFF_MAX_CELLS = 1000000  # au-delà (lignes x lignes), découpage sur les lignes uniques
+    DIFF_MAX_CONTEXT = 100  # lignes de contexte maximum par bloc
+
+    # Stockage des versions: instantanés complets + deltas (flask pack-versions)
+    VERSION_DELTA_ENABLED = True
+    VERSION_SNAPSHOT_INTERVAL = 20  # versions par instantané (instantané compris)
+    VERSION_DELTA_MAX_RATIO = 0.5  # delta plus gros que 50 % du contenu: nouvel instantané
+    VERSION_NUMBER_RETRIES = 3  # essais d'une modification/restauration dont le numéro de version est pris
+    VERSION_CACHE_ENABLED = True
+    VERSION_CACHE_MAX_ENTRIES = 200
+    VERSION_CACHE_MAX_BYTES = 64 * 1024 * 1024
+
+    # Rétention de l'historique des versions (flask compact-versions, voir app.utils.retention)
+    VERSION_RETENTION = {
+        'keep_all': False,
+        'keep_last': 50,  # dernières versions de chaque template
+        'daily_days': 30,  # dernière version de chaque jour, sur 30 jours
+        'monthly_months': None,  # dernière version de chaque mois (None: sans limite)
+        'restore_points': True  # restaurations et versions restaurées
+    }
+    VERSION_COMPACTION_ASYNC = False  # True: compactage en tâche de fond après chaque nouvelle version
+    VERSION_COMPACTION_DELAY = 60.0  # secondes - regroupe les modifications successives d'un template
+    VERSION_COMPACTION_BATCH_SIZE = 100  # templates par lot
+
+    # Contenus HTML/CSS stockés compressés (flask compress-content pour les lignes existantes)
+    CONTENT_COMPRESSION = 'auto'  # zstd si le module zstandard est installé, sinon zlib; 'none': aucune
+    CONTENT_COMPRESSION_LEVEL = None  # défaut de l'algorithme (zstd: 3, zlib: 6)
+    CONTENT_COMPRESSION_MIN_SIZE = 256  # octets en dessous desquels le contenu est stocké tel quel
+
+    # Contenus stockés par empreinte SHA-256 (flask externalize-content pour les lignes existantes)
+    CONTENT_BLOB_ENABLED = True
+    CONTENT_BLOB_BACKEND = 'db'  # 'db': table content_blobs, 'fs': fichiers lus par mmap
+    CONTENT_BLOB_DIR = None  # backend 'fs' (défaut: <instance>/blobs)
+    CONTENT_BLOB_MIN_SIZE = 4096  # caractères en dessous desquels le contenu reste dans la ligne
+    CONTENT_BLOB_CACHE_MAX_ENTRIES = 500
+    CONTENT_BLOB_CACHE_MAX_BYTES = 64 * 1024 * 1024
+    CONTENT_COLD_AFTER_DAYS = 90  # niveau froid après N jours sans utilisation (flask tier-content)
+
+    # Rendu par lots (POST /api/templates/<id>/render/batch, flask render-batch)
+    # Route HTTP: rendu sur place (pas de fork d'un worker web multi-threadé)
+    BATCH_RENDER_WORKERS = int(os.environ.get('BATCH_RENDER_WORKERS', 0))
+    BATCH_RENDER_CLI_WORKERS = int(os.environ.get('BATCH_RENDER_CLI_WORKERS', os.cpu_count() or 1))  # flask render-batch
+    BATCH_RENDER_CHUNK_SIZE = 200  # lignes par lot envoyé à un processus
+    BATCH_RENDER_MAX_PENDING = None  # lots en cours (None: 2 x workers)
+    BATCH_RENDER_MP_CONTEXT = os.environ.get('BATCH_RENDER_MP_CONTEXT')  # fork, spawn, forkserver
+
+    # Compression des réponses (gzip/deflate, brotli si le module est installé)
+    COMPRESSION_ENABLED = True
+    COMPRESSION_MIN_SIZE = 1024  # octets - les petites réponses ne sont pas compressées
+    COMPRESSION_LEVEL = 6  # gzip/deflate: 1 (rapide) à 9 (compact)
+    COMPRESSION_BROTLI_QUALITY = 4  # 0 à 11
 
     # Logs
     LOG_LEVEL = 'INFO'
@@ -84,8 +209,18 @@ class TestingConfig(Config):
     TESTING = True
     DEBUG = True
 
-    # Base de données de test en mémoire
-    SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+    # Base de données de test en mémoire (TEST_DATABASE_URL: fichier partagé
+    # entre threads, voir tests/conftest.py)
+    SQLALCHEMY_DATABASE_URI = os.environ.get('TEST_DATABASE_URL', 'sqlite:///:memory:')
+
+    # Logs d'activité écrits immédiatement (résultats déterministes)
+    ACTIVITY_LOG_ASYNC = False
+
+    # Pas de limitation de débit pendant les tests
+    RATE_LIMIT_ENABLED = False
+
+    # KDF peu coûteuse pour des tests rapides
+    PASSWORD_HASH_METHOD = 'pbkdf2:sha256:1000'
 
     # Désactiver CSRF pour les tests
     WTF_CSRF_ENABLED = False
@@ -8,6 +8,9 @@ Modèle ActivityLog - Logs d'audit et sécurité
 
 from datetime import datetime, timedelta
 from app import db
+from app.utils.activity_writer import activity_writer
+from app.utils.batch_operations import delete_in_batches
+from app.utils.pagination import keyset_paginate
 
 
 class ActivityLog(db.Model):
@@ -102,8 +105,20 @@ class ActivityLog(db.Model):
             user_agent: User agent
 
         Returns:
-            ActivityLog: Log créé
+            ActivityLog: Log créé (None si écriture différée)
         """
+        if activity_writer.async_enabled:
+            activity_writer.write({
+                'user_id': user_id,
+                'action': action,
+                'entity_type': entity_type,
+                'entity_id': entity_id,
+                'details': details or {},
+                'ip_address': ip_address,
+                'user_agent': user_agent
+            })
+            return None
+
         log = ActivityLog(
             user_id=user_id,
             action=action,
@@ -119,6 +134,40 @@ class ActivityLog(db.Model):
 
         return log
 
+    @staticmethod
+    def log_activities(entries):
+        """
+        Créer plusieurs logs d'activité en une seule instruction INSERT
+
+        Args:
+            entries: Liste de dicts (mêmes clés que log_activity)
+
+        Returns:
+            int: Nombre de logs écrits ou mis en file
+        """
+        rows = [{
+            'user_id': entry['user_id'],
+            'action': entry['action'],
+            'entity_type': entry.get('entity_type'),
+            'entity_id': entry.get('entity_id'),
+            'details': entry.get('details') or {},
+            'ip_address': entry.get('ip_address'),
+            'user_agent': entry.get('user_agent')
+        } for entry in entries]
+
+        if not rows:
+            return 0
+
+        if activity_writer.async_enabled:
+            for row in rows:
+                activity_writer.write(row)
+            return len(rows)
+
+        db.session.execute(db.insert(ActivityLog.__table__), rows)
+        db.session.commit()
+
+        return len(rows)
+
     @staticmethod
     def get_user_activities(user_id, limit=50):
         """
@@ -173,7 +222,8 @@ class ActivityLog(db.Model):
 
     @staticmethod
     def search_activities(action=None, user_id=None, entity_type=None,
-                          start_date=None, end_date=None, page=1, per_page=50):
+                          start_date=None, end_date=None, page=1, per_page=50,
+                          cursor=None, count=None):
         """
         Rechercher des activités
 
@@ -183,8 +233,10 @@ class ActivityLog(db.Model):
             entity_type: Filtrer par type d'entité
             start_date: Date de début
             end_date: Date de fin
-            page: Numéro de page
+            page: Numéro de page (mode compatibilité, sans curseur)
             per_page: Éléments par page
+            cursor: Curseur sur (created_at, id) ('' pour la première page)
+            count: Comptage en mode curseur ('none', 'estimate', 'exact')
 
         Returns:
             dict: Résultats paginés
@@ -206,6 +258,10 @@ class ActivityLog(db.Model):
         if end_date:
             query = query.filter(ActivityLog.created_at <= end_date)
 
+        if cursor is not None:
+            result = keyset_paginate(query, [ActivityLog.created_at, ActivityLog.id], cursor, per_page, count)
+            return result.to_dict('logs', [log.to_dict() for log in result.items])
+
         query = query.order_by(db.desc('created_at'))
 
         pagination = query.paginate(page=page, per_page=per_page, error_out=False)
@@ -218,27 +274,23 @@ class ActivityLog(db.Model):
         }
 
     @staticmethod
-    def cleanup_old_logs(days=90):
+    def cleanup_old_logs(days=90, batch_size=5000, progress=None):
         """
-        Nettoyer les vieux logs
+        Nettoyer les vieux logs (DELETE par lots)
 
         Args:
             days: Nombre de jours à conserver
+            batch_size: Nombre de logs par lot
+            progress: Callback progress(total_supprimé)
 
         Returns:
             int: Nombre de logs supprimés
         """
         cutoff_date = datetime.utcnow() - timedelta(days=days)
 
-        old_logs = ActivityLog.query.filter(
-            ActivityLog.created_at < cutoff_date
-        ).all()
-
-        count = len(old_logs)
-
-        for log in old_logs:
-            db.session.delete(log)
-
-        db.session.commit()
-
-        return count
+        return delete_in_batches(
+            ActivityLog,
+            ActivityLog.created_at < cutoff_date,
+            batch_size=batch_size,
+            progress=progress
+        )
@@ -0,0 +1,308 @@
+# ============================================
+# FICHIER: backend/app/models/content_blob.py
+# Modèle Contenu Stocké par Empreinte
+# ============================================
+"""
+Modèle ContentBlob - Corps HTML/CSS partagés, comptés par référence
+
+Une ligne par contenu distinct (SHA-256). Les templates et les versions
+(instantanés) y font référence par leurs colonnes html_blob / css_blob au
+lieu de recopier le corps: une duplication, une restauration ou un CSS
+inchangé ajoutent une référence, pas une copie.
+
+ref_count est tenu à jour par les événements de flush des modèles (et par
+store_values pour les insertions en masse); un contenu à 0 référence est
+supprimé par BlobService.collect_garbage(), qui peut aussi recompter les
+références (suppressions faites directement en SQL).
+
+Niveau ('tier'): 'hot' (data, ou fichier lu par mmap) ou 'cold' (LZMA,
+voir BlobService.apply_tiering). La lecture est identique dans les deux cas.
+"""
+
+from datetime import datetime
+from sqlalchemy.dialects.mysql import LONGBLOB
+from app import db
+from app.utils.blob_store import blob_store
+from app.utils.compressed_text import CompressedText
+
+
+class ContentBlob(db.Model):
+    """Modèle représentant un contenu stocké par empreinte"""
+
+    __tablename__ = 'content_blobs'
+
+    # Colonnes
+    hash = db.Column(db.String(64), primary_key=True)
+    size = db.Column(db.Integer, nullable=False)  # octets (UTF-8)
+    ref_count = db.Column(db.Integer, nullable=False, default=0)
+    tier = db.Column(db.String(4), nullable=False, default='hot')
+    # Backend 'db': contenu (niveau chaud) ou LZMA (niveau froid); backend 'fs': NULL
+    data = db.Column(CompressedText, nullable=True)
+    cold_data = db.Column(db.LargeBinary().with_variant(LONGBLOB(), 'mysql'), nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+    # Contraintes
+    __table_args__ = (
+        db.Index('idx_blob_tier', 'tier'),
+        db.Index('idx_blob_ref_count', 'ref_count'),
+    )
+
+    def __repr__(self):
+        """Représentation string"""
+        return f'<ContentBlob {self.hash[:12]} {self.tier} refs={self.ref_count}>'
+
+    @staticmethod
+    def acquire(digest, text, connection):
+        """
+        Ajouter une référence à un contenu (créé s'il n'existe pas)
+
+        Args:
+            digest: Empreinte du contenu
+            text: Contenu
+            connection: Connexion de la transaction en cours
+        """
+        table = ContentBlob.__table__
+        incremented = connection.execute(
+            db.update(table).where(table.c.hash == digest).values(ref_count=table.c.ref_count + 1)
+        ).rowcount
+        if incremented:
+            return
+
+        if blob_store.backend == 'fs':
+            blob_store.write(digest, text)
+
+        values = {
+            'hash': digest,
+            'size': len(text.encode('utf-8')),
+            'ref_count': 1,
+            'tier': 'hot',
+            'data': text if blob_store.backend == 'db' else None,
+            'created_at': datetime.utcnow()
+        }
+        # Création concurrente du même contenu: la seconde devient une référence
+        connection.execute(ContentBlob._upsert(connection.dialect.name, values))
+        blob_store.put(digest, text)
+
+    @staticmethod
+    def _upsert(dialect, values):
+        """INSERT, ou +1 référence si l'empreinte existe déjà (MySQL / SQLite)"""
+        table = ContentBlob.__table__
+
+        if dialect == 'mysql':
+            from sqlalchemy.dialects.mysql import insert
+            statement = insert(table).values(**values)
+            return statement.on_duplicate_key_update(ref_count=table.c.ref_count + 1)
+
+        if dialect == 'sqlite':
+            from sqlalchemy.dialects.sqlite import insert
+            statement = insert(table).values(**values)
+            return statement.on_conflict_do_update(
+                index_elements=[table.c.hash], set_={'ref_count': table.c.ref_count + 1}
+            )
+
+        return db.insert(table).values(**values)
+
+    @staticmethod
+    def release(digests, connection):
+        """
+        Retirer une référence à des contenus
+
+        Args:
+            digests: Empreintes (None ignorés, une référence par occurrence)
+            connection: Connexion de la transaction en cours
+        """
+        table = ContentBlob.__table__
+        for digest in digests:
+            if digest:
+                connection.execute(
+                    db.update(table)
+                    .where(table.c.hash == digest, table.c.ref_count > 0)
+                    .values(ref_count=table.c.ref_count - 1)
+                )
+
+    @staticmethod
+    def load(digests, connection=None):
+        """
+        Contenus de plusieurs empreintes (cache, puis une requête)
+
+        Args:
+            digests: Empreintes
+            connection: Connexion à utiliser (événements de flush), défaut: session
+
+        Returns:
+            dict: {empreinte: contenu}
+        """
+        contents = {}
+        missing = []
+        for digest in set(digests):
+            if not digest:
+                continue
+            text = blob_store.get(digest)
+            if text is None:
+                missing.append(digest)
+            else:
+                contents[digest] = text
+
+        if missing:
+            execute = connection.execute if connection is not None else db.session.execute
+            table = ContentBlob.__table__
+            for row in execute(
+                db.select(table.c.hash, table.c.data, table.c.cold_data).where(table.c.hash.in_(missing))
+            ):
+                contents[row.hash] = blob_store.resolve(row.hash, row.data, row.cold_data)
+
+            for digest in missing:
+                if digest not in contents:
+                    raise ValueError(f'Contenu {digest} introuvable')
+
+        return contents
+
+    @staticmethod
+    def text(digest, connection=None):
+        """
+        Contenu d'une empreinte
+
+        Args:
+            digest: Empreinte
+            connection: Connexion à utiliser (événements de flush), défaut: session
+
+        Returns:
+            str: Contenu
+        """
+        return ContentBlob.load([digest], connection)[digest]
+
+    @staticmethod
+    def resolve(stored, digest, connection=None):
+        """
+        Contenu d'une colonne stockée dans la ligne ou par empreinte
+
+        Args:
+            stored: Valeur de la colonne de contenu
+            digest: Empreinte (html_blob / css_blob), None si contenu dans la ligne
+            connection: Connexion à utiliser (événements de flush), défaut: session
+
+        Returns:
+            str: Contenu
+        """
+        return ContentBlob.text(digest, connection) if digest else stored
+
+    @staticmethod
+    def with_content(query, stored, reference, name):
+        """
+        Ajouter à une requête un contenu lisible par row_text (sans requête de plus)
+
+        Le contenu référencé est lu par LEFT JOIN dans la même requête: c'est
+        ce qui permet de lire un historique en flux (curseur serveur ouvert,
+        aucune autre requête possible sur la connexion).
+
+        Args:
+            query: Requête db.select
+            stored: Colonne du contenu dans la ligne
+            reference: Colonne de l'empreinte (html_blob / css_blob)
+            name: Nom du contenu dans les lignes ('html_content', ...)
+
+        Returns:
+            Select: Requête complétée
+        """
+        blob = db.aliased(ContentBlob, name=f'{name}_blobs')
+        return query.outerjoin(blob, blob.hash == reference).add_columns(
+            stored.label(name),
+            reference.label(f'{name}_blob'),
+            blob.data.label(f'{name}_blob_data'),
+            blob.cold_data.label(f'{name}_blob_cold')
+        )
+
+    @staticmethod
+    def row_text(row, name):
+        """
+        Contenu d'une ligne lue avec with_content
+
+        Args:
+            row: Ligne de résultat
+            name: Nom du contenu
+
+        Returns:
+            str: Contenu (stocké dans la ligne ou référencé)
+        """
+        mapping = row._mapping
+        digest = mapping[f'{name}_blob']
+        if not digest:
+            return mapping[name]
+        return blob_store.resolve(digest, mapping[f'{name}_blob_data'], mapping[f'{name}_blob_cold'])
+
+    @staticmethod
+    def references(values, keys=(('html_content', 'html_blob'), ('css_content', 'css_blob'))):
+        """
+        Remplacer les grands contenus d'une ligne par leur empreinte (sans
+        ajouter de référence)
+
+        Args:
+            values: Dictionnaire de colonnes (modifié)
+            keys: Couples (colonne du contenu, colonne de l'empreinte)
+
+        Returns:
+            list: (empreinte, contenu) à passer à acquire()
+        """
+        acquired = []
+        for content_key, reference_key in keys:
+            text = values.get(content_key)
+            if blob_store.should_store(text):
+                digest = blob_store.digest(text)
+                values[content_key] = ''
+                values[reference_key] = digest
+                acquired.append((digest, text))
+            else:
+                values[reference_key] = None
+        return acquired
+
+    @staticmethod
+    def store_values(rows, connection=None):
+        """
+        Préparer des lignes insérées en masse (db.insert): grands contenus
+        remplacés par leur empreinte, références ajoutées
+
+        Args:
+            rows: Dictionnaires de colonnes html_content / css_content (modifiés)
+            connection: Connexion (défaut: celle de la session)
+
+        Returns:
+            list: Les mêmes lignes
+        """
+        connection = connection or db.session.connection()
+        for values in rows:
+            for digest, text in ContentBlob.references(values):
+                ContentBlob.acquire(digest, text, connection)
+        return rows
+
+
+def store_content(connection, target, externalize=True):
+    """
+    Tenir les références d'un template ou d'une version avant son écriture
+    (événements before_insert / before_update)
+
+    Un contenu modifié assez grand est remplacé dans la ligne par son
+    empreinte (référence ajoutée); les références remplacées sont retirées.
+    Les colonnes non modifiées ne sont pas lues.
+
+    Args:
+        connection: Connexion du flush
+        target: Instance (attributs _html_stored/_css_stored, html_blob/css_blob)
+        externalize: Stocker par empreinte (False: contenu gardé dans la ligne)
+    """
+    state = db.inspect(target)
+    released = []
+
+    for stored, reference in (('_html_stored', 'html_blob'), ('_css_stored', 'css_blob')):
+        released.extend(digest for digest in state.attrs[reference].history.deleted if digest)
+
+        if not externalize or not state.attrs[stored].history.added:
+            continue
+
+        text = getattr(target, stored)
+        if getattr(target, reference) is None and blob_store.should_store(text):
+            digest = blob_store.digest(text)
+            ContentBlob.acquire(digest, text, connection)
+            setattr(target, stored, '')
+            setattr(target, reference, digest)
+
+    ContentBlob.release(released, connection)
@@ -7,7 +7,14 @@ Modèle EmailTemplate - Gestion des modèles d'emails
 """
 
 from datetime import datetime
+from sqlalchemy import event
 from app import db
+from app.models.content_blob import ContentBlob, store_content
+from app.utils.blob_store import blob_store
+from app.utils.compressed_text import CompressedText
+from app.utils.preview_cache import preview_cache, PreviewCache
+from app.utils.css_inliner import inline_css
+from app.utils.fieldsets import wants_any
 
 
 class EmailTemplate(db.Model):
@@ -20,11 +27,18 @@ class EmailTemplate(db.Model):
     user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), nullable=False, index=True)
     nom = db.Column(db.String(255), nullable=False, index=True)
     sujet = db.Column(db.String(500), nullable=False)
-    html_content = db.Column(db.Text, nullable=False)
-    css_content = db.Column(db.Text, nullable=True)
+    # Contenus stockés compressés (LONGBLOB), ou vides si stockés par empreinte
+    # (html_blob / css_blob, voir ContentBlob): lus et écrits par html_content / css_content
+    _html_stored = db.Column('html_content', CompressedText, nullable=False)
+    _css_stored = db.Column('css_content', CompressedText, nullable=True)
+    html_blob = db.Column(db.String(64), nullable=True)
+    css_blob = db.Column(db.String(64), nullable=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False, index=True)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False, index=True)
     is_active = db.Column(db.Boolean, default=True, nullable=False, index=True)
+    # Dernier numéro de version attribué (voir TemplateVersion.allocate_version_number);
+    # la version initiale est créée avec le template
+    version_counter = db.Column(db.Integer, default=1, nullable=False)
 
     # Relations
     versions = db.relationship('TemplateVersion', backref='template', lazy='dynamic', cascade='all, delete-orphan')
@@ -36,8 +50,44 @@ class EmailTemplate(db.Model):
     __table_args__ = (
         db.Index('idx_user_active_templates', 'user_id', 'is_active', 'updated_at'),
         db.Index('idx_template_search', 'user_id', 'is_active', 'nom', 'sujet'),
+        # Recomptage des références (BlobService.recount)
+        db.Index('idx_template_html_blob', 'html_blob'),
+        db.Index('idx_template_css_blob', 'css_blob'),
     )
 
+    # Champs projetables (?fields= / ?include=) et leur coût
+    FIELDS = {
+        'id': 'colonne',
+        'user_id': 'colonne',
+        'nom': 'colonne',
+        'sujet': 'colonne',
+        'is_active': 'colonne',
+        'created_at': 'colonne',
+        'updated_at': 'colonne',
+        'html_content': 'colonne compressée ou contenu par empreinte (non lu si absent de la sélection)',
+        'css_content': 'colonne compressée ou contenu par empreinte (non lu si absent de la sélection)',
+        'full_html': 'html_content + css_content, rendu mis en cache par contenu',
+        'version_count': '1 COUNT (1 COUNT groupé pour toute une liste)',
+        'metadata': 'jointure template_metadata (même requête)',
+        'category': 'jointure template_metadata (même requête)',
+        'tags': 'jointure template_metadata (même requête)',
+        'favorite': 'jointure template_metadata (même requête)',
+        'usage_count': 'jointure template_metadata (même requête)',
+        'owner': 'jointure users (même requête)',
+        'versions': '1 requête par template (10 dernières versions, sans contenu)'
+    }
+
+    # Sélections par défaut quand seul ?include= est fourni
+    DETAIL_FIELDS = (
+        'id', 'user_id', 'nom', 'sujet', 'is_active', 'created_at', 'updated_at', 'version_count',
+        'html_content', 'css_content', 'full_html', 'metadata', 'owner'
+    )
+    SUMMARY_FIELDS = (
+        'id', 'nom', 'sujet', 'updated_at', 'version_count', 'category', 'tags', 'favorite', 'usage_count'
+    )
+
+    METADATA_FIELDS = ('metadata', 'category', 'tags', 'favorite', 'usage_count')
+
     def __init__(self, user_id, nom, sujet, html_content, css_content=''):
         """
         Initialiser un template
@@ -55,6 +105,33 @@ class EmailTemplate(db.Model):
         self.html_content = html_content
         self.css_content = css_content or ''
 
+    @property
+    def html_content(self):
+        """Contenu HTML (lu dans la ligne ou par empreinte)"""
+        return ContentBlob.resolve(self._html_stored, self.html_blob)
+
+    @html_content.setter
+    def html_content(self, value):
+        if not self._same_blob(self.html_blob, value):
+            self._html_stored = value
+            self.html_blob = None
+
+    @property
+    def css_content(self):
+        """Contenu CSS (lu dans la ligne ou par empreinte)"""
+        return ContentBlob.resolve(self._css_stored, self.css_blob)
+
+    @css_content.setter
+    def css_content(self, value):
+        if not self._same_blob(self.css_blob, value):
+            self._css_stored = value
+            self.css_blob = None
+
+    @staticmethod
+    def _same_blob(digest, value):
+        """Contenu identique au contenu référencé (rien à réécrire)"""
+        return digest is not None and blob_store.should_store(value) and blob_store.digest(value) == digest
+
     def update_content(self, html_content=None, css_content=None):
         """
         Mettre à jour le contenu
@@ -97,34 +174,97 @@ class EmailTemplate(db.Model):
         Returns:
             int: Nombre de versions
         """
+        # Valeur préchargée pour les listes (voir preload_version_counts)
+        count = self.__dict__.get('_version_count')
+        if count is not None:
+            return count
+
         return self.versions.count()
 
-    def get_full_html(self):
+    def preview_hash(self):
         """
-        Obtenir le HTML complet avec CSS inline
+        Hash du contenu de l'aperçu (clé de cache et ETag)
+
+        Returns:
+            str: SHA-256 de (version du rendu, sujet, html, css)
+        """
+        return PreviewCache.content_hash(self.sujet, self.html_content, self.css_content)
+
+    def get_full_html(self, content_hash=None):
+        """
+        Obtenir le HTML complet avec CSS inline (mis en cache par contenu)
+
+        Args:
+            content_hash: Hash déjà calculé (optionnel)
+
+        Returns:
+            str: HTML avec CSS
+        """
+        return preview_cache.get_or_render(content_hash or self.preview_hash(), self._render_full_html)
+
+    def _render_full_html(self):
+        """Construire le HTML complet (sans cache)"""
+        return EmailTemplate.build_full_html(self.sujet, self.html_content, self.css_content)
+
+    @staticmethod
+    def build_full_html(title, html_content, css_content):
+        """
+        Document HTML complet: titre, CSS mis en ligne et corps
+
+        Le CSS est recopié dans les attributs style des éléments (les clients
+        mail ignorent souvent <style>); seuls @media, @font-face et les
+        sélecteurs non reportables restent dans <style>.
+
+        Args:
+            title: Contenu de <title>
+            html_content: Contenu HTML
+            css_content: Contenu CSS (sans CSS, le HTML est renvoyé tel quel)
 
         Returns:
             str: HTML avec CSS
         """
-        if self.css_content:
-            return f"""
+        if css_content:
+            body, css_content = inline_css(EmailTemplate.wrap_body(html_content), css_content)
+            return EmailTemplate.build_document(title, body, css_content)
+        else:
+            return html_content
+
+    @staticmethod
+    def wrap_body(html_content):
+        """Balise <body> du document autour du contenu (cible des règles 'body')"""
+        return f"""<body>
+    {html_content}
+</body>"""
+
+    @staticmethod
+    def build_document(title, body, css_content):
+        """
+        Document HTML autour d'un <body> déjà construit (CSS déjà mis en ligne)
+
+        Args:
+            title: Contenu de <title>
+            body: Élément <body> complet (wrap_body)
+            css_content: CSS restant pour <style> (peut être vide)
+
+        Returns:
+            str: HTML complet
+        """
+        style = f"""
+    <style>
+        {css_content}
+    </style>""" if css_content else ''
+
+        return f"""
 <!DOCTYPE html>
 <html lang="fr">
 <head>
     <meta charset="UTF-8">
     <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>{self.sujet}</title>
-    <style>
-        {self.css_content}
-    </style>
+    <title>{title}</title>{style}
 </head>
-<body>
-    {self.html_content}
-</body>
+{body}
 </html>
             """.strip()
-        else:
-            return self.html_content
 
     def duplicate(self, new_name=None):
         """
@@ -185,6 +325,62 @@ class EmailTemplate(db.Model):
 
         return data
 
+    def to_fields_dict(self, fields):
+        """
+        Convertir en dictionnaire limité aux champs demandés
+
+        Seuls les champs de la sélection sont lus: aucune requête pour le
+        propriétaire, les métadonnées ou les versions s'ils sont absents.
+
+        Args:
+            fields: Sélection (voir FIELDS et parse_fieldset)
+
+        Returns:
+            dict: Représentation JSON partielle
+        """
+        data = {}
+
+        for name in ('id', 'user_id', 'nom', 'sujet', 'is_active'):
+            if name in fields:
+                data[name] = getattr(self, name)
+
+        for name in ('created_at', 'updated_at'):
+            if name in fields:
+                value = getattr(self, name)
+                data[name] = value.isoformat() if value else None
+
+        if 'html_content' in fields:
+            data['html_content'] = self.html_content
+        if 'css_content' in fields:
+            data['css_content'] = self.css_content or ''
+        if 'full_html' in fields:
+            data['full_html'] = self.get_full_html()
+
+        if 'version_count' in fields:
+            data['version_count'] = self.get_version_count()
+
+        if wants_any(fields, *self.METADATA_FIELDS):
+            metadata = self.template_metadata
+
+            if 'metadata' in fields:
+                data['metadata'] = metadata.to_dict() if metadata else None
+            for name in ('category', 'tags', 'favorite', 'usage_count'):
+                if name in fields:
+                    data[name] = getattr(metadata, name) if metadata else None
+
+        if 'owner' in fields:
+            data['owner'] = self.owner.to_public_dict() if self.owner else None
+
+        if 'versions' in fields:
+            from app.models.template_version import TemplateVersion
+
+            versions = self.versions.options(
+                *TemplateVersion.field_options(TemplateVersion.SUMMARY_FIELDS)
+            ).order_by(db.desc('version_number')).limit(10)
+            data['versions'] = [v.to_fields_dict(TemplateVersion.SUMMARY_FIELDS) for v in versions]
+
+        return data
+
     def to_summary_dict(self):
         """
         Représentation résumée (pour les listes)
@@ -225,6 +421,114 @@ class EmailTemplate(db.Model):
         """
         return EmailTemplate.query.get(template_id)
 
+    @staticmethod
+    def with_summary_options(query):
+        """
+        Options de chargement pour les listes (to_summary_dict)
+
+        Les métadonnées sont chargées par jointure dans la même requête et
+        le contenu HTML/CSS, inutile dans un résumé, n'est pas lu.
+
+        Args:
+            query: Requête sur EmailTemplate
+
+        Returns:
+            Query: Requête avec options de chargement
+        """
+        return query.options(
+            db.joinedload(EmailTemplate.template_metadata),
+            db.defer(EmailTemplate._html_stored),
+            db.defer(EmailTemplate._css_stored)
+        )
+
+    @staticmethod
+    def field_options(fields):
+        """
+        Options de chargement correspondant à une sélection de champs
+
+        Les colonnes TEXT ne sont lues que si demandées, les métadonnées et
+        le propriétaire sont joints dans la même requête seulement s'ils
+        figurent dans la sélection.
+
+        Args:
+            fields: Sélection (voir FIELDS)
+
+        Returns:
+            list: Options à passer à query.options()
+        """
+        options = []
+
+        if not wants_any(fields, 'html_content', 'full_html'):
+            options.append(db.defer(EmailTemplate._html_stored))
+        if not wants_any(fields, 'css_content', 'full_html'):
+            options.append(db.defer(EmailTemplate._css_stored))
+
+        if wants_any(fields, *EmailTemplate.METADATA_FIELDS):
+            options.append(db.joinedload(EmailTemplate.template_metadata))
+        if 'owner' in fields:
+            options.append(db.joinedload(EmailTemplate.owner))
+
+        return options
+
+    @staticmethod
+    def to_fields_list(templates, fields):
+        """
+        Projection d'une page de templates (nombre de requêtes constant)
+
+        Args:
+            templates: Templates chargés avec field_options(fields)
+            fields: Sélection
+
+        Returns:
+            list: Liste de to_fields_dict
+        """
+        if 'version_count' in fields:
+            EmailTemplate.preload_version_counts(templates)
+        return [t.to_fields_dict(fields) for t in templates]
+
+    @staticmethod
+    def preload_version_counts(templates):
+        """
+        Précharger le nombre de versions en une seule requête groupée
+
+        Args:
+            templates: Liste de templates
+
+        Returns:
+            list: Les mêmes templates
+        """
+        from app.models.template_version import TemplateVersion
+
+        ids = [t.id for t in templates]
+        if not ids:
+            return templates
+
+        counts = dict(db.session.query(
+            TemplateVersion.template_id,
+            db.func.count(TemplateVersion.id)
+        ).filter(
+            TemplateVersion.template_id.in_(ids)
+        ).group_by(TemplateVersion.template_id).all())
+
+        for template in templates:
+            template._version_count = counts.get(template.id, 0)
+
+        return templates
+
+    @staticmethod
+    def to_summary_list(templates):
+        """
+        Résumés d'une page de templates (nombre de requêtes constant)
+
+        Args:
+            templates: Templates chargés avec with_summary_options
+
+        Returns:
+            list: Liste de to_summary_dict
+        """
+        EmailTemplate.preload_version_counts(templates)
+        return [t.to_summary_dict() for t in templates]
+
     @staticmethod
     def find_by_user(user_id, include_inactive=False):
         """
@@ -267,10 +571,11 @@ class EmailTemplate(db.Model):
             (EmailTemplate.nom.like(search)) | (EmailTemplate.sujet.like(search))
         ).order_by(db.desc('updated_at'))
 
+        query = EmailTemplate.with_summary_options(query)
         pagination = query.paginate(page=page, per_page=per_page, error_out=False)
 
         return {
-            'templates': [t.to_summary_dict() for t in pagination.items],
+            'templates': EmailTemplate.to_summary_list(pagination.items),
             'total': pagination.total,
             'pages': pagination.pages,
             'page': page
@@ -302,3 +607,52 @@ class EmailTemplate(db.Model):
             'inactive_templates': total - active,
             'last_updated': last_template.updated_at.isoformat() if last_template else None
         }
+
+
+def _previous_value(state, key):
+    """Valeur d'un attribut avant modification (None si non chargé)"""
+    history = state.attrs[key].history
+    if history.deleted:
+        return history.deleted[0]
+    return history.unchanged[0] if history.unchanged else None
+
+
+def _previous_content(state, stored, reference, connection):
+    """Contenu avant modification, dans la ligne ou par empreinte (None si non chargé)"""
+    digest = _previous_value(state, reference)
+    if digest:
+        return ContentBlob.text(digest, connection)
+    return _previous_value(state, stored)
+
+
+@event.listens_for(EmailTemplate, 'before_update')
+def _discard_stale_preview(mapper, connection, target):
+    """Retirer du cache l'aperçu de l'ancien contenu (update_content, restauration, ...)"""
+    state = db.inspect(target)
+    keys = ('sujet', '_html_stored', '_css_stored', 'html_blob', 'css_blob')
+
+    if not any(state.attrs[key].history.has_changes() for key in keys):
+        return
+
+    old_values = [
+        _previous_value(state, 'sujet'),
+        _previous_content(state, '_html_stored', 'html_blob', connection),
+        _previous_content(state, '_css_stored', 'css_blob', connection)
+    ]
+
+    # Contenu HTML non chargé: l'entrée sortira du cache par LRU
+    if old_values[1] is not None:
+        preview_cache.discard(PreviewCache.content_hash(*old_values))
+
+
+@event.listens_for(EmailTemplate, 'before_insert')
+@event.listens_for(EmailTemplate, 'before_update')
+def _store_content(mapper, connection, target):
+    """Stocker par empreinte les grands contenus (après _discard_stale_preview)"""
+    store_content(connection, target)
+
+
+@event.listens_for(EmailTemplate, 'before_delete')
+def _release_content(mapper, connection, target):
+    """Retirer les références du template supprimé"""
+    ContentBlob.release([target.html_blob, target.css_blob], connection)
@@ -13,6 +13,8 @@ from app.models.template_metadata import TemplateMetadata
 from app.models.validation_result import ValidationResult
 from app.models.session import Session
 from app.models.activity_log import ActivityLog
+from app.models.template_search_document import TemplateSearchDocument
+from app.models.content_blob import ContentBlob
 
 __all__ = [
     'User',
@@ -21,5 +23,7 @@ __all__ = [
     'TemplateMetadata',
     'ValidationResult',
     'Session',
-    'ActivityLog'
+    'ActivityLog',
+    'TemplateSearchDocument',
+    'ContentBlob'
 ]
@@ -8,6 +8,8 @@ Modèle Session - Gestion des sessions JWT
 
 from datetime import datetime, timedelta
 from app import db
+from app.utils.auth_cache import auth_cache
+from app.utils.batch_operations import update_in_batches, delete_in_batches
 import hashlib
 
 
@@ -68,6 +70,7 @@ class Session(db.Model):
         self.is_revoked = True
         self.revoked_at = datetime.utcnow()
         db.session.commit()
+        auth_cache.invalidate(self.token_hash)
 
     def to_dict(self):
         """
@@ -137,49 +140,54 @@ class Session(db.Model):
         ).order_by(db.desc('created_at')).all()
 
     @staticmethod
-    def revoke_all_user_sessions(user_id, exclude_token_hash=None):
+    def revoke_all_user_sessions(user_id, exclude_token_hash=None, batch_size=5000):
         """
-        Révoquer toutes les sessions d'un utilisateur
+        Révoquer toutes les sessions d'un utilisateur (UPDATE ensembliste)
 
         Args:
             user_id: ID de l'utilisateur
             exclude_token_hash: Hash de token à exclure (session courante)
+            batch_size: Nombre de sessions par lot
 
         Returns:
             int: Nombre de sessions révoquées
         """
-        query = Session.query.filter_by(user_id=user_id, is_revoked=False)
-        
+        conditions = [Session.user_id == user_id, Session.is_revoked == False]
+
         if exclude_token_hash:
-            query = query.filter(Session.token_hash != exclude_token_hash)
-        
-        sessions = query.all()
-        count = 0
-        
-        for session in sessions:
-            session.revoke()
-            count += 1
-        
+            conditions.append(Session.token_hash != exclude_token_hash)
+
+        count = update_in_batches(
+            Session,
+            {'is_revoked': True, 'revoked_at': datetime.utcnow()},
+            *conditions,
+            batch_size=batch_size
+        )
+
+        # Invalider aussi les access tokens sans état déjà émis
+        # (vide également le cache d'authentification de l'utilisateur)
+        from app.models.user import User
+        User.bump_token_epoch(user_id)
+
         return count
 
     @staticmethod
-    def cleanup_expired():
+    def cleanup_expired(batch_size=5000, progress=None):
         """
-        Nettoyer les sessions expirées
+        Nettoyer les sessions expirées ou révoquées (DELETE par lots)
+
+        Args:
+            batch_size: Nombre de sessions par lot
+            progress: Callback progress(total_supprimé)
 
         Returns:
             int: Nombre de sessions supprimées
         """
         now = datetime.utcnow()
-        expired_sessions = Session.query.filter(
-            (Session.expires_at < now) | (Session.is_revoked == True)
-        ).all()
-        
-        count = len(expired_sessions)
-        
-        for session in expired_sessions:
-            db.session.delete(session)
-        
-        db.session.commit()
-        
-        return count
+
+        return delete_in_batches(
+            Session,
+            (Session.expires_at < now) | (Session.is_revoked == True),
+            batch_size=batch_size,
+            progress=progress
+        )
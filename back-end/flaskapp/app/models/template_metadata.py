@@ -27,6 +27,8 @@ class TemplateMetadata(db.Model):
     favorite = db.Column(db.Boolean, default=False, nullable=False, index=True)
     shared = db.Column(db.Boolean, default=False, nullable=False, index=True)
     shared_with = db.Column(db.JSON, nullable=True)
+    # Règles de rétention propres au template (surchargent VERSION_RETENTION), NULL: politique globale
+    retention_policy = db.Column(db.JSON, nullable=True)
 
     def __init__(self, template_id, category=None, tags=None, usage_count=0,
                  favorite=False, shared=False, shared_with=None):
@@ -130,7 +132,8 @@ class TemplateMetadata(db.Model):
             'last_used': self.last_used.isoformat() if self.last_used else None,
             'favorite': self.favorite,
             'shared': self.shared,
-            'shared_with': self.shared_with or []
+            'shared_with': self.shared_with or [],
+            'retention_policy': self.retention_policy
         }
 
     def __repr__(self):
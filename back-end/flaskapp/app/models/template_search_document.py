@@ -0,0 +1,88 @@
+# ============================================
+# FICHIER: backend/app/models/template_search_document.py
+# Modèle Document de Recherche
+# ============================================
+"""
+Modèle TemplateSearchDocument - Texte indexé pour la recherche plein texte
+
+Une ligne par template: nom, sujet, tags + catégorie et texte du HTML sans
+balises. L'index plein texte dépend de la base:
+    - MySQL  : index FULLTEXT sur les quatre colonnes (filtre) et un par
+               colonne (score pondéré), collation utf8mb4_unicode_ci,
+               insensible aux accents
+    - SQLite : table virtuelle FTS5 à contenu externe, synchronisée par
+               triggers (tokenizer unicode61 remove_diacritics 2)
+"""
+
+from datetime import datetime
+from sqlalchemy import event, DDL
+from app import db
+
+
+class TemplateSearchDocument(db.Model):
+    """Document de recherche d'un template"""
+
+    __tablename__ = 'template_search_documents'
+
+    # Colonnes
+    template_id = db.Column(db.Integer, db.ForeignKey('email_templates.id', ondelete='CASCADE'),
+                            primary_key=True, autoincrement=False)
+    user_id = db.Column(db.Integer, nullable=False)
+    is_active = db.Column(db.Boolean, default=True, nullable=False)
+    nom = db.Column(db.String(255), nullable=False)
+    sujet = db.Column(db.String(500), nullable=False)
+    meta = db.Column(db.Text, nullable=True)
+    body = db.Column(db.Text, nullable=True)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+
+    __table_args__ = (
+        db.Index('idx_search_user_active', 'user_id', 'is_active'),
+    )
+
+    def __repr__(self):
+        """Représentation string"""
+        return f'<TemplateSearchDocument {self.template_id}>'
+
+
+# Index plein texte spécifiques à chaque base (créés avec la table)
+_table = TemplateSearchDocument.__table__
+
+event.listen(_table, 'after_create', DDL(
+    'ALTER TABLE template_search_documents '
+    'ADD FULLTEXT INDEX ft_template_search (nom, sujet, meta, body), '
+    'ADD FULLTEXT INDEX ft_search_nom (nom), '
+    'ADD FULLTEXT INDEX ft_search_sujet (sujet), '
+    'ADD FULLTEXT INDEX ft_search_meta (meta), '
+    'ADD FULLTEXT INDEX ft_search_body (body)'
+).execute_if(dialect='mysql'))
+
+event.listen(_table, 'after_create', DDL(
+    "CREATE VIRTUAL TABLE IF NOT EXISTS template_search_fts USING fts5("
+    "nom, sujet, meta, body, "
+    "content='template_search_documents', content_rowid='template_id', "
+    "tokenize='unicode61 remove_diacritics 2')"
+).execute_if(dialect='sqlite'))
+
+event.listen(_table, 'after_create', DDL(
+    "CREATE TRIGGER IF NOT EXISTS template_search_ai AFTER INSERT ON template_search_documents BEGIN "
+    "INSERT INTO template_search_fts(rowid, nom, sujet, meta, body) "
+    "VALUES (new.template_id, new.nom, new.sujet, new.meta, new.body); END"
+).execute_if(dialect='sqlite'))
+
+event.listen(_table, 'after_create', DDL(
+    "CREATE TRIGGER IF NOT EXISTS template_search_ad AFTER DELETE ON template_search_documents BEGIN "
+    "INSERT INTO template_search_fts(template_search_fts, rowid, nom, sujet, meta, body) "
+    "VALUES ('delete', old.template_id, old.nom, old.sujet, old.meta, old.body); END"
+).execute_if(dialect='sqlite'))
+
+event.listen(_table, 'after_create', DDL(
+    "CREATE TRIGGER IF NOT EXISTS template_search_au AFTER UPDATE ON template_search_documents BEGIN "
+    "INSERT INTO template_search_fts(template_search_fts, rowid, nom, sujet, meta, body) "
+    "VALUES ('delete', old.template_id, old.nom, old.sujet, old.meta, old.body); "
+    "INSERT INTO template_search_fts(rowid, nom, sujet, meta, body) "
+    "VALUES (new.template_id, new.nom, new.sujet, new.meta, new.body); END"
+).execute_if(dialect='sqlite'))
+
+event.listen(_table, 'before_drop', DDL(
+    'DROP TABLE IF EXISTS template_search_fts'
+).execute_if(dialect='sqlite'))
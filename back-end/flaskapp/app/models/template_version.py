@@ -4,10 +4,30 @@
 # ============================================
 """
 Modèle TemplateVersion - Historique des versions
+
+Stockage: une version sur VERSION_SNAPSHOT_INTERVAL au plus est un
+instantané (contenu complet, delta_base_id NULL); les suivantes sont
+stockées en delta JSON de cet instantané (app.utils.version_delta) dans les
+mêmes colonnes. html_content et css_content restent le contenu complet:
+une version delta est reconstruite à la lecture (instantané + delta), et le
+résultat est mis en cache par version.
+
+Le contenu d'un instantané assez grand est stocké par empreinte
+(html_blob / css_blob, voir ContentBlob): une restauration ou un CSS
+inchangé ajoute une référence au lieu d'une copie. Les deltas, petits et
+propres à chaque version, restent dans la ligne.
 """
 
 from datetime import datetime
+from flask import current_app
+from sqlalchemy import event
+from sqlalchemy.exc import IntegrityError
 from app import db
+from app.models.content_blob import ContentBlob, store_content
+from app.models.user import User
+from app.utils.blob_store import blob_store
+from app.utils.compressed_text import CompressedText
+from app.utils.version_delta import encode_delta, apply_delta, version_content_cache
 
 
 class TemplateVersion(db.Model):
@@ -20,9 +40,24 @@ class TemplateVersion(db.Model):
     template_id = db.Column(db.Integer, db.ForeignKey('email_templates.id',
                             ondelete='CASCADE'), nullable=False, index=True)
     version_number = db.Column(db.Integer, nullable=False)
-    html_content = db.Column(db.Text, nullable=False)
-    css_content = db.Column(db.Text, nullable=True)
+    # Contenu stocké: complet pour un instantané, delta JSON sinon (voir html_content),
+    # compressé dans les deux cas (CompressedText)
+    _html_stored = db.Column('html_content', CompressedText, nullable=False)
+    _css_stored = db.Column('css_content', CompressedText, nullable=True)
+    # Empreintes du contenu d'un instantané stocké par empreinte (colonne de contenu vide)
+    html_blob = db.Column(db.String(64), nullable=True)
+    css_blob = db.Column(db.String(64), nullable=True)
+    # Instantané de référence (même template), NULL si la version est un instantané
+    delta_base_id = db.Column(db.Integer, nullable=True)
+    # Taille (octets UTF-8) et SHA-256 du contenu complet: l'historique les
+    # renvoie sans lire le contenu
+    html_size = db.Column(db.Integer, nullable=True)
+    css_size = db.Column(db.Integer, nullable=True)
+    html_hash = db.Column(db.String(64), nullable=True)
+    css_hash = db.Column(db.String(64), nullable=True)
     change_description = db.Column(db.String(500), nullable=True)
+    # Numéro de la version restaurée (point de restauration, voir app.utils.retention)
+    restored_from = db.Column(db.Integer, nullable=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False, index=True)
     created_by = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), nullable=False)
     ip_address = db.Column(db.String(45), nullable=True)
@@ -35,6 +70,44 @@ class TemplateVersion(db.Model):
         db.Index('idx_version_number', 'version_number'),
         db.Index('idx_created_at', 'created_at'),
         db.Index('idx_created_by', 'created_by'),
+        db.Index('idx_delta_base', 'delta_base_id'),
+        # Recomptage des références (BlobService.recount)
+        db.Index('idx_version_html_blob', 'html_blob'),
+        db.Index('idx_version_css_blob', 'css_blob'),
+    )
+
+    # Champs projetables (?fields= / ?include=) et leur coût
+    FIELDS = {
+        'id': 'colonne',
+        'template_id': 'colonne',
+        'version_number': 'colonne',
+        'change_description': 'colonne',
+        'restored_from': 'colonne',
+        'created_at': 'colonne',
+        'created_by': 'colonne',
+        'html_size': 'colonne',
+        'css_size': 'colonne',
+        'html_hash': 'colonne',
+        'css_hash': 'colonne',
+        'html_content': 'colonne compressée (non lue si absente de la sélection, + instantané si delta)',
+        'css_content': 'colonne compressée (non lue si absente de la sélection, + instantané si delta)',
+        'creator': 'jointure users (même requête)'
+    }
+
+    # Sélections par défaut quand seul ?include= est fourni
+    SUMMARY_FIELDS = (
+        'id', 'template_id', 'version_number', 'change_description', 'created_at', 'created_by', 'creator',
+        'html_size', 'css_size', 'html_hash', 'css_hash'
+    )
+    DETAIL_FIELDS = SUMMARY_FIELDS + ('html_content', 'css_content')
+
+    # Tailles et empreintes du contenu complet (voir content_stats)
+    STATS_COLUMNS = ('html_size', 'css_size', 'html_hash', 'css_hash')
+
+    # Champs lus tels quels par history_query (ni contenu, ni objet chargé)
+    HISTORY_COLUMNS = (
+        'id', 'template_id', 'version_number', 'change_description', 'restored_from', 'created_at',
+        'created_by', 'html_size', 'css_size', 'html_hash', 'css_hash'
     )
 
     def __init__(self, template_id, version_number, html_content, css_content='',
@@ -61,6 +134,89 @@ class TemplateVersion(db.Model):
         self.ip_address = ip_address
         self.user_agent = user_agent
 
+    @property
+    def html_content(self):
+        """Contenu HTML complet (reconstruit si la version est stockée en delta)"""
+        return self.get_content()[0]
+
+    @html_content.setter
+    def html_content(self, value):
+        self._set_content(value, self.css_content)
+
+    @property
+    def css_content(self):
+        """Contenu CSS complet (reconstruit si la version est stockée en delta)"""
+        return self.get_content()[1]
+
+    @css_content.setter
+    def css_content(self, value):
+        self._set_content(self.html_content, value)
+
+    def _set_content(self, html_content, css_content):
+        """Stocker un contenu complet (la version devient un instantané)"""
+        self._html_stored = html_content
+        self._css_stored = css_content
+        self.html_blob = None
+        self.css_blob = None
+        self.delta_base_id = None
+        self._content = None
+
+    def get_content(self):
+        """
+        Contenu complet de la version
+
+        Returns:
+            tuple: (html, css)
+        """
+        if self.delta_base_id is None:
+            return (
+                ContentBlob.resolve(self._html_stored, self.html_blob),
+                ContentBlob.resolve(self._css_stored, self.css_blob)
+            )
+
+        content = getattr(self, '_content', None)
+        if content is None:
+            key = (self.id, self.created_at)
+            content = version_content_cache.get(key)
+            if content is None:
+                content = TemplateVersion.decode(
+                    TemplateVersion.load_base(self.delta_base_id), self._html_stored, self._css_stored
+                )
+                version_content_cache.put(key, content)
+            self._content = content
+
+        return content
+
+    def release_dependents(self):
+        """
+        Détacher les versions stockées en delta de cet instantané (avant sa
+        suppression): la plus ancienne devient l'instantané des suivantes
+        """
+        if self.delta_base_id is not None:
+            return
+
+        dependents = TemplateVersion.query.filter_by(
+            delta_base_id=self.id
+        ).order_by(TemplateVersion.version_number).all()
+        if not dependents:
+            return
+
+        base = self.get_content()
+        contents = [
+            TemplateVersion.decode(base, version._html_stored, version._css_stored)
+            for version in dependents
+        ]
+
+        snapshot = dependents[0]
+        snapshot._set_content(*contents[0])
+        db.session.flush()
+
+        for version, (html_content, css_content) in zip(dependents[1:], contents[1:]):
+            version._html_stored = encode_delta(contents[0][0], html_content)
+            version._css_stored = encode_delta(contents[0][1], css_content)
+            version.delta_base_id = snapshot.id
+            version._content = (html_content, css_content)
+
     def to_dict(self, include_content=True):
         """
         Convertir en dictionnaire
@@ -76,6 +232,7 @@ class TemplateVersion(db.Model):
             'template_id': self.template_id,
             'version_number': self.version_number,
             'change_description': self.change_description,
+            'restored_from': self.restored_from,
             'created_at': self.created_at.isoformat() if self.created_at else None,
             'created_by': self.created_by
         }
@@ -93,14 +250,151 @@ class TemplateVersion(db.Model):
 
         return data
 
+    def to_fields_dict(self, fields):
+        """
+        Convertir en dictionnaire limité aux champs demandés
+
+        Args:
+            fields: Sélection (voir FIELDS et parse_fieldset)
+
+        Returns:
+            dict: Représentation JSON partielle
+        """
+        data = {}
+
+        for name in TemplateVersion.HISTORY_COLUMNS:
+            if name in fields and name != 'created_at':
+                data[name] = getattr(self, name)
+
+        if 'created_at' in fields:
+            data['created_at'] = self.created_at.isoformat() if self.created_at else None
+
+        if 'html_content' in fields:
+            data['html_content'] = self.html_content
+        if 'css_content' in fields:
+            data['css_content'] = self.css_content
+
+        if 'creator' in fields:
+            data['creator'] = {
+                'id': self.creator.id,
+                'name': self.creator.get_full_name()
+            } if self.creator else None
+
+        return data
+
     def __repr__(self):
         """Représentation string"""
         return f'<TemplateVersion {self.template_id} v{self.version_number}>'
 
+    @staticmethod
+    def field_options(fields):
+        """
+        Options de chargement correspondant à une sélection de champs
+
+        Args:
+            fields: Sélection (voir FIELDS)
+
+        Returns:
+            list: Options à passer à query.options()
+        """
+        options = []
+
+        # Un delta se reconstruit avec ses deux colonnes: lues ensemble ou pas du tout
+        if 'html_content' not in fields and 'css_content' not in fields:
+            options.append(db.defer(TemplateVersion._html_stored))
+            options.append(db.defer(TemplateVersion._css_stored))
+
+        if 'creator' in fields:
+            options.append(db.joinedload(TemplateVersion.creator))
+
+        return options
+
+    @staticmethod
+    def history_query(template_id, fields):
+        """
+        Historique d'un template en colonnes seulement (aucun contenu ni delta lu)
+
+        Le créateur est joint dans la même requête, réduit à son nom.
+
+        Args:
+            template_id: ID du template
+            fields: Sélection (voir HISTORY_COLUMNS, et 'creator')
+
+        Returns:
+            Query: Requête de lignes (à paginer, puis history_dicts)
+        """
+        columns = [
+            getattr(TemplateVersion, name) for name in TemplateVersion.HISTORY_COLUMNS
+            if name in fields or name in ('id', 'version_number')
+        ]
+        query = db.session.query(*columns).filter(TemplateVersion.template_id == template_id)
+
+        if 'creator' in fields:
+            query = query.outerjoin(User, User.id == TemplateVersion.created_by).add_columns(
+                User.id.label('creator_id'),
+                (User.prenom + ' ' + User.nom).label('creator_name')
+            )
+
+        return query
+
+    @staticmethod
+    def history_dicts(rows, fields):
+        """
+        Convertir des lignes de history_query (mêmes clés que to_fields_dict)
+
+        Les tailles et empreintes absentes (versions antérieures à la
+        migration 9) sont calculées et enregistrées au passage
+        (fill_content_stats).
+
+        Args:
+            rows: Lignes de résultat
+            fields: Sélection
+
+        Returns:
+            list: Représentations JSON partielles
+        """
+        requested = [name for name in TemplateVersion.STATS_COLUMNS if name in fields]
+        missing = [row.id for row in rows if any(getattr(row, name) is None for name in requested)]
+        stats = TemplateVersion.fill_content_stats(missing) if missing else {}
+
+        return [TemplateVersion.history_dict(row, fields, stats.get(row.id)) for row in rows]
+
+    @staticmethod
+    def history_dict(row, fields, stats=None):
+        """
+        Convertir une ligne de history_query (mêmes clés que to_fields_dict)
+
+        Args:
+            row: Ligne de résultat
+            fields: Sélection
+            stats: Tailles et empreintes calculées (remplacent celles de la ligne)
+
+        Returns:
+            dict: Représentation JSON partielle
+        """
+        data = {
+            name: getattr(row, name) for name in TemplateVersion.HISTORY_COLUMNS
+            if name in fields and name != 'created_at'
+        }
+        if stats:
+            data.update((name, value) for name, value in stats.items() if name in fields)
+
+        if 'created_at' in fields:
+            data['created_at'] = row.created_at.isoformat() if row.created_at else None
+
+        if 'creator' in fields:
+            data['creator'] = {
+                'id': row.creator_id,
+                'name': row.creator_name
+            } if row.creator_id is not None else None
+
+        return data
+
     @staticmethod
     def get_next_version_number(template_id):
         """
-        Obtenir le prochain numéro de version
+        Obtenir le prochain numéro de version (sans le réserver, voir
+        allocate_version_number pour créer une version)
 
         Args:
             template_id: ID du template
@@ -108,11 +402,115 @@ class TemplateVersion(db.Model):
         Returns:
             int: Prochain numéro de version
         """
-        last_version = TemplateVersion.query.filter_by(
-            template_id=template_id
-        ).order_by(db.desc('version_number')).first()
+        templates = db.Model.metadata.tables['email_templates']
+        counter = db.session.execute(
+            db.select(templates.c.version_counter).where(templates.c.id == template_id)
+        ).scalar()
+
+        return (counter or 0) + 1
+
+    @staticmethod
+    def allocate_version_number(template_id):
+        """
+        Réserver le prochain numéro de version d'un template
+
+        Le compteur email_templates.version_counter est incrémenté dans la
+        transaction en cours: la ligne du template reste verrouillée jusqu'au
+        commit (ou rollback), deux créations de version concurrentes sur le
+        même template obtiennent donc des numéros différents. Un numéro n'est
+        jamais réattribué, même après suppression de sa version.
+
+        Args:
+            template_id: ID du template
+
+        Returns:
+            int: Numéro réservé
+
+        Raises:
+            ValueError: Si template introuvable
+        """
+        templates = db.Model.metadata.tables['email_templates']
+        allocated = db.session.execute(
+            db.update(templates).where(templates.c.id == template_id).values(
+                version_counter=templates.c.version_counter + 1,
+                # Date de modification inchangée (onupdate de email_templates)
+                updated_at=templates.c.updated_at
+            )
+        ).rowcount
+        if not allocated:
+            raise ValueError('Template non trouvé')
+
+        return db.session.execute(
+            db.select(templates.c.version_counter).where(templates.c.id == template_id)
+        ).scalar()
+
+    @staticmethod
+    def sync_version_counter(template_id):
+        """
+        Recaler le compteur d'un template sur son plus grand numéro de version
+        (versions insérées sans passer par le compteur)
+
+        Args:
+            template_id: ID du template
+        """
+        templates = db.Model.metadata.tables['email_templates']
+        last_number = db.session.execute(
+            db.select(db.func.max(TemplateVersion.version_number)).where(TemplateVersion.template_id == template_id)
+        ).scalar() or 0
 
-        return (last_version.version_number + 1) if last_version else 1
+        db.session.execute(
+            db.update(templates).where(
+                templates.c.id == template_id,
+                templates.c.version_counter < last_number
+            ).values(version_counter=last_number, updated_at=templates.c.updated_at)
+        )
+        db.session.commit()
+
+    @staticmethod
+    def is_number_conflict(error):
+        """
+        Erreur d'intégrité due à un numéro de version déjà pris
+
+        Args:
+            error: IntegrityError
+
+        Returns:
+            bool: True si contrainte unique_template_version (MySQL ou SQLite)
+        """
+        message = str(error.orig) if getattr(error, 'orig', None) is not None else str(error)
+        return 'unique_template_version' in message or 'template_versions.version_number' in message
+
+    @staticmethod
+    def retrying(template_id, operation):
+        """
+        Exécuter une opération qui crée une version, relancée si son numéro
+        est déjà pris (compteur en retard: versions insérées par ailleurs)
+
+        Args:
+            template_id: ID du template
+            operation: Fonction sans argument (charge, modifie et valide)
+
+        Returns:
+            Résultat de l'opération
+
+        Raises:
+            ValueError: Si le conflit persiste après VERSION_NUMBER_RETRIES essais
+        """
+        attempts = max(1, current_app.config.get('VERSION_NUMBER_RETRIES', 3))
+
+        for attempt in range(1, attempts + 1):
+            try:
+                return operation()
+            except IntegrityError as e:
+                db.session.rollback()
+                if attempt == attempts or not TemplateVersion.is_number_conflict(e):
+                    current_app.logger.error(f'❌ Erreur sauvegarde version (template {template_id}): {str(e)}')
+                    raise ValueError(f'Erreur sauvegarde: {str(e)}')
+
+                current_app.logger.warning(
+                    f'Numéro de version déjà pris (template {template_id}), essai {attempt + 1}/{attempts}'
+                )
+                TemplateVersion.sync_version_counter(template_id)
 
     @staticmethod
     def get_template_versions(template_id, limit=None):
@@ -151,3 +549,272 @@ class TemplateVersion(db.Model):
             template_id=template_id,
             version_number=version_number
         ).first()
+
+    @staticmethod
+    def content_query(*columns):
+        """
+        Requête des colonnes nécessaires à decode_rows (sans chargement ORM)
+
+        Les contenus stockés par empreinte sont lus par jointure dans la même
+        requête (historique lu en flux: aucune requête de plus).
+
+        Args:
+            columns: Colonnes supplémentaires
+
+        Returns:
+            Select: id, created_at, delta_base_id, colonnes demandées, puis
+            html_content et css_content stockés (voir ContentBlob.with_content)
+        """
+        query = db.select(
+            TemplateVersion.id,
+            TemplateVersion.created_at,
+            TemplateVersion.delta_base_id,
+            *columns
+        )
+        query = ContentBlob.with_content(
+            query, TemplateVersion._html_stored, TemplateVersion.html_blob, 'html_content'
+        )
+        return ContentBlob.with_content(
+            query, TemplateVersion._css_stored, TemplateVersion.css_blob, 'css_content'
+        )
+
+    @staticmethod
+    def decode_rows(rows):
+        """
+        Contenus complets de lignes lues avec content_query()
+
+        Les instantanés présents dans les lignes servent directement aux
+        deltas qui en dépendent (export d'un historique complet: aucune
+        requête supplémentaire).
+
+        Args:
+            rows: Lignes lues avec content_query()
+
+        Returns:
+            list: (html, css) dans l'ordre des lignes
+        """
+        snapshots = {
+            row.id: (ContentBlob.row_text(row, 'html_content'), ContentBlob.row_text(row, 'css_content'))
+            for row in rows if row.delta_base_id is None
+        }
+
+        contents = []
+        for row in rows:
+            if row.delta_base_id is None:
+                contents.append(snapshots[row.id])
+            elif row.delta_base_id in snapshots:
+                contents.append(TemplateVersion.decode(
+                    snapshots[row.delta_base_id], row.html_content, row.css_content
+                ))
+            else:
+                key = (row.id, row.created_at)
+                content = version_content_cache.get(key)
+                if content is None:
+                    content = TemplateVersion.decode(
+                        TemplateVersion.load_base(row.delta_base_id), row.html_content, row.css_content
+                    )
+                    version_content_cache.put(key, content)
+                contents.append(content)
+
+        return contents
+
+    @staticmethod
+    def load_content(template_id, version_number):
+        """
+        Contenu complet d'une version sans charger l'objet
+
+        Args:
+            template_id: ID du template
+            version_number: Numéro de version
+
+        Returns:
+            tuple: (html, css), ou None si version introuvable
+        """
+        row = db.session.execute(
+            TemplateVersion.content_query().where(
+                TemplateVersion.template_id == template_id,
+                TemplateVersion.version_number == version_number
+            )
+        ).first()
+
+        return TemplateVersion.decode_rows([row])[0] if row else None
+
+    @staticmethod
+    def load_base(snapshot_id, connection=None):
+        """
+        Contenu d'un instantané (mis en cache: il sert à toutes ses versions delta)
+
+        Args:
+            snapshot_id: ID de l'instantané
+            connection: Connexion à utiliser (événements de flush), défaut: session
+
+        Returns:
+            tuple: (html, css)
+
+        Raises:
+            ValueError: Si instantané introuvable
+        """
+        execute = connection.execute if connection is not None else db.session.execute
+
+        created_at = execute(
+            db.select(TemplateVersion.created_at).where(TemplateVersion.id == snapshot_id)
+        ).scalar()
+        if created_at is None:
+            raise ValueError(f'Instantané de version {snapshot_id} introuvable')
+
+        key = (snapshot_id, created_at)
+        content = version_content_cache.get(key)
+        if content is None:
+            row = execute(
+                db.select(
+                    TemplateVersion._html_stored, TemplateVersion._css_stored,
+                    TemplateVersion.html_blob, TemplateVersion.css_blob
+                ).where(TemplateVersion.id == snapshot_id)
+            ).first()
+            content = (
+                ContentBlob.resolve(row[0], row[2], connection),
+                ContentBlob.resolve(row[1], row[3], connection)
+            )
+            version_content_cache.put(key, content)
+
+        return content
+
+    @staticmethod
+    def decode(base, html_delta, css_delta):
+        """
+        Reconstruire un contenu à partir de son instantané
+
+        Args:
+            base: (html, css) de l'instantané
+            html_delta: Delta HTML stocké
+            css_delta: Delta CSS stocké
+
+        Returns:
+            tuple: (html, css)
+        """
+        return apply_delta(base[0], html_delta), apply_delta(base[1], css_delta)
+
+    @staticmethod
+    def encode(base, html_content, css_content):
+        """
+        Deltas d'un contenu par rapport à un instantané, s'ils sont rentables
+
+        Args:
+            base: (html, css) de l'instantané
+            html_content: HTML complet
+            css_content: CSS complet
+
+        Returns:
+            tuple: (delta HTML, delta CSS), ou None si plus gros que
+            VERSION_DELTA_MAX_RATIO du contenu
+        """
+        html_delta = encode_delta(base[0], html_content)
+        css_delta = encode_delta(base[1], css_content)
+
+        full_size = len(html_content or '') + len(css_content or '')
+        if len(html_delta) + len(css_delta) > current_app.config.get('VERSION_DELTA_MAX_RATIO', 0.5) * full_size:
+            return None
+        return html_delta, css_delta
+
+    @staticmethod
+    def fill_content_stats(version_ids):
+        """
+        Calculer et enregistrer les tailles et empreintes de versions qui
+        n'en ont pas (créées avant la migration 9), sans réécrire leur
+        stockage (ni delta, ni référence de contenu)
+
+        Args:
+            version_ids: IDs des versions
+
+        Returns:
+            dict: {id: content_stats}
+        """
+        rows = db.session.execute(
+            TemplateVersion.content_query().where(TemplateVersion.id.in_(version_ids))
+        ).all()
+        stats = {
+            row.id: TemplateVersion.content_stats(*content)
+            for row, content in zip(rows, TemplateVersion.decode_rows(rows))
+        }
+
+        if stats:
+            table = TemplateVersion.__table__
+            db.session.execute(
+                db.update(table).where(table.c.id == db.bindparam('version_id')).values(
+                    {name: db.bindparam(name) for name in TemplateVersion.STATS_COLUMNS}
+                ),
+                [dict(values, version_id=version_id) for version_id, values in stats.items()]
+            )
+            db.session.commit()
+
+        return stats
+
+    @staticmethod
+    def content_stats(html_content, css_content):
+        """
+        Tailles (octets UTF-8) et empreintes SHA-256 d'un contenu complet
+
+        L'empreinte est celle de ContentBlob: un instantané stocké par
+        empreinte a html_hash == html_blob.
+
+        Returns:
+            dict: html_size, css_size, html_hash, css_hash
+        """
+        html_content, css_content = html_content or '', css_content or ''
+        return {
+            'html_size': len(html_content.encode('utf-8')),
+            'css_size': len(css_content.encode('utf-8')),
+            'html_hash': blob_store.digest(html_content),
+            'css_hash': blob_store.digest(css_content)
+        }
+
+
+@event.listens_for(TemplateVersion, 'before_insert')
+def _pack_version(mapper, connection, target):
+    """Stocker une nouvelle version en delta du dernier instantané du template"""
+    html_content, css_content = target._html_stored, target._css_stored
+    for name, value in TemplateVersion.content_stats(html_content, css_content).items():
+        setattr(target, name, value)
+
+    config = current_app.config
+    if not config.get('VERSION_DELTA_ENABLED', True):
+        return
+
+    snapshot_id = connection.execute(
+        db.select(TemplateVersion.id).where(
+            TemplateVersion.template_id == target.template_id,
+            TemplateVersion.delta_base_id.is_(None)
+        ).order_by(TemplateVersion.version_number.desc()).limit(1)
+    ).scalar()
+    if snapshot_id is None:
+        return
+
+    # Instantané complet (lui compris): la nouvelle version en sera un
+    dependents = connection.execute(
+        db.select(db.func.count(TemplateVersion.id)).where(TemplateVersion.delta_base_id == snapshot_id)
+    ).scalar()
+    if dependents + 2 > config.get('VERSION_SNAPSHOT_INTERVAL', 20):
+        return
+
+    packed = TemplateVersion.encode(
+        TemplateVersion.load_base(snapshot_id, connection), html_content, css_content
+    )
+    if packed is None:
+        return
+
+    target._html_stored, target._css_stored = packed
+    target.delta_base_id = snapshot_id
+    target._content = (html_content, css_content)
+
+
+@event.listens_for(TemplateVersion, 'before_insert')
+@event.listens_for(TemplateVersion, 'before_update')
+def _store_content(mapper, connection, target):
+    """Stocker par empreinte le contenu d'un instantané (après _pack_version)"""
+    store_content(connection, target, externalize=target.delta_base_id is None)
+
+
+@event.listens_for(TemplateVersion, 'before_delete')
+def _release_content(mapper, connection, target):
+    """Retirer les références de la version supprimée"""
+    ContentBlob.release([target.html_blob, target.css_blob], connection)
@@ -7,8 +7,10 @@ Modèle User - Gestion des utilisateurs de la plateforme
 """
 
 from datetime import datetime
-from werkzeug.security import generate_password_hash, check_password_hash
 from app import db
+from app.utils.auth_cache import auth_cache
+from app.utils.password_hasher import password_hasher
+from app.utils.pagination import keyset_paginate
 
 
 class User(db.Model):
@@ -26,6 +28,7 @@ class User(db.Model):
     last_login = db.Column(db.DateTime, nullable=True)
     is_active = db.Column(db.Boolean, default=True, nullable=False, index=True)
     role = db.Column(db.Enum('user', 'admin', name='user_roles'), default='user', nullable=False)
+    token_epoch = db.Column(db.Integer, default=0, nullable=False)  # Révocation des access tokens sans état
 
     # Relations
     email_templates = db.relationship('EmailTemplate', backref='owner', lazy='dynamic', cascade='all, delete-orphan')
@@ -33,32 +36,55 @@ class User(db.Model):
     activity_logs = db.relationship('ActivityLog', backref='user', lazy='dynamic')
     created_versions = db.relationship('TemplateVersion', backref='creator', lazy='dynamic')
 
+    # Champs projetables (?fields= / ?include=) et leur coût
+    FIELDS = {
+        'id': 'colonne',
+        'email': 'colonne',
+        'nom': 'colonne',
+        'prenom': 'colonne',
+        'full_name': 'calculé (nom + prénom)',
+        'role': 'colonne',
+        'is_active': 'colonne',
+        'created_at': 'colonne',
+        'last_login': 'colonne',
+        'stats': '4 COUNT (templates, templates actifs, sessions, sessions actives)'
+    }
+
+    # Sélections par défaut quand seul ?include= est fourni
+    SUMMARY_FIELDS = (
+        'id', 'email', 'nom', 'prenom', 'full_name', 'role', 'is_active', 'created_at', 'last_login'
+    )
+    DETAIL_FIELDS = SUMMARY_FIELDS + ('stats',)
+
     def __init__(self, email, password, nom, prenom, role='user'):
         """
         Initialiser un utilisateur
 
         Args:
             email: Email unique de l'utilisateur
-            password: Mot de passe en clair (sera hashé en production)
+            password: Mot de passe en clair (hashé via password_hasher)
             nom: Nom de famille
             prenom: Prénom
             role: Rôle (user ou admin)
         """
         self.email = email.lower().strip()
-        self.password = password  # En dev/test, stocker en clair
-        # En production, utiliser: self.set_password(password)
+        self.set_password(password)
         self.nom = nom.strip()
         self.prenom = prenom.strip()
         self.role = role
+        self.token_epoch = 0
 
     def set_password(self, password):
         """
-        Hasher le mot de passe (pour production)
+        Hasher le mot de passe (pool borné, voir PASSWORD_HASH_METHOD)
 
         Args:
             password: Mot de passe en clair
+
+        Raises:
+            PasswordHasherBusy: Si le pool de hachage est saturé
         """
-        self.password = generate_password_hash(password)
+        self.password = password_hasher.hash(password)
 
     def check_password(self, password):
         """
@@ -69,12 +95,21 @@ class User(db.Model):
 
         Returns:
             bool: True si le mot de passe est correct
+
+        Raises:
+            PasswordHasherBusy: Si le pool de hachage est saturé
         """
-        # En dev/test avec mots de passe en clair
-        return self.password == password
+        # Accepte aussi les anciens mots de passe stockés en clair
+        return password_hasher.verify(self.password, password)
 
-        # En production avec hash
-        # return check_password_hash(self.password, password)
+    def password_needs_rehash(self):
+        """
+        Vérifier si le hash stocké utilise des paramètres périmés
+
+        Returns:
+            bool: True si en clair ou KDF différente de la configuration
+        """
+        return password_hasher.needs_rehash(self.password)
 
     def update_last_login(self):
         """Mettre à jour la date de dernière connexion"""
@@ -85,12 +120,24 @@ class User(db.Model):
         """Désactiver le compte utilisateur"""
         self.is_active = False
         db.session.commit()
+        auth_cache.invalidate_user(self.id)
 
     def activate(self):
         """Activer le compte utilisateur"""
         self.is_active = True
         db.session.commit()
 
+    def change_role(self, new_role):
+        """
+        Changer le rôle de l'utilisateur
+
+        Args:
+            new_role: Nouveau rôle (user ou admin)
+        """
+        self.role = new_role
+        db.session.commit()
+        auth_cache.invalidate_user(self.id)
+
     def is_admin(self):
         """
         Vérifier si l'utilisateur est administrateur
@@ -141,12 +188,50 @@ class User(db.Model):
         }
 
         if include_stats:
-            data['stats'] = {
-                'total_templates': self.email_templates.count(),
-                'active_templates': self.get_active_templates_count(),
-                'total_sessions': self.sessions.count(),
-                'active_sessions': self.sessions.filter_by(is_revoked=False).count()
-            }
+            data['stats'] = self.get_stats()
+
+        return data
+
+    def get_stats(self):
+        """
+        Statistiques de l'utilisateur (4 requêtes COUNT)
+
+        Returns:
+            dict: Templates et sessions, totaux et actifs
+        """
+        return {
+            'total_templates': self.email_templates.count(),
+            'active_templates': self.get_active_templates_count(),
+            'total_sessions': self.sessions.count(),
+            'active_sessions': self.sessions.filter_by(is_revoked=False).count()
+        }
+
+    def to_fields_dict(self, fields):
+        """
+        Convertir en dictionnaire limité aux champs demandés
+
+        Args:
+            fields: Sélection (voir FIELDS et parse_fieldset)
+
+        Returns:
+            dict: Représentation JSON partielle
+        """
+        data = {}
+
+        for name in ('id', 'email', 'nom', 'prenom', 'role', 'is_active'):
+            if name in fields:
+                data[name] = getattr(self, name)
+
+        if 'full_name' in fields:
+            data['full_name'] = self.get_full_name()
+
+        for name in ('created_at', 'last_login'):
+            if name in fields:
+                value = getattr(self, name)
+                data[name] = value.isoformat() if value else None
+
+        if 'stats' in fields:
+            data['stats'] = self.get_stats()
 
         return data
 
@@ -167,6 +252,22 @@ class User(db.Model):
         """Représentation string"""
         return f'<User {self.email}>'
 
+    @staticmethod
+    def to_list(users, fields=None):
+        """
+        Sérialiser une liste d'utilisateurs
+
+        Args:
+            users: Utilisateurs
+            fields: Sélection de champs (None: to_dict)
+
+        Returns:
+            list: Représentations JSON
+        """
+        if fields is None:
+            return [u.to_dict() for u in users]
+        return [u.to_fields_dict(fields) for u in users]
+
     @staticmethod
     def find_by_email(email):
         """
@@ -193,6 +294,21 @@ class User(db.Model):
         """
         return User.query.get(user_id)
 
+    @staticmethod
+    def bump_token_epoch(user_id):
+        """
+        Incrémenter l'époque des tokens (invalide tous les access tokens émis)
+
+        Args:
+            user_id: ID de l'utilisateur
+        """
+        User.query.filter_by(id=user_id).update(
+            {User.token_epoch: User.token_epoch + 1},
+            synchronize_session=False
+        )
+        db.session.commit()
+        auth_cache.invalidate_user(user_id)
+
     @staticmethod
     def get_all_active():
         """
@@ -204,14 +320,17 @@ class User(db.Model):
         return User.query.filter_by(is_active=True).all()
 
     @staticmethod
-    def search(query, page=1, per_page=20):
+    def search(query, page=1, per_page=20, cursor=None, count=None, fields=None):
         """
         Rechercher des utilisateurs
 
         Args:
             query: Terme de recherche
-            page: Numéro de page
+            page: Numéro de page (mode compatibilité, sans curseur)
             per_page: Éléments par page
+            cursor: Curseur sur (created_at, id) ('' pour la première page)
+            count: Comptage en mode curseur ('none', 'estimate', 'exact')
+            fields: Sélection de champs (None: to_dict)
 
         Returns:
             dict: Résultats paginés
@@ -224,12 +343,18 @@ class User(db.Model):
                 User.nom.like(search_term),
                 User.prenom.like(search_term)
             )
-        ).order_by(User.created_at.desc())
+        )
+
+        if cursor is not None:
+            result = keyset_paginate(users_query, [User.created_at, User.id], cursor, per_page, count)
+            return result.to_dict('users', User.to_list(result.items, fields))
+
+        users_query = users_query.order_by(User.created_at.desc())
 
         pagination = users_query.paginate(page=page, per_page=per_page, error_out=False)
 
         return {
-            'users': [u.to_dict() for u in pagination.items],
+            'users': User.to_list(pagination.items, fields),
             'total': pagination.total,
             'pages': pagination.pages,
             'page': page
@@ -6,11 +6,26 @@
 Routes admin - Gestion des utilisateurs et supervision
 """
 
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, current_app
 from app.services.user_service import UserService
+from app.services.version_storage_service import VersionStorageService
+from app.services.blob_service import BlobService
+from app.services.version_retention_service import VersionRetentionService
 from app.models.activity_log import ActivityLog
 from app.models.session import Session
+from app.models.user import User
 from app.utils.decorators import token_required, admin_required, get_request_info
+from app.utils.activity_writer import activity_writer
+from app.utils.version_compactor import version_compactor
+from app.utils.password_hasher import password_hasher
+from app.utils.preview_cache import preview_cache
+from app.utils.render_cache import render_cache
+from app.utils.css_inliner import stylesheet_cache
+from app.utils.diff_cache import diff_cache
+from app.utils.version_delta import version_content_cache
+from app.utils.blob_store import blob_store
+from app.utils.compression import response_compressor
+from app.utils.fieldsets import request_fieldset
 
 admin_bp = Blueprint('admin', __name__, url_prefix='/api/admin')
 
@@ -29,9 +44,14 @@ def get_all_users(current_user):
         page: Numéro de page (défaut: 1)
         per_page: Éléments par page (défaut: 20)
         include_inactive: Inclure les inactifs (défaut: false)
+        cursor: Curseur de pagination ('' pour la première page, active le mode curseur)
+        count: Comptage en mode curseur (none, estimate, exact)
+        fields: Champs à renvoyer (voir User.FIELDS)
+        include: Champs ajoutés, ex: stats (4 COUNT par utilisateur)
 
     Returns:
         200: Liste des utilisateurs
+        400: Curseur ou champ invalide
     """
     try:
         page = request.args.get('page', 1, type=int)
@@ -41,7 +61,10 @@ def get_all_users(current_user):
         result = UserService.get_all_users(
             page=page,
             per_page=per_page,
-            include_inactive=include_inactive
+            include_inactive=include_inactive,
+            cursor=request.args.get('cursor'),
+            count=request.args.get('count'),
+            fields=request_fieldset(User, User.SUMMARY_FIELDS)
         )
 
         return jsonify({
@@ -49,6 +72,11 @@ def get_all_users(current_user):
             'data': result
         }), 200
 
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'message': str(e)
+        }), 400
     except Exception as e:
         return jsonify({
             'success': False,
@@ -70,6 +98,9 @@ def search_users(current_user):
         q: Terme de recherche
         page: Numéro de page (défaut: 1)
         per_page: Éléments par page (défaut: 20)
+        cursor: Curseur de pagination ('' pour la première page, active le mode curseur)
+        count: Comptage en mode curseur (none, estimate, exact)
+        fields / include: Projection des résultats (voir User.FIELDS)
 
     Returns:
         200: Résultats de recherche
@@ -85,13 +116,23 @@ def search_users(current_user):
                 'message': 'Le paramètre "q" est requis'
             }), 400
 
-        result = UserService.search_users(query, page, per_page)
+        result = UserService.search_users(
+            query, page, per_page,
+            cursor=request.args.get('cursor'),
+            count=request.args.get('count'),
+            fields=request_fieldset(User, User.SUMMARY_FIELDS)
+        )
 
         return jsonify({
             'success': True,
             'data': result
         }), 200
 
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'message': str(e)
+        }), 400
     except Exception as e:
         return jsonify({
             'success': False,
@@ -109,16 +150,29 @@ def get_user(current_user, user_id):
     Headers:
         Authorization: Bearer <token>
 
+    Query Params:
+        fields: Champs à renvoyer (voir User.FIELDS), sans 'stats' évite 4 COUNT
+        include: Champs ajoutés à la représentation complète
+
     Returns:
         200: Utilisateur trouvé
+        400: Champ invalide
         404: Utilisateur non trouvé
     """
+    try:
+        fields = request_fieldset(User, User.DETAIL_FIELDS)
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'message': str(e)
+        }), 400
+
     try:
         user = UserService.get_user_by_id(user_id)
 
         return jsonify({
             'success': True,
-            'user': user.to_dict(include_stats=True)
+            'user': user.to_dict(include_stats=True) if fields is None else user.to_fields_dict(fields)
         }), 200
 
     except ValueError as e:
@@ -277,6 +331,8 @@ def get_activity_logs(current_user):
         user_id: Filtrer par utilisateur
         page: Numéro de page (défaut: 1)
         per_page: Éléments par page (défaut: 50)
+        cursor: Curseur de pagination ('' pour la première page, active le mode curseur)
+        count: Comptage en mode curseur (none, estimate, exact)
 
     Returns:
         200: Logs d'activité
@@ -291,7 +347,9 @@ def get_activity_logs(current_user):
             action=action,
             user_id=user_id,
             page=page,
-            per_page=per_page
+            per_page=per_page,
+            cursor=request.args.get('cursor'),
+            count=request.args.get('count')
         )
 
         return jsonify({
@@ -299,6 +357,11 @@ def get_activity_logs(current_user):
             'data': result
         }), 200
 
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'message': str(e)
+        }), 400
     except Exception as e:
         return jsonify({
             'success': False,
@@ -382,20 +445,43 @@ def get_all_sessions(current_user):
 @admin_required
 def cleanup_sessions(current_user):
     """
-    Nettoyer les sessions expirées
+    Nettoyer les sessions expirées (et optionnellement les vieux logs)
 
     Headers:
         Authorization: Bearer <token>
 
+    Query Params:
+        batch_size: Lignes supprimées par lot (défaut: 5000)
+        logs_days: Supprimer aussi les logs plus vieux que N jours (optionnel)
+
     Returns:
         200: Sessions nettoyées
     """
     try:
-        count = Session.cleanup_expired()
+        batch_size = min(max(request.args.get('batch_size', 5000, type=int), 1), 50000)
+        logs_days = request.args.get('logs_days', type=int)
+
+        def log_progress(label):
+            return lambda total: current_app.logger.info(f'Nettoyage {label}: {total} ligne(s) supprimée(s)')
+
+        count = Session.cleanup_expired(
+            batch_size=batch_size,
+            progress=log_progress('sessions')
+        )
+
+        deleted = {'sessions': count}
+
+        if logs_days:
+            deleted['activity_logs'] = ActivityLog.cleanup_old_logs(
+                days=logs_days,
+                batch_size=batch_size,
+                progress=log_progress('logs')
+            )
 
         return jsonify({
             'success': True,
-            'message': f'{count} session(s) nettoyée(s)'
+            'message': f'{count} session(s) nettoyée(s)',
+            'deleted': deleted
         }), 200
 
     except Exception as e:
@@ -459,7 +545,17 @@ def get_platform_statistics(current_user):
                 },
                 'sessions': {
                     'active': active_sessions
-                }
+                },
+                'activity_writer': activity_writer.stats(),
+                'version_compactor': version_compactor.stats(),
+                'password_hasher': password_hasher.stats(),
+                'preview_cache': preview_cache.stats(),
+                'render_cache': render_cache.stats(),
+                'stylesheet_cache': stylesheet_cache.stats(),
+                'diff_cache': diff_cache.stats(),
+                'version_content_cache': version_content_cache.stats(),
+                'blob_store': blob_store.stats(),
+                'compression': response_compressor.stats()
             }
         }), 200
 
@@ -468,3 +564,95 @@ def get_platform_statistics(current_user):
             'success': False,
             'message': 'Erreur lors de la récupération des statistiques'
         }), 500
+
+
+@admin_bp.route('/version-storage', methods=['GET'])
+@token_required
+@admin_required
+def get_version_storage(current_user):
+    """
+    Espace occupé par l'historique des versions (instantanés + deltas)
+
+    Headers:
+        Authorization: Bearer <token>
+
+    Query Params:
+        template_id: Limiter à un template
+        limit: Nombre maximum de templates, plus gros gains d'abord (défaut: 50)
+
+    Returns:
+        200: Rapport par template et totaux
+    """
+    try:
+        template_id = request.args.get('template_id', type=int)
+        limit = min(request.args.get('limit', 50, type=int), 500)
+
+        return jsonify({
+            'success': True,
+            'storage': VersionStorageService.report(template_id=template_id, limit=limit)
+        }), 200
+
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'message': 'Erreur lors du calcul de l\'espace des versions'
+        }), 500
+
+
+@admin_bp.route('/version-retention', methods=['GET'])
+@token_required
+@admin_required
+def get_version_retention(current_user):
+    """
+    Rapport à blanc de la rétention: versions que flask compact-versions supprimerait
+
+    Headers:
+        Authorization: Bearer <token>
+
+    Query Params:
+        template_id: Limiter à un template
+        limit: Nombre maximum de templates, plus gros élagages d'abord (défaut: 50)
+
+    Returns:
+        200: Politique globale, rapport par template et totaux
+    """
+    try:
+        template_id = request.args.get('template_id', type=int)
+        limit = min(request.args.get('limit', 50, type=int), 500)
+
+        return jsonify({
+            'success': True,
+            'retention': VersionRetentionService.report(template_id=template_id, limit=limit)
+        }), 200
+
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'message': 'Erreur lors du calcul de la rétention des versions'
+        }), 500
+
+
+@admin_bp.route('/blob-storage', methods=['GET'])
+@token_required
+@admin_required
+def get_blob_storage(current_user):
+    """
+    Contenus stockés par empreinte: nombre, taille, niveaux et références
+
+    Headers:
+        Authorization: Bearer <token>
+
+    Returns:
+        200: Rapport (voir BlobService.report)
+    """
+    try:
+        return jsonify({
+            'success': True,
+            'storage': BlobService.report()
+        }), 200
+
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'message': 'Erreur lors du calcul de l\'espace des contenus'
+        }), 500
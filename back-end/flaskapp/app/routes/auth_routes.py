@@ -10,6 +10,7 @@ from flask import Blueprint, request, jsonify
 from app.services.auth_service import AuthService
 from app.services.user_service import UserService
 from app.utils.decorators import token_required, get_request_info
+from app.utils.password_hasher import PasswordHasherBusy
 
 auth_bp = Blueprint('auth', __name__, url_prefix='/api/auth')
 
@@ -30,6 +31,7 @@ def register():
     Returns:
         201: Utilisateur créé
         400: Erreur de validation
+        429: Pool de hachage saturé
     """
     try:
         data = request.get_json()
@@ -69,6 +71,11 @@ def register():
             'user': user.to_dict()
         }), 201
 
+    except PasswordHasherBusy as e:
+        return jsonify({
+            'success': False,
+            'message': str(e)
+        }), 429, {'Retry-After': str(e.retry_after)}
     except ValueError as e:
         return jsonify({
             'success': False,
@@ -95,6 +102,7 @@ def login():
     Returns:
         200: Token JWT et informations utilisateur
         401: Identifiants invalides
+        429: Pool de hachage saturé
     """
     try:
         data = request.get_json()
@@ -123,6 +131,11 @@ def login():
             'data': result
         }), 200
 
+    except PasswordHasherBusy as e:
+        return jsonify({
+            'success': False,
+            'message': str(e)
+        }), 429, {'Retry-After': str(e.retry_after)}
     except ValueError as e:
         return jsonify({
             'success': False,
@@ -6,12 +6,26 @@
 Routes des templates - CRUD complet avec gestion CSS PARFAITE
 """
 
-from flask import Blueprint, request, jsonify, current_app
+from flask import Blueprint, Response, request, jsonify, current_app, make_response, stream_with_context
 from app.services.template_service import TemplateService
 from app.services.version_service import VersionService
+from app.services.version_retention_service import VersionRetentionService
 from app.services.validation_service import ValidationService
+from app.services.bulk_service import BulkService
+from app.services.import_service import ImportService
+from app.services.export_service import ExportService, MIMETYPES as EXPORT_MIMETYPES
+from app.services.render_service import RenderService, RenderError
+from app.services.batch_render_service import BatchRenderService, MIMETYPES as BATCH_RENDER_MIMETYPES
+from app.services.diff_service import DiffService
+from app.models.email_template import EmailTemplate
+from app.models.template_version import TemplateVersion
 from app.utils.decorators import token_required, get_request_info
+from app.utils.fieldsets import request_fieldset
+import json
+import shutil
+import tempfile
 import traceback
+from datetime import datetime
 
 template_bp = Blueprint('templates', __name__, url_prefix='/api/templates')
 
@@ -106,7 +120,13 @@ def create_template(current_user):
 @template_bp.route('/', methods=['GET'])
 @token_required
 def get_templates(current_user):
-    """Récupérer tous les templates de l'utilisateur"""
+    """
+    Récupérer tous les templates de l'utilisateur
+
+    Query Params:
+        fields: Champs à renvoyer (voir EmailTemplate.FIELDS), ex: id,nom,updated_at
+        include: Champs ajoutés aux résumés, ex: owner,html_content
+    """
     try:
         page = request.args.get('page', 1, type=int)
         per_page = request.args.get('per_page', 20, type=int)
@@ -116,7 +136,10 @@ def get_templates(current_user):
             user_id=current_user.id,
             include_inactive=include_inactive,
             page=page,
-            per_page=per_page
+            per_page=per_page,
+            cursor=request.args.get('cursor'),
+            count=request.args.get('count'),
+            fields=request_fieldset(EmailTemplate, EmailTemplate.SUMMARY_FIELDS)
         )
 
         return jsonify({
@@ -124,6 +147,11 @@ def get_templates(current_user):
             'data': result
         }), 200
 
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'message': str(e)
+        }), 400
     except Exception as e:
         current_app.logger.error(f'❌ Error fetching templates: {str(e)}')
         return jsonify({
@@ -132,14 +160,206 @@ def get_templates(current_user):
         }), 500
 
 
+@template_bp.route('/bulk', methods=['POST'])
+@token_required
+def bulk_templates(current_user):
+    """
+    Appliquer un lot d'opérations sur les templates (une transaction)
+
+    Body:
+        {
+            "atomic": true,  // défaut: une opération invalide annule tout le lot
+            "operations": [
+                {"op": "create", "nom": "...", "sujet": "...", "html_content": "...", "category": "...", "tags": []},
+                {"op": "update", "id": 12, "html_content": "...", "change_description": "..."},
+                {"op": "delete", "id": 13, "soft": true},
+                {"op": "restore", "id": 14},
+                {"op": "move_category", "id": 15, "category": "Newsletter"},
+                {"op": "add_tags", "id": 15, "tags": ["promo"]},
+                {"op": "remove_tags", "id": 15, "tags": ["old"]},
+                {"op": "set_favorite", "id": 15, "favorite": true}
+            ]
+        }
+
+    Returns:
+        200: Toutes les opérations appliquées
+        207: Lot non atomique partiellement appliqué (statut par opération)
+        400: Lot invalide, ou lot atomique annulé (statut par opération)
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        atomic = data.get('atomic', True)
+
+        if not isinstance(atomic, bool):
+            return jsonify({
+                'success': False,
+                'message': 'Le champ atomic doit être un booléen'
+            }), 400
+
+        ip_address, user_agent = get_request_info(request)
+
+        result = BulkService.apply(
+            user_id=current_user.id,
+            operations=data.get('operations'),
+            atomic=atomic,
+            ip_address=ip_address,
+            user_agent=user_agent
+        )
+
+        if not result['applied']:
+            message, status = 'Lot annulé: au moins une opération est invalide', 400
+        elif result['failed']:
+            message, status = 'Lot partiellement appliqué', 207
+        else:
+            message, status = 'Lot appliqué avec succès', 200
+
+        return jsonify({
+            'success': status == 200,
+            'message': message,
+            'data': result
+        }), status
+
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'message': str(e)
+        }), 400
+    except Exception as e:
+        current_app.logger.error(f'❌ Error applying bulk operations: {str(e)}')
+        current_app.logger.error(traceback.format_exc())
+        return jsonify({
+            'success': False,
+            'message': 'Erreur lors de l\'application du lot'
+        }), 500
+
+
+@template_bp.route('/import', methods=['POST'])
+@token_required
+def import_templates(current_user):
+    """
+    Importer des templates depuis un ZIP ou un NDJSON (voir ImportService)
+
+    Body:
+        multipart/form-data avec un champ "file" (.zip ou .ndjson),
+        ou le fichier brut (Content-Type: application/zip ou application/x-ndjson)
+
+    Query Params:
+        format: zip ou ndjson (si le nom/type ne suffit pas)
+
+    Returns:
+        200: Flux NDJSON d'événements (progress, error par entrée, done)
+        400: Format ou archive invalide
+    """
+    try:
+        upload = request.files.get('file')
+
+        if upload is not None:
+            fileobj, filename, content_type = upload.stream, upload.filename, upload.mimetype
+        else:
+            fileobj, filename, content_type = request.stream, None, request.content_type
+
+        fmt = ImportService.detect_format(filename, content_type, request.args.get('format'))
+
+        # Le ZIP se lit depuis la fin (annuaire central): corps brut copié sur disque
+        if fmt == 'zip' and not fileobj.seekable():
+            spooled = tempfile.SpooledTemporaryFile(max_size=1024 * 1024)
+            shutil.copyfileobj(fileobj, spooled)
+            spooled.seek(0)
+            fileobj = spooled
+
+        entries = ImportService.iter_entries(fileobj, fmt)
+
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'message': str(e)
+        }), 400
+
+    ip_address, user_agent = get_request_info(request)
+    events = ImportService.import_entries(
+        current_user.id, entries, ip_address=ip_address, user_agent=user_agent
+    )
+
+    def generate():
+        for event in events:
+            yield json.dumps(event, ensure_ascii=False) + '\n'
+
+    response = Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+    # no-transform: chaque événement est transmis sans attendre un bloc compressé
+    response.headers['Cache-Control'] = 'no-cache, no-transform'
+    return response
+
+
+@template_bp.route('/export', methods=['GET'])
+@token_required
+def export_templates(current_user):
+    """
+    Exporter la bibliothèque en flux (voir ExportService)
+
+    Query Params:
+        format: ndjson (défaut) ou zip
+        versions: Inclure l'historique des versions (défaut: false)
+        metadata: Inclure category, tags, favorite, ... (défaut: true)
+        after: Reprendre après cet ID de template (export interrompu)
+
+    Returns:
+        200: Fichier NDJSON ou ZIP, transmis au fil de la lecture
+        400: Paramètre invalide
+    """
+    try:
+        fmt = ExportService.validate_format(request.args.get('format', 'ndjson'))
+        after = request.args.get('after', type=int)
+        if after is not None and after < 0:
+            raise ValueError('after doit être un ID de template positif')
+
+        chunks = ExportService.export(
+            current_user.id,
+            fmt,
+            include_metadata=request.args.get('metadata', 'true').lower() == 'true',
+            include_versions=request.args.get('versions', 'false').lower() == 'true',
+            after=after
+        )
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'message': str(e)
+        }), 400
+
+    filename = f'templates-{datetime.utcnow():%Y%m%d-%H%M%S}.{fmt}'
+
+    response = Response(stream_with_context(chunks), mimetype=EXPORT_MIMETYPES[fmt])
+    response.headers['Content-Disposition'] = f'attachment; filename="{filename}"'
+    response.headers['Cache-Control'] = 'no-store'
+    return response
+
+
 @template_bp.route('/<int:template_id>', methods=['GET'])
 @token_required
 def get_template(current_user, template_id):
     """
     Récupérer un template par ID - GARANTIT CSS
+
+    Query Params:
+        fields: Champs à renvoyer (voir EmailTemplate.FIELDS), ex: id,nom,sujet
+        include: Champs ajoutés à la représentation complète, ex: versions
     """
     try:
-        template = TemplateService.get_template_by_id(template_id, current_user.id)
+        fields = request_fieldset(EmailTemplate, EmailTemplate.DETAIL_FIELDS)
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'message': str(e)
+        }), 400
+
+    try:
+        template = TemplateService.get_template_by_id(template_id, current_user.id, fields=fields)
+
+        # Projection: seuls les champs demandés ont été chargés
+        if fields is not None:
+            return jsonify({
+                'success': True,
+                'template': template.to_fields_dict(fields)
+            }), 200
 
         # CORRECTION CRITIQUE: Garantir CSS dans réponse
         template_dict = template.to_dict(
@@ -282,7 +502,12 @@ def delete_template(current_user, template_id):
 @template_bp.route('/search', methods=['GET'])
 @token_required
 def search_templates(current_user):
-    """Rechercher des templates"""
+    """
+    Rechercher des templates
+
+    Query Params:
+        fields / include: Projection des résultats (voir get_templates)
+    """
     try:
         query = request.args.get('q', '')
         page = request.args.get('page', 1, type=int)
@@ -298,7 +523,10 @@ def search_templates(current_user):
             user_id=current_user.id,
             query=query,
             page=page,
-            per_page=per_page
+            per_page=per_page,
+            cursor=request.args.get('cursor'),
+            count=request.args.get('count'),
+            fields=request_fieldset(EmailTemplate, EmailTemplate.SUMMARY_FIELDS)
         )
 
         return jsonify({
@@ -306,6 +534,11 @@ def search_templates(current_user):
             'data': result
         }), 200
 
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'message': str(e)
+        }), 400
     except Exception as e:
         current_app.logger.error(f'❌ Error searching: {str(e)}')
         return jsonify({
@@ -380,17 +613,79 @@ def validate_template(current_user, template_id):
         }), 500
 
 
+def _conditional_preview(template, build_response):
+    """
+    Réponse d'aperçu avec ETag fort (hash du contenu)
+
+    Si If-None-Match correspond, renvoie 304 sans construire le HTML.
+    """
+    content_hash = template.preview_hash()
+
+    # Comparaison faible: l'ETag devient W/"..." si la réponse est compressée
+    if request.if_none_match.contains_weak(content_hash):
+        response = make_response('', 304)
+    else:
+        response = make_response(build_response(template.get_full_html(content_hash)))
+
+    response.set_etag(content_hash)
+    response.headers['Cache-Control'] = current_app.config.get('PREVIEW_CACHE_CONTROL', 'private, no-cache')
+    return response
+
+
 @template_bp.route('/<int:template_id>/preview', methods=['GET'])
 @token_required
 def preview_template(current_user, template_id):
-    """Obtenir le HTML complet pour aperçu"""
+    """
+    Obtenir le HTML complet pour aperçu (JSON)
+
+    Headers:
+        If-None-Match: ETag d'un aperçu précédent (304 si inchangé)
+    """
     try:
         template = TemplateService.get_template_by_id(template_id, current_user.id)
 
-        return jsonify({
+        return _conditional_preview(template, lambda html: jsonify({
             'success': True,
-            'html': template.get_full_html()
-        }), 200
+            'html': html
+        }))
+
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'message': str(e)
+        }), 404
+    except Exception as e:
+        current_app.logger.error(f'❌ Error generating preview: {str(e)}')
+        return jsonify({
+            'success': False,
+            'message': 'Erreur lors de la génération de l\'aperçu'
+        }), 500
+
+
+@template_bp.route('/<int:template_id>/preview/html', methods=['GET'])
+@token_required
+def preview_template_html(current_user, template_id):
+    """
+    Obtenir l'aperçu en text/html (document brut, pour un iframe)
+
+    Le document est servi en bac à sable (CSP sandbox): ses scripts ne
+    s'exécutent pas dans l'origine de l'API.
+
+    Headers:
+        If-None-Match: ETag d'un aperçu précédent (304 si inchangé)
+    """
+    try:
+        template = TemplateService.get_template_by_id(template_id, current_user.id)
+
+        def build(html):
+            response = make_response(html)
+            response.mimetype = 'text/html'
+            return response
+
+        response = _conditional_preview(template, build)
+        response.headers['Content-Security-Policy'] = 'sandbox'
+        response.headers['X-Content-Type-Options'] = 'nosniff'
+        return response
 
     except ValueError as e:
         return jsonify({
@@ -405,10 +700,163 @@ def preview_template(current_user, template_id):
         }), 500
 
 
+@template_bp.route('/<int:template_id>/render', methods=['POST'])
+@token_required
+def render_template(current_user, template_id):
+    """
+    Rendre un template personnalisé (variables, conditions, boucles)
+
+    Body:
+        {
+            "data": {"prenom": "Marie", "produits": [...]},
+            "version": 3   (optionnel, défaut: version courante)
+        }
+
+    Returns:
+        200: sujet et html rendus
+        400: Données ou syntaxe du template invalides
+        404: Template ou version introuvable
+    """
+    try:
+        body = request.get_json(silent=True)
+        if body is None:
+            body = {}
+        if not isinstance(body, dict):
+            raise RenderError('Le corps de la requête doit être un objet JSON')
+
+        version_number = body.get('version')
+        if version_number is not None and (not isinstance(version_number, int) or isinstance(version_number, bool)):
+            raise RenderError('version doit être un numéro de version')
+
+        data = body.get('data', {})
+        if not isinstance(data, dict):
+            raise RenderError('data doit être un objet JSON')
+
+        result = RenderService.render_template(
+            template_id=template_id,
+            user_id=current_user.id,
+            data=data,
+            version_number=version_number
+        )
+
+        return jsonify({
+            'success': True,
+            'data': result
+        }), 200
+
+    except RenderError as e:
+        return jsonify({
+            'success': False,
+            'message': str(e)
+        }), 400
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'message': str(e)
+        }), 404
+    except Exception as e:
+        current_app.logger.error(f'❌ Error rendering template: {str(e)}')
+        return jsonify({
+            'success': False,
+            'message': 'Erreur lors du rendu du template'
+        }), 500
+
+
+@template_bp.route('/<int:template_id>/render/batch', methods=['POST'])
+@token_required
+def render_template_batch(current_user, template_id):
+    """
+    Rendre un template pour une liste de destinataires (voir BatchRenderService)
+
+    Body:
+        multipart/form-data avec un champ "file" (.csv ou .ndjson),
+        ou le fichier brut (Content-Type: text/csv ou application/x-ndjson)
+
+    Query Params:
+        input: csv ou ndjson (si le nom/type ne suffit pas)
+        format: ndjson (défaut) ou zip (fichiers .eml)
+        order: ordered (défaut) ou unordered
+        version: Version à rendre (défaut: version courante)
+        to_field: Colonne de l'adresse du destinataire (défaut: email)
+        sender: Expéditeur des .eml
+
+    Returns:
+        200: Résultats en flux (NDJSON ou ZIP)
+        400: Paramètre, fichier ou template invalide
+        404: Template ou version introuvable
+    """
+    try:
+        upload = request.files.get('file')
+
+        if upload is not None:
+            fileobj, filename, content_type = upload.stream, upload.filename, upload.mimetype
+        else:
+            fileobj, filename, content_type = request.stream, None, request.content_type
+
+        fmt = BatchRenderService.detect_format(filename, content_type, request.args.get('input'))
+        output = BatchRenderService.validate_output(request.args.get('format', 'ndjson'))
+
+        order = request.args.get('order', 'ordered')
+        if order not in ('ordered', 'unordered'):
+            raise ValueError('order doit valoir ordered ou unordered')
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'message': str(e)
+        }), 400
+
+    try:
+        ip_address, user_agent = get_request_info(request)
+        chunks = BatchRenderService.render_rows(
+            template_id,
+            current_user.id,
+            BatchRenderService.iter_rows(fileobj, fmt),
+            output=output,
+            ordered=order == 'ordered',
+            version_number=request.args.get('version', type=int),
+            to_field=request.args.get('to_field', 'email'),
+            sender=request.args.get('sender'),
+            ip_address=ip_address,
+            user_agent=user_agent
+        )
+    except RenderError as e:
+        return jsonify({
+            'success': False,
+            'message': str(e)
+        }), 400
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'message': str(e)
+        }), 404
+
+    response = Response(stream_with_context(chunks), mimetype=BATCH_RENDER_MIMETYPES[output])
+    if output == 'zip':
+        response.headers['Content-Disposition'] = f'attachment; filename="template-{template_id}-emails.zip"'
+    return response
+
+
 @template_bp.route('/<int:template_id>/versions', methods=['GET'])
 @token_required
 def get_template_versions(current_user, template_id):
-    """Récupérer les versions d'un template"""
+    """
+    Récupérer les versions d'un template
+
+    Par défaut, métadonnées seulement (tailles et empreintes du contenu, nom
+    du créateur): le contenu d'une version se lit par /versions/<n>/content.
+
+    Query Params:
+        fields: Champs à renvoyer (voir TemplateVersion.FIELDS)
+        include: Champs ajoutés, ex: html_content,css_content
+    """
+    try:
+        fields = request_fieldset(TemplateVersion, TemplateVersion.SUMMARY_FIELDS)
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'message': str(e)
+        }), 400
+
     try:
         page = request.args.get('page', 1, type=int)
         per_page = request.args.get('per_page', 20, type=int)
@@ -417,7 +865,10 @@ def get_template_versions(current_user, template_id):
             template_id=template_id,
             user_id=current_user.id,
             page=page,
-            per_page=per_page
+            per_page=per_page,
+            cursor=request.args.get('cursor'),
+            count=request.args.get('count'),
+            fields=fields
         )
 
         return jsonify({
@@ -441,17 +892,32 @@ def get_template_versions(current_user, template_id):
 @template_bp.route('/<int:template_id>/versions/<int:version_number>', methods=['GET'])
 @token_required
 def get_template_version(current_user, template_id, version_number):
-    """Récupérer une version spécifique"""
+    """
+    Récupérer une version spécifique
+
+    Query Params:
+        fields: Champs à renvoyer (voir TemplateVersion.FIELDS)
+        include: Champs ajoutés à la représentation complète
+    """
+    try:
+        fields = request_fieldset(TemplateVersion, TemplateVersion.DETAIL_FIELDS)
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'message': str(e)
+        }), 400
+
     try:
         version = VersionService.get_version_by_number(
             template_id=template_id,
             version_number=version_number,
-            user_id=current_user.id
+            user_id=current_user.id,
+            fields=fields
         )
 
         return jsonify({
             'success': True,
-            'version': version.to_dict(include_content=True)
+            'version': version.to_dict(include_content=True) if fields is None else version.to_fields_dict(fields)
         }), 200
 
     except ValueError as e:
@@ -467,6 +933,49 @@ def get_template_version(current_user, template_id, version_number):
         }), 500
 
 
+@template_bp.route('/<int:template_id>/versions/<int:version_number>/content', methods=['GET'])
+@token_required
+def get_template_version_content(current_user, template_id, version_number):
+    """
+    Récupérer le contenu HTML/CSS d'une version (l'historique ne renvoie que
+    ses tailles et empreintes)
+
+    Headers:
+        If-None-Match: ETag d'un contenu précédent (304 si identique)
+    """
+    try:
+        content = VersionService.get_version_content(
+            template_id=template_id,
+            version_number=version_number,
+            user_id=current_user.id
+        )
+
+        etag = f'{content["html_hash"]}.{content["css_hash"]}'
+        if request.if_none_match.contains_weak(etag):
+            response = make_response('', 304)
+        else:
+            response = make_response(jsonify({
+                'success': True,
+                'content': content
+            }))
+
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = 'private, no-cache'
+        return response
+
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'message': str(e)
+        }), 404
+    except Exception as e:
+        current_app.logger.error(f'❌ Error fetching version content: {str(e)}')
+        return jsonify({
+            'success': False,
+            'message': 'Erreur lors de la récupération du contenu de la version'
+        }), 500
+
+
 @template_bp.route('/<int:template_id>/versions/<int:version_number>/restore', methods=['POST'])
 @token_required
 def restore_version(current_user, template_id, version_number):
@@ -504,22 +1013,49 @@ def restore_version(current_user, template_id, version_number):
 @template_bp.route('/<int:template_id>/versions/compare', methods=['GET'])
 @token_required
 def compare_versions(current_user, template_id):
-    """Comparer deux versions"""
-    try:
-        v1 = request.args.get('v1', type=int)
-        v2 = request.args.get('v2', type=int)
+    """
+    Comparer deux versions (blocs de modifications HTML et CSS)
+
+    Query Params:
+        v1, v2: Numéros des versions comparées (v1 -> v2)
+        context: Lignes inchangées autour de chaque bloc (défaut: 3)
+        mode: line (défaut) ou word (positions des mots modifiés)
+        normalize: Ignorer blancs et retours à la ligne (défaut: true)
+
+    Returns:
+        200: Comparaison (diff.html, diff.css: blocs au format unifié)
+        400: Paramètre invalide
+        404: Template ou version introuvable
+    """
+    v1 = request.args.get('v1', type=int)
+    v2 = request.args.get('v2', type=int)
 
-        if not v1 or not v2:
-            return jsonify({
-                'success': False,
-                'message': 'Les paramètres v1 et v2 sont requis'
-            }), 400
+    if not v1 or not v2:
+        return jsonify({
+            'success': False,
+            'message': 'Les paramètres v1 et v2 sont requis'
+        }), 400
 
+    try:
+        context = request.args.get('context', 3, type=int)
+        mode = request.args.get('mode', 'line')
+        DiffService.validate_options(context, mode)
+        context = min(context, current_app.config.get('DIFF_MAX_CONTEXT', 100))
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'message': str(e)
+        }), 400
+
+    try:
         result = VersionService.compare_versions(
             template_id=template_id,
             version1_number=v1,
             version2_number=v2,
-            user_id=current_user.id
+            user_id=current_user.id,
+            context=context,
+            mode=mode,
+            normalize=request.args.get('normalize', 'true').lower() == 'true'
         )
 
         return jsonify({
@@ -540,6 +1076,91 @@ def compare_versions(current_user, template_id):
         }), 500
 
 
+@template_bp.route('/<int:template_id>/versions/retention', methods=['GET'])
+@token_required
+def get_version_retention(current_user, template_id):
+    """
+    Politique de rétention du template et aperçu (à blanc) de son élagage
+
+    Returns:
+        200: policy, overridden, kept_versions (raisons), pruned_versions, pruned_bytes
+        404: Template introuvable
+    """
+    try:
+        return jsonify({
+            'success': True,
+            'retention': VersionRetentionService.get_policy(template_id, current_user.id)
+        }), 200
+
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'message': str(e)
+        }), 404
+    except Exception as e:
+        current_app.logger.error(f'❌ Error fetching retention policy: {str(e)}')
+        return jsonify({
+            'success': False,
+            'message': 'Erreur lors de la récupération de la politique de rétention'
+        }), 500
+
+
+@template_bp.route('/<int:template_id>/versions/retention', methods=['PUT'])
+@token_required
+def update_version_retention(current_user, template_id):
+    """
+    Définir la politique de rétention propre au template
+
+    Body:
+        {
+            "policy": {"keep_last": 20, "daily_days": 7}  // null ou {}: politique globale
+        }
+
+    Returns:
+        200: Nouvelle politique et aperçu de l'élagage
+        400: Politique invalide
+        404: Template introuvable
+    """
+    try:
+        TemplateService.get_template_by_id(template_id, current_user.id)
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'message': str(e)
+        }), 404
+
+    data = request.get_json(silent=True) or {}
+    if 'policy' not in data:
+        return jsonify({
+            'success': False,
+            'message': 'Le champ policy est requis'
+        }), 400
+
+    try:
+        ip_address, _ = get_request_info(request)
+        retention = VersionRetentionService.set_policy(
+            template_id, current_user.id, data['policy'], ip_address=ip_address
+        )
+
+        return jsonify({
+            'success': True,
+            'message': 'Politique de rétention mise à jour',
+            'retention': retention
+        }), 200
+
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'message': str(e)
+        }), 400
+    except Exception as e:
+        current_app.logger.error(f'❌ Error updating retention policy: {str(e)}')
+        return jsonify({
+            'success': False,
+            'message': 'Erreur lors de la mise à jour de la politique de rétention'
+        }), 500
+
+
 @template_bp.route('/statistics', methods=['GET'])
 @token_required
 def get_statistics(current_user):
@@ -9,7 +9,10 @@ Routes utilisateurs - Profil et gestion du compte
 from flask import Blueprint, request, jsonify
 from app.services.user_service import UserService
 from app.models.activity_log import ActivityLog
+from app.models.user import User
 from app.utils.decorators import token_required, get_request_info
+from app.utils.password_hasher import PasswordHasherBusy
+from app.utils.fieldsets import request_fieldset
 
 user_bp = Blueprint('users', __name__, url_prefix='/api/users')
 
@@ -23,15 +26,28 @@ def get_profile(current_user):
     Headers:
         Authorization: Bearer <token>
 
+    Query Params:
+        fields: Champs à renvoyer (voir User.FIELDS), sans 'stats' évite 4 COUNT
+        include: Champs ajoutés à la représentation complète
+
     Returns:
         200: Profil utilisateur
+        400: Champ invalide
     """
     try:
+        fields = request_fieldset(User, User.DETAIL_FIELDS)
+
         return jsonify({
             'success': True,
-            'user': current_user.to_dict(include_stats=True)
+            'user': current_user.to_dict(include_stats=True) if fields is None else current_user.to_fields_dict(fields)
         }), 200
 
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'message': str(e)
+        }), 400
+
     except Exception as e:
         return jsonify({
             'success': False,
@@ -75,6 +91,11 @@ def update_profile(current_user):
             'user': user.to_dict()
         }), 200
 
+    except PasswordHasherBusy as e:
+        return jsonify({
+            'success': False,
+            'message': str(e)
+        }), 429, {'Retry-After': str(e.retry_after)}
     except ValueError as e:
         return jsonify({
             'success': False,
@@ -138,6 +159,11 @@ def change_password(current_user):
             'message': 'Mot de passe changé avec succès'
         }), 200
 
+    except PasswordHasherBusy as e:
+        return jsonify({
+            'success': False,
+            'message': str(e)
+        }), 429, {'Retry-After': str(e.retry_after)}
     except ValueError as e:
         return jsonify({
             'success': False,
@@ -253,6 +279,11 @@ def deactivate_account(current_user):
             'message': 'Compte désactivé avec succès'
         }), 200
 
+    except PasswordHasherBusy as e:
+        return jsonify({
+            'success': False,
+            'message': str(e)
+        }), 429, {'Retry-After': str(e.retry_after)}
     except Exception as e:
         return jsonify({
             'success': False,
@@ -13,13 +13,14 @@ from app import db
 from app.models.user import User
 from app.models.session import Session
 from app.models.activity_log import ActivityLog
+from app.utils.auth_cache import auth_cache
 
 
 class AuthService:
     """Service gérant l'authentification et les tokens JWT"""
 
     @staticmethod
-    def generate_token(user_id, email, role):
+    def generate_token(user_id, email, role, token_type=None, expires_delta=None, **claims):
         """
         Générer un token JWT
 
@@ -27,18 +28,28 @@ class AuthService:
             user_id: ID de l'utilisateur
             email: Email de l'utilisateur
             role: Rôle de l'utilisateur
+            token_type: Type de token ('access' ou 'refresh', optionnel)
+            expires_delta: Durée de validité (défaut: JWT_ACCESS_TOKEN_EXPIRES)
+            **claims: Claims supplémentaires (epoch, sid, ...)
 
         Returns:
             str: Token JWT
         """
+        expires_delta = expires_delta or current_app.config['JWT_ACCESS_TOKEN_EXPIRES']
+
         payload = {
             'user_id': user_id,
             'email': email,
             'role': role,
-            'exp': datetime.utcnow() + current_app.config['JWT_ACCESS_TOKEN_EXPIRES'],
+            'exp': datetime.utcnow() + expires_delta,
             'iat': datetime.utcnow()
         }
 
+        if token_type:
+            payload['type'] = token_type
+
+        payload.update(claims)
+
         token = jwt.encode(
             payload,
             current_app.config['JWT_SECRET_KEY'],
@@ -47,6 +58,40 @@ class AuthService:
 
         return token
 
+    @staticmethod
+    def stateless_tokens_enabled():
+        """
+        Vérifier si le mode access token sans état est activé
+
+        Returns:
+            bool: True si JWT_STATELESS_ACCESS_TOKENS est actif
+        """
+        return current_app.config.get('JWT_STATELESS_ACCESS_TOKENS', False)
+
+    @staticmethod
+    def generate_access_token(user, session_id):
+        """
+        Générer un access token court, vérifiable sans la table sessions
+
+        Args:
+            user: Utilisateur
+            session_id: ID de la session (refresh token) associée
+
+        Returns:
+            tuple: (token, expires_at)
+        """
+        expires_delta = current_app.config['JWT_STATELESS_ACCESS_EXPIRES']
+
+        token = AuthService.generate_token(
+            user.id, user.email, user.role,
+            token_type='access',
+            expires_delta=expires_delta,
+            epoch=user.token_epoch,
+            sid=session_id
+        )
+
+        return token, datetime.utcnow() + expires_delta
+
     @staticmethod
     def verify_token(token):
         """
@@ -74,12 +119,13 @@ class AuthService:
             raise ValueError('Token invalide')
 
     @staticmethod
-    def get_current_user(token):
+    def get_current_user(token, payload=None):
         """
         Récupérer l'utilisateur courant à partir du token
 
         Args:
             token: Token JWT
+            payload: Payload déjà vérifié (évite un second décodage)
 
         Returns:
             User: Utilisateur courant
@@ -88,10 +134,32 @@ class AuthService:
             ValueError: Si utilisateur non trouvé ou token invalide
         """
         # Vérifier le token
-        payload = AuthService.verify_token(token)
+        if payload is None:
+            payload = AuthService.verify_token(token)
+
+        # Access token sans état: seule l'époque de l'utilisateur est vérifiée
+        if payload.get('type') == 'access' and AuthService.stateless_tokens_enabled():
+            return AuthService._get_stateless_user(payload)
 
-        # Vérifier que la session existe et est active
         token_hash = Session.hash_token(token)
+
+        # Déjà résolu pendant cette requête
+        user = auth_cache.get_request_user(token_hash)
+        if user is not None:
+            return user
+
+        # Token chaud: aucune requête DB
+        entry = auth_cache.get(token_hash)
+        if entry is not None:
+            if not auth_cache.is_session_active(entry):
+                auth_cache.invalidate(token_hash)
+                raise ValueError('Session invalide ou expirée')
+
+            user = auth_cache.restore_user(entry['user'])
+            auth_cache.set_request_user(token_hash, user)
+            return user
+
+        # Vérifier que la session existe et est active
         session = Session.find_by_token_hash(token_hash)
 
         if not session or not session.is_active():
@@ -103,8 +171,42 @@ class AuthService:
         if not user or not user.is_active:
             raise ValueError('Utilisateur non trouvé ou inactif')
 
+        auth_cache.set(token_hash, payload, session, user)
+        auth_cache.set_request_user(token_hash, user)
+
         return user
 
+    @staticmethod
+    def _get_stateless_user(payload):
+        """
+        Résoudre l'utilisateur d'un access token sans état
+
+        Args:
+            payload: Payload vérifié (type 'access')
+
+        Returns:
+            User: Utilisateur courant
+
+        Raises:
+            ValueError: Si l'époque du token est périmée ou utilisateur inactif
+        """
+        user_id = payload['user_id']
+
+        state = auth_cache.get_user_state(user_id)
+
+        if state is None:
+            user = User.find_by_id(user_id)
+
+            if not user or not user.is_active:
+                raise ValueError('Utilisateur non trouvé ou inactif')
+
+            state = auth_cache.set_user_state(user)
+
+        if payload.get('epoch') != state['epoch']:
+            raise ValueError('Token révoqué')
+
+        return auth_cache.restore_user(state['user'])
+
     @staticmethod
     def login(email, password, ip_address=None, user_agent=None):
         """
@@ -121,6 +223,7 @@ class AuthService:
 
         Raises:
             ValueError: Si identifiants invalides
+            PasswordHasherBusy: Si le pool de hachage est saturé
         """
         # Trouver l'utilisateur
         user = User.find_by_email(email)
@@ -135,8 +238,18 @@ class AuthService:
         if not user.check_password(password):
             raise ValueError('Email ou mot de passe incorrect')
 
-        # Générer le token
-        token = AuthService.generate_token(user.id, user.email, user.role)
+        # Recalculer le hash si les paramètres KDF ont changé
+        # (commité avec la date de dernière connexion)
+        if user.password_needs_rehash():
+            user.set_password(password)
+
+        stateless = AuthService.stateless_tokens_enabled()
+
+        # Générer le token (refresh token en mode sans état)
+        token = AuthService.generate_token(
+            user.id, user.email, user.role,
+            token_type='refresh' if stateless else None
+        )
 
         # Créer la session
         token_hash = Session.hash_token(token)
@@ -167,6 +280,17 @@ class AuthService:
             user_agent=user_agent
         )
 
+        if stateless:
+            access_token, access_expires_at = AuthService.generate_access_token(user, session.id)
+
+            return {
+                'token': access_token,
+                'refresh_token': token,
+                'user': user.to_dict(),
+                'expires_at': access_expires_at.isoformat(),
+                'refresh_expires_at': expires_at.isoformat()
+            }
+
         return {
             'token': token,
             'user': user.to_dict(),
@@ -190,8 +314,12 @@ class AuthService:
             payload = AuthService.verify_token(token)
 
             # Trouver et révoquer la session
-            token_hash = Session.hash_token(token)
-            session = Session.find_by_token_hash(token_hash)
+            if payload.get('type') == 'access':
+                # L'access token reste valide jusqu'à son expiration (courte)
+                session = Session.query.get(payload.get('sid'))
+            else:
+                token_hash = Session.hash_token(token)
+                session = Session.find_by_token_hash(token_hash)
 
             if session:
                 session.revoke()
@@ -216,6 +344,9 @@ class AuthService:
         """
         Rafraîchir un token
 
+        En mode sans état, old_token doit être le refresh token (adossé à
+        une session en base) et un nouvel access token court est émis.
+
         Args:
             old_token: Ancien token
 
@@ -228,18 +359,30 @@ class AuthService:
         # Vérifier l'ancien token
         payload = AuthService.verify_token(old_token)
 
+        if payload.get('type') == 'access':
+            raise ValueError('Un refresh token est requis')
+
         # Récupérer l'utilisateur
         user = User.find_by_id(payload['user_id'])
 
         if not user or not user.is_active:
             raise ValueError('Utilisateur non trouvé ou inactif')
 
-        # Générer un nouveau token
-        new_token = AuthService.generate_token(user.id, user.email, user.role)
-
         # Révoquer l'ancienne session
         old_token_hash = Session.hash_token(old_token)
         old_session = Session.find_by_token_hash(old_token_hash)
+
+        if payload.get('type') == 'refresh' and (not old_session or not old_session.is_active()):
+            raise ValueError('Session invalide ou expirée')
+
+        stateless = AuthService.stateless_tokens_enabled()
+
+        # Générer un nouveau token
+        new_token = AuthService.generate_token(
+            user.id, user.email, user.role,
+            token_type='refresh' if stateless else None
+        )
+
         if old_session:
             old_session.revoke()
 
@@ -256,6 +399,16 @@ class AuthService:
         db.session.add(new_session)
         db.session.commit()
 
+        if stateless:
+            access_token, access_expires_at = AuthService.generate_access_token(user, new_session.id)
+
+            return {
+                'token': access_token,
+                'refresh_token': new_token,
+                'expires_at': access_expires_at.isoformat(),
+                'refresh_expires_at': expires_at.isoformat()
+            }
+
         return {
             'token': new_token,
             'expires_at': expires_at.isoformat()
@@ -0,0 +1,470 @@
+# ============================================
+# FICHIER: backend/app/services/batch_render_service.py
+# Service de Rendu par Lots (Publipostage)
+# ============================================
+"""
+Service de rendu par lots - Un template, une liste de destinataires
+
+Entrée: un fichier CSV (en-tête = noms des variables, séparateur ',' ';'
+ou tabulation détecté sur l'en-tête) ou NDJSON (un objet par ligne), lu
+au fil de l'eau.
+
+Sortie, produite en flux:
+    - NDJSON : une ligne par destinataire
+               {"row": 1, "to": "...", "sujet": "...", "html": "..."}
+               {"row": 2, "error": "..."}
+               puis {"event": "done", "rows": n, "rendered": n, "failed": n}
+    - ZIP    : un fichier 000001.eml par destinataire rendu, puis
+               errors.ndjson (lignes en erreur) et summary.json
+
+Exécution: les lignes sont découpées en lots de BATCH_RENDER_CHUNK_SIZE,
+rendus sur place par la route HTTP (BATCH_RENDER_WORKERS = 0 par défaut)
+ou envoyés à un pool de processus par flask render-batch
+(BATCH_RENDER_CLI_WORKERS). Chaque processus
+compile le template une seule fois (initialiseur du pool) puis rend ses
+lots, y compris la sérialisation JSON, l'analyse des lignes NDJSON et la
+construction et compression des .eml. Au plus BATCH_RENDER_MAX_PENDING
+lots sont en cours à la fois: la mémoire ne dépend pas de la taille de la
+liste.
+
+Ordre: 'ordered' restitue les lignes dans l'ordre du fichier; 'unordered'
+restitue chaque lot dès qu'il est prêt (un lot lent ne bloque pas les
+suivants).
+
+Une erreur sur une ligne (données, expression interdite, ...) est
+rapportée pour cette ligne seulement.
+"""
+
+import base64
+import codecs
+import csv
+import json
+import multiprocessing
+import tempfile
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from email.header import Header
+from email.utils import formataddr, parseaddr
+from itertools import chain, islice
+from flask import current_app
+from app.models.activity_log import ActivityLog
+from app.services.render_service import RenderService, RenderError
+from app.utils.zipstream import ZipStreamWriter, deflate_member
+
+
+INPUT_FORMATS = ('csv', 'ndjson')
+OUTPUT_FORMATS = ('ndjson', 'zip')
+
+MIMETYPES = {'zip': 'application/zip', 'ndjson': 'application/x-ndjson'}
+
+CSV_DELIMITERS = (',', ';', '\t')
+
+
+class _Renderer:
+    """Template compilé et paramètres de sortie, partagés par toutes les lignes"""
+
+    def __init__(self, compiled, subject, output, to_field, sender):
+        """
+        Args:
+            compiled: CompiledVersion
+            subject: jinja2.Template du sujet
+            output: 'ndjson' ou 'zip'
+            to_field: Colonne de l'adresse du destinataire
+            sender: Expéditeur des .eml (optionnel)
+        """
+        self.compiled = compiled
+        self.subject = subject
+        self.output = output
+        self.to_field = to_field
+        self.sender = sender
+
+    @classmethod
+    def from_source(cls, sujet, html_content, css_content, output, to_field, sender):
+        """Compiler le template (initialiseur d'un processus du pool)"""
+        compiled, _ = RenderService.compile_version(None, html_content, css_content)
+        subject, _ = RenderService.compile_source(sujet, name='sujet', autoescape=False)
+        return cls(compiled, subject, output, to_field, sender)
+
+    def render_chunk(self, chunk):
+        """
+        Rendre un lot de lignes
+
+        Args:
+            chunk: Liste de (numéro de ligne, données ou ligne NDJSON brute, erreur ou None)
+
+        Returns:
+            list: (numéro de ligne, en erreur, contenu) par ligne; le contenu
+                  est la ligne NDJSON du résultat, ou le .eml déjà compressé
+                  en sortie ZIP (ligne NDJSON de l'erreur si la ligne a échoué)
+        """
+        return [self.render_row(row, record, error) for row, record, error in chunk]
+
+    def render_row(self, row, record, error=None):
+        """Rendre une ligne, en capturant son erreur"""
+        # Ligne NDJSON brute: analysée ici, dans le processus de rendu
+        if error is None and isinstance(record, (bytes, str)):
+            record, error = _parse_ndjson(record)
+
+        if error is not None:
+            return row, True, _dump({'row': row, 'error': error})
+
+        to = record.get(self.to_field)
+        try:
+            sujet, html = RenderService.render_document(self.compiled, self.subject, record)
+            if self.output == 'zip':
+                return row, False, deflate_member(self.build_eml(to, sujet, html))
+        except RenderError as e:
+            return row, True, _dump({'row': row, 'error': str(e)})
+        except Exception as e:
+            return row, True, _dump({'row': row, 'error': f'Erreur inattendue: {str(e)}'})
+
+        return row, False, _dump({'row': row, 'to': to, 'sujet': sujet, 'html': html})
+
+    def build_eml(self, to, sujet, html):
+        """
+        Message MIME (.eml) d'un destinataire
+
+        Écrit directement (email.message coûte ~1 ms par message, plus que
+        le rendu): en-têtes encodés RFC 2047, corps HTML en base64.
+
+        Raises:
+            RenderError: Si une adresse est invalide
+        """
+        headers = []
+        for name, value in (('From', self.sender), ('To', to)):
+            if value:
+                headers.append(f'{name}: {_encode_address(name, str(value))}')
+
+        # Le sujet rendu peut contenir des retours à la ligne venus des données
+        subject = ' '.join(sujet.splitlines())
+        headers += [
+            f'Subject: {_encode_header(subject)}',
+            'MIME-Version: 1.0',
+            'Content-Type: text/html; charset="utf-8"',
+            'Content-Transfer-Encoding: base64'
+        ]
+
+        return '\r\n'.join(headers).encode('ascii') + b'\r\n\r\n' + \
+            base64.encodebytes(html.encode('utf-8')).replace(b'\n', b'\r\n')
+
+
+def _dump(data):
+    """Une ligne NDJSON"""
+    return json.dumps(data, ensure_ascii=False) + '\n'
+
+
+def _parse_ndjson(line):
+    """Analyser une ligne NDJSON: (données, None) ou (None, erreur)"""
+    try:
+        data = json.loads(line)
+    except ValueError:
+        return None, 'JSON invalide'
+
+    if not isinstance(data, dict):
+        return None, 'Objet JSON attendu'
+    return data, None
+
+
+def _encode_address(name, value):
+    """Adresse 'Nom <adresse>' ou 'adresse', nom encodé RFC 2047 si besoin"""
+    display_name, address = parseaddr(value)
+    if '\r' in value or '\n' in value or '@' not in address or not address.isascii():
+        raise RenderError(f'Adresse {name} invalide: {value}')
+    return formataddr((display_name, address), charset='utf-8')
+
+
+def _encode_header(value):
+    """Valeur d'en-tête ASCII telle quelle, sinon mot encodé RFC 2047 (UTF-8)"""
+    if value.isascii():
+        return value
+    return Header(value, 'utf-8').encode()
+
+
+# Template compilé d'un processus du pool
+_worker_renderer = None
+
+
+def _init_worker(*args):
+    """Initialiseur du pool: compiler le template une fois par processus"""
+    global _worker_renderer
+    _worker_renderer = _Renderer.from_source(*args)
+
+
+def _render_chunk(chunk):
+    """Rendre un lot dans un processus du pool"""
+    return _worker_renderer.render_chunk(chunk)
+
+
+def _chunks(iterable, size):
+    """Découper un itérable en listes de size éléments"""
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+class BatchRenderService:
+    """Service de rendu d'un template pour une liste de destinataires"""
+
+    @staticmethod
+    def detect_format(filename=None, content_type=None, requested=None):
+        """
+        Déterminer le format de la liste de destinataires
+
+        Args:
+            filename: Nom du fichier envoyé
+            content_type: Type MIME
+            requested: Format explicite ('csv' ou 'ndjson')
+
+        Returns:
+            str: 'csv' ou 'ndjson'
+
+        Raises:
+            ValueError: Si format inconnu
+        """
+        if requested:
+            if requested not in INPUT_FORMATS:
+                raise ValueError(f'Format d\'entrée invalide (attendu: {", ".join(INPUT_FORMATS)})')
+            return requested
+
+        name = (filename or '').lower()
+        mimetype = (content_type or '').split(';')[0].strip().lower()
+
+        if name.endswith('.csv') or mimetype in ('text/csv', 'application/csv'):
+            return 'csv'
+        if name.endswith(('.ndjson', '.jsonl')) or mimetype in ('application/x-ndjson', 'application/jsonl'):
+            return 'ndjson'
+
+        raise ValueError('Format non reconnu: envoyer un .csv ou un .ndjson (ou préciser input)')
+
+    @staticmethod
+    def validate_output(output):
+        """
+        Vérifier le format de sortie
+
+        Args:
+            output: 'ndjson' ou 'zip'
+
+        Returns:
+            str: Format
+
+        Raises:
+            ValueError: Si format inconnu
+        """
+        if output not in OUTPUT_FORMATS:
+            raise ValueError(f'Format de sortie invalide (attendu: {", ".join(OUTPUT_FORMATS)})')
+        return output
+
+    @staticmethod
+    def iter_rows(fileobj, fmt):
+        """
+        Lignes de données d'un fichier, lues au fil de l'eau
+
+        Args:
+            fileobj: Fichier binaire
+            fmt: 'csv' ou 'ndjson'
+
+        Yields:
+            tuple: (numéro de ligne, données ou ligne NDJSON brute, erreur ou None)
+        """
+        if fmt == 'csv':
+            return BatchRenderService._iter_csv(fileobj)
+        return BatchRenderService._iter_ndjson(fileobj)
+
+    @staticmethod
+    def _iter_csv(fileobj):
+        """Une ligne de données par enregistrement CSV (hors en-tête)"""
+        text = codecs.getreader('utf-8-sig')(fileobj, errors='replace')
+        header = text.readline()
+        if not header.strip():
+            return
+
+        delimiter = max(CSV_DELIMITERS, key=header.count)
+        reader = csv.DictReader(chain([header], text), delimiter=delimiter)
+
+        for row, record in enumerate(reader, start=1):
+            # Colonnes en trop: DictReader les range sous la clé None
+            if None in record:
+                yield row, None, 'Plus de valeurs que de colonnes'
+                continue
+            yield row, {key: value or '' for key, value in record.items()}, None
+
+    @staticmethod
+    def _iter_ndjson(fileobj):
+        """Une ligne de données par ligne non vide (analysée par le processus de rendu)"""
+        row = 0
+        for line in fileobj:
+            if line.strip():
+                row += 1
+                yield row, line, None
+
+    @staticmethod
+    def render_rows(template_id, user_id, rows, output='ndjson', ordered=True, version_number=None,
+                    to_field='email', sender=None, workers=None, chunk_size=None,
+                    ip_address=None, user_agent=None):
+        """
+        Rendre un template pour chaque ligne et produire la sortie en flux
+
+        La version est résolue (et le template compilé) avant le premier
+        morceau: une erreur de template est levée immédiatement.
+
+        Args:
+            template_id: ID du template
+            user_id: ID du propriétaire
+            rows: Itérable de (ligne, données, erreur) (voir iter_rows)
+            output: 'ndjson' ou 'zip'
+            ordered: Restituer les lignes dans l'ordre du fichier
+            version_number: Version à rendre (défaut: version courante)
+            to_field: Colonne de l'adresse du destinataire
+            sender: Expéditeur des .eml
+            workers: Processus de rendu, 0 pour rendre sur place
+                     (défaut: BATCH_RENDER_WORKERS, 0: pas de fork du worker web)
+            chunk_size: Lignes par lot (défaut: BATCH_RENDER_CHUNK_SIZE)
+            ip_address: Adresse IP (log d'activité)
+            user_agent: User agent (log d'activité)
+
+        Returns:
+            iterator: Morceaux de la sortie (str pour NDJSON, bytes pour ZIP)
+
+        Raises:
+            ValueError: Si template/version introuvable ou format de sortie invalide
+            RenderError: Si le template ne compile pas
+        """
+        BatchRenderService.validate_output(output)
+
+        config = current_app.config
+        workers = config.get('BATCH_RENDER_WORKERS', 0) if workers is None else workers
+        chunk_size = chunk_size or config.get('BATCH_RENDER_CHUNK_SIZE', 200)
+
+        version = RenderService.find_version(template_id, user_id, version_number)
+        html_content, css_content = RenderService.load_version_content(template_id, version.version_number)
+
+        # Compilé ici aussi en mode pool: une erreur de syntaxe remonte avant le flux
+        compiled = RenderService.get_compiled_version(
+            template_id, version.version_number, version.created_at,
+            lambda: (html_content, css_content)
+        )
+        subject = RenderService.get_compiled_subject(template_id, version.sujet)
+
+        settings = {
+            'source': (version.sujet, html_content, css_content, output, to_field, sender),
+            'renderer': _Renderer(compiled, subject, output, to_field, sender),
+            'workers': workers,
+            'chunk_size': chunk_size,
+            'ordered': ordered,
+            'max_pending': config.get('BATCH_RENDER_MAX_PENDING') or max(2, workers * 2),
+            'mp_context': config.get('BATCH_RENDER_MP_CONTEXT')
+        }
+
+        results = BatchRenderService._iter_results(rows, settings)
+        counts = {'rows': 0, 'rendered': 0, 'failed': 0}
+
+        def counted():
+            for result in results:
+                counts['rows'] += 1
+                counts['failed' if result[1] else 'rendered'] += 1
+                yield result
+
+            ActivityLog.log_activity(
+                user_id=user_id,
+                action='TEMPLATE_BATCH_RENDERED',
+                entity_type='template',
+                entity_id=template_id,
+                details=dict(counts, version=version.version_number, output=output),
+                ip_address=ip_address,
+                user_agent=user_agent
+            )
+
+        if output == 'zip':
+            return BatchRenderService._stream_zip(counted(), counts)
+        return BatchRenderService._stream_ndjson(counted(), counts)
+
+    @staticmethod
+    def _iter_results(rows, settings):
+        """Résultats ligne par ligne, rendus sur place ou dans le pool"""
+        chunks = _chunks(rows, settings['chunk_size'])
+
+        if settings['workers'] <= 0:
+            renderer = settings['renderer']
+            for chunk in chunks:
+                yield from renderer.render_chunk(chunk)
+            return
+
+        context = multiprocessing.get_context(settings['mp_context'])
+        pool = ProcessPoolExecutor(
+            max_workers=settings['workers'],
+            mp_context=context,
+            initializer=_init_worker,
+            initargs=settings['source']
+        )
+
+        try:
+            if settings['ordered']:
+                results = BatchRenderService._dispatch_ordered(pool, chunks, settings['max_pending'])
+            else:
+                results = BatchRenderService._dispatch_unordered(pool, chunks, settings['max_pending'])
+
+            for chunk_results in results:
+                yield from chunk_results
+        finally:
+            pool.shutdown(cancel_futures=True)
+
+    @staticmethod
+    def _dispatch_ordered(pool, chunks, max_pending):
+        """Lots restitués dans l'ordre d'envoi (au plus max_pending en cours)"""
+        pending = deque()
+
+        for chunk in chunks:
+            pending.append(pool.submit(_render_chunk, chunk))
+            if len(pending) >= max_pending:
+                yield pending.popleft().result()
+
+        while pending:
+            yield pending.popleft().result()
+
+    @staticmethod
+    def _dispatch_unordered(pool, chunks, max_pending):
+        """Lots restitués dès qu'ils sont prêts (au plus max_pending en cours)"""
+        pending = set()
+
+        for chunk in chunks:
+            pending.add(pool.submit(_render_chunk, chunk))
+            if len(pending) >= max_pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield future.result()
+
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield future.result()
+
+    @staticmethod
+    def _stream_ndjson(results, counts):
+        """Une ligne NDJSON par résultat (sérialisée par le processus de rendu), puis le bilan"""
+        for _, _, line in results:
+            yield line
+
+        yield _dump(dict(counts, event='done'))
+
+    @staticmethod
+    def _stream_zip(results, counts):
+        """Un .eml par ligne rendue, puis errors.ndjson et summary.json"""
+        writer = ZipStreamWriter()
+
+        # Erreurs mises de côté (sur disque au-delà de 1 Mo) jusqu'à la fin de l'archive
+        with tempfile.SpooledTemporaryFile(max_size=1024 * 1024) as errors:
+            for row, failed, content in results:
+                if failed:
+                    errors.write(content.encode('utf-8'))
+                else:
+                    yield writer.add_deflated(f'{row:06d}.eml', content)
+
+            if counts['failed']:
+                errors.seek(0)
+                yield writer.add('errors.ndjson', errors.read())
+
+        yield writer.add('summary.json', json.dumps(counts))
+        yield from writer.finish()
@@ -0,0 +1,356 @@
+# ============================================
+# FICHIER: backend/app/services/blob_service.py
+# Service des Contenus Stockés par Empreinte
+# ============================================
+"""
+Service des contenus par empreinte - Reprise, niveaux et nettoyage
+
+    - externalize()      : stocke par empreinte les grands contenus écrits
+                           avant (templates et instantanés de versions)
+    - apply_tiering()    : passe au niveau froid (LZMA) les contenus des
+                           templates inutilisés depuis N jours
+                           (TemplateMetadata.last_used, à défaut updated_at),
+                           et ramène au niveau chaud ceux d'un template
+                           utilisé de nouveau
+    - collect_garbage()  : supprime les contenus sans référence (et, avec
+                           recount=True, recompte d'abord les références:
+                           suppressions faites directement en SQL);
+                           utilisable pendant que l'application tourne
+    - report()           : nombre, taille et niveau des contenus
+
+La lecture d'un contenu froid est transparente (décompression, puis cache
+LRU): le passage au niveau chaud n'est qu'une optimisation, faite au
+passage suivant de apply_tiering() (commande planifiée tier-content).
+
+Les lignes des templates et des versions sont réécrites sans passer par
+l'ORM: ni updated_at ni les événements des modèles ne sont touchés.
+"""
+
+import os
+import time
+from datetime import datetime, timedelta
+from flask import current_app
+from app import db
+from app.models.content_blob import ContentBlob
+from app.models.email_template import EmailTemplate
+from app.models.template_metadata import TemplateMetadata
+from app.models.template_version import TemplateVersion
+from app.utils.blob_store import blob_store
+
+
+# Tables qui référencent des contenus, et lignes dont le contenu est complet
+REFERENCING_TABLES = (
+    (EmailTemplate.__table__, None),
+    (TemplateVersion.__table__, TemplateVersion.__table__.c.delta_base_id.is_(None)),
+)
+
+
+class BlobService:
+    """Service de gestion des contenus stockés par empreinte"""
+
+    @staticmethod
+    def externalize(batch_size=200, progress=None):
+        """
+        Stocker par empreinte les grands contenus encore dans les lignes
+
+        Args:
+            batch_size: Lignes lues (et validées) par transaction
+            progress: Fonction appelée après chaque lot (table, lignes lues, réécrites)
+
+        Returns:
+            dict: {table: {'rows', 'rewritten'}}
+        """
+        results = {}
+
+        for table, condition in REFERENCING_TABLES:
+            stats = {'rows': 0, 'rewritten': 0}
+            last_id = 0
+
+            while True:
+                query = db.select(
+                    table.c.id, table.c.html_content, table.c.css_content, table.c.html_blob, table.c.css_blob
+                ).where(table.c.id > last_id).order_by(table.c.id).limit(batch_size)
+                if condition is not None:
+                    query = query.where(condition)
+
+                rows = db.session.execute(query).all()
+                if not rows:
+                    break
+
+                connection = db.session.connection()
+                for row in rows:
+                    keys = [
+                        (content_key, reference_key)
+                        for content_key, reference_key in (('html_content', 'html_blob'), ('css_content', 'css_blob'))
+                        if getattr(row, reference_key) is None and blob_store.should_store(getattr(row, content_key))
+                    ]
+                    if not keys:
+                        continue
+
+                    values = {content_key: getattr(row, content_key) for content_key, _ in keys}
+                    for digest, text in ContentBlob.references(values, keys):
+                        ContentBlob.acquire(digest, text, connection)
+
+                    # Date de modification inchangée (onupdate de email_templates)
+                    if 'updated_at' in table.c:
+                        values['updated_at'] = table.c.updated_at
+
+                    connection.execute(db.update(table).where(table.c.id == row.id).values(**values))
+                    stats['rewritten'] += 1
+
+                db.session.commit()
+                stats['rows'] += len(rows)
+                last_id = rows[-1].id
+
+                if progress:
+                    progress(table.name, stats['rows'], stats['rewritten'])
+
+            results[table.name] = stats
+
+        return results
+
+    @staticmethod
+    def _recent_references(cutoff):
+        """Empreintes référencées par les templates utilisés depuis cutoff (et leurs versions)"""
+        last_used = db.func.coalesce(TemplateMetadata.last_used, EmailTemplate.updated_at)
+        recent = db.select(EmailTemplate.id).outerjoin(
+            TemplateMetadata, TemplateMetadata.template_id == EmailTemplate.id
+        ).where(last_used >= cutoff)
+
+        selects = []
+        for model, owner in ((EmailTemplate, EmailTemplate.id), (TemplateVersion, TemplateVersion.template_id)):
+            for reference in (model.html_blob, model.css_blob):
+                # Pas de NULL: la liste sert à un NOT IN
+                selects.append(db.select(reference).where(owner.in_(recent), reference.isnot(None)))
+
+        return db.union(*selects)
+
+    @staticmethod
+    def apply_tiering(days=None, dry_run=False, batch_size=100):
+        """
+        Passer au niveau froid les contenus des templates inutilisés, et
+        ramener au niveau chaud ceux des templates de nouveau utilisés
+
+        Un contenu partagé reste chaud tant qu'un template récent y fait référence.
+
+        Args:
+            days: Jours sans utilisation (défaut: CONTENT_COLD_AFTER_DAYS)
+            dry_run: Compter sans rien déplacer
+            batch_size: Contenus déplacés par transaction
+
+        Returns:
+            dict: days, cutoff, frozen, thawed, frozen_bytes, thawed_bytes, dry_run
+        """
+        days = days if days is not None else current_app.config.get('CONTENT_COLD_AFTER_DAYS', 90)
+        cutoff = datetime.utcnow() - timedelta(days=days)
+        recent = BlobService._recent_references(cutoff)
+
+        moves = (
+            ('frozen', True, db.and_(ContentBlob.tier == 'hot', ContentBlob.hash.notin_(recent))),
+            ('thawed', False, db.and_(ContentBlob.tier == 'cold', ContentBlob.hash.in_(recent))),
+        )
+        result = {'days': days, 'cutoff': cutoff.isoformat(), 'dry_run': dry_run}
+
+        for key, cold, condition in moves:
+            count, size = db.session.execute(
+                db.select(db.func.count(), db.func.coalesce(db.func.sum(ContentBlob.size), 0)).where(condition)
+            ).one()
+            result[key], result[f'{key}_bytes'] = count, int(size)
+
+            if dry_run:
+                continue
+
+            while True:
+                digests = db.session.execute(
+                    db.select(ContentBlob.hash).where(condition).limit(batch_size)
+                ).scalars().all()
+                if not digests:
+                    break
+                for digest in digests:
+                    BlobService._move(digest, cold)
+                db.session.commit()
+
+        return result
+
+    @staticmethod
+    def _move(digest, cold):
+        """Changer le niveau d'un contenu (ligne, et fichier pour le backend 'fs')"""
+        table = ContentBlob.__table__
+        row = db.session.execute(
+            db.select(table.c.data, table.c.cold_data).where(table.c.hash == digest)
+        ).one()
+
+        values = {'tier': 'cold' if cold else 'hot'}
+        if row.data is not None or row.cold_data is not None:
+            text = blob_store.resolve(digest, row.data, row.cold_data)
+            values['data'], values['cold_data'] = (None, blob_store.freeze(text)) if cold else (text, None)
+        else:
+            blob_store.move(digest, cold)
+
+        db.session.execute(db.update(table).where(table.c.hash == digest).values(**values))
+
+    @staticmethod
+    def _references(blob):
+        """Colonnes qui référencent un contenu, corrélées à la ligne blob"""
+        return [
+            column == blob.c.hash
+            for table, _ in REFERENCING_TABLES
+            for column in (table.c.html_blob, table.c.css_blob)
+        ]
+
+    @staticmethod
+    def recount(batch_size=500, progress=None):
+        """
+        Recalculer les compteurs de références à partir des lignes
+
+        Chaque compteur est recalculé par l'UPDATE qui l'écrit (sous-requête
+        corrélée, ligne verrouillée): une référence ajoutée pendant le
+        recomptage n'est jamais écrasée par un comptage plus ancien.
+        Utilisable pendant que l'application sert des requêtes.
+
+        Args:
+            batch_size: Contenus recomptés par transaction
+            progress: Fonction appelée après chaque lot (contenus lus, corrigés)
+
+        Returns:
+            int: Contenus dont le compteur a été corrigé
+        """
+        table = ContentBlob.__table__
+        counts = [
+            db.select(db.func.count()).where(reference).scalar_subquery()
+            for reference in BlobService._references(table)
+        ]
+        expected = sum(counts[1:], counts[0])
+
+        fixed = 0
+        seen = 0
+        last_hash = ''
+        while True:
+            digests = db.session.execute(
+                db.select(table.c.hash).where(table.c.hash > last_hash).order_by(table.c.hash).limit(batch_size)
+            ).scalars().all()
+            if not digests:
+                break
+
+            fixed += db.session.execute(
+                db.update(table)
+                .where(table.c.hash.in_(digests), table.c.ref_count != expected)
+                .values(ref_count=expected)
+                .execution_options(synchronize_session=False)
+            ).rowcount
+            db.session.commit()
+
+            seen += len(digests)
+            last_hash = digests[-1]
+            if progress:
+                progress(seen, fixed)
+
+        return fixed
+
+    @staticmethod
+    def collect_garbage(recount=False, grace_seconds=3600):
+        """
+        Supprimer les contenus sans référence
+
+        Un contenu n'est supprimé que si son compteur est à 0 et qu'aucune
+        ligne ne le référence au moment du DELETE (compteur faux ou
+        référence ajoutée entre-temps: le contenu est conservé).
+
+        Backend 'fs': les fichiers sans ligne sont supprimés après un délai
+        de grâce (un contenu en cours de création a son fichier avant sa ligne).
+
+        Args:
+            recount: Recalculer d'abord les compteurs (voir recount)
+            grace_seconds: Âge minimum d'un fichier orphelin supprimé
+
+        Returns:
+            dict: recounted, deleted, files_removed
+        """
+        recounted = BlobService.recount() if recount else 0
+
+        table = ContentBlob.__table__
+        unreferenced = [~db.exists().where(reference) for reference in BlobService._references(table)]
+        deleted = db.session.execute(
+            db.delete(table).where(table.c.ref_count <= 0, *unreferenced)
+        ).rowcount
+        db.session.commit()
+
+        files_removed = 0
+        if blob_store.backend == 'fs':
+            files_removed = BlobService._remove_orphan_files(grace_seconds)
+
+        return {'recounted': recounted, 'deleted': deleted, 'files_removed': files_removed}
+
+    @staticmethod
+    def _remove_orphan_files(grace_seconds):
+        """Supprimer les fichiers anciens dont l'empreinte n'a plus de ligne"""
+        limit = time.time() - grace_seconds
+        candidates = {}
+
+        for level in ('hot', 'cold'):
+            root = os.path.join(blob_store.directory, level)
+            for folder, _, names in os.walk(root):
+                for name in names:
+                    path = os.path.join(folder, name)
+                    if name.startswith('.tmp-') or os.path.getmtime(path) > limit:
+                        continue
+                    candidates.setdefault(name.split('.')[0], []).append(path)
+
+        removed = 0
+        digests = list(candidates)
+        for start in range(0, len(digests), 500):
+            chunk = digests[start:start + 500]
+            existing = set(db.session.execute(
+                db.select(ContentBlob.hash).where(ContentBlob.hash.in_(chunk))
+            ).scalars())
+            for digest in chunk:
+                if digest in existing:
+                    continue
+                for path in candidates[digest]:
+                    try:
+                        os.unlink(path)
+                        removed += 1
+                    except FileNotFoundError:
+                        pass
+
+        return removed
+
+    @staticmethod
+    def report():
+        """
+        Contenus stockés par empreinte, par niveau
+
+        referenced_bytes est la taille des contenus autant de fois qu'ils
+        sont référencés (ce qu'occuperaient des copies), stored_bytes leur
+        taille une fois chacun.
+
+        Returns:
+            dict: backend, tiers {niveau: {'blobs', 'bytes'}}, blobs, references,
+            stored_bytes, referenced_bytes, unreferenced
+        """
+        tiers = {
+            tier: {'blobs': count, 'bytes': int(size or 0)}
+            for tier, count, size in db.session.execute(
+                db.select(ContentBlob.tier, db.func.count(), db.func.sum(ContentBlob.size))
+                .group_by(ContentBlob.tier)
+            )
+        }
+        blobs, references, stored, referenced, unreferenced = db.session.execute(
+            db.select(
+                db.func.count(),
+                db.func.coalesce(db.func.sum(ContentBlob.ref_count), 0),
+                db.func.coalesce(db.func.sum(ContentBlob.size), 0),
+                db.func.coalesce(db.func.sum(ContentBlob.size * ContentBlob.ref_count), 0),
+                db.func.coalesce(db.func.sum(db.case((ContentBlob.ref_count <= 0, 1), else_=0)), 0)
+            )
+        ).one()
+
+        return {
+            'backend': blob_store.backend,
+            'tiers': tiers,
+            'blobs': blobs,
+            'references': int(references),
+            'stored_bytes': int(stored),
+            'referenced_bytes': int(referenced),
+            'unreferenced': int(unreferenced)
+        }
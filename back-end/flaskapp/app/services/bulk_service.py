@@ -0,0 +1,460 @@
+# ============================================
+# FICHIER: backend/app/services/bulk_service.py
+# Service d'Opérations Groupées sur les Templates
+# ============================================
+"""
+Service d'opérations groupées - Plusieurs opérations, une transaction
+
+Opérations supportées (clé 'op'):
+    - create        : nom, sujet, html_content, css_content, category, tags
+    - update        : id + nom / sujet / html_content / css_content / change_description
+    - delete        : id, soft (défaut: true)
+    - restore       : id
+    - move_category : id, category (null pour retirer la catégorie)
+    - add_tags      : id, tags
+    - remove_tags   : id, tags
+    - set_favorite  : id, favorite
+
+Les templates référencés sont chargés en une requête, les numéros de
+version réservés sur le compteur de chaque template modifié (voir
+TemplateVersion.allocate_version_number). Versions, métadonnées, résultats de
+validation et documents de recherche sont insérés en une instruction
+multi-lignes par table. Seuls les templates créés sont insérés ligne par
+ligne (un seul flush): leur id est nécessaire aux autres tables et ni MySQL
+ni SQLite ne renvoient des ids ordonnés pour un INSERT multi-lignes.
+Un seul commit pour tout le lot, puis un seul INSERT pour les logs.
+
+atomic=True (défaut): une opération invalide annule tout le lot.
+atomic=False: les opérations invalides sont ignorées, les autres appliquées.
+"""
+
+from datetime import datetime
+from flask import current_app
+from sqlalchemy.orm.attributes import set_committed_value
+from app import db
+from app.models.content_blob import ContentBlob
+from app.models.email_template import EmailTemplate
+from app.models.template_version import TemplateVersion
+from app.models.template_metadata import TemplateMetadata
+from app.models.validation_result import ValidationResult
+from app.models.activity_log import ActivityLog
+from app.services.validation_service import ValidationService
+from app.services.search_service import SearchService
+
+
+OPERATIONS = (
+    'create', 'update', 'delete', 'restore',
+    'move_category', 'add_tags', 'remove_tags', 'set_favorite'
+)
+
+
+def _required_text(op, field):
+    """Valeur texte non vide d'une opération"""
+    value = op.get(field)
+    if not isinstance(value, str) or not value.strip():
+        raise ValueError(f'Le champ {field} est requis')
+    return value
+
+
+def _normalize_css(css):
+    """None ou blanc -> '' (même règle que TemplateService)"""
+    if css is None or (isinstance(css, str) and not css.strip()):
+        return ''
+    if not isinstance(css, str):
+        raise ValueError('Le champ css_content doit être une chaîne')
+    return css
+
+
+def _tag_list(op):
+    """Liste de tags d'une opération"""
+    tags = op.get('tags')
+    if not isinstance(tags, list) or not all(isinstance(tag, str) and tag.strip() for tag in tags):
+        raise ValueError('Le champ tags doit être une liste de chaînes non vides')
+    return [tag.strip() for tag in tags]
+
+
+class _BulkBatch:
+    """État d'un lot en cours (templates chargés, lignes à insérer, logs)"""
+
+    def __init__(self, user_id, operations, ip_address=None, user_agent=None):
+        self.user_id = user_id
+        self.ip_address = ip_address
+        self.user_agent = user_agent
+
+        ids = {op.get('id') for op in operations if isinstance(op, dict) and isinstance(op.get('id'), int)}
+
+        # Templates référencés (une requête, métadonnées jointes)
+        self.templates = {
+            t.id: t for t in EmailTemplate.query.options(
+                db.joinedload(EmailTemplate.template_metadata)
+            ).filter(
+                EmailTemplate.id.in_(ids),
+                EmailTemplate.user_id == user_id
+            ).all()
+        } if ids else {}
+
+        self.created = []           # (template, métadonnées, validation, résultat)
+        self.version_rows = []
+        self.validation_rows = []
+        self.hard_deleted = set()
+        self.indexed = {}           # templates dont le document de recherche change
+        self.activities = []
+
+    # ---- Accès -------------------------------------------------------
+
+    def template(self, op):
+        """Template référencé par op['id'] (appartenant à l'utilisateur)"""
+        template_id = op.get('id')
+        if not isinstance(template_id, int):
+            raise ValueError('Le champ id est requis')
+        if template_id in self.hard_deleted:
+            raise ValueError('Template supprimé plus tôt dans ce lot')
+
+        template = self.templates.get(template_id)
+        if template is None:
+            raise ValueError('Template non trouvé ou accès non autorisé')
+        return template
+
+    def metadata(self, template):
+        """Métadonnées du template (créées si absentes)"""
+        if template.template_metadata is None:
+            template.template_metadata = TemplateMetadata(template_id=template.id)
+        return template.template_metadata
+
+    def log(self, action, template_id, details):
+        """Ajouter un log d'activité (écrit après le commit)"""
+        self.activities.append({
+            'user_id': self.user_id,
+            'action': action,
+            'entity_type': 'template',
+            'entity_id': template_id,
+            'details': details,
+            'ip_address': self.ip_address,
+            'user_agent': self.user_agent
+        })
+
+    def validation_row(self, template_id, result):
+        """Ligne validation_results pour un résultat de ValidationService"""
+        return {
+            'template_id': template_id,
+            'is_valid': result['is_valid'],
+            'html_valid': result['html_valid'],
+            'css_valid': result['css_valid'],
+            'errors': result['errors'],
+            'warnings': result['warnings']
+        }
+
+    def version_row(self, template_id, version_number, html_content, css_content, description):
+        """Ligne template_versions (instantané complet)"""
+        return {
+            'template_id': template_id,
+            'version_number': version_number,
+            'html_content': html_content,
+            'css_content': css_content,
+            **TemplateVersion.content_stats(html_content, css_content),
+            'change_description': description,
+            'created_by': self.user_id,
+            'ip_address': self.ip_address,
+            'user_agent': self.user_agent
+        }
+
+    # ---- Opérations --------------------------------------------------
+    # Chaque opération valide toutes ses entrées avant de modifier quoi que ce soit
+
+    def create(self, op):
+        nom = _required_text(op, 'nom').strip()
+        sujet = _required_text(op, 'sujet').strip()
+        html_content = _required_text(op, 'html_content')
+        css_content = _normalize_css(op.get('css_content'))
+        tags = _tag_list(op) if op.get('tags') is not None else []
+        category = op.get('category')
+        if category is not None and not isinstance(category, str):
+            raise ValueError('Le champ category doit être une chaîne ou null')
+
+        validation_result = ValidationService.validate_template(html_content, css_content)
+
+        template = EmailTemplate(
+            user_id=self.user_id,
+            nom=nom,
+            sujet=sujet,
+            html_content=html_content,
+            css_content=css_content
+        )
+        metadata = TemplateMetadata(template_id=None, category=category, tags=tags)
+
+        db.session.add(template)
+
+        outcome = {'status': 'created'}
+        self.created.append((template, metadata, validation_result, outcome))
+        return outcome
+
+    def update(self, op):
+        template = self.template(op)
+        changes = {}
+
+        for field in ('nom', 'sujet'):
+            if field in op:
+                changes[field] = _required_text(op, field).strip()
+        if 'html_content' in op:
+            changes['html_content'] = _required_text(op, 'html_content')
+        if 'css_content' in op:
+            changes['css_content'] = _normalize_css(op['css_content'])
+
+        changes = {
+            field: value for field, value in changes.items()
+            if value != (getattr(template, field) or '')
+        }
+
+        if not changes:
+            return {'status': 'unchanged', 'id': template.id}
+
+        if 'html_content' in changes or 'css_content' in changes:
+            html = changes.get('html_content', template.html_content)
+            css = changes.get('css_content', template.css_content or '')
+            validation_result = ValidationService.validate_template(html, css)
+
+            # Numéro réservé jusqu'à la fin du lot (compteur du template)
+            version_number = TemplateVersion.allocate_version_number(template.id)
+
+            self.version_rows.append(self.version_row(
+                template.id, version_number, html, css,
+                op.get('change_description') or f'Mise à jour - Version {version_number}'
+            ))
+            self.validation_rows.append(self.validation_row(template.id, validation_result))
+
+        for field, value in changes.items():
+            setattr(template, field, value)
+
+        self.indexed[template.id] = template
+        self.log('TEMPLATE_UPDATED', template.id, {'fields': list(changes), 'bulk': True})
+
+        return {'status': 'updated', 'id': template.id}
+
+    def delete(self, op):
+        template = self.template(op)
+        soft = op.get('soft', True)
+
+        if not isinstance(soft, bool):
+            raise ValueError('Le champ soft doit être un booléen')
+
+        if soft:
+            template.is_active = False
+            template.updated_at = datetime.utcnow()
+            self.indexed[template.id] = template
+        else:
+            self.hard_deleted.add(template.id)
+            self.indexed.pop(template.id, None)
+
+        self.log('TEMPLATE_DELETED', template.id, {'soft_delete': soft, 'nom': template.nom, 'bulk': True})
+
+        return {'status': 'deleted', 'id': template.id, 'soft': soft}
+
+    def restore(self, op):
+        template = self.template(op)
+
+        template.is_active = True
+        template.updated_at = datetime.utcnow()
+        self.indexed[template.id] = template
+        self.log('TEMPLATE_RESTORED', template.id, {'nom': template.nom, 'bulk': True})
+
+        return {'status': 'restored', 'id': template.id}
+
+    def move_category(self, op):
+        template = self.template(op)
+
+        if 'category' not in op:
+            raise ValueError('Le champ category est requis')
+        category = op['category']
+        if category is not None and not isinstance(category, str):
+            raise ValueError('Le champ category doit être une chaîne ou null')
+
+        self.metadata(template).category = category.strip() if category and category.strip() else None
+        return self._metadata_updated(template, op, {'category': category})
+
+    def add_tags(self, op):
+        template = self.template(op)
+        tags = _tag_list(op)
+
+        metadata = self.metadata(template)
+        current = list(metadata.tags or [])
+        metadata.tags = current + [tag for tag in dict.fromkeys(tags) if tag not in current]
+        return self._metadata_updated(template, op, {'tags': tags})
+
+    def remove_tags(self, op):
+        template = self.template(op)
+        tags = set(_tag_list(op))
+
+        metadata = self.metadata(template)
+        metadata.tags = [tag for tag in (metadata.tags or []) if tag not in tags]
+        return self._metadata_updated(template, op, {'tags': sorted(tags)})
+
+    def set_favorite(self, op):
+        template = self.template(op)
+        favorite = op.get('favorite')
+
+        if not isinstance(favorite, bool):
+            raise ValueError('Le champ favorite doit être un booléen')
+
+        self.metadata(template).favorite = favorite
+        return self._metadata_updated(template, op, {'favorite': favorite})
+
+    def _metadata_updated(self, template, op, details):
+        """Index et log communs aux opérations sur les métadonnées"""
+        self.indexed[template.id] = template
+        self.log('TEMPLATE_METADATA_UPDATED', template.id, dict(details, op=op['op'], bulk=True))
+        return {'status': 'updated', 'id': template.id}
+
+    # ---- Écriture ----------------------------------------------------
+
+    def flush(self):
+        """Écrire le lot (le commit reste à la charge de l'appelant)"""
+        metadata_rows = []
+
+        # Templates créés: un flush pour obtenir leurs ids
+        if self.created:
+            db.session.flush()
+
+            for template, metadata, validation_result, outcome in self.created:
+                outcome['id'] = template.id
+
+                metadata.template_id = template.id
+                metadata_rows.append({
+                    'template_id': template.id,
+                    'category': metadata.category,
+                    'tags': metadata.tags,
+                    'usage_count': 0,
+                    'favorite': False,
+                    'shared': False,
+                    'shared_with': []
+                })
+                # Relation renseignée hors session (ligne insérée en lot ci-dessous),
+                # lue par l'index de recherche sans requête supplémentaire
+                set_committed_value(template, 'template_metadata', metadata)
+
+                self.version_rows.append(self.version_row(
+                    template.id, 1, template.html_content, template.css_content, 'Version initiale'
+                ))
+                self.validation_rows.append(self.validation_row(template.id, validation_result))
+                self.indexed[template.id] = template
+                self.log('TEMPLATE_CREATED', template.id, {
+                    'nom': template.nom,
+                    'has_css': bool(template.css_content),
+                    'validation_status': 'valid' if validation_result['is_valid'] else 'invalid_but_allowed',
+                    'bulk': True
+                })
+
+        if metadata_rows:
+            db.session.execute(db.insert(TemplateMetadata.__table__), metadata_rows)
+        if self.version_rows:
+            db.session.execute(db.insert(TemplateVersion.__table__), ContentBlob.store_values(self.version_rows))
+        if self.validation_rows:
+            db.session.execute(db.insert(ValidationResult.__table__), self.validation_rows)
+
+        SearchService.index_templates(list(self.indexed.values()))
+
+        if self.hard_deleted:
+            self._delete_templates(list(self.hard_deleted))
+
+    def _delete_templates(self, ids):
+        """Supprimer définitivement des templates et leurs lignes liées (une requête par table)"""
+        for template_id in ids:
+            db.session.expunge(self.templates[template_id])
+
+        # Références des contenus stockés par empreinte (les DELETE ne passent pas par l'ORM)
+        connection = db.session.connection()
+        for model, owner in ((EmailTemplate, EmailTemplate.id), (TemplateVersion, TemplateVersion.template_id)):
+            references = connection.execute(
+                db.select(model.html_blob, model.css_blob).where(
+                    owner.in_(ids), db.or_(model.html_blob.isnot(None), model.css_blob.isnot(None))
+                )
+            ).all()
+            ContentBlob.release([digest for row in references for digest in row], connection)
+
+        SearchService.remove_templates(ids)
+        for model in (TemplateVersion, ValidationResult, TemplateMetadata):
+            db.session.execute(
+                db.delete(model).where(model.template_id.in_(ids)).execution_options(synchronize_session=False)
+            )
+        db.session.execute(
+            db.delete(EmailTemplate).where(EmailTemplate.id.in_(ids)).execution_options(synchronize_session=False)
+        )
+
+
+class BulkService:
+    """Service appliquant des lots d'opérations sur les templates"""
+
+    @staticmethod
+    def apply(user_id, operations, atomic=True, ip_address=None, user_agent=None):
+        """
+        Appliquer un lot d'opérations en une transaction
+
+        Args:
+            user_id: ID du propriétaire
+            operations: Liste de dicts {'op': ..., ...} (voir OPERATIONS)
+            atomic: Annuler tout le lot si une opération est invalide
+            ip_address: Adresse IP
+            user_agent: User agent
+
+        Returns:
+            dict: results (statut par opération, dans l'ordre), succeeded,
+                  failed, applied (False si le lot a été annulé)
+
+        Raises:
+            ValueError: Si le lot lui-même est invalide (vide, trop grand)
+        """
+        if not isinstance(operations, list) or not operations:
+            raise ValueError('Le champ operations doit être une liste non vide')
+
+        max_operations = current_app.config.get('BULK_MAX_OPERATIONS', 500)
+        if len(operations) > max_operations:
+            raise ValueError(f'Trop d\'opérations: {len(operations)} (maximum {max_operations})')
+
+        batch = _BulkBatch(user_id, operations, ip_address, user_agent)
+        outcomes = []
+
+        for op in operations:
+            try:
+                if not isinstance(op, dict) or op.get('op') not in OPERATIONS:
+                    raise ValueError(f'Opération inconnue (attendu: {", ".join(OPERATIONS)})')
+                outcomes.append(getattr(batch, op['op'])(op))
+            except ValueError as e:
+                outcomes.append({'status': 'error', 'message': str(e)})
+
+        failed = sum(1 for outcome in outcomes if outcome['status'] == 'error')
+        applied = not (atomic and failed)
+
+        if applied:
+            try:
+                batch.flush()
+                db.session.commit()
+            except Exception as e:
+                db.session.rollback()
+                current_app.logger.error(f'❌ Erreur lot de templates: {str(e)}')
+                raise ValueError(f'Erreur sauvegarde: {str(e)}')
+
+            ActivityLog.log_activities(batch.activities)
+        else:
+            db.session.rollback()
+
+        results = []
+        for index, (op, outcome) in enumerate(zip(operations, outcomes)):
+            result = {'index': index, 'op': op.get('op') if isinstance(op, dict) else None}
+
+            if outcome['status'] != 'error' and not applied:
+                result['status'] = 'skipped'
+            else:
+                result.update(outcome)
+
+            results.append(result)
+
+        current_app.logger.info(
+            f'Lot de {len(operations)} opération(s) pour user {user_id}: '
+            f'{len(operations) - failed} ok, {failed} erreur(s), appliqué={applied}'
+        )
+
+        return {
+            'results': results,
+            'succeeded': len(operations) - failed if applied else 0,
+            'failed': failed,
+            'applied': applied
+        }
@@ -0,0 +1,121 @@
+# ============================================
+# FICHIER: backend/app/services/content_compression_service.py
+# Service de Compression des Contenus Stockés
+# ============================================
+"""
+Service de compression des contenus - Reprise des lignes existantes
+
+Après la migration des colonnes en LONGBLOB, les contenus écrits avant
+restent du texte brut (lisible, voir CompressedText). backfill() les
+réécrit compressés, par lots d'ids croissants validés un à un: l'application
+reste en service pendant la reprise, qui peut être interrompue et relancée.
+
+Les lignes sont réécrites sans passer par l'ORM: ni updated_at ni les
+événements des modèles (cache des aperçus, index de recherche) ne sont
+touchés, le contenu lu est identique.
+"""
+
+from app import db
+from app.models.email_template import EmailTemplate
+from app.models.template_version import TemplateVersion
+from app.utils.compressed_text import content_codec, ContentCodec
+
+
+# Tables et colonnes CompressedText
+COMPRESSED_COLUMNS = (
+    (EmailTemplate.__table__, ('html_content', 'css_content')),
+    (TemplateVersion.__table__, ('html_content', 'css_content')),
+)
+
+
+class ContentCompressionService:
+    """Service de reprise et de statistiques des contenus compressés"""
+
+    @staticmethod
+    def backfill(batch_size=200, recompress=False, progress=None):
+        """
+        Compresser les contenus écrits avant la migration
+
+        Args:
+            batch_size: Lignes lues (et validées) par transaction
+            recompress: Réécrire aussi les contenus compressés avec un autre algorithme
+            progress: Fonction appelée après chaque lot (table, lignes lues, réécrites)
+
+        Returns:
+            dict: {table: {'rows', 'rewritten'}}
+        """
+        results = {}
+
+        for table, names in COMPRESSED_COLUMNS:
+            # Valeurs brutes (sans décompression) pour reconnaître leur format
+            raw = [db.type_coerce(table.c[name], db.LargeBinary()).label(name) for name in names]
+            stats = {'rows': 0, 'rewritten': 0}
+            last_id = 0
+
+            while True:
+                rows = db.session.execute(
+                    db.select(table.c.id, *raw)
+                    .where(table.c.id > last_id)
+                    .order_by(table.c.id)
+                    .limit(batch_size)
+                ).all()
+                if not rows:
+                    break
+
+                for row in rows:
+                    values = {
+                        name: content_codec.decode(value)
+                        for name, value in zip(names, row[1:])
+                        if value is not None and content_codec.needs_rewrite(value, recompress)
+                    }
+                    if not values:
+                        continue
+
+                    # Date de modification inchangée (onupdate de email_templates)
+                    if 'updated_at' in table.c:
+                        values['updated_at'] = table.c.updated_at
+
+                    db.session.execute(db.update(table).where(table.c.id == row.id).values(**values))
+                    stats['rewritten'] += 1
+
+                db.session.commit()
+                stats['rows'] += len(rows)
+                last_id = rows[-1].id
+
+                if progress:
+                    progress(table.name, stats['rows'], stats['rewritten'])
+
+            results[table.name] = stats
+
+        return results
+
+    @staticmethod
+    def report():
+        """
+        Formats et taille stockée des contenus, par table et colonne
+
+        Returns:
+            dict: {table: {colonne: {'bytes', 'formats': {format: lignes}}}}
+        """
+        report = {}
+
+        for table, names in COMPRESSED_COLUMNS:
+            report[table.name] = {}
+            for name in names:
+                column = table.c[name]
+                marker = db.func.substr(db.type_coerce(column, db.LargeBinary()), 1, 2)
+
+                formats = {}
+                total = 0
+                for value, count, size in db.session.execute(
+                    db.select(marker, db.func.count(), db.func.sum(db.func.length(column)))
+                    .where(column.isnot(None))
+                    .group_by(marker)
+                ):
+                    fmt = ContentCodec.format_of(value)
+                    formats[fmt] = formats.get(fmt, 0) + count
+                    total += int(size or 0)
+
+                report[table.name][name] = {'bytes': total, 'formats': formats}
+
+        return report
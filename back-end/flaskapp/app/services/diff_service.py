@@ -0,0 +1,282 @@
+# ============================================
+# FICHIER: backend/app/services/diff_service.py
+# Service de Différences entre Contenus
+# ============================================
+"""
+Service de différences - Comparaison ligne à ligne (et mot à mot) de HTML/CSS
+
+Résultat: des blocs de modifications (hunks) entourés de `context` lignes
+inchangées, à la manière d'un diff unifié, au lieu des deux documents:
+    {"changed", "old_lines", "new_lines", "added", "removed", "approximate",
+     "hunks": [{"old_start", "old_lines", "new_start", "new_lines",
+                "lines": [{"op": " "|"-"|"+", "text", "old", "new",
+                           "highlights": [[début, fin], ...]}]}]}
+
+Normalisation (par défaut): fins de ligne unifiées, espaces de début et de
+fin retirés, blancs consécutifs réduits, lignes vides ignorées; en HTML
+chaque balise qui suit une autre passe à la ligne ('><'), en CSS chaque
+déclaration et chaque accolade. Un HTML minifié sur une seule ligne donne
+ainsi un diff lisible, et une réindentation n'apparaît pas. Les numéros de
+ligne se rapportent alors au texte normalisé.
+
+Mode 'word': dans un bloc remplacé, chaque ligne supprimée est comparée à
+la ligne ajoutée de même rang; 'highlights' donne les positions des mots
+modifiés.
+
+Taille: la comparaison des lignes (app.utils.sequence_diff) ne confie à
+difflib que les zones de moins de DIFF_MAX_CELLS (lignes avant x lignes
+après); au-delà, elle découpe sur les lignes uniques des deux côtés. Une
+zone trop grande sans ancre est rendue comme un bloc remplacé; le résultat
+est alors marqué "approximate".
+"""
+
+import re
+from difflib import SequenceMatcher
+from app.utils.sequence_diff import DEFAULT_MAX_CELLS, opcodes as sequence_opcodes
+
+
+MODES = ('line', 'word')
+
+_WHITESPACE = re.compile(r'\s+')
+_HTML_BREAK = re.compile(r'>\s*<')
+_CSS_BREAK = re.compile(r'([{};])')
+_TOKEN = re.compile(r'\w+|\s+|[^\w\s]', re.UNICODE)
+
+
+def normalize_html(text):
+    """
+    Lignes normalisées d'un HTML (une balise par ligne si elles se suivent)
+
+    Args:
+        text: Contenu HTML
+
+    Returns:
+        list: Lignes non vides, blancs réduits
+    """
+    text = _HTML_BREAK.sub('>\n<', (text or '').replace('\r\n', '\n').replace('\r', '\n'))
+    return _clean_lines(text)
+
+
+def normalize_css(text):
+    """
+    Lignes normalisées d'un CSS (une déclaration ou accolade par ligne,
+    espacement canonique: 'p {', 'color: red;')
+
+    Args:
+        text: Contenu CSS
+
+    Returns:
+        list: Lignes non vides, blancs réduits
+    """
+    text = _CSS_BREAK.sub('\\1\n', (text or '').replace('\r\n', '\n').replace('\r', '\n'))
+    return [_css_line(line) for line in _clean_lines(text.replace('}', '\n}'))]
+
+
+def _css_line(line):
+    """Forme canonique d'une ligne CSS: 'sélecteur {', 'propriété: valeur;', '}'"""
+    if line.endswith('{'):
+        return line[:-1].rstrip() + ' {'
+    if line == '}':
+        return line
+    prop, colon, value = line.rstrip(';').partition(':')
+    if not colon:
+        return line
+    return f'{prop.rstrip()}: {value.strip()};'
+
+
+def _clean_lines(text):
+    """Lignes sans blancs superflus, vides retirées"""
+    lines = []
+    for line in text.split('\n'):
+        line = _WHITESPACE.sub(' ', line).strip()
+        if line:
+            lines.append(line)
+    return lines
+
+
+def _raw_lines(text):
+    """Lignes telles quelles (fins de ligne unifiées)"""
+    text = (text or '').replace('\r\n', '\n').replace('\r', '\n')
+    return text.split('\n') if text else []
+
+
+def _group(ops, context):
+    """
+    Regrouper les opérations en blocs entourés de `context` lignes inchangées
+    (même découpage que difflib.SequenceMatcher.get_grouped_opcodes)
+    """
+    ops = list(ops)
+    if ops[0][0] == 'equal':
+        tag, i1, i2, j1, j2 = ops[0]
+        ops[0] = tag, max(i1, i2 - context), i2, max(j1, j2 - context), j2
+    if ops[-1][0] == 'equal':
+        tag, i1, i2, j1, j2 = ops[-1]
+        ops[-1] = tag, i1, min(i2, i1 + context), j1, min(j2, j1 + context)
+
+    groups = []
+    group = []
+    for tag, i1, i2, j1, j2 in ops:
+        # Longue plage inchangée: fin du bloc courant, début du suivant
+        if tag == 'equal' and i2 - i1 > 2 * context:
+            group.append((tag, i1, min(i2, i1 + context), j1, min(j2, j1 + context)))
+            groups.append(group)
+            group = []
+            i1, j1 = max(i1, i2 - context), max(j1, j2 - context)
+        group.append((tag, i1, i2, j1, j2))
+
+    if group and not (len(group) == 1 and group[0][0] == 'equal'):
+        groups.append(group)
+    return groups
+
+
+def _highlights(old, new, max_cells):
+    """
+    Positions des mots modifiés entre deux lignes
+
+    Returns:
+        tuple: (plages dans old, plages dans new), None si lignes trop longues
+    """
+    old_tokens = _TOKEN.findall(old)
+    new_tokens = _TOKEN.findall(new)
+    if len(old_tokens) * len(new_tokens) > max_cells:
+        return None
+
+    old_offsets = _offsets(old_tokens)
+    new_offsets = _offsets(new_tokens)
+    old_ranges, new_ranges = [], []
+
+    matcher = SequenceMatcher(None, old_tokens, new_tokens, autojunk=False)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == 'equal':
+            continue
+        if i2 > i1:
+            old_ranges.append([old_offsets[i1], old_offsets[i2]])
+        if j2 > j1:
+            new_ranges.append([new_offsets[j1], new_offsets[j2]])
+    return old_ranges, new_ranges
+
+
+def _offsets(tokens):
+    """Position de début de chaque mot (plus la fin du texte)"""
+    offsets = [0]
+    for token in tokens:
+        offsets.append(offsets[-1] + len(token))
+    return offsets
+
+
+class DiffService:
+    """Service de comparaison de contenus"""
+
+    @staticmethod
+    def validate_options(context, mode):
+        """
+        Vérifier les options de comparaison
+
+        Args:
+            context: Lignes inchangées autour de chaque bloc
+            mode: 'line' ou 'word'
+
+        Raises:
+            ValueError: Si option invalide
+        """
+        if context is None or context < 0:
+            raise ValueError('context doit être un entier positif ou nul')
+        if mode not in MODES:
+            raise ValueError(f'Mode invalide (attendu: {", ".join(MODES)})')
+
+    @staticmethod
+    def diff(old_text, new_text, kind='html', context=3, mode='line', normalize=True,
+             max_cells=DEFAULT_MAX_CELLS):
+        """
+        Comparer deux contenus
+
+        Args:
+            old_text: Contenu d'origine
+            new_text: Nouveau contenu
+            kind: 'html' ou 'css' (règles de normalisation)
+            context: Lignes inchangées autour de chaque bloc
+            mode: 'line' ou 'word' (positions des mots modifiés)
+            normalize: Normaliser les blancs et les retours à la ligne
+            max_cells: Taille maximum d'une comparaison fine (lignes x lignes)
+
+        Returns:
+            dict: changed, old_lines, new_lines, added, removed, approximate, hunks
+        """
+        if normalize:
+            split = normalize_css if kind == 'css' else normalize_html
+        else:
+            split = _raw_lines
+
+        old_lines = split(old_text)
+        new_lines = split(new_text)
+
+        ops, approximate = sequence_opcodes(old_lines, new_lines, max_cells)
+
+        added = sum(j2 - j1 for tag, _, _, j1, j2 in ops if tag != 'equal')
+        removed = sum(i2 - i1 for tag, i1, i2, _, _ in ops if tag != 'equal')
+
+        hunks = [
+            DiffService._hunk(group, old_lines, new_lines, mode, max_cells)
+            for group in _group(ops, context)
+        ] if added or removed else []
+
+        return {
+            'changed': bool(added or removed),
+            'old_lines': len(old_lines),
+            'new_lines': len(new_lines),
+            'added': added,
+            'removed': removed,
+            'approximate': approximate,
+            'hunks': hunks
+        }
+
+    @staticmethod
+    def estimate_size(result):
+        """
+        Taille approximative d'un résultat en mémoire (pour les caches)
+
+        Args:
+            result: Résultat de diff
+
+        Returns:
+            int: Octets estimés
+        """
+        return 256 + sum(
+            len(line['text']) + 96
+            for hunk in result['hunks']
+            for line in hunk['lines']
+        )
+
+    @staticmethod
+    def _hunk(group, old_lines, new_lines, mode, max_cells):
+        """Bloc de modifications: en-tête (positions 1-based) et lignes"""
+        lines = []
+
+        for tag, i1, i2, j1, j2 in group:
+            if tag == 'equal':
+                lines.extend(
+                    {'op': ' ', 'text': old_lines[i], 'old': i + 1, 'new': j1 + k + 1}
+                    for k, i in enumerate(range(i1, i2))
+                )
+                continue
+
+            removed = [{'op': '-', 'text': old_lines[i], 'old': i + 1, 'new': None} for i in range(i1, i2)]
+            added = [{'op': '+', 'text': new_lines[j], 'old': None, 'new': j + 1} for j in range(j1, j2)]
+
+            if mode == 'word' and tag == 'replace':
+                for old_line, new_line in zip(removed, added):
+                    ranges = _highlights(old_line['text'], new_line['text'], max_cells)
+                    if ranges is not None:
+                        old_line['highlights'], new_line['highlights'] = ranges
+
+            lines.extend(removed)
+            lines.extend(added)
+
+        first, last = group[0], group[-1]
+        return {
+            'old_start': first[1] + 1,
+            'old_lines': last[2] - first[1],
+            'new_start': first[3] + 1,
+            'new_lines': last[4] - first[3],
+            'lines': lines
+        }
@@ -0,0 +1,326 @@
+# ============================================
+# FICHIER: backend/app/services/export_service.py
+# Service d'Export de Templates
+# ============================================
+"""
+Service d'export - Bibliothèque d'un utilisateur en ZIP ou NDJSON
+
+Formats produits (relus tels quels par ImportService):
+    - NDJSON : un template par ligne
+               {"id", "nom", "sujet", "html_content", "css_content",
+                "created_at", "updated_at", "category", "tags", "favorite",
+                "usage_count", "last_used", "versions": [...]}
+    - ZIP    : un dossier par template, nommé "<id>-<nom>"
+               <id>-<nom>/index.html
+               <id>-<nom>/style.css
+               <id>-<nom>/meta.json        (champs du NDJSON sans le contenu)
+               <id>-<nom>/versions.ndjson  (historique, une version par ligne)
+
+Métadonnées (category, tags, favorite, ...) et historique sont optionnels.
+
+Mémoire constante: les templates sont lus par lots de EXPORT_BATCH_SIZE
+(pagination par id, comme rebuild_index) et l'historique d'un lot est lu
+en flux (yield_per / stream_results). Le ZIP est émis template par
+template (voir app.utils.zipstream), son annuaire central étant mis de
+côté dans un fichier temporaire.
+
+Reprise: les templates sortent par id croissant. Après une coupure,
+relancer l'export avec after=<id du dernier template reçu en entier>
+(champ id du NDJSON, préfixe du dossier dans le ZIP).
+"""
+
+import json
+import re
+from itertools import groupby
+from flask import current_app
+from app import db
+from app.models.content_blob import ContentBlob
+from app.models.email_template import EmailTemplate
+from app.models.template_metadata import TemplateMetadata
+from app.models.template_version import TemplateVersion
+from app.services.search_service import fold
+from app.utils.zipstream import ZipStreamWriter
+
+
+FORMATS = ('zip', 'ndjson')
+
+MIMETYPES = {'zip': 'application/zip', 'ndjson': 'application/x-ndjson'}
+
+TEMPLATE_COLUMNS = (
+    EmailTemplate.id,
+    EmailTemplate.nom,
+    EmailTemplate.sujet,
+    EmailTemplate.created_at,
+    EmailTemplate.updated_at
+)
+
+METADATA_COLUMNS = (
+    TemplateMetadata.category,
+    TemplateMetadata.tags,
+    TemplateMetadata.favorite,
+    TemplateMetadata.usage_count,
+    TemplateMetadata.last_used
+)
+
+VERSION_COLUMNS = (
+    TemplateVersion.template_id,
+    TemplateVersion.version_number,
+    TemplateVersion.change_description,
+    TemplateVersion.created_by
+)
+
+
+def _isoformat(value):
+    """Date ISO ou None"""
+    return value.isoformat() if value else None
+
+
+def _dump(data):
+    """Une ligne NDJSON"""
+    return json.dumps(data, ensure_ascii=False) + '\n'
+
+
+def _folder_name(template_id, nom):
+    """Nom de dossier ZIP: '<id>-<nom replié>' ('42-bienvenue-client')"""
+    slug = re.sub(r'[^a-z0-9]+', '-', fold(nom or '')).strip('-')[:60]
+    return f'{template_id}-{slug}' if slug else str(template_id)
+
+
+class ExportService:
+    """Service d'export de templates en flux"""
+
+    @staticmethod
+    def validate_format(fmt):
+        """
+        Vérifier le format demandé
+
+        Args:
+            fmt: 'zip' ou 'ndjson'
+
+        Returns:
+            str: Format
+
+        Raises:
+            ValueError: Si format inconnu
+        """
+        if fmt not in FORMATS:
+            raise ValueError(f'Format invalide (attendu: {", ".join(FORMATS)})')
+        return fmt
+
+    @staticmethod
+    def iter_templates(user_id, include_metadata=True, include_versions=False, after=None, batch_size=None):
+        """
+        Templates actifs d'un utilisateur, par id croissant
+
+        Args:
+            user_id: ID du propriétaire
+            include_metadata: Ajouter category, tags, favorite, usage_count, last_used
+            include_versions: Ajouter l'historique (clé 'versions')
+            after: Reprendre après cet ID de template
+            batch_size: Templates par requête (défaut: EXPORT_BATCH_SIZE)
+
+        Yields:
+            dict: Template exporté
+        """
+        batch_size = batch_size or current_app.config.get('EXPORT_BATCH_SIZE', 200)
+        last_id = after or 0
+
+        columns = TEMPLATE_COLUMNS + (METADATA_COLUMNS if include_metadata else ())
+
+        while True:
+            query = db.select(*columns).where(
+                EmailTemplate.user_id == user_id,
+                EmailTemplate.is_active.is_(True),
+                EmailTemplate.id > last_id
+            ).order_by(EmailTemplate.id).limit(batch_size)
+
+            if include_metadata:
+                query = query.outerjoin(TemplateMetadata, TemplateMetadata.template_id == EmailTemplate.id)
+
+            # Contenus par empreinte lus dans la même requête (rien à lire pendant le flux des versions)
+            query = ContentBlob.with_content(query, EmailTemplate._html_stored, EmailTemplate.html_blob, 'html_content')
+            query = ContentBlob.with_content(query, EmailTemplate._css_stored, EmailTemplate.css_blob, 'css_content')
+
+            rows = db.session.execute(query).all()
+            if not rows:
+                return
+
+            versions = ExportService._iter_versions([row.id for row in rows]) if include_versions else None
+
+            try:
+                for row in rows:
+                    yield ExportService._template_dict(row, include_metadata, versions)
+            finally:
+                # Le curseur de l'historique doit être libéré avant la requête suivante
+                if versions is not None:
+                    versions.close()
+
+            # Lot incomplet: plus rien à lire
+            if len(rows) < batch_size:
+                return
+
+            last_id = rows[-1].id
+
+    @staticmethod
+    def _template_dict(row, include_metadata, versions):
+        """Dictionnaire exporté d'une ligne (template + métadonnées)"""
+        data = {
+            'id': row.id,
+            'nom': row.nom,
+            'sujet': row.sujet,
+            'html_content': ContentBlob.row_text(row, 'html_content'),
+            'css_content': ContentBlob.row_text(row, 'css_content') or '',
+            'created_at': _isoformat(row.created_at),
+            'updated_at': _isoformat(row.updated_at)
+        }
+
+        if include_metadata:
+            data.update({
+                'category': row.category,
+                'tags': row.tags or [],
+                'favorite': bool(row.favorite),
+                'usage_count': row.usage_count or 0,
+                'last_used': _isoformat(row.last_used)
+            })
+
+        if versions is not None:
+            data['versions'] = ExportService._versions_of(versions, row.id)
+
+        return data
+
+    @staticmethod
+    def _iter_versions(template_ids):
+        """Historique des templates d'un lot, lu en flux, groupé par template"""
+        result = db.session.execute(
+            TemplateVersion.content_query(*VERSION_COLUMNS)
+            .where(TemplateVersion.template_id.in_(template_ids))
+            .order_by(TemplateVersion.template_id, TemplateVersion.version_number)
+            .execution_options(yield_per=current_app.config.get('EXPORT_VERSION_BATCH_SIZE', 100))
+        )
+        return _GroupedVersions(result)
+
+    @staticmethod
+    def _versions_of(versions, template_id):
+        """Versions d'un template (les groupes arrivent dans l'ordre des ids)"""
+        rows = versions.take(template_id)
+        return [
+            {
+                'version_number': row.version_number,
+                'html_content': html_content,
+                'css_content': css_content or '',
+                'change_description': row.change_description,
+                'created_at': _isoformat(row.created_at),
+                'created_by': row.created_by
+            }
+            for row, (html_content, css_content) in zip(rows, TemplateVersion.decode_rows(rows))
+        ]
+
+    @staticmethod
+    def stream_ndjson(templates):
+        """
+        Sérialiser en NDJSON
+
+        Args:
+            templates: Itérable de templates (iter_templates)
+
+        Yields:
+            str: Une ligne par template
+        """
+        for data in templates:
+            yield _dump(data)
+
+    @staticmethod
+    def stream_zip(templates):
+        """
+        Sérialiser en ZIP, écrit au fil de l'eau
+
+        Args:
+            templates: Itérable de templates (iter_templates)
+
+        Yields:
+            bytes: Morceaux de l'archive (un par template, puis l'annuaire central)
+        """
+        writer = ZipStreamWriter()
+
+        for data in templates:
+            folder = _folder_name(data['id'], data['nom'])
+            versions = data.pop('versions', None)
+
+            chunk = writer.add(f'{folder}/index.html', data.pop('html_content'))
+            chunk += writer.add(f'{folder}/style.css', data.pop('css_content'))
+            chunk += writer.add(f'{folder}/meta.json', json.dumps(data, ensure_ascii=False, indent=2))
+
+            if versions is not None:
+                chunk += writer.add(f'{folder}/versions.ndjson', ''.join(_dump(v) for v in versions))
+
+            yield chunk
+
+        yield from writer.finish()
+
+    @staticmethod
+    def export(user_id, fmt, include_metadata=True, include_versions=False, after=None):
+        """
+        Exporter la bibliothèque d'un utilisateur
+
+        Args:
+            user_id: ID du propriétaire
+            fmt: 'zip' ou 'ndjson'
+            include_metadata: Inclure les métadonnées
+            include_versions: Inclure l'historique des versions
+            after: Reprendre après cet ID de template
+
+        Returns:
+            iterator: Morceaux du fichier (str pour NDJSON, bytes pour ZIP)
+
+        Raises:
+            ValueError: Si format inconnu
+        """
+        ExportService.validate_format(fmt)
+        templates = ExportService.iter_templates(
+            user_id,
+            include_metadata=include_metadata,
+            include_versions=include_versions,
+            after=after
+        )
+
+        if fmt == 'zip':
+            return ExportService.stream_zip(templates)
+        return ExportService.stream_ndjson(templates)
+
+
+class _GroupedVersions:
+    """Parcours d'un résultat trié par template_id, un groupe à la fois"""
+
+    def __init__(self, result):
+        """
+        Args:
+            result: Résultat (template_id, version_number, ...) trié par template_id
+        """
+        self._result = result
+        self._groups = groupby(result, key=lambda row: row.template_id)
+        self._current = next(self._groups, None)
+
+    def take(self, template_id):
+        """
+        Versions d'un template; les ids doivent être demandés par ordre croissant
+
+        Args:
+            template_id: ID du template
+
+        Returns:
+            list: Lignes de ses versions (vide si aucune)
+        """
+        while self._current is not None and self._current[0] < template_id:
+            self._current = next(self._groups, None)
+
+        if self._current is None or self._current[0] != template_id:
+            return []
+
+        # Le groupe est lu avant d'avancer: groupby partage l'itérateur
+        rows = list(self._current[1])
+        self._current = next(self._groups, None)
+        return rows
+
+    def close(self):
+        """Libérer le curseur serveur"""
+        self._result.close()
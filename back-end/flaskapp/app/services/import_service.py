@@ -0,0 +1,442 @@
+# ============================================
+# FICHIER: backend/app/services/import_service.py
+# Service d'Import de Templates
+# ============================================
+"""
+Service d'import - Templates depuis une archive ZIP ou un fichier NDJSON
+
+Formats acceptés:
+    - NDJSON : un objet JSON par ligne
+               {"nom", "sujet", "html_content", "css_content", "category", "tags"}
+    - ZIP    : fichiers regroupés par nom ou par dossier
+               bienvenue.html + bienvenue.css + bienvenue.json
+               bienvenue/index.html + bienvenue/style.css + bienvenue/meta.json
+               (le JSON optionnel porte nom, sujet, category, tags; à défaut le
+               nom vient du fichier et le sujet de la balise <title>)
+
+Les entrées sont lues une à une (lignes NDJSON, membres du ZIP): la mémoire
+ne dépend que de la taille d'un lot, pas de celle de l'archive.
+
+Pipeline par lot de IMPORT_CHUNK_SIZE entrées:
+    1. contrôle des champs (processus principal)
+    2. ValidationService.validate_template + texte indexable, sur place
+       (route HTTP, IMPORT_WORKERS = 0 par défaut) ou dans un pool de
+       processus (flask import-templates, IMPORT_CLI_WORKERS): le lot
+       suivant est alors validé pendant l'insertion du lot courant
+    3. insertion: templates ligne par ligne (id nécessaire), puis versions,
+       métadonnées, validations et documents de recherche en une
+       instruction multi-lignes par table; un commit par lot
+
+import_entries produit des événements (progress, error, done) consommés
+par la route HTTP (NDJSON) et la commande CLI.
+"""
+
+import json
+import multiprocessing
+import posixpath
+import re
+import zipfile
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from flask import current_app
+from app import db
+from app.models.content_blob import ContentBlob
+from app.models.email_template import EmailTemplate
+from app.models.template_version import TemplateVersion
+from app.models.template_metadata import TemplateMetadata
+from app.models.validation_result import ValidationResult
+from app.models.template_search_document import TemplateSearchDocument
+from app.models.activity_log import ActivityLog
+from app.services.validation_service import ValidationService
+from app.services.search_service import SearchService, html_to_text
+
+
+FORMATS = ('zip', 'ndjson')
+
+TITLE_RE = re.compile(r'<title[^>]*>(.*?)</title>', re.IGNORECASE | re.DOTALL)
+
+# Noms de fichiers d'un template rangé dans son propre dossier
+FOLDER_FILES = {'index.html': '.html', 'index.htm': '.html', 'style.css': '.css', 'meta.json': '.json'}
+
+
+def _analyze(item):
+    """
+    Validation + texte indexable d'une entrée (exécuté dans un processus du pool)
+
+    Args:
+        item: (html_content, css_content)
+
+    Returns:
+        tuple: (résultat de validation, texte visible du HTML)
+    """
+    html_content, css_content = item
+    return ValidationService.validate_template(html_content, css_content), html_to_text(html_content)
+
+
+def _chunks(iterable, size):
+    """Découper un itérable en listes de size éléments"""
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _read_member(archive, info, max_bytes):
+    """Lire un membre du ZIP en texte, en refusant les membres trop gros"""
+    if info.file_size > max_bytes:
+        raise ValueError(f'{info.filename}: fichier trop volumineux ({info.file_size} octets)')
+
+    with archive.open(info) as member:
+        # file_size est déclaratif: la lecture est bornée elle aussi
+        data = member.read(max_bytes + 1)
+    if len(data) > max_bytes:
+        raise ValueError(f'{info.filename}: fichier trop volumineux')
+
+    try:
+        return data.decode('utf-8-sig')
+    except UnicodeDecodeError:
+        raise ValueError(f'{info.filename}: encodage invalide (UTF-8 attendu)')
+
+
+class ImportService:
+    """Service d'import de templates par lots"""
+
+    @staticmethod
+    def detect_format(filename=None, content_type=None, requested=None):
+        """
+        Déterminer le format d'une archive
+
+        Args:
+            filename: Nom du fichier envoyé
+            content_type: Type MIME
+            requested: Format explicite ('zip' ou 'ndjson')
+
+        Returns:
+            str: 'zip' ou 'ndjson'
+
+        Raises:
+            ValueError: Si format inconnu
+        """
+        if requested:
+            if requested not in FORMATS:
+                raise ValueError(f'Format invalide (attendu: {", ".join(FORMATS)})')
+            return requested
+
+        name = (filename or '').lower()
+        mimetype = (content_type or '').split(';')[0].strip().lower()
+
+        if name.endswith('.zip') or mimetype in ('application/zip', 'application/x-zip-compressed'):
+            return 'zip'
+        if name.endswith(('.ndjson', '.jsonl')) or mimetype in ('application/x-ndjson', 'application/jsonl'):
+            return 'ndjson'
+
+        raise ValueError('Format non reconnu: envoyer un .zip ou un .ndjson (ou préciser format)')
+
+    @staticmethod
+    def iter_entries(fileobj, fmt):
+        """
+        Entrées d'une archive, lues au fil de l'eau
+
+        Args:
+            fileobj: Fichier binaire (seekable pour un ZIP)
+            fmt: 'zip' ou 'ndjson'
+
+        Returns:
+            iterator: (source, données brutes ou None, erreur ou None)
+
+        Raises:
+            ValueError: Si l'archive ZIP est illisible (vérifié immédiatement)
+        """
+        if fmt == 'zip':
+            return ImportService._iter_zip(fileobj)
+        return ImportService._iter_ndjson(fileobj)
+
+    @staticmethod
+    def _iter_ndjson(fileobj):
+        """Une entrée par ligne non vide (json.loads accepte des octets UTF-8)"""
+        for line_number, line in enumerate(fileobj, start=1):
+            source = f'ligne {line_number}'
+
+            if not line.strip():
+                continue
+
+            try:
+                data = json.loads(line)
+            except ValueError:
+                yield source, None, 'JSON invalide'
+                continue
+
+            if not isinstance(data, dict):
+                yield source, None, 'Objet JSON attendu'
+                continue
+
+            yield source, data, None
+
+    @staticmethod
+    def _iter_zip(fileobj):
+        """Ouvrir l'archive (erreur immédiate si invalide) et itérer ses groupes"""
+        try:
+            archive = zipfile.ZipFile(fileobj)
+        except zipfile.BadZipFile:
+            raise ValueError('Archive ZIP invalide')
+
+        return ImportService._iter_zip_groups(archive)
+
+    @staticmethod
+    def _iter_zip_groups(archive):
+        """Une entrée par groupe de fichiers (même nom ou même dossier)"""
+        max_bytes = current_app.config.get('IMPORT_MAX_ENTRY_BYTES', 2 * 1024 * 1024)
+
+        with archive:
+            # Seul l'annuaire central (noms, tailles) est lu ici
+            groups = OrderedDict()
+            for info in archive.infolist():
+                name = info.filename
+                basename = posixpath.basename(name)
+
+                if info.is_dir() or name.startswith('__MACOSX/') or basename.startswith('.'):
+                    continue
+
+                if basename.lower() in FOLDER_FILES and posixpath.dirname(name):
+                    key, ext = posixpath.dirname(name), FOLDER_FILES[basename.lower()]
+                else:
+                    key, ext = posixpath.splitext(name)
+                    ext = '.html' if ext.lower() == '.htm' else ext.lower()
+
+                if ext in ('.html', '.css', '.json'):
+                    groups.setdefault(key, {})[ext] = info
+
+            for key, files in groups.items():
+                try:
+                    if '.html' not in files:
+                        raise ValueError('Fichier HTML manquant')
+
+                    html_content = _read_member(archive, files['.html'], max_bytes)
+                    css_content = _read_member(archive, files['.css'], max_bytes) if '.css' in files else ''
+
+                    meta = {}
+                    if '.json' in files:
+                        meta_text = _read_member(archive, files['.json'], max_bytes)
+                        try:
+                            meta = json.loads(meta_text)
+                        except ValueError:
+                            meta = None
+                        if not isinstance(meta, dict):
+                            raise ValueError('Métadonnées JSON invalides')
+                except ValueError as e:
+                    yield key, None, str(e)
+                    continue
+
+                title = TITLE_RE.search(html_content)
+                nom = meta.get('nom') or posixpath.basename(key)
+
+                yield key, {
+                    'nom': nom,
+                    'sujet': meta.get('sujet') or (title.group(1).strip() if title else '') or nom,
+                    'html_content': html_content,
+                    'css_content': css_content,
+                    'category': meta.get('category'),
+                    'tags': meta.get('tags')
+                }, None
+
+    @staticmethod
+    def normalize_entry(data):
+        """
+        Contrôler et normaliser les champs d'une entrée
+
+        Args:
+            data: Données brutes
+
+        Returns:
+            dict: nom, sujet, html_content, css_content, category, tags
+
+        Raises:
+            ValueError: Si un champ est invalide
+        """
+        entry = {}
+
+        for field in ('nom', 'sujet', 'html_content'):
+            value = data.get(field)
+            if not isinstance(value, str) or not value.strip():
+                raise ValueError(f'Le champ {field} est requis')
+            entry[field] = value if field == 'html_content' else value.strip()
+
+        if len(entry['nom']) > 255 or len(entry['sujet']) > 500:
+            raise ValueError('Nom (255) ou sujet (500 caractères) trop long')
+
+        css = data.get('css_content')
+        if css is not None and not isinstance(css, str):
+            raise ValueError('Le champ css_content doit être une chaîne')
+        entry['css_content'] = css if css and css.strip() else ''
+
+        category = data.get('category')
+        if category is not None and not isinstance(category, str):
+            raise ValueError('Le champ category doit être une chaîne')
+        entry['category'] = category.strip() if category and category.strip() else None
+
+        tags = data.get('tags') or []
+        if not isinstance(tags, list) or not all(isinstance(tag, str) for tag in tags):
+            raise ValueError('Le champ tags doit être une liste de chaînes')
+        entry['tags'] = [tag.strip() for tag in tags if tag.strip()]
+
+        return entry
+
+    @staticmethod
+    def import_entries(user_id, entries, chunk_size=None, workers=None, ip_address=None, user_agent=None):
+        """
+        Importer des entrées par lots
+
+        Args:
+            user_id: ID du propriétaire
+            entries: Itérable de (source, données, erreur) (voir iter_entries)
+            chunk_size: Entrées par lot/transaction (défaut: IMPORT_CHUNK_SIZE)
+            workers: Processus de validation, 0 pour valider sur place
+                     (défaut: IMPORT_WORKERS, 0: pas de fork du worker web)
+            ip_address: Adresse IP (log d'activité)
+            user_agent: User agent (log d'activité)
+
+        Yields:
+            dict: Événements
+                {'event': 'error', 'source': ..., 'message': ...}
+                {'event': 'progress', 'processed': n, 'imported': n, 'failed': n}
+                {'event': 'done', 'processed': n, 'imported': n, 'failed': n}
+        """
+        config = current_app.config
+        chunk_size = chunk_size or config.get('IMPORT_CHUNK_SIZE', 500)
+        workers = config.get('IMPORT_WORKERS', 0) if workers is None else workers
+
+        counts = {'processed': 0, 'imported': 0, 'failed': 0}
+        pool = None
+
+        if workers > 0:
+            context = multiprocessing.get_context(config.get('IMPORT_MP_CONTEXT'))
+            pool = ProcessPoolExecutor(max_workers=workers, mp_context=context)
+
+        try:
+            pending = None
+
+            for chunk in _chunks(entries, chunk_size):
+                ready, errors = [], []
+
+                for source, data, error in chunk:
+                    if error is None:
+                        try:
+                            ready.append((source, ImportService.normalize_entry(data)))
+                            continue
+                        except ValueError as e:
+                            error = str(e)
+                    errors.append((source, error))
+
+                items = [(entry['html_content'], entry['css_content']) for _, entry in ready]
+                if pool is not None:
+                    analyses = pool.map(_analyze, items, chunksize=max(1, len(items) // (workers * 4)))
+                else:
+                    analyses = map(_analyze, items)
+
+                # Insertion du lot précédent pendant l'analyse de celui-ci
+                if pending is not None:
+                    yield from ImportService._write_chunk(user_id, *pending, counts)
+
+                pending = (ready, errors, analyses)
+
+            if pending is not None:
+                yield from ImportService._write_chunk(user_id, *pending, counts)
+        finally:
+            if pool is not None:
+                pool.shutdown(cancel_futures=True)
+
+        ActivityLog.log_activity(
+            user_id=user_id,
+            action='TEMPLATES_IMPORTED',
+            entity_type='template',
+            details=dict(counts),
+            ip_address=ip_address,
+            user_agent=user_agent
+        )
+
+        yield dict(counts, event='done')
+
+    @staticmethod
+    def _write_chunk(user_id, ready, errors, analyses, counts):
+        """Insérer un lot analysé et produire ses événements"""
+        for source, message in errors:
+            yield {'event': 'error', 'source': source, 'message': message}
+
+        counts['processed'] += len(ready) + len(errors)
+        counts['failed'] += len(errors)
+
+        if ready:
+            try:
+                ImportService._insert(user_id, ready, list(analyses))
+                counts['imported'] += len(ready)
+            except Exception as e:
+                db.session.rollback()
+                current_app.logger.error(f'❌ Import: lot de {len(ready)} entrée(s) rejeté: {str(e)}')
+                counts['failed'] += len(ready)
+                for source, _ in ready:
+                    yield {'event': 'error', 'source': source, 'message': f'Erreur sauvegarde: {str(e)}'}
+
+        yield dict(counts, event='progress')
+
+    @staticmethod
+    def _insert(user_id, ready, analyses):
+        """Écrire un lot dans une transaction"""
+        templates_table = EmailTemplate.__table__
+        metadata_rows, version_rows, validation_rows, document_rows = [], [], [], []
+
+        for (source, entry), (validation_result, body) in zip(ready, analyses):
+            result = db.session.execute(db.insert(templates_table), ContentBlob.store_values([{
+                'user_id': user_id,
+                'nom': entry['nom'],
+                'sujet': entry['sujet'],
+                'html_content': entry['html_content'],
+                'css_content': entry['css_content'],
+                'is_active': True
+            }]))
+            template_id = result.inserted_primary_key[0]
+
+            version_rows.append({
+                'template_id': template_id,
+                'version_number': 1,
+                'html_content': entry['html_content'],
+                'css_content': entry['css_content'],
+                **TemplateVersion.content_stats(entry['html_content'], entry['css_content']),
+                'change_description': 'Version initiale (import)',
+                'created_by': user_id
+            })
+            metadata_rows.append({
+                'template_id': template_id,
+                'category': entry['category'],
+                'tags': entry['tags'],
+                'usage_count': 0,
+                'favorite': False,
+                'shared': False,
+                'shared_with': []
+            })
+            validation_rows.append({
+                'template_id': template_id,
+                'is_valid': validation_result['is_valid'],
+                'html_valid': validation_result['html_valid'],
+                'css_valid': validation_result['css_valid'],
+                'errors': validation_result['errors'],
+                'warnings': validation_result['warnings']
+            })
+            document_rows.append(SearchService.document_values(
+                template_id=template_id,
+                user_id=user_id,
+                is_active=True,
+                nom=entry['nom'],
+                sujet=entry['sujet'],
+                body=body,
+                category=entry['category'],
+                tags=entry['tags']
+            ))
+
+        db.session.execute(db.insert(TemplateVersion.__table__), ContentBlob.store_values(version_rows))
+        db.session.execute(db.insert(TemplateMetadata.__table__), metadata_rows)
+        db.session.execute(db.insert(ValidationResult.__table__), validation_rows)
+        db.session.execute(db.insert(TemplateSearchDocument.__table__), document_rows)
+        db.session.commit()
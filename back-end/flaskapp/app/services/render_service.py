@@ -0,0 +1,346 @@
+# ============================================
+# FICHIER: backend/app/services/render_service.py
+# Service de Rendu des Templates
+# ============================================
+"""
+Service de rendu - Personnalisation des templates à partir de données
+
+Syntaxe (Jinja2, fourni par Flask), exécutée dans un bac à sable:
+    {{ prenom }}                              variable (échappée en HTML)
+    {{ client.ville | default('Paris') }}     clé d'un objet, filtre
+    {% if premium %}...{% else %}...{% endif %} condition
+    {% for produit in produits %}...{% endfor %} boucle
+
+Une variable absente est rendue vide, y compris client.ville si client
+manque. Le sujet est rendu sans échappement (en-tête d'email en texte
+brut) puis échappé dans la balise <title> du document.
+
+Compilation: le HTML d'une version est compilé une seule fois en fonction
+de rendu (code Python généré par Jinja2), conservée dans render_cache sous
+(template_id, version_number). Un rendu répété ne lit en base que le sujet
+et l'en-tête de la version: le contenu n'est ni relu ni réanalysé.
+
+CSS: il est mis en ligne dans le source avant la compilation, une fois
+par version, sauf si une balise contient elle-même des variables ou des
+blocs (class="{{ type }}", <td {% if ... %}>): le style dépend alors des
+données et chaque rendu est mis en ligne séparément.
+"""
+
+import re
+from markupsafe import escape
+from jinja2 import ChainableUndefined, TemplateError, TemplateSyntaxError
+from jinja2.sandbox import SandboxedEnvironment, SecurityError
+from app import db
+from app.models.email_template import EmailTemplate
+from app.models.template_version import TemplateVersion
+from app.utils.render_cache import render_cache
+from app.utils.css_inliner import inline_css
+
+
+# Longueur maximum d'une chaîne ou liste produite par '*' dans un template
+MAX_REPEAT_LENGTH = 100000
+
+# Exposant maximum de '**'
+MAX_EXPONENT = 100
+
+# Balise dont les attributs contiennent {{ }}, {% %} ou {# #}
+_DYNAMIC_TAG = re.compile(r'<[a-zA-Z][^<>]*(?:\{[{%#]|[}%#]\})')
+
+
+class RenderError(ValueError):
+    """Contenu ou données impossibles à rendre (syntaxe, expression interdite, ...)"""
+
+
+class _RenderEnvironment(SandboxedEnvironment):
+    """Bac à sable Jinja2 bornant aussi les opérateurs coûteux ('*', '**')"""
+
+    intercepted_binops = frozenset(['*', '**'])
+
+    def call_binop(self, context, operator, left, right):
+        """Refuser les répétitions et puissances démesurées"""
+        if operator == '**' and isinstance(right, (int, float)) and abs(right) > MAX_EXPONENT:
+            raise SecurityError(f'Exposant limité à {MAX_EXPONENT}')
+
+        if operator == '*':
+            for sequence, count in ((left, right), (right, left)):
+                if isinstance(sequence, (str, list, tuple)) and isinstance(count, int) \
+                        and len(sequence) * count > MAX_REPEAT_LENGTH:
+                    raise SecurityError(f'Répétition limitée à {MAX_REPEAT_LENGTH} éléments')
+
+        return super().call_binop(context, operator, left, right)
+
+
+# HTML: valeurs échappées; sujet: texte brut
+_html_env = _RenderEnvironment(autoescape=True, undefined=ChainableUndefined)
+_text_env = _RenderEnvironment(autoescape=False, undefined=ChainableUndefined)
+
+
+class CompiledVersion:
+    """Version compilée: fonction de rendu du HTML et CSS à appliquer"""
+
+    __slots__ = ('created_at', 'body', 'css', 'inlined')
+
+    def __init__(self, created_at, body, css, inlined=False):
+        """
+        Args:
+            created_at: Date de création de la version (contrôle de l'entrée)
+            body: jinja2.Template du HTML
+            css: CSS de la version (inlined: CSS restant pour <style>)
+            inlined: CSS déjà mis en ligne, body rend l'élément <body> complet
+        """
+        self.created_at = created_at
+        self.body = body
+        self.css = css
+        self.inlined = inlined
+
+
+class RenderService:
+    """Service de rendu des templates personnalisés"""
+
+    @staticmethod
+    def compile_source(source, name='template', autoescape=True):
+        """
+        Compiler un contenu en fonction de rendu
+
+        Args:
+            source: Contenu avec variables, conditions, boucles
+            name: Nom affiché dans les erreurs
+            autoescape: Échapper les valeurs en HTML
+
+        Returns:
+            tuple: (jinja2.Template, taille du code généré en octets)
+
+        Raises:
+            RenderError: Si erreur de syntaxe
+        """
+        env = _html_env if autoescape else _text_env
+
+        try:
+            python_source = env.compile(source or '', name=name, raw=True)
+        except TemplateSyntaxError as e:
+            raise RenderError(f'Erreur de syntaxe ({name}, ligne {e.lineno}): {e.message}')
+
+        code = compile(python_source, f'<{name}>', 'exec')
+        template = env.template_class.from_code(env, code, env.make_globals(None))
+        return template, len(python_source)
+
+    @staticmethod
+    def get_compiled_version(template_id, version_number, created_at, load_content):
+        """
+        Version compilée, depuis le cache ou compilée puis mise en cache
+
+        Args:
+            template_id: ID du template
+            version_number: Numéro de version
+            created_at: Date de création de la version
+            load_content: Fonction sans argument renvoyant (html, css)
+
+        Returns:
+            CompiledVersion: Version compilée
+
+        Raises:
+            RenderError: Si erreur de syntaxe
+        """
+        key = (template_id, version_number)
+
+        compiled = render_cache.get(key)
+        # Version supprimée puis recréée sous le même numéro: recompiler
+        if compiled is not None and compiled.created_at == created_at:
+            return compiled
+
+        html_content, css_content = load_content()
+        compiled, size = RenderService.compile_version(
+            created_at, html_content, css_content, name=f'v{version_number}'
+        )
+
+        render_cache.put(key, compiled, size + len(compiled.css))
+        return compiled
+
+    @staticmethod
+    def compile_version(created_at, html_content, css_content, name='template'):
+        """
+        Compiler le contenu d'une version, CSS mis en ligne si possible
+
+        Args:
+            created_at: Date de création de la version
+            html_content: HTML de la version
+            css_content: CSS de la version
+            name: Nom affiché dans les erreurs
+
+        Returns:
+            tuple: (CompiledVersion, taille du code généré en octets)
+
+        Raises:
+            RenderError: Si erreur de syntaxe
+        """
+        css_content = css_content or ''
+        inlined = bool(css_content) and not _DYNAMIC_TAG.search(html_content or '')
+
+        if inlined:
+            html_content, css_content = inline_css(EmailTemplate.wrap_body(html_content), css_content)
+
+        body, size = RenderService.compile_source(html_content, name=name)
+        return CompiledVersion(created_at, body, css_content, inlined), size
+
+    @staticmethod
+    def get_compiled_subject(template_id, sujet):
+        """
+        Sujet compilé (non versionné: l'entrée garde son texte source)
+
+        Args:
+            template_id: ID du template
+            sujet: Sujet courant
+
+        Returns:
+            jinja2.Template: Fonction de rendu du sujet
+
+        Raises:
+            RenderError: Si erreur de syntaxe
+        """
+        key = (template_id, 'sujet')
+
+        cached = render_cache.get(key)
+        if cached is not None and cached[0] == sujet:
+            return cached[1]
+
+        template, size = RenderService.compile_source(sujet, name='sujet', autoescape=False)
+        render_cache.put(key, (sujet, template), size + len(sujet))
+        return template
+
+    @staticmethod
+    def find_version(template_id, user_id, version_number=None):
+        """
+        En-tête de la version à rendre (sans son contenu)
+
+        Args:
+            template_id: ID du template
+            user_id: ID du propriétaire
+            version_number: Version (défaut: version courante)
+
+        Returns:
+            Row: sujet, version_number, created_at
+
+        Raises:
+            ValueError: Si template ou version introuvable
+        """
+        query = db.select(
+            EmailTemplate.sujet,
+            TemplateVersion.version_number,
+            TemplateVersion.created_at
+        ).join(
+            TemplateVersion, TemplateVersion.template_id == EmailTemplate.id
+        ).where(
+            EmailTemplate.id == template_id,
+            EmailTemplate.user_id == user_id,
+            EmailTemplate.is_active.is_(True)
+        )
+
+        if version_number is not None:
+            query = query.where(TemplateVersion.version_number == version_number)
+        else:
+            query = query.order_by(TemplateVersion.version_number.desc()).limit(1)
+
+        row = db.session.execute(query).first()
+        if row is None:
+            raise ValueError('Version non trouvée' if version_number is not None
+                             else 'Template non trouvé ou accès non autorisé')
+        return row
+
+    @staticmethod
+    def load_version_content(template_id, version_number):
+        """
+        Contenu d'une version
+
+        Args:
+            template_id: ID du template
+            version_number: Numéro de version
+
+        Returns:
+            tuple: (html_content, css_content)
+        """
+        content = TemplateVersion.load_content(template_id, version_number)
+        if content is None:
+            raise ValueError(f'Version {version_number} non trouvée')
+        return content
+
+    @staticmethod
+    def render_template(template_id, user_id, data, version_number=None):
+        """
+        Rendre un template avec des données
+
+        Args:
+            template_id: ID du template
+            user_id: ID du propriétaire
+            data: Variables (dict)
+            version_number: Version à rendre (défaut: version courante)
+
+        Returns:
+            dict: template_id, version_number, sujet et html rendus
+
+        Raises:
+            RenderError: Si données, syntaxe ou expression invalides
+            ValueError: Si template ou version introuvable
+        """
+        if not isinstance(data, dict):
+            raise RenderError('data doit être un objet JSON')
+
+        row = RenderService.find_version(template_id, user_id, version_number)
+
+        compiled = RenderService.get_compiled_version(
+            template_id, row.version_number, row.created_at,
+            lambda: RenderService.load_version_content(template_id, row.version_number)
+        )
+        subject = RenderService.get_compiled_subject(template_id, row.sujet)
+
+        sujet, html = RenderService.render_document(compiled, subject, data)
+
+        return {
+            'template_id': template_id,
+            'version_number': row.version_number,
+            'sujet': sujet,
+            'html': html
+        }
+
+    @staticmethod
+    def render_document(compiled, subject, data):
+        """
+        Rendre le sujet et le document HTML complet
+
+        Args:
+            compiled: CompiledVersion
+            subject: jinja2.Template du sujet
+            data: Variables
+
+        Returns:
+            tuple: (sujet, html complet)
+
+        Raises:
+            RenderError: Si expression interdite ou erreur à l'exécution
+        """
+        sujet, html_content = RenderService.render_compiled(compiled.body, subject, data)
+        if compiled.inlined:
+            return sujet, EmailTemplate.build_document(escape(sujet), html_content, compiled.css)
+        return sujet, EmailTemplate.build_full_html(escape(sujet), html_content, compiled.css)
+
+    @staticmethod
+    def render_compiled(body, subject, data):
+        """
+        Exécuter les fonctions de rendu
+
+        Args:
+            body: jinja2.Template du HTML
+            subject: jinja2.Template du sujet
+            data: Variables
+
+        Returns:
+            tuple: (sujet, html)
+
+        Raises:
+            RenderError: Si expression interdite ou erreur à l'exécution
+        """
+        try:
+            return subject.render(data), body.render(data)
+        except SecurityError as e:
+            raise RenderError(f'Expression interdite: {str(e)}')
+        except (TemplateError, ArithmeticError, LookupError, TypeError, ValueError) as e:
+            raise RenderError(f'Erreur de rendu: {str(e)}')
@@ -0,0 +1,461 @@
+# ============================================
+# FICHIER: backend/app/services/search_service.py
+# Service de Recherche Plein Texte
+# ============================================
+"""
+Service de recherche - Index plein texte des templates
+
+Le texte indexé (TemplateSearchDocument) est maintenu à chaque création,
+modification, suppression ou restauration de template. La recherche passe
+par l'index FULLTEXT (MySQL) ou FTS5 (SQLite): son coût dépend du nombre de
+résultats, pas de la taille de la bibliothèque de l'utilisateur.
+
+Pertinence: nom > sujet > tags/catégorie > contenu, mêmes poids sur les
+deux bases (SEARCH_WEIGHTS): poids BM25 par colonne sous SQLite, somme
+pondérée des scores MATCH ... AGAINST de chaque colonne sous MySQL (un
+index FULLTEXT par colonne). Les extraits mettent les termes trouvés en
+évidence avec <mark>, sans tenir compte des accents.
+"""
+
+import html
+import re
+import unicodedata
+from html.parser import HTMLParser
+from flask import current_app
+from app import db
+from app.models.email_template import EmailTemplate
+from app.models.template_search_document import TemplateSearchDocument
+
+
+# Colonnes indexées et leur poids dans le score de pertinence
+SEARCH_COLUMNS = ('nom', 'sujet', 'meta', 'body')
+SEARCH_WEIGHTS = (10.0, 5.0, 3.0, 1.0)
+
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+
+class _TextExtractor(HTMLParser):
+    """Extraire le texte visible d'un document HTML"""
+
+    SKIPPED_TAGS = ('script', 'style', 'head', 'title')
+    BLOCK_TAGS = ('p', 'div', 'br', 'li', 'tr', 'td', 'th', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'table')
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.parts = []
+        self._skip = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in self.SKIPPED_TAGS:
+            self._skip += 1
+        elif tag in self.BLOCK_TAGS:
+            self.parts.append(' ')
+
+        # Le texte alternatif des images est recherchable
+        if tag == 'img':
+            alt = dict(attrs).get('alt')
+            if alt:
+                self.parts.append(f' {alt} ')
+
+    def handle_endtag(self, tag):
+        if tag in self.SKIPPED_TAGS and self._skip:
+            self._skip -= 1
+        elif tag in self.BLOCK_TAGS:
+            self.parts.append(' ')
+
+    def handle_data(self, data):
+        if not self._skip:
+            self.parts.append(data)
+
+
+def html_to_text(html_content):
+    """
+    Texte visible d'un HTML (sans balises, scripts ni styles)
+
+    Args:
+        html_content: Contenu HTML
+
+    Returns:
+        str: Texte avec espaces normalisés
+    """
+    parser = _TextExtractor()
+    try:
+        parser.feed(html_content or '')
+        parser.close()
+    except Exception:
+        # HTML très mal formé: repli sur une suppression grossière des balises
+        return ' '.join(re.sub(r'<[^>]+>', ' ', html_content or '').split())
+
+    return ' '.join(''.join(parser.parts).split())
+
+
+def fold(text):
+    """
+    Minuscules sans accents ('Été' -> 'ete', 'Garçon' -> 'garcon')
+
+    Args:
+        text: Texte
+
+    Returns:
+        str: Texte replié
+    """
+    return ''.join(_fold_char(c) for c in text)
+
+
+def _fold_char(char):
+    """Replier un caractère (NFKD peut produire plusieurs caractères: ﬁ -> fi)"""
+    decomposed = unicodedata.normalize('NFKD', char.lower())
+    return ''.join(c for c in decomposed if not unicodedata.combining(c))
+
+
+def tokenize(query):
+    """
+    Termes d'une requête utilisateur, repliés
+
+    Args:
+        query: Texte saisi
+
+    Returns:
+        list: Termes uniques dans l'ordre de saisie
+    """
+    terms = []
+    for token in TOKEN_RE.findall(fold(query or '')):
+        if token not in terms:
+            terms.append(token)
+    return terms
+
+
+def highlight(text, terms, max_length=160):
+    """
+    Extrait autour du premier terme trouvé, termes entourés de <mark>
+
+    La comparaison se fait sur le texte replié (accents ignorés) mais
+    l'extrait conserve le texte d'origine. Le texte est échappé en HTML.
+
+    Args:
+        text: Texte source
+        terms: Termes repliés (préfixes acceptés)
+        max_length: Longueur approximative de l'extrait
+
+    Returns:
+        str: Extrait HTML ou None si aucun terme trouvé
+    """
+    if not text or not terms:
+        return None
+
+    # Texte replié + position d'origine de chaque caractère replié
+    folded_chars = []
+    positions = []
+    for index, char in enumerate(text):
+        for folded_char in _fold_char(char):
+            folded_chars.append(folded_char)
+            positions.append(index)
+    folded = ''.join(folded_chars)
+
+    pattern = re.compile(r'\b(' + '|'.join(re.escape(term) for term in terms) + r')\w*', re.UNICODE)
+    matches = list(pattern.finditer(folded))
+    if not matches:
+        return None
+
+    first = positions[matches[0].start()]
+    start = max(0, first - max_length // 3)
+    end = min(len(text), start + max_length)
+
+    # Ne pas couper un mot au début
+    if start > 0:
+        space = text.find(' ', start)
+        if space != -1 and space < first:
+            start = space + 1
+
+    parts = []
+    cursor = start
+    for match in matches:
+        begin = positions[match.start()]
+        finish = positions[match.end() - 1] + 1
+        if begin < start or finish > end:
+            continue
+        parts.append(html.escape(text[cursor:begin]))
+        parts.append(f'<mark>{html.escape(text[begin:finish])}</mark>')
+        cursor = finish
+    parts.append(html.escape(text[cursor:end]))
+
+    return ('…' if start > 0 else '') + ''.join(parts) + ('…' if end < len(text) else '')
+
+
+class SearchService:
+    """Service gérant l'index et la recherche plein texte des templates"""
+
+    @staticmethod
+    def is_enabled():
+        """
+        Vérifier si l'index plein texte est utilisable
+
+        Returns:
+            bool: True si activé et base supportée (MySQL ou SQLite)
+        """
+        return (
+            current_app.config.get('SEARCH_FULLTEXT_ENABLED', True)
+            and db.engine.dialect.name in ('mysql', 'sqlite')
+        )
+
+    @staticmethod
+    def build_document(template):
+        """
+        Construire (sans l'enregistrer) le document de recherche d'un template
+
+        Args:
+            template: Template
+
+        Returns:
+            dict: Colonnes du document
+        """
+        metadata = template.template_metadata
+
+        return SearchService.document_values(
+            template_id=template.id,
+            user_id=template.user_id,
+            is_active=template.is_active,
+            nom=template.nom,
+            sujet=template.sujet,
+            body=html_to_text(template.html_content),
+            category=metadata.category if metadata else None,
+            tags=metadata.tags if metadata else None
+        )
+
+    @staticmethod
+    def document_values(template_id, user_id, is_active, nom, sujet, body, category=None, tags=None):
+        """
+        Colonnes d'un document de recherche à partir de valeurs brutes
+        (imports: le texte du HTML peut être extrait hors du processus principal)
+
+        Args:
+            template_id: ID du template
+            user_id: ID du propriétaire
+            is_active: Template actif
+            nom: Nom
+            sujet: Sujet
+            body: Texte visible du HTML (html_to_text)
+            category: Catégorie
+            tags: Liste de tags
+
+        Returns:
+            dict: Colonnes du document
+        """
+        meta_parts = []
+        if category:
+            meta_parts.append(category)
+        meta_parts.extend(tags or [])
+
+        max_chars = current_app.config.get('SEARCH_BODY_MAX_CHARS', 20000)
+
+        return {
+            'template_id': template_id,
+            'user_id': user_id,
+            'is_active': bool(is_active),
+            'nom': nom,
+            'sujet': sujet,
+            'meta': ' '.join(str(part) for part in meta_parts),
+            'body': body[:max_chars]
+        }
+
+    @staticmethod
+    def index_template(template):
+        """
+        Créer ou mettre à jour le document d'un template
+        (dans la transaction courante, commité par l'appelant)
+
+        Args:
+            template: Template (avec id)
+        """
+        values = SearchService.build_document(template)
+        document = db.session.get(TemplateSearchDocument, template.id)
+
+        if document is None:
+            db.session.add(TemplateSearchDocument(**values))
+        else:
+            for key, value in values.items():
+                setattr(document, key, value)
+
+    @staticmethod
+    def index_templates(templates):
+        """
+        Créer ou mettre à jour les documents de plusieurs templates
+        (une requête pour les documents existants, commité par l'appelant)
+
+        Args:
+            templates: Templates (avec id et métadonnées chargées)
+        """
+        if not templates:
+            return
+
+        existing = {
+            d.template_id: d for d in TemplateSearchDocument.query.filter(
+                TemplateSearchDocument.template_id.in_([t.id for t in templates])
+            ).all()
+        }
+
+        for template in templates:
+            values = SearchService.build_document(template)
+            document = existing.get(template.id)
+
+            if document is None:
+                db.session.add(TemplateSearchDocument(**values))
+            else:
+                for key, value in values.items():
+                    setattr(document, key, value)
+
+    @staticmethod
+    def set_active(template_id, is_active):
+        """
+        Marquer le document comme actif/inactif (suppression logique)
+
+        Args:
+            template_id: ID du template
+            is_active: Nouvel état
+        """
+        TemplateSearchDocument.query.filter_by(template_id=template_id).update(
+            {'is_active': is_active}, synchronize_session=False
+        )
+
+    @staticmethod
+    def remove_template(template_id):
+        """
+        Supprimer le document d'un template (suppression définitive)
+
+        Args:
+            template_id: ID du template
+        """
+        TemplateSearchDocument.query.filter_by(template_id=template_id).delete(synchronize_session=False)
+
+    @staticmethod
+    def remove_templates(template_ids):
+        """
+        Supprimer les documents de plusieurs templates (une requête)
+
+        Args:
+            template_ids: IDs des templates
+        """
+        if template_ids:
+            TemplateSearchDocument.query.filter(
+                TemplateSearchDocument.template_id.in_(template_ids)
+            ).delete(synchronize_session=False)
+
+    @staticmethod
+    def rebuild_index(batch_size=500, progress=None):
+        """
+        Reconstruire tous les documents (migration ou réparation)
+
+        Args:
+            batch_size: Templates traités par transaction
+            progress: Callback progress(total_indexé)
+
+        Returns:
+            int: Nombre de templates indexés
+        """
+        total = 0
+        last_id = 0
+
+        while True:
+            templates = EmailTemplate.query.options(
+                db.joinedload(EmailTemplate.template_metadata)
+            ).filter(EmailTemplate.id > last_id).order_by(EmailTemplate.id).limit(batch_size).all()
+
+            if not templates:
+                break
+
+            for template in templates:
+                SearchService.index_template(template)
+
+            total += len(templates)
+            last_id = templates[-1].id
+
+            db.session.commit()
+            db.session.expunge_all()
+
+            if progress:
+                progress(total)
+
+        return total
+
+    @staticmethod
+    def match_query(user_id, terms):
+        """
+        Sous-requête (template_id, score) des documents correspondants
+
+        Un score plus grand signifie plus pertinent, quelle que soit la base.
+
+        Args:
+            user_id: ID du propriétaire
+            terms: Termes repliés (tous requis, en préfixe)
+
+        Returns:
+            Subquery: Colonnes template_id et score, ou None si aucun terme exploitable
+        """
+        dialect = db.engine.dialect.name
+        params = {'user_id': user_id}
+
+        if dialect == 'sqlite':
+            match = ' '.join(f'"{term}"*' for term in terms)
+            weights = ', '.join(str(w) for w in SEARCH_WEIGHTS)
+            sql = (
+                f'SELECT d.template_id AS template_id, -bm25(template_search_fts, {weights}) AS score '
+                'FROM template_search_fts '
+                'JOIN template_search_documents d ON d.template_id = template_search_fts.rowid '
+                'WHERE template_search_fts MATCH :match AND d.user_id = :user_id AND d.is_active = 1'
+            )
+            params['match'] = match
+        else:
+            # Les mots plus courts que innodb_ft_min_token_size sont ignorés par l'index
+            min_length = current_app.config.get('SEARCH_MYSQL_MIN_TOKEN_SIZE', 3)
+            terms = [term for term in terms if len(term) >= min_length]
+            if not terms:
+                return None
+
+            # Filtre sur l'index global (tous les termes, toutes colonnes
+            # confondues), score pondéré sur les index de chaque colonne
+            match = ' '.join(f'+{term}*' for term in terms)
+            any_term = ' '.join(f'{term}*' for term in terms)
+            score = ' + '.join(
+                f'{weight} * MATCH ({column}) AGAINST (:any_term IN BOOLEAN MODE)'
+                for column, weight in zip(SEARCH_COLUMNS, SEARCH_WEIGHTS)
+            )
+            sql = (
+                f'SELECT template_id, {score} AS score '
+                'FROM template_search_documents '
+                'WHERE user_id = :user_id AND is_active = 1 '
+                'AND MATCH (nom, sujet, meta, body) AGAINST (:match IN BOOLEAN MODE)'
+            )
+            params['match'] = match
+            params['any_term'] = any_term
+
+        return db.text(sql).bindparams(**params).columns(
+            template_id=db.Integer, score=db.Float
+        ).subquery('search_matches')
+
+    @staticmethod
+    def snippets(template, document, terms):
+        """
+        Extraits mis en évidence pour un résultat
+
+        Args:
+            template: Template
+            document: TemplateSearchDocument (ou None)
+            terms: Termes repliés
+
+        Returns:
+            dict: Extraits par champ trouvé (nom, sujet, meta, body)
+        """
+        fields = {
+            'nom': template.nom,
+            'sujet': template.sujet,
+            'meta': document.meta if document else None,
+            'body': document.body if document else None
+        }
+
+        result = {}
+        for field, text in fields.items():
+            snippet = highlight(text, terms)
+            if snippet:
+                result[field] = snippet
+
+        return result
@@ -7,6 +7,7 @@ Service de gestion des templates - CORRIGÉ pour CSS et validation
 """
 
 from flask import current_app
+from sqlalchemy.exc import IntegrityError
 from app import db
 from app.models.email_template import EmailTemplate
 from app.models.template_version import TemplateVersion
@@ -14,6 +15,10 @@ from app.models.template_metadata import TemplateMetadata
 from app.models.validation_result import ValidationResult
 from app.models.activity_log import ActivityLog
 from app.services.validation_service import ValidationService
+from app.models.template_search_document import TemplateSearchDocument
+from app.services.search_service import SearchService, tokenize
+from app.utils.pagination import keyset_paginate
+from app.utils.version_compactor import version_compactor
 
 
 class TemplateService:
@@ -104,6 +109,9 @@ class TemplateService:
         db.session.add(metadata)
         db.session.add(validation)
 
+        # Index de recherche (même transaction)
+        SearchService.index_template(template)
+
         try:
             db.session.commit()
             current_app.logger.info(
@@ -134,7 +142,22 @@ class TemplateService:
 
     @staticmethod
     def update_template(template_id, user_id, **kwargs):
-        """Mettre à jour un template - CORRIGÉ pour CSS"""
+        """
+        Mettre à jour un template - CORRIGÉ pour CSS
+
+        Relancée si le numéro de la nouvelle version est déjà pris
+        (voir TemplateVersion.retrying). La rétention des versions est
+        ensuite planifiée (voir VersionCompactor).
+        """
+        template = TemplateVersion.retrying(
+            template_id, lambda: TemplateService._update_template(template_id, user_id, kwargs)
+        )
+        version_compactor.schedule(template_id)
+        return template
+
+    @staticmethod
+    def _update_template(template_id, user_id, kwargs):
+        """Mise à jour dans une transaction (un essai de update_template)"""
         template = TemplateService.get_template_by_id(template_id, user_id)
 
         # CORRECTION CRITIQUE: Normaliser CSS
@@ -167,8 +190,8 @@ class TemplateService:
                     f"AUTORISÉ"
                 )
 
-            # Créer nouvelle version
-            new_version_number = TemplateVersion.get_next_version_number(template_id)
+            # Créer nouvelle version (numéro réservé jusqu'au commit)
+            new_version_number = TemplateVersion.allocate_version_number(template_id)
 
             version = TemplateVersion(
                 template_id=template_id,
@@ -212,12 +235,19 @@ class TemplateService:
                     setattr(template, field, new_value)
                     updated_fields.append(field)
 
+        if updated_fields:
+            SearchService.index_template(template)
+
         try:
             db.session.commit()
             current_app.logger.info(
                 f'✅ Template {template_id} mis à jour: {updated_fields}, '
                 f'CSS={len(template.css_content or "")} chars'
             )
+        except IntegrityError:
+            # Numéro de version déjà pris: relancé par update_template
+            db.session.rollback()
+            raise
         except Exception as e:
             db.session.rollback()
             current_app.logger.error(f'❌ Erreur mise à jour: {str(e)}')
@@ -240,15 +270,25 @@ class TemplateService:
         return template
 
     @staticmethod
-    def get_template_by_id(template_id, user_id=None):
-        """Récupérer un template par ID"""
+    def get_template_by_id(template_id, user_id=None, fields=None):
+        """
+        Récupérer un template par ID
+
+        fields: sélection de champs (parse_fieldset), seules les colonnes et
+        relations correspondantes sont chargées. None: chargement complet.
+        """
+        query = EmailTemplate.query
+
+        if fields is not None:
+            query = query.options(*EmailTemplate.field_options(fields))
+
         if user_id:
-            template = EmailTemplate.query.filter_by(
+            template = query.filter_by(
                 id=template_id,
                 user_id=user_id
             ).first()
         else:
-            template = EmailTemplate.query.get(template_id)
+            template = query.get(template_id)
 
         if not template:
             raise ValueError('Template non trouvé ou accès non autorisé')
@@ -256,18 +296,36 @@ class TemplateService:
         return template
 
     @staticmethod
-    def get_user_templates(user_id, include_inactive=False, page=1, per_page=20):
-        """Récupérer les templates d'un utilisateur"""
+    def get_user_templates(user_id, include_inactive=False, page=1, per_page=20, cursor=None, count=None,
+                           fields=None):
+        """
+        Récupérer les templates d'un utilisateur
+
+        cursor=None: pagination classique page/per_page (compatibilité).
+        Sinon pagination par curseur sur (updated_at, id), voir keyset_paginate.
+
+        fields=None: résumés (to_summary_dict). Sinon projection sur les
+        champs demandés (voir EmailTemplate.FIELDS).
+        """
         query = EmailTemplate.query.filter_by(user_id=user_id)
 
         if not include_inactive:
             query = query.filter_by(is_active=True)
 
+        if fields is None:
+            query = EmailTemplate.with_summary_options(query)
+        else:
+            query = query.options(*EmailTemplate.field_options(fields))
+
+        if cursor is not None:
+            result = keyset_paginate(query, [EmailTemplate.updated_at, EmailTemplate.id], cursor, per_page, count)
+            return result.to_dict('templates', TemplateService._template_list(result.items, fields))
+
         query = query.order_by(db.desc('updated_at'))
         pagination = query.paginate(page=page, per_page=per_page, error_out=False)
 
         return {
-            'templates': [t.to_summary_dict() for t in pagination.items],
+            'templates': TemplateService._template_list(pagination.items, fields),
             'total': pagination.total,
             'pages': pagination.pages,
             'page': page,
@@ -280,8 +338,10 @@ class TemplateService:
         template = TemplateService.get_template_by_id(template_id, user_id)
 
         if soft:
+            SearchService.set_active(template_id, False)
             template.soft_delete()
         else:
+            SearchService.remove_template(template_id)
             db.session.delete(template)
             db.session.commit()
 
@@ -297,27 +357,104 @@ class TemplateService:
         return True
 
     @staticmethod
-    def search_templates(user_id, query, page=1, per_page=20):
-        """Rechercher des templates"""
-        search = f"%{query}%"
+    def search_templates(user_id, query, page=1, per_page=20, cursor=None, count=None, fields=None):
+        """
+        Rechercher des templates
+
+        Avec l'index plein texte: nom, sujet, tags, catégorie et texte du HTML,
+        tri par pertinence et extraits mis en évidence ('highlights').
+        Sinon (index désactivé ou base non supportée): LIKE sur nom et sujet.
 
-        templates_query = EmailTemplate.query.filter(
-            EmailTemplate.user_id == user_id,
-            EmailTemplate.is_active,
-        ).filter(
-            (EmailTemplate.nom.like(search)) | (EmailTemplate.sujet.like(search))
-        ).order_by(db.desc('updated_at'))
+        cursor=None: pagination classique page/per_page (compatibilité).
+        Sinon pagination par curseur, dans le même ordre: (score, id) avec
+        l'index plein texte, (updated_at, id) sinon.
+
+        fields: projection des résultats (voir get_user_templates)
+        """
+        terms = tokenize(query)
+        matches = None
+
+        if terms and SearchService.is_enabled():
+            matches = SearchService.match_query(user_id, terms)
+
+        if matches is not None:
+            templates_query = EmailTemplate.query.join(
+                matches, matches.c.template_id == EmailTemplate.id
+            )
+        else:
+            search = f"%{query}%"
+
+            templates_query = EmailTemplate.query.filter(
+                EmailTemplate.user_id == user_id,
+                EmailTemplate.is_active,
+            ).filter(
+                (EmailTemplate.nom.like(search)) | (EmailTemplate.sujet.like(search))
+            )
+
+        if fields is None:
+            templates_query = EmailTemplate.with_summary_options(templates_query)
+        else:
+            templates_query = templates_query.options(*EmailTemplate.field_options(fields))
+
+        if cursor is not None:
+            if matches is not None:
+                # Lignes (template, score): le score alimente le curseur
+                result = keyset_paginate(
+                    templates_query.add_columns(matches.c.score), [matches.c.score, EmailTemplate.id],
+                    cursor, per_page, count, key=lambda row: [row.score, row[0].id]
+                )
+                templates = [row[0] for row in result.items]
+            else:
+                result = keyset_paginate(
+                    templates_query, [EmailTemplate.updated_at, EmailTemplate.id], cursor, per_page, count
+                )
+                templates = result.items
+
+            data = result.to_dict('templates', TemplateService._search_summaries(templates, terms, fields))
+            data['query'] = query
+            return data
+
+        if matches is not None:
+            templates_query = templates_query.order_by(matches.c.score.desc(), EmailTemplate.id.desc())
+        else:
+            templates_query = templates_query.order_by(db.desc('updated_at'))
 
         pagination = templates_query.paginate(page=page, per_page=per_page, error_out=False)
 
         return {
-            'templates': [t.to_summary_dict() for t in pagination.items],
+            'templates': TemplateService._search_summaries(pagination.items, terms, fields),
             'total': pagination.total,
             'pages': pagination.pages,
             'page': page,
             'query': query
         }
 
+    @staticmethod
+    def _template_list(templates, fields):
+        """Résumés (fields=None) ou projection d'une page de templates"""
+        if fields is None:
+            return EmailTemplate.to_summary_list(templates)
+        return EmailTemplate.to_fields_list(templates, fields)
+
+    @staticmethod
+    def _search_summaries(templates, terms, fields=None):
+        """Résumés (ou projection) + extraits mis en évidence (une requête pour les documents)"""
+        summaries = TemplateService._template_list(templates, fields)
+
+        if not templates or not terms:
+            return summaries
+
+        documents = {
+            d.template_id: d for d in TemplateSearchDocument.query.filter(
+                TemplateSearchDocument.template_id.in_([t.id for t in templates])
+            ).all()
+        }
+
+        for template, summary in zip(templates, summaries):
+            summary['highlights'] = SearchService.snippets(template, documents.get(template.id), terms)
+
+        return summaries
+
     @staticmethod
     def duplicate_template(template_id, user_id, new_name=None):
         """Dupliquer un template"""
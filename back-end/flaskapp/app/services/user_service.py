@@ -10,6 +10,8 @@ from flask import current_app
 from app import db
 from app.models.user import User
 from app.models.activity_log import ActivityLog
+from app.utils.auth_cache import auth_cache
+from app.utils.pagination import keyset_paginate
 # from datetime import datetime
 
 
@@ -34,6 +36,7 @@ class UserService:
 
         Raises:
             ValueError: Si données invalides ou email existant
+            PasswordHasherBusy: Si le pool de hachage est saturé
         """
         # Validation des champs requis
         if not email or not email.strip():
@@ -127,6 +130,7 @@ class UserService:
 
         Raises:
             ValueError: Si données invalides
+            PasswordHasherBusy: Si le pool de hachage est saturé
         """
         user = UserService.get_user_by_id(user_id)
 
@@ -148,10 +152,10 @@ class UserService:
         if 'password' in kwargs and kwargs['password']:
             if len(kwargs['password']) < 6:
                 raise ValueError('Le mot de passe doit contenir au moins 6 caractères')
-            user.password = kwargs['password']
-            # En production: user.set_password(kwargs['password'])
+            user.set_password(kwargs['password'])
 
         db.session.commit()
+        auth_cache.invalidate_user(user_id)
 
         # Logger l'activité
         ActivityLog.log_activity(
@@ -181,6 +185,7 @@ class UserService:
 
         # Désactiver au lieu de supprimer
         user.deactivate()
+        User.bump_token_epoch(user_id)
 
         # Logger l'activité
         ActivityLog.log_activity(
@@ -224,14 +229,17 @@ class UserService:
         return user
 
     @staticmethod
-    def get_all_users(page=1, per_page=20, include_inactive=False):
+    def get_all_users(page=1, per_page=20, include_inactive=False, cursor=None, count=None, fields=None):
         """
         Récupérer tous les utilisateurs (paginés)
 
         Args:
-            page: Numéro de page
+            page: Numéro de page (mode compatibilité, sans curseur)
             per_page: Éléments par page
             include_inactive: Inclure les utilisateurs inactifs
+            cursor: Curseur sur (created_at, id) ('' pour la première page)
+            count: Comptage en mode curseur ('none', 'estimate', 'exact')
+            fields: Sélection de champs (voir User.FIELDS, None: to_dict)
 
         Returns:
             dict: Résultats paginés
@@ -241,31 +249,38 @@ class UserService:
         if not include_inactive:
             query = query.filter_by(is_active=True)
 
+        if cursor is not None:
+            result = keyset_paginate(query, [User.created_at, User.id], cursor, per_page, count)
+            return result.to_dict('users', User.to_list(result.items, fields))
+
         query = query.order_by(db.desc('created_at'))
 
         pagination = query.paginate(page=page, per_page=per_page, error_out=False)
 
         return {
-            'users': [u.to_dict() for u in pagination.items],
+            'users': User.to_list(pagination.items, fields),
             'total': pagination.total,
             'pages': pagination.pages,
             'page': page
         }
 
     @staticmethod
-    def search_users(query, page=1, per_page=20):
+    def search_users(query, page=1, per_page=20, cursor=None, count=None, fields=None):
         """
         Rechercher des utilisateurs
 
         Args:
             query: Terme de recherche
-            page: Numéro de page
+            page: Numéro de page (mode compatibilité, sans curseur)
             per_page: Éléments par page
+            cursor: Curseur ('' pour la première page)
+            count: Comptage en mode curseur ('none', 'estimate', 'exact')
+            fields: Sélection de champs (voir User.FIELDS, None: to_dict)
 
         Returns:
             dict: Résultats paginés
         """
-        return User.search(query, page, per_page)
+        return User.search(query, page, per_page, cursor=cursor, count=count, fields=fields)
 
     @staticmethod
     def get_user_statistics(user_id):
@@ -305,8 +320,7 @@ class UserService:
         user = UserService.get_user_by_id(user_id)
         old_role = user.role
 
-        user.role = new_role
-        db.session.commit()
+        user.change_role(new_role)
 
         # Logger l'activité
         ActivityLog.log_activity(
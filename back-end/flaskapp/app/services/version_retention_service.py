@@ -0,0 +1,328 @@
+# ============================================
+# FICHIER: backend/app/services/version_retention_service.py
+# Service de Rétention des Versions
+# ============================================
+"""
+Service de rétention des versions - Élagage de l'historique
+
+La politique d'un template est VERSION_RETENTION, complétée par sa
+surcharge (TemplateMetadata.retention_policy); les règles sont dans
+app.utils.retention. Le plan d'un template ne lit que les colonnes de
+métadonnées des versions (ni contenu, ni delta): le rapport à blanc
+parcourt tout l'historique sans rien décompresser.
+
+    - plan_template()    : versions conservées (avec leurs raisons) et élaguées
+    - compact_template() : supprime les versions élaguées d'un template
+    - compact()          : tous les templates, par lots (flask compact-versions,
+                           ou VersionCompactor en tâche de fond)
+    - report()           : rapport à blanc, les plus gros élagages d'abord
+
+Les versions delta élaguées sont supprimées directement; un instantané
+élagué passe d'abord son rôle à la plus ancienne de ses versions delta
+conservées (TemplateVersion.release_dependents), et ses références de
+contenu sont retirées (ContentBlob). Les contenus devenus inutiles sont
+supprimés par flask gc-blobs.
+"""
+
+from datetime import datetime
+from flask import current_app
+from app import db
+from app.models.activity_log import ActivityLog
+from app.models.content_blob import ContentBlob
+from app.models.email_template import EmailTemplate
+from app.models.template_metadata import TemplateMetadata
+from app.models.template_version import TemplateVersion
+from app.utils.retention import kept_versions, merge_policy, parse_policy
+
+
+class VersionRetentionService:
+    """Service d'application des politiques de rétention des versions"""
+
+    # Versions delta supprimées par instruction
+    DELETE_CHUNK_SIZE = 500
+
+    @staticmethod
+    def effective_policy(override=None):
+        """
+        Politique complète: VERSION_RETENTION complétée par une surcharge
+
+        Args:
+            override: Politique partielle du template (ou None)
+
+        Returns:
+            dict: Politique complète
+        """
+        return merge_policy(current_app.config.get('VERSION_RETENTION'), override)
+
+    @staticmethod
+    def plan_template(template_id, now=None):
+        """
+        Versions conservées et élaguées d'un template (métadonnées seulement)
+
+        Args:
+            template_id: ID du template
+            now: Date de référence (défaut: maintenant)
+
+        Returns:
+            dict: template_id, policy, overridden, versions, kept ({numéro: [raisons]}),
+            pruned (lignes des versions élaguées), pruned_bytes
+        """
+        override = db.session.execute(
+            db.select(TemplateMetadata.retention_policy).where(TemplateMetadata.template_id == template_id)
+        ).scalar()
+        policy = VersionRetentionService.effective_policy(override)
+
+        rows = db.session.execute(
+            db.select(
+                TemplateVersion.id,
+                TemplateVersion.version_number,
+                TemplateVersion.created_at,
+                TemplateVersion.restored_from,
+                TemplateVersion.delta_base_id,
+                TemplateVersion.html_size,
+                TemplateVersion.css_size
+            ).where(TemplateVersion.template_id == template_id).order_by(TemplateVersion.version_number)
+        ).all()
+
+        kept = kept_versions(
+            ((row.version_number, row.created_at, row.restored_from) for row in rows), policy, now
+        )
+        pruned = [row for row in rows if row.version_number not in kept]
+
+        return {
+            'template_id': template_id,
+            'policy': policy,
+            'overridden': bool(override),
+            'versions': len(rows),
+            'kept': kept,
+            'pruned': pruned,
+            'pruned_bytes': sum((row.html_size or 0) + (row.css_size or 0) for row in pruned)
+        }
+
+    @staticmethod
+    def _summary(plan, details=False):
+        """Plan sérialisable (numéros élagués, et raisons si details)"""
+        summary = {
+            'template_id': plan['template_id'],
+            'versions': plan['versions'],
+            'kept': len(plan['kept']),
+            'pruned': len(plan['pruned']),
+            'pruned_bytes': plan['pruned_bytes']
+        }
+        if details:
+            summary['policy'] = plan['policy']
+            summary['overridden'] = plan['overridden']
+            summary['pruned_versions'] = [row.version_number for row in plan['pruned']]
+            summary['kept_versions'] = {
+                str(number): reasons for number, reasons in sorted(plan['kept'].items(), reverse=True)
+            }
+        return summary
+
+    @staticmethod
+    def compact_template(template_id, dry_run=False, now=None):
+        """
+        Supprimer les versions d'un template que sa politique ne retient pas
+
+        La ligne du template est verrouillée pendant l'élagage: une
+        modification concurrente attend la fin de la transaction.
+
+        Args:
+            template_id: ID du template
+            dry_run: Calculer sans rien supprimer
+            now: Date de référence (défaut: maintenant)
+
+        Returns:
+            dict: template_id, versions, kept, pruned, pruned_bytes (None si template absent)
+        """
+        locked = db.session.execute(
+            db.select(EmailTemplate.id).where(EmailTemplate.id == template_id).with_for_update()
+        ).scalar()
+        if locked is None:
+            db.session.rollback()
+            return None
+
+        plan = VersionRetentionService.plan_template(template_id, now)
+        summary = VersionRetentionService._summary(plan)
+        if dry_run or not plan['pruned']:
+            db.session.rollback()
+            return summary
+
+        # Versions delta d'abord: un instantané élagué n'a plus à les réécrire
+        deltas = [row.id for row in plan['pruned'] if row.delta_base_id is not None]
+        table = TemplateVersion.__table__
+        connection = db.session.connection()
+        for start in range(0, len(deltas), VersionRetentionService.DELETE_CHUNK_SIZE):
+            chunk = deltas[start:start + VersionRetentionService.DELETE_CHUNK_SIZE]
+            references = connection.execute(
+                db.select(table.c.html_blob, table.c.css_blob).where(
+                    table.c.id.in_(chunk), db.or_(table.c.html_blob.isnot(None), table.c.css_blob.isnot(None))
+                )
+            ).all()
+            ContentBlob.release([digest for row in references for digest in row], connection)
+            connection.execute(db.delete(table).where(table.c.id.in_(chunk)))
+
+        snapshots = [row.id for row in plan['pruned'] if row.delta_base_id is None]
+        if snapshots:
+            for version in TemplateVersion.query.filter(
+                TemplateVersion.id.in_(snapshots)
+            ).order_by(TemplateVersion.version_number).all():
+                version.release_dependents()
+                db.session.delete(version)
+                db.session.flush()
+
+        db.session.commit()
+
+        ActivityLog.log_activity(
+            user_id=None,
+            action='VERSIONS_PRUNED',
+            entity_type='template',
+            entity_id=template_id,
+            details={
+                'pruned': summary['pruned'],
+                'pruned_bytes': summary['pruned_bytes'],
+                'versions': [row.version_number for row in plan['pruned']]
+            }
+        )
+
+        return summary
+
+    @staticmethod
+    def compact(template_id=None, dry_run=False, batch_size=None, limit=None, progress=None):
+        """
+        Appliquer la rétention à tous les templates (ou à un seul), par lots
+
+        Seuls les templates ayant plus d'une version sont lus; chaque
+        template est élagué dans sa propre transaction.
+
+        Args:
+            template_id: ID d'un template (défaut: tous)
+            dry_run: Calculer sans rien supprimer
+            batch_size: Templates lus par requête (défaut: VERSION_COMPACTION_BATCH_SIZE)
+            limit: Nombre maximum de templates détaillés (les plus gros élagages d'abord)
+            progress: Fonction appelée après chaque lot (templates traités, versions élaguées)
+
+        Returns:
+            dict: dry_run, templates (détail des templates élagués), totals
+        """
+        batch_size = batch_size or current_app.config.get('VERSION_COMPACTION_BATCH_SIZE', 100)
+        now = datetime.utcnow()
+        totals = {'templates': 0, 'versions': 0, 'kept': 0, 'pruned': 0, 'pruned_bytes': 0, 'compacted': 0}
+        entries = []
+        last_id = 0
+
+        while True:
+            query = db.select(TemplateVersion.template_id).where(
+                TemplateVersion.template_id > last_id
+            ).group_by(TemplateVersion.template_id).having(
+                db.func.count(TemplateVersion.id) > 1
+            ).order_by(TemplateVersion.template_id).limit(batch_size)
+            if template_id is not None:
+                query = query.where(TemplateVersion.template_id == template_id)
+
+            template_ids = db.session.execute(query).scalars().all()
+            if not template_ids:
+                break
+
+            for current_id in template_ids:
+                summary = VersionRetentionService.compact_template(current_id, dry_run, now)
+                if summary is None:
+                    continue
+
+                totals['templates'] += 1
+                for key in ('versions', 'kept', 'pruned', 'pruned_bytes'):
+                    totals[key] += summary[key]
+                if summary['pruned']:
+                    totals['compacted'] += 0 if dry_run else 1
+                    entries.append(summary)
+
+            last_id = template_ids[-1]
+            if progress:
+                progress(totals['templates'], totals['pruned'])
+
+        entries.sort(key=lambda entry: (-entry['pruned'], entry['template_id']))
+        return {
+            'dry_run': dry_run,
+            'templates': entries[:limit] if limit else entries,
+            'totals': totals
+        }
+
+    @staticmethod
+    def report(template_id=None, limit=50):
+        """
+        Rapport à blanc: ce que la rétention supprimerait
+
+        Args:
+            template_id: ID d'un template (défaut: tous)
+            limit: Nombre maximum de templates détaillés
+
+        Returns:
+            dict: policy (globale), templates, totals
+        """
+        report = VersionRetentionService.compact(template_id, dry_run=True, limit=limit)
+        report['policy'] = VersionRetentionService.effective_policy()
+        return report
+
+    @staticmethod
+    def get_policy(template_id, user_id):
+        """
+        Politique d'un template et aperçu de son élagage
+
+        Args:
+            template_id: ID du template
+            user_id: ID de l'utilisateur
+
+        Returns:
+            dict: Plan détaillé (policy, overridden, kept_versions, pruned_versions, ...)
+
+        Raises:
+            ValueError: Si template non trouvé
+        """
+        template = EmailTemplate.query.filter_by(id=template_id, user_id=user_id).first()
+        if not template:
+            raise ValueError('Template non trouvé ou accès non autorisé')
+
+        plan = VersionRetentionService.plan_template(template_id)
+        return VersionRetentionService._summary(plan, details=True)
+
+    @staticmethod
+    def set_policy(template_id, user_id, policy, ip_address=None):
+        """
+        Définir (ou retirer) la politique propre à un template
+
+        Args:
+            template_id: ID du template
+            user_id: ID de l'utilisateur
+            policy: Politique partielle (None ou {}: politique globale)
+            ip_address: Adresse IP
+
+        Returns:
+            dict: Plan détaillé avec la nouvelle politique
+
+        Raises:
+            ValueError: Si template non trouvé ou politique invalide
+        """
+        template = EmailTemplate.query.filter_by(id=template_id, user_id=user_id).first()
+        if not template:
+            raise ValueError('Template non trouvé ou accès non autorisé')
+
+        override = parse_policy(policy) if policy else None
+        # Politique complète valide (la surcharge complète la politique globale)
+        VersionRetentionService.effective_policy(override)
+
+        metadata = TemplateMetadata.query.filter_by(template_id=template_id).first()
+        if metadata is None:
+            metadata = TemplateMetadata(template_id=template_id)
+            db.session.add(metadata)
+        metadata.retention_policy = override
+        db.session.commit()
+
+        ActivityLog.log_activity(
+            user_id=user_id,
+            action='RETENTION_POLICY_UPDATED',
+            entity_type='template',
+            entity_id=template_id,
+            details={'policy': override},
+            ip_address=ip_address
+        )
+
+        return VersionRetentionService.get_policy(template_id, user_id)
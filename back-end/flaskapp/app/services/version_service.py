@@ -11,21 +11,31 @@ from app import db
 from app.models.template_version import TemplateVersion
 from app.models.email_template import EmailTemplate
 from app.models.activity_log import ActivityLog
+from app.services.search_service import SearchService
+from app.services.diff_service import DiffService
+from app.utils.pagination import keyset_paginate
+from app.utils.blob_store import blob_store
+from app.utils.diff_cache import diff_cache
+from app.utils.version_compactor import version_compactor
 
 
 class VersionService:
     """Service gérant les versions de templates"""
 
     @staticmethod
-    def get_template_versions(template_id, user_id, page=1, per_page=20):
+    def get_template_versions(template_id, user_id, page=1, per_page=20, cursor=None, count=None,
+                              fields=None):
         """
         Récupérer les versions d'un template
 
         Args:
             template_id: ID du template
             user_id: ID de l'utilisateur (pour vérifier la propriété)
-            page: Numéro de page
+            page: Numéro de page (mode compatibilité, sans curseur)
             per_page: Éléments par page
+            cursor: Curseur sur version_number ('' pour la première page)
+            count: Comptage en mode curseur ('none', 'estimate', 'exact')
+            fields: Sélection de champs (défaut: TemplateVersion.SUMMARY_FIELDS)
 
         Returns:
             dict: Versions paginées
@@ -33,24 +43,41 @@ class VersionService:
         Raises:
             ValueError: Si template non trouvé ou accès non autorisé
         """
-        # Vérifier que l'utilisateur est propriétaire du template
+        # Vérifier que l'utilisateur est propriétaire du template (sans lire son contenu)
         template = EmailTemplate.query.filter_by(
             id=template_id,
             user_id=user_id
-        ).first()
+        ).options(db.load_only(EmailTemplate.id, EmailTemplate.nom)).first()
 
         if not template:
             raise ValueError('Template non trouvé ou accès non autorisé')
 
-        # Récupérer les versions
-        query = TemplateVersion.query.filter_by(
-            template_id=template_id
-        ).order_by(db.desc('version_number'))
+        fields = fields or TemplateVersion.SUMMARY_FIELDS
+
+        if 'html_content' in fields or 'css_content' in fields:
+            # Contenu demandé: versions chargées (deltas reconstruits), créateurs joints
+            query = TemplateVersion.query.filter_by(
+                template_id=template_id
+            ).options(*TemplateVersion.field_options(fields))
+            serialize = lambda versions: [version.to_fields_dict(fields) for version in versions]
+        else:
+            # Historique: colonnes seulement, nom du créateur joint (voir get_version_content)
+            query = TemplateVersion.history_query(template_id, fields)
+            serialize = lambda rows: TemplateVersion.history_dicts(rows, fields)
+
+        if cursor is not None:
+            result = keyset_paginate(query, [TemplateVersion.version_number], cursor, per_page, count)
+            data = result.to_dict('versions', serialize(result.items))
+            data['template_id'] = template_id
+            data['template_name'] = template.nom
+            return data
+
+        query = query.order_by(TemplateVersion.version_number.desc())
 
         pagination = query.paginate(page=page, per_page=per_page, error_out=False)
 
         return {
-            'versions': [v.to_dict(include_content=False) for v in pagination.items],
+            'versions': serialize(pagination.items),
             'total': pagination.total,
             'pages': pagination.pages,
             'page': page,
@@ -59,7 +86,7 @@ class VersionService:
         }
 
     @staticmethod
-    def get_version_by_number(template_id, version_number, user_id):
+    def get_version_by_number(template_id, version_number, user_id, fields=None):
         """
         Récupérer une version spécifique
 
@@ -67,6 +94,7 @@ class VersionService:
             template_id: ID du template
             version_number: Numéro de version
             user_id: ID de l'utilisateur
+            fields: Sélection de champs à charger (None: version complète)
 
         Returns:
             TemplateVersion: Version
@@ -84,13 +112,56 @@ class VersionService:
             raise ValueError('Template non trouvé ou accès non autorisé')
 
         # Récupérer la version
-        version = TemplateVersion.get_version_by_number(template_id, version_number)
+        if fields is None:
+            version = TemplateVersion.get_version_by_number(template_id, version_number)
+        else:
+            version = TemplateVersion.query.filter_by(
+                template_id=template_id,
+                version_number=version_number
+            ).options(*TemplateVersion.field_options(fields)).first()
 
         if not version:
             raise ValueError(f'Version {version_number} non trouvée')
 
         return version
 
+    @staticmethod
+    def get_version_content(template_id, version_number, user_id):
+        """
+        Contenu d'une version, à la demande (l'historique n'en renvoie que
+        les tailles et empreintes)
+
+        Args:
+            template_id: ID du template
+            version_number: Numéro de version
+            user_id: ID de l'utilisateur
+
+        Returns:
+            dict: version_number, html_content, css_content, html_hash, css_hash
+
+        Raises:
+            ValueError: Si template ou version non trouvé
+        """
+        template = EmailTemplate.query.filter_by(
+            id=template_id,
+            user_id=user_id
+        ).options(db.load_only(EmailTemplate.id)).first()
+
+        if not template:
+            raise ValueError('Template non trouvé ou accès non autorisé')
+
+        content = TemplateVersion.load_content(template_id, version_number)
+        if content is None:
+            raise ValueError(f'Version {version_number} non trouvée')
+
+        return {
+            'version_number': version_number,
+            'html_content': content[0],
+            'css_content': content[1],
+            'html_hash': blob_store.digest(content[0] or ''),
+            'css_hash': blob_store.digest(content[1] or '')
+        }
+
     @staticmethod
     def restore_version(template_id, version_number, user_id,
                         ip_address=None, user_agent=None):
@@ -110,6 +181,15 @@ class VersionService:
         Raises:
             ValueError: Si version non trouvée ou erreur
         """
+        template = TemplateVersion.retrying(template_id, lambda: VersionService._restore_version(
+            template_id, version_number, user_id, ip_address, user_agent
+        ))
+        version_compactor.schedule(template_id)
+        return template
+
+    @staticmethod
+    def _restore_version(template_id, version_number, user_id, ip_address, user_agent):
+        """Restauration dans une transaction (un essai de restore_version)"""
         # Récupérer la version à restaurer
         version_to_restore = VersionService.get_version_by_number(
             template_id, version_number, user_id
@@ -118,8 +198,8 @@ class VersionService:
         # Récupérer le template
         template = EmailTemplate.query.get(template_id)
 
-        # Créer une nouvelle version avec le contenu restauré
-        new_version_number = TemplateVersion.get_next_version_number(template_id)
+        # Créer une nouvelle version avec le contenu restauré (numéro réservé jusqu'au commit)
+        new_version_number = TemplateVersion.allocate_version_number(template_id)
 
         new_version = TemplateVersion(
             template_id=template_id,
@@ -131,12 +211,14 @@ class VersionService:
             ip_address=ip_address,
             user_agent=user_agent
         )
+        new_version.restored_from = version_number
 
         # Mettre à jour le template avec le contenu restauré
         template.html_content = version_to_restore.html_content
         template.css_content = version_to_restore.css_content
 
         db.session.add(new_version)
+        SearchService.index_template(template)
         db.session.commit()
 
         # Logger l'activité
@@ -161,15 +243,23 @@ class VersionService:
         return template
 
     @staticmethod
-    def compare_versions(template_id, version1_number, version2_number, user_id):
+    def compare_versions(template_id, version1_number, version2_number, user_id,
+                         context=3, mode='line', normalize=True):
         """
         Comparer deux versions
 
+        Le résultat contient les blocs de modifications (DiffService), pas
+        les deux documents. Il est mis en cache: deux versions ne changent
+        jamais, la même comparaison n'est calculée qu'une fois.
+
         Args:
             template_id: ID du template
             version1_number: Numéro de la première version
             version2_number: Numéro de la deuxième version
             user_id: ID de l'utilisateur
+            context: Lignes inchangées autour de chaque bloc
+            mode: 'line' ou 'word' (positions des mots modifiés)
+            normalize: Ignorer blancs et retours à la ligne (HTML/CSS)
 
         Returns:
             dict: Comparaison des versions
@@ -177,31 +267,74 @@ class VersionService:
         Raises:
             ValueError: Si versions non trouvées
         """
-        # Récupérer les deux versions
-        version1 = VersionService.get_version_by_number(
-            template_id, version1_number, user_id
-        )
-        version2 = VersionService.get_version_by_number(
-            template_id, version2_number, user_id
-        )
+        # Vérifier que l'utilisateur est propriétaire (sans lire le contenu)
+        template = EmailTemplate.query.filter_by(
+            id=template_id,
+            user_id=user_id
+        ).options(db.load_only(EmailTemplate.id)).first()
 
-        # Comparer les contenus
-        html_changed = version1.html_content != version2.html_content
-        css_changed = version1.css_content != version2.css_content
+        if not template:
+            raise ValueError('Template non trouvé ou accès non autorisé')
 
-        return {
+        # En-têtes des deux versions (contenu lu seulement si absent du cache)
+        headers = {
+            row.version_number: row
+            for row in db.session.execute(
+                db.select(
+                    TemplateVersion.version_number,
+                    TemplateVersion.created_at,
+                    TemplateVersion.change_description
+                ).where(
+                    TemplateVersion.template_id == template_id,
+                    TemplateVersion.version_number.in_((version1_number, version2_number))
+                )
+            )
+        }
+
+        for number in (version1_number, version2_number):
+            if number not in headers:
+                raise ValueError(f'Version {number} non trouvée')
+
+        version1, version2 = headers[version1_number], headers[version2_number]
+
+        key = (
+            template_id,
+            version1_number, version1.created_at,
+            version2_number, version2.created_at,
+            context, mode, normalize
+        )
+        result = diff_cache.get(key)
+        if result is not None:
+            return result
+
+        rows = db.session.execute(
+            TemplateVersion.content_query(TemplateVersion.version_number).where(
+                TemplateVersion.template_id == template_id,
+                TemplateVersion.version_number.in_((version1_number, version2_number))
+            )
+        ).all()
+        contents = dict(zip((row.version_number for row in rows), TemplateVersion.decode_rows(rows)))
+        (old_html, old_css), (new_html, new_css) = contents[version1_number], contents[version2_number]
+
+        max_cells = current_app.config.get('DIFF_MAX_CELLS', 1000000)
+        options = {'context': context, 'mode': mode, 'normalize': normalize}
+
+        html_diff = DiffService.diff(old_html, new_html, 'html', max_cells=max_cells, **options)
+        css_diff = DiffService.diff(old_css, new_css, 'css', max_cells=max_cells, **options)
+
+        # Comparaison stricte (les blancs comptent), comme avant les blocs
+        html_changed = old_html != new_html
+        css_changed = (old_css or '') != (new_css or '')
+
+        result = {
             'template_id': template_id,
             'version1': {
                 'number': version1_number,
-                'html_content': version1.html_content,
-                'css_content': version1.css_content,
                 'created_at': version1.created_at.isoformat(),
                 'change_description': version1.change_description
             },
             'version2': {
                 'number': version2_number,
-                'html_content': version2.html_content,
-                'css_content': version2.css_content,
                 'created_at': version2.created_at.isoformat(),
                 'change_description': version2.change_description
             },
@@ -209,9 +342,17 @@ class VersionService:
                 'html_changed': html_changed,
                 'css_changed': css_changed,
                 'any_changes': html_changed or css_changed
-            }
+            },
+            'diff': {
+                'html': html_diff,
+                'css': css_diff
+            },
+            'options': options
         }
 
+        diff_cache.put(key, result, DiffService.estimate_size(html_diff) + DiffService.estimate_size(css_diff))
+        return result
+
     @staticmethod
     def get_latest_version(template_id, user_id):
         """
@@ -268,7 +409,8 @@ class VersionService:
         if latest_version and latest_version.version_number == version_number:
             raise ValueError('Impossible de supprimer la version actuelle')
 
-        # Supprimer la version
+        # Supprimer la version (ses versions delta prennent un autre instantané)
+        version.release_dependents()
         db.session.delete(version)
         db.session.commit()
 
@@ -0,0 +1,269 @@
+# ============================================
+# FICHIER: backend/app/services/version_storage_service.py
+# Service de Stockage des Versions
+# ============================================
+"""
+Service de stockage des versions - Compactage en deltas et rapport d'espace
+
+Les nouvelles versions sont stockées en delta dès leur création
+(TemplateVersion, événement before_insert). pack() réécrit l'historique
+existant selon les mêmes règles: un instantané complet toutes les
+VERSION_SNAPSHOT_INTERVAL versions au plus (ou quand le delta dépasse
+VERSION_DELTA_MAX_RATIO du contenu), des deltas de cet instantané entre
+les deux. C'est aussi la migration des versions créées avant les deltas
+(ou insérées en masse par l'import et les opérations groupées).
+
+Le contenu complet d'une version ne change pas: seules les lignes dont le
+stockage change sont réécrites, et pack() peut être relancé sans effet.
+Les instantanés réécrits sont stockés par empreinte (voir ContentBlob)
+selon les mêmes règles qu'à la création. Les tailles et empreintes du
+contenu complet (lues par l'historique) sont renseignées au passage;
+fill_stats() les renseigne seules, sans rien réécrire d'autre.
+"""
+
+from flask import current_app
+from app import db
+from app.models.content_blob import ContentBlob
+from app.models.template_version import TemplateVersion
+from app.utils.version_delta import apply_delta
+
+
+class VersionStorageService:
+    """Service de compactage de l'historique des versions"""
+
+    @staticmethod
+    def pack(template_id=None, batch_size=200):
+        """
+        Compacter l'historique de tous les templates (ou d'un seul)
+
+        Args:
+            template_id: ID d'un template (défaut: tous)
+            batch_size: Versions lues (et validées) par transaction
+
+        Returns:
+            dict: templates, versions, rewritten, snapshots
+        """
+        query = db.select(TemplateVersion.template_id).distinct().order_by(TemplateVersion.template_id)
+        if template_id is not None:
+            query = query.where(TemplateVersion.template_id == template_id)
+        template_ids = db.session.execute(query).scalars().all()
+
+        totals = {'templates': len(template_ids), 'versions': 0, 'rewritten': 0, 'snapshots': 0}
+        for current_id in template_ids:
+            for key, value in VersionStorageService.pack_template(current_id, batch_size).items():
+                totals[key] += value
+
+        return totals
+
+    @staticmethod
+    def pack_template(template_id, batch_size=200):
+        """
+        Compacter l'historique d'un template
+
+        Les versions sont lues par numéro croissant, par lots: l'instantané
+        d'une version delta la précède toujours, son contenu d'origine est
+        donc déjà connu quand la ligne est relue.
+
+        Args:
+            template_id: ID du template
+            batch_size: Versions lues (et validées) par transaction
+
+        Returns:
+            dict: versions, rewritten, snapshots
+        """
+        config = current_app.config
+        enabled = config.get('VERSION_DELTA_ENABLED', True)
+        interval = config.get('VERSION_SNAPSHOT_INTERVAL', 20)
+
+        # Contenu complet des instantanés d'origine (décodage) et de l'instantané courant
+        old_snapshots = {}
+        snapshot_id, snapshot, dependents = None, None, 0
+        stats = {'versions': 0, 'rewritten': 0, 'snapshots': 0}
+        last_number = 0
+
+        while True:
+            rows = db.session.execute(
+                TemplateVersion.content_query(
+                    TemplateVersion.version_number,
+                    TemplateVersion.html_size,
+                    TemplateVersion.css_size,
+                    TemplateVersion.html_hash,
+                    TemplateVersion.css_hash
+                ).where(
+                    TemplateVersion.template_id == template_id,
+                    TemplateVersion.version_number > last_number
+                ).order_by(TemplateVersion.version_number).limit(batch_size)
+            ).all()
+            if not rows:
+                break
+
+            for row in rows:
+                if row.delta_base_id is None:
+                    content = (ContentBlob.row_text(row, 'html_content'), ContentBlob.row_text(row, 'css_content'))
+                    old_snapshots[row.id] = content
+                else:
+                    base = old_snapshots.get(row.delta_base_id) or TemplateVersion.load_base(row.delta_base_id)
+                    content = (apply_delta(base[0], row.html_content), apply_delta(base[1], row.css_content))
+
+                packed = None
+                if enabled and snapshot is not None and dependents + 2 <= interval:
+                    packed = TemplateVersion.encode(snapshot, *content)
+
+                if packed is None:
+                    values = {'delta_base_id': None, 'html_content': content[0], 'css_content': content[1]}
+                    acquired = ContentBlob.references(values)
+                    snapshot_id, snapshot, dependents = row.id, content, 0
+                    stats['snapshots'] += 1
+                else:
+                    values = {
+                        'delta_base_id': snapshot_id,
+                        'html_content': packed[0],
+                        'css_content': packed[1],
+                        'html_blob': None,
+                        'css_blob': None
+                    }
+                    acquired = []
+                    dependents += 1
+
+                values.update(TemplateVersion.content_stats(*content))
+                stats['versions'] += 1
+
+                current = {
+                    'delta_base_id': row.delta_base_id,
+                    'html_content': row.html_content,
+                    'css_content': row.css_content,
+                    'html_blob': row.html_content_blob,
+                    'css_blob': row.css_content_blob,
+                    'html_size': row.html_size,
+                    'css_size': row.css_size,
+                    'html_hash': row.html_hash,
+                    'css_hash': row.css_hash
+                }
+                if values != current:
+                    connection = db.session.connection()
+                    for digest, text in acquired:
+                        ContentBlob.acquire(digest, text, connection)
+                    ContentBlob.release([row.html_content_blob, row.css_content_blob], connection)
+                    db.session.execute(
+                        db.update(TemplateVersion.__table__)
+                        .where(TemplateVersion.__table__.c.id == row.id)
+                        .values(**values)
+                    )
+                    stats['rewritten'] += 1
+
+            db.session.commit()
+            last_number = rows[-1].version_number
+
+        return stats
+
+    @staticmethod
+    def fill_stats(batch_size=500, progress=None):
+        """
+        Renseigner les tailles et empreintes manquantes de toutes les versions
+        (versions antérieures à la migration 9), sans réécrire leur stockage
+
+        L'historique les complète aussi à la lecture (TemplateVersion.
+        history_dicts); cette commande évite ce calcul aux premières lectures.
+
+        Args:
+            batch_size: Versions traitées par transaction
+            progress: Fonction appelée après chaque lot (versions complétées)
+
+        Returns:
+            int: Nombre de versions complétées
+        """
+        missing = db.or_(*[getattr(TemplateVersion, name).is_(None) for name in TemplateVersion.STATS_COLUMNS])
+        total = 0
+        last_id = 0
+
+        while True:
+            version_ids = db.session.execute(
+                db.select(TemplateVersion.id).where(TemplateVersion.id > last_id, missing)
+                .order_by(TemplateVersion.id).limit(batch_size)
+            ).scalars().all()
+            if not version_ids:
+                break
+
+            total += len(TemplateVersion.fill_content_stats(version_ids))
+            last_id = version_ids[-1]
+            if progress:
+                progress(total)
+
+        return total
+
+    @staticmethod
+    def report(template_id=None, limit=None):
+        """
+        Espace occupé par l'historique, par template
+
+        stored_bytes est la taille stockée dans les lignes (deltas et
+        instantanés, après compression), full_bytes celle des contenus
+        complets. Les instantanés stockés par empreinte (blob_snapshots) ne
+        comptent pas dans stored_bytes: leur contenu, partagé, est compté une
+        fois par BlobService.report().
+
+        Args:
+            template_id: ID d'un template (défaut: tous)
+            limit: Nombre maximum de templates (les plus gros gains d'abord)
+
+        Returns:
+            dict: templates (liste), totals
+        """
+        html = TemplateVersion._html_stored
+        css = TemplateVersion._css_stored
+        stored = db.func.length(html) + db.func.coalesce(db.func.length(css), 0)
+        # Versions jamais compactées: taille non renseignée, taille stockée à défaut
+        full = (
+            db.func.coalesce(TemplateVersion.html_size, db.func.length(html))
+            + db.func.coalesce(TemplateVersion.css_size, db.func.length(css), 0)
+        )
+        saved = db.func.sum(full) - db.func.sum(stored)
+        is_snapshot = db.case((TemplateVersion.delta_base_id.is_(None), 1), else_=0)
+        by_digest = db.case(
+            (db.or_(TemplateVersion.html_blob.isnot(None), TemplateVersion.css_blob.isnot(None)), 1), else_=0
+        )
+
+        columns = (
+            db.func.count(TemplateVersion.id).label('versions'),
+            db.func.sum(is_snapshot).label('snapshots'),
+            db.func.sum(by_digest).label('blob_snapshots'),
+            db.func.sum(stored).label('stored_bytes'),
+            db.func.sum(full).label('full_bytes')
+        )
+        query = db.select(TemplateVersion.template_id, *columns).group_by(
+            TemplateVersion.template_id
+        ).order_by(saved.desc(), TemplateVersion.template_id)
+        totals_query = db.select(*columns)
+
+        if template_id is not None:
+            query = query.where(TemplateVersion.template_id == template_id)
+            totals_query = totals_query.where(TemplateVersion.template_id == template_id)
+        if limit:
+            query = query.limit(limit)
+
+        templates = [
+            {'template_id': row.template_id, **VersionStorageService._report_entry(row)}
+            for row in db.session.execute(query)
+        ]
+        totals = db.session.execute(totals_query).one()
+
+        return {
+            'templates': templates,
+            'totals': VersionStorageService._report_entry(totals)
+        }
+
+    @staticmethod
+    def _report_entry(row):
+        """Ligne du rapport: compteurs, octets et part économisée"""
+        stored_bytes = int(row.stored_bytes or 0)
+        full_bytes = int(row.full_bytes or 0)
+        return {
+            'versions': row.versions,
+            'snapshots': int(row.snapshots or 0),
+            'deltas': row.versions - int(row.snapshots or 0),
+            'blob_snapshots': int(row.blob_snapshots or 0),
+            'stored_bytes': stored_bytes,
+            'full_bytes': full_bytes,
+            'saved_bytes': full_bytes - stored_bytes,
+            'saved_percent': round(100.0 * (full_bytes - stored_bytes) / full_bytes, 1) if full_bytes else 0.0
+        }
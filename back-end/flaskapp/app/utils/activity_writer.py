@@ -0,0 +1,243 @@
+# ============================================
+# FICHIER: backend/app/utils/activity_writer.py
+# Écriture Différée des Logs d'Activité
+# ============================================
+"""
+Écriture différée (write-behind) des logs d'activité
+
+Les événements sont placés dans une file bornée en mémoire. Un thread de fond
+les insère par lots (INSERT multi-lignes) dès que ACTIVITY_LOG_BATCH_SIZE
+événements sont en attente ou que ACTIVITY_LOG_FLUSH_INTERVAL est écoulé.
+
+Politique quand la file est pleine (ACTIVITY_LOG_BACKPRESSURE):
+    - 'sync'  : écrire l'événement directement (aucune perte, plus lent)
+    - 'block' : attendre ACTIVITY_LOG_BLOCK_TIMEOUT puis abandonner
+    - 'drop'  : abandonner immédiatement l'événement
+
+Mode synchrone (ACTIVITY_LOG_ASYNC = False, utilisé pour les tests):
+ActivityLog.log_activity écrit chaque événement dans sa propre transaction,
+comme avant, sans passer par la file.
+"""
+
+import atexit
+import os
+import queue
+import threading
+import time
+from datetime import datetime
+
+
+class ActivityWriter:
+    """File d'attente + thread d'écriture par lots des logs d'activité"""
+
+    BACKPRESSURE_POLICIES = ('sync', 'block', 'drop')
+
+    def __init__(self):
+        """Initialiser le writer (configuré par init_app)"""
+        self.app = None
+        self.async_enabled = False
+        self.batch_size = 200
+        self.flush_interval = 1.0
+        self.backpressure = 'sync'
+        self.block_timeout = 0.5
+        self._queue = None
+        self._thread = None
+        self._pid = None
+        self._stop = threading.Event()
+        self._start_lock = threading.Lock()
+        self._atexit_registered = False
+        self._stats_lock = threading.Lock()
+        self._stats = {
+            'enqueued': 0,
+            'flushed': 0,
+            'batches': 0,
+            'dropped': 0,
+            'written_sync': 0,
+            'failed': 0
+        }
+
+    def init_app(self, app):
+        """
+        Configurer le writer à partir de la configuration Flask
+
+        Args:
+            app: Application Flask
+        """
+        self.app = app
+        self.async_enabled = app.config.get('ACTIVITY_LOG_ASYNC', False)
+        self.batch_size = app.config.get('ACTIVITY_LOG_BATCH_SIZE', self.batch_size)
+        self.flush_interval = app.config.get('ACTIVITY_LOG_FLUSH_INTERVAL', self.flush_interval)
+        self.block_timeout = app.config.get('ACTIVITY_LOG_BLOCK_TIMEOUT', self.block_timeout)
+        self.backpressure = app.config.get('ACTIVITY_LOG_BACKPRESSURE', self.backpressure)
+
+        if self.backpressure not in self.BACKPRESSURE_POLICIES:
+            raise ValueError(f'ACTIVITY_LOG_BACKPRESSURE invalide: {self.backpressure}')
+
+        self._queue = queue.Queue(maxsize=app.config.get('ACTIVITY_LOG_QUEUE_SIZE', 10000))
+
+        # Une seule fois par processus (create_app peut être appelé plusieurs fois)
+        if self.async_enabled and not self._atexit_registered:
+            atexit.register(self.shutdown)
+            self._atexit_registered = True
+
+    def write(self, row):
+        """
+        Mettre un événement en file (mode asynchrone)
+
+        Args:
+            row: Colonnes du log (dict)
+
+        Returns:
+            bool: True si écrit immédiatement, False si différé ou abandonné
+        """
+        # Horodater à l'émission, pas à l'écriture du lot
+        row.setdefault('created_at', datetime.utcnow())
+
+        self._ensure_started()
+
+        try:
+            if self.backpressure == 'block':
+                self._queue.put(row, timeout=self.block_timeout)
+            else:
+                self._queue.put_nowait(row)
+        except queue.Full:
+            if self.backpressure == 'sync':
+                self._write_sync(row)
+                return True
+
+            self._count('dropped')
+            return False
+
+        self._count('enqueued')
+        return False
+
+    def flush(self):
+        """
+        Vider la file immédiatement (thread appelant)
+
+        Returns:
+            int: Nombre d'événements écrits
+        """
+        rows = self._drain(limit=None)
+        if rows:
+            self._insert_batch(rows)
+        return len(rows)
+
+    def shutdown(self, timeout=5.0):
+        """
+        Arrêter le thread et écrire les événements restants
+
+        Args:
+            timeout: Délai maximum d'attente du thread (secondes)
+        """
+        self._stop.set()
+
+        if self._thread is not None and self._thread.is_alive():
+            self._thread.join(timeout)
+
+        if self._queue is not None and self.app is not None:
+            with self.app.app_context():
+                self.flush()
+
+    def stats(self):
+        """
+        Compteurs du writer
+
+        Returns:
+            dict: enqueued, flushed, batches, dropped, written_sync, failed, pending
+        """
+        with self._stats_lock:
+            data = dict(self._stats)
+
+        data['async'] = self.async_enabled
+        data['backpressure'] = self.backpressure
+        data['pending'] = self._queue.qsize() if self._queue is not None else 0
+        return data
+
+    def _ensure_started(self):
+        """Démarrer le thread (paresseusement, et après un fork de worker)"""
+        if self._thread is not None and self._thread.is_alive() and self._pid == os.getpid():
+            return
+
+        with self._start_lock:
+            if self._thread is not None and self._thread.is_alive() and self._pid == os.getpid():
+                return
+
+            self._pid = os.getpid()
+            self._stop.clear()
+            self._thread = threading.Thread(
+                target=self._run,
+                name='activity-log-writer',
+                daemon=True
+            )
+            self._thread.start()
+
+    def _run(self):
+        """Boucle du thread: regrouper puis insérer par lots"""
+        from app import db
+
+        with self.app.app_context():
+            while not self._stop.is_set():
+                try:
+                    first = self._queue.get(timeout=self.flush_interval)
+                except queue.Empty:
+                    continue
+
+                rows = [first]
+
+                # Remplir le lot jusqu'au seuil de taille ou de temps
+                deadline = time.monotonic() + self.flush_interval
+                while len(rows) < self.batch_size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    try:
+                        rows.append(self._queue.get(timeout=remaining))
+                    except queue.Empty:
+                        break
+
+                self._insert_batch(rows)
+                db.session.remove()
+
+    def _drain(self, limit):
+        """Retirer jusqu'à limit événements de la file sans attendre"""
+        rows = []
+        while limit is None or len(rows) < limit:
+            try:
+                rows.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return rows
+
+    def _insert_batch(self, rows):
+        """Insérer un lot en une seule instruction multi-lignes"""
+        from app import db
+        from app.models.activity_log import ActivityLog
+
+        try:
+            db.session.execute(db.insert(ActivityLog.__table__), rows)
+            db.session.commit()
+            self._count('flushed', len(rows))
+            self._count('batches')
+        except Exception as e:
+            db.session.rollback()
+            self._count('failed', len(rows))
+            self.app.logger.error(f'❌ Écriture des logs d\'activité échouée ({len(rows)}): {str(e)}')
+
+    def _write_sync(self, row):
+        """Écrire un événement dans sa propre transaction"""
+        from app import db
+        from app.models.activity_log import ActivityLog
+
+        db.session.execute(db.insert(ActivityLog.__table__), [row])
+        db.session.commit()
+        self._count('written_sync')
+
+    def _count(self, key, amount=1):
+        """Incrémenter un compteur"""
+        with self._stats_lock:
+            self._stats[key] += amount
+
+
+# Instance globale (configurée dans create_app)
+activity_writer = ActivityWriter()
@@ -0,0 +1,323 @@
+# ============================================
+# FICHIER: backend/app/utils/auth_cache.py
+# Cache d'Authentification
+# ============================================
+"""
+Cache d'authentification - Évite les requêtes DB répétées dans token_required
+
+Chaque entrée est indexée par le hash du token (Session.hash_token) et contient:
+    - le payload JWT décodé
+    - l'état de la session (révoquée / date d'expiration)
+    - un instantané détaché de l'utilisateur (colonnes uniquement)
+
+Il conserve aussi, par utilisateur, l'époque de révocation (User.token_epoch)
+utilisée pour vérifier les access tokens sans état.
+
+Le cache est borné (LRU) et chaque entrée a une durée de vie (TTL). Il est
+local au processus: avec plusieurs workers, une révocation faite sur un autre
+worker n'est visible qu'à l'expiration du TTL, qui doit donc rester court.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from flask import g
+
+
+class AuthCache:
+    """Cache LRU + TTL des tokens vérifiés"""
+
+    def __init__(self, max_entries=10000, ttl=30):
+        """
+        Initialiser le cache
+
+        Args:
+            max_entries: Nombre maximum d'entrées
+            ttl: Durée de vie d'une entrée (secondes)
+        """
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.enabled = True
+        self._entries = OrderedDict()
+        self._user_index = {}
+        self._user_states = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def init_app(self, app):
+        """
+        Configurer le cache à partir de la configuration Flask
+
+        Args:
+            app: Application Flask
+        """
+        self.enabled = app.config.get('AUTH_CACHE_ENABLED', True)
+        self.max_entries = app.config.get('AUTH_CACHE_MAX_ENTRIES', self.max_entries)
+        self.ttl = app.config.get('AUTH_CACHE_TTL', self.ttl)
+        self.clear()
+
+    def get(self, token_hash):
+        """
+        Récupérer une entrée valide
+
+        Args:
+            token_hash: Hash du token
+
+        Returns:
+            dict: Entrée (payload, session, user) ou None
+        """
+        if not self.enabled:
+            return None
+
+        with self._lock:
+            entry = self._entries.get(token_hash)
+
+            if entry is None:
+                self.misses += 1
+                return None
+
+            if entry['cached_until'] < time.monotonic():
+                self._remove(token_hash)
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(token_hash)
+            self.hits += 1
+            return entry
+
+    def set(self, token_hash, payload, session, user):
+        """
+        Mettre en cache un token vérifié
+
+        Args:
+            token_hash: Hash du token
+            payload: Payload JWT décodé
+            session: Session active
+            user: Utilisateur chargé
+        """
+        if not self.enabled:
+            return
+
+        entry = {
+            'payload': payload,
+            'session': {
+                'id': session.id,
+                'expires_at': session.expires_at,
+                'is_revoked': session.is_revoked
+            },
+            'user_id': user.id,
+            'user': AuthCache.snapshot_user(user),
+            'cached_until': time.monotonic() + self.ttl
+        }
+
+        with self._lock:
+            self._remove(token_hash)
+            self._entries[token_hash] = entry
+            self._user_index.setdefault(user.id, set()).add(token_hash)
+
+            while len(self._entries) > self.max_entries:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+
+    def get_user_state(self, user_id):
+        """
+        Récupérer l'époque et l'instantané d'un utilisateur
+
+        Args:
+            user_id: ID de l'utilisateur
+
+        Returns:
+            dict: État (epoch, user) ou None
+        """
+        if not self.enabled:
+            return None
+
+        with self._lock:
+            state = self._user_states.get(user_id)
+
+            if state is None:
+                self.misses += 1
+                return None
+
+            if state['cached_until'] < time.monotonic():
+                del self._user_states[user_id]
+                self.misses += 1
+                return None
+
+            self._user_states.move_to_end(user_id)
+            self.hits += 1
+            return state
+
+    def set_user_state(self, user):
+        """
+        Mettre en cache l'époque et l'instantané d'un utilisateur actif
+
+        Args:
+            user: Utilisateur chargé
+
+        Returns:
+            dict: État mis en cache
+        """
+        state = {
+            'epoch': user.token_epoch,
+            'user': AuthCache.snapshot_user(user),
+            'cached_until': time.monotonic() + self.ttl
+        }
+
+        if not self.enabled:
+            return state
+
+        with self._lock:
+            self._user_states.pop(user.id, None)
+            self._user_states[user.id] = state
+
+            while len(self._user_states) > self.max_entries:
+                self._user_states.popitem(last=False)
+
+        return state
+
+    def invalidate(self, token_hash):
+        """
+        Invalider un token (révocation de session)
+
+        Args:
+            token_hash: Hash du token
+        """
+        with self._lock:
+            self._remove(token_hash)
+
+    def invalidate_user(self, user_id):
+        """
+        Invalider tous les tokens d'un utilisateur
+        (désactivation, changement de rôle, modification du profil)
+
+        Args:
+            user_id: ID de l'utilisateur
+        """
+        with self._lock:
+            for token_hash in list(self._user_index.get(user_id, ())):
+                self._remove(token_hash)
+            self._user_states.pop(user_id, None)
+
+    def clear(self):
+        """Vider le cache"""
+        with self._lock:
+            self._entries.clear()
+            self._user_index.clear()
+            self._user_states.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        """
+        Statistiques du cache
+
+        Returns:
+            dict: Taille, hits, misses
+        """
+        with self._lock:
+            return {
+                'enabled': self.enabled,
+                'size': len(self._entries),
+                'user_states': len(self._user_states),
+                'max_entries': self.max_entries,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses
+            }
+
+    def _remove(self, token_hash):
+        """Retirer une entrée (appelé sous verrou)"""
+        entry = self._entries.pop(token_hash, None)
+        if entry is None:
+            return
+
+        hashes = self._user_index.get(entry['user_id'])
+        if hashes is not None:
+            hashes.discard(token_hash)
+            if not hashes:
+                del self._user_index[entry['user_id']]
+
+    @staticmethod
+    def is_session_active(entry):
+        """
+        Vérifier l'état de session mis en cache
+
+        Args:
+            entry: Entrée du cache
+
+        Returns:
+            bool: True si la session est toujours active
+        """
+        session = entry['session']
+        return not session['is_revoked'] and datetime.utcnow() <= session['expires_at']
+
+    @staticmethod
+    def snapshot_user(user):
+        """
+        Copier les colonnes d'un utilisateur (instantané détaché)
+
+        Args:
+            user: Utilisateur chargé
+
+        Returns:
+            dict: Valeurs des colonnes
+        """
+        return {column.key: getattr(user, column.key) for column in user.__table__.columns}
+
+    @staticmethod
+    def restore_user(snapshot):
+        """
+        Reconstruire un utilisateur attaché à la session DB sans requête
+
+        Args:
+            snapshot: Instantané créé par snapshot_user
+
+        Returns:
+            User: Utilisateur attaché à db.session
+        """
+        from sqlalchemy.orm import make_transient_to_detached
+        from sqlalchemy.orm.attributes import set_committed_value
+        from app import db
+        from app.models.user import User
+
+        user = User.__mapper__.class_manager.new_instance()
+        for key, value in snapshot.items():
+            set_committed_value(user, key, value)
+        make_transient_to_detached(user)
+
+        # merge(load=False) réutilise l'identité sans interroger la base
+        return db.session.merge(user, load=False)
+
+    @staticmethod
+    def get_request_user(token_hash):
+        """
+        Utilisateur déjà résolu pendant la requête courante
+
+        Args:
+            token_hash: Hash du token
+
+        Returns:
+            User: Utilisateur ou None
+        """
+        cached = g.get('_auth_user')
+        if cached and cached[0] == token_hash:
+            return cached[1]
+        return None
+
+    @staticmethod
+    def set_request_user(token_hash, user):
+        """
+        Mémoriser l'utilisateur pour la requête courante
+
+        Args:
+            token_hash: Hash du token
+            user: Utilisateur courant
+        """
+        g._auth_user = (token_hash, user)
+
+
+# Instance globale (configurée dans create_app)
+auth_cache = AuthCache()
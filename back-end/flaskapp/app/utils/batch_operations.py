@@ -0,0 +1,95 @@
+# ============================================
+# FICHIER: backend/app/utils/batch_operations.py
+# Opérations SQL par Lots
+# ============================================
+"""
+Opérations ensemblistes par lots - UPDATE/DELETE sans charger les lignes
+
+Chaque lot est une transaction courte: les verrous restent limités et une
+interruption ne perd que le lot en cours.
+"""
+
+from app import db
+
+
+def delete_in_batches(model, *conditions, batch_size=5000, progress=None):
+    """
+    Supprimer les lignes correspondant aux conditions, par lots d'IDs
+
+    Args:
+        model: Modèle SQLAlchemy (doit avoir une colonne id)
+        *conditions: Expressions de filtre
+        batch_size: Nombre de lignes par lot
+        progress: Callback progress(total_supprimé) appelé après chaque lot
+
+    Returns:
+        int: Nombre total de lignes supprimées
+    """
+    total = 0
+
+    while True:
+        ids = [row[0] for row in db.session.query(model.id).filter(
+            *conditions
+        ).order_by(model.id).limit(batch_size).all()]
+
+        if not ids:
+            break
+
+        result = db.session.execute(
+            db.delete(model).where(model.id.in_(ids)).execution_options(synchronize_session=False)
+        )
+        db.session.commit()
+
+        total += result.rowcount
+
+        if progress:
+            progress(total)
+
+        if len(ids) < batch_size:
+            break
+
+    return total
+
+
+def update_in_batches(model, values, *conditions, batch_size=5000, progress=None):
+    """
+    Mettre à jour les lignes correspondant aux conditions, par lots d'IDs
+
+    Les conditions doivent exclure les lignes déjà mises à jour, sinon
+    la boucle ne se termine pas (ex: is_revoked == False).
+
+    Args:
+        model: Modèle SQLAlchemy (doit avoir une colonne id)
+        values: Valeurs à écrire (dict)
+        *conditions: Expressions de filtre
+        batch_size: Nombre de lignes par lot
+        progress: Callback progress(total_modifié) appelé après chaque lot
+
+    Returns:
+        int: Nombre total de lignes modifiées
+    """
+    total = 0
+
+    while True:
+        ids = [row[0] for row in db.session.query(model.id).filter(
+            *conditions
+        ).order_by(model.id).limit(batch_size).all()]
+
+        if not ids:
+            break
+
+        result = db.session.execute(
+            db.update(model).where(model.id.in_(ids)).values(values)
+            .execution_options(synchronize_session=False)
+        )
+        db.session.commit()
+
+        total += result.rowcount
+
+        if progress:
+            progress(total)
+
+        if len(ids) < batch_size:
+            break
+
+    return total
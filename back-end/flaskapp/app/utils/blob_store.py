@@ -0,0 +1,313 @@
+# ============================================
+# FICHIER: backend/app/utils/blob_store.py
+# Stockage des Contenus par Empreinte
+# ============================================
+"""
+Stockage par empreinte - Corps HTML/CSS identiques stockés une seule fois
+
+Un contenu d'au moins CONTENT_BLOB_MIN_SIZE caractères est identifié par
+le SHA-256 de son UTF-8 et stocké une fois dans content_blobs (voir le
+modèle ContentBlob, qui tient le compte des références). Ce module porte
+la partie indépendante de la base:
+
+    - backend 'db': le contenu est dans la colonne content_blobs.data
+      (compressée, voir CompressedText)
+    - backend 'fs': un fichier par contenu sous CONTENT_BLOB_DIR
+      (<dir>/hot/ab/abcdef...), écrit atomiquement et lu par mmap
+    - niveau froid: contenu compressé en LZMA (content_blobs.cold_data, ou
+      <dir>/cold/ab/abcdef....xz), décompressé à la lecture
+    - cache LRU des contenus lus: un contenu ne change jamais pour une
+      empreinte donnée, le cache n'a rien à invalider
+"""
+
+import hashlib
+import lzma
+import mmap
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+
+
+BACKENDS = ('db', 'fs')
+
+
+class BlobStore:
+    """Fichiers, niveau froid et cache des contenus stockés par empreinte"""
+
+    def __init__(self, max_entries=500, max_bytes=64 * 1024 * 1024):
+        """
+        Args:
+            max_entries: Nombre maximum de contenus en cache
+            max_bytes: Taille maximum cumulée des contenus en cache
+        """
+        self.enabled = True
+        self.backend = 'db'
+        self.directory = None
+        self.min_size = 4096
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def init_app(self, app):
+        """
+        Configurer le stockage à partir de la configuration Flask
+
+        Args:
+            app: Application Flask
+        """
+        backend = app.config.get('CONTENT_BLOB_BACKEND', 'db')
+        if backend not in BACKENDS:
+            raise ValueError(f'CONTENT_BLOB_BACKEND invalide (attendu: {", ".join(BACKENDS)})')
+
+        self.enabled = app.config.get('CONTENT_BLOB_ENABLED', True)
+        self.backend = backend
+        self.directory = os.path.join(app.instance_path, 'blobs') \
+            if app.config.get('CONTENT_BLOB_DIR') is None else app.config['CONTENT_BLOB_DIR']
+        self.min_size = app.config.get('CONTENT_BLOB_MIN_SIZE', self.min_size)
+        self.max_entries = app.config.get('CONTENT_BLOB_CACHE_MAX_ENTRIES', self.max_entries)
+        self.max_bytes = app.config.get('CONTENT_BLOB_CACHE_MAX_BYTES', self.max_bytes)
+        self.clear()
+
+    # ---- Empreintes ---------------------------------------------------
+
+    @staticmethod
+    def digest(text):
+        """
+        Empreinte d'un contenu
+
+        Args:
+            text: Contenu
+
+        Returns:
+            str: SHA-256 hexadécimal (64 caractères)
+        """
+        return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+    def should_store(self, text):
+        """
+        Le contenu doit-il être stocké par empreinte (sinon: dans la ligne)
+
+        Args:
+            text: Contenu (ou None)
+
+        Returns:
+            bool: True si stockage activé et contenu assez grand
+        """
+        return self.enabled and bool(text) and len(text) >= self.min_size
+
+    # ---- Niveau froid -------------------------------------------------
+
+    @staticmethod
+    def freeze(text):
+        """Forme froide d'un contenu (LZMA)"""
+        return lzma.compress(text.encode('utf-8'), preset=6)
+
+    @staticmethod
+    def thaw(data):
+        """Contenu d'une forme froide"""
+        return lzma.decompress(bytes(data)).decode('utf-8')
+
+    # ---- Fichiers (backend 'fs') --------------------------------------
+
+    def path(self, digest, cold=False):
+        """
+        Chemin du fichier d'un contenu
+
+        Args:
+            digest: Empreinte
+            cold: Niveau froid (.xz)
+
+        Returns:
+            str: Chemin absolu
+        """
+        if cold:
+            return os.path.join(self.directory, 'cold', digest[:2], digest + '.xz')
+        return os.path.join(self.directory, 'hot', digest[:2], digest)
+
+    def write(self, digest, text, cold=False):
+        """
+        Écrire le fichier d'un contenu (s'il existe déjà: date rafraîchie)
+
+        L'écriture passe par un fichier temporaire renommé: un lecteur ne
+        voit jamais de fichier partiel. La date du fichier protège un
+        contenu en cours de création du nettoyage des fichiers orphelins.
+
+        Args:
+            digest: Empreinte
+            text: Contenu
+            cold: Écrire la forme froide
+        """
+        target = self.path(digest, cold)
+        if os.path.exists(target):
+            try:
+                os.utime(target)
+                return
+            except FileNotFoundError:
+                pass
+
+        folder = os.path.dirname(target)
+        os.makedirs(folder, exist_ok=True)
+        data = self.freeze(text) if cold else text.encode('utf-8')
+
+        fd, temporary = tempfile.mkstemp(dir=folder, prefix='.tmp-')
+        try:
+            with os.fdopen(fd, 'wb') as output:
+                output.write(data)
+            os.replace(temporary, target)
+        except BaseException:
+            if os.path.exists(temporary):
+                os.unlink(temporary)
+            raise
+
+    def read(self, digest):
+        """
+        Lire le fichier d'un contenu (niveau chaud, sinon froid)
+
+        Args:
+            digest: Empreinte
+
+        Returns:
+            str: Contenu
+
+        Raises:
+            FileNotFoundError: Si aucun des deux fichiers n'existe
+        """
+        try:
+            with open(self.path(digest), 'rb') as source:
+                with mmap.mmap(source.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                    return str(mapped, 'utf-8')
+        except FileNotFoundError:
+            with open(self.path(digest, cold=True), 'rb') as source:
+                return self.thaw(source.read())
+
+    def move(self, digest, cold):
+        """
+        Passer le fichier d'un contenu au niveau froid (ou chaud)
+
+        Args:
+            digest: Empreinte
+            cold: True: vers le niveau froid, False: vers le niveau chaud
+        """
+        text = self.read(digest)
+        self.write(digest, text, cold=cold)
+        self.remove(digest, cold=not cold)
+
+    def remove(self, digest, cold=None):
+        """
+        Supprimer le fichier d'un contenu
+
+        Args:
+            digest: Empreinte
+            cold: Niveau (None: les deux)
+        """
+        for level in ((False, True) if cold is None else (cold,)):
+            try:
+                os.unlink(self.path(digest, level))
+            except FileNotFoundError:
+                pass
+
+    # ---- Lecture ------------------------------------------------------
+
+    def resolve(self, digest, data=None, cold_data=None):
+        """
+        Contenu d'une empreinte à partir de sa ligne content_blobs
+
+        Args:
+            digest: Empreinte
+            data: Colonne data (niveau chaud, backend 'db')
+            cold_data: Colonne cold_data (niveau froid, backend 'db')
+
+        Returns:
+            str: Contenu
+        """
+        text = self.get(digest)
+        if text is None:
+            if data is not None:
+                text = data
+            elif cold_data is not None:
+                text = self.thaw(cold_data)
+            else:
+                text = self.read(digest)
+            self.put(digest, text)
+        return text
+
+    # ---- Cache --------------------------------------------------------
+
+    def get(self, digest):
+        """
+        Contenu en cache
+
+        Args:
+            digest: Empreinte
+
+        Returns:
+            str: Contenu, ou None si absent
+        """
+        with self._lock:
+            text = self._entries.get(digest)
+            if text is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(digest)
+            self.hits += 1
+            return text
+
+    def put(self, digest, text):
+        """
+        Mettre un contenu en cache
+
+        Args:
+            digest: Empreinte
+            text: Contenu
+        """
+        size = len(text)
+        if size > self.max_bytes:
+            return
+
+        with self._lock:
+            if digest in self._entries:
+                self._entries.move_to_end(digest)
+                return
+
+            self._entries[digest] = text
+            self._bytes += size
+
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= len(evicted)
+
+    def clear(self):
+        """Vider le cache"""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        """
+        Statistiques du cache
+
+        Returns:
+            dict: Backend, taille, octets, hits, misses
+        """
+        with self._lock:
+            return {
+                'enabled': self.enabled,
+                'backend': self.backend,
+                'size': len(self._entries),
+                'bytes': self._bytes,
+                'max_entries': self.max_entries,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses
+            }
+
+
+# Instance globale (configurée dans create_app)
+blob_store = BlobStore()
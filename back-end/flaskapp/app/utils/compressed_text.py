@@ -0,0 +1,204 @@
+# ============================================
+# FICHIER: backend/app/utils/compressed_text.py
+# Colonnes de Contenu Compressées
+# ============================================
+"""
+Colonnes compressées - Type SQLAlchemy pour les contenus HTML/CSS
+
+CompressedText se lit et s'écrit comme un texte (str), mais est stocké dans
+une colonne binaire (LONGBLOB en MySQL: jusqu'à 4 Go, au lieu de 64 Ko
+pour TEXT) sous une forme compressée, précédée d'un marqueur de format:
+
+    b'\\x00Z' + zlib
+    b'\\x00S' + zstd (si le module 'zstandard' est installé)
+    b'\\x00P' + UTF-8 (contenu court ou incompressible)
+
+Toute autre valeur est un texte écrit avant la migration (ou par une
+procédure SQL): elle est lue telle quelle. Les deux formes cohabitent
+pendant la reprise des lignes existantes (flask compress-content).
+
+La décompression a lieu au chargement de la colonne: les requêtes qui ne
+lisent pas le contenu (listes, defer/load_only) ne la paient pas.
+"""
+
+import threading
+import zlib
+from sqlalchemy.dialects.mysql import LONGBLOB
+from sqlalchemy.types import LargeBinary, TypeDecorator
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - dépendance optionnelle
+    zstandard = None
+
+
+ZLIB = b'\x00Z'
+ZSTD = b'\x00S'
+PLAIN = b'\x00P'
+
+FORMATS = {ZLIB: 'zlib', ZSTD: 'zstd', PLAIN: 'plain'}
+
+ALGORITHMS = ('auto', 'zstd', 'zlib', 'none')
+
+
+class ContentCodec:
+    """Compression / décompression des contenus stockés"""
+
+    def __init__(self, algorithm='auto', level=None, min_size=256):
+        """
+        Args:
+            algorithm: 'auto' (zstd si disponible, sinon zlib), 'zstd', 'zlib' ou 'none'
+            level: Niveau de compression (défaut: 3 pour zstd, 6 pour zlib)
+            min_size: Taille en octets en dessous de laquelle rien n'est compressé
+        """
+        self.level = level
+        self.min_size = min_size
+        self.algorithm = self._resolve(algorithm)
+        self._local = threading.local()
+
+    def init_app(self, app):
+        """
+        Configurer le codec à partir de la configuration Flask
+
+        Args:
+            app: Application Flask
+        """
+        algorithm = app.config.get('CONTENT_COMPRESSION', 'auto')
+        if algorithm == 'zstd' and zstandard is None:
+            app.logger.warning('CONTENT_COMPRESSION=zstd sans le module zstandard: zlib utilisé')
+
+        self.algorithm = self._resolve(algorithm)
+        self.level = app.config.get('CONTENT_COMPRESSION_LEVEL', self.level)
+        self.min_size = app.config.get('CONTENT_COMPRESSION_MIN_SIZE', self.min_size)
+        self._local = threading.local()
+
+    @staticmethod
+    def _resolve(algorithm):
+        """Algorithme effectif ('zstd' indisponible: zlib)"""
+        if algorithm not in ALGORITHMS:
+            raise ValueError(f'CONTENT_COMPRESSION invalide (attendu: {", ".join(ALGORITHMS)})')
+        if algorithm in ('auto', 'zstd'):
+            return 'zstd' if zstandard is not None else 'zlib'
+        return algorithm
+
+    def encode(self, text):
+        """
+        Forme stockée d'un texte
+
+        Args:
+            text: Contenu
+
+        Returns:
+            bytes: Marqueur + données
+        """
+        data = text.encode('utf-8')
+        if self.algorithm == 'none' or len(data) < self.min_size:
+            return PLAIN + data
+
+        if self.algorithm == 'zstd':
+            marker, packed = ZSTD, self._zstd_compressor().compress(data)
+        else:
+            marker, packed = ZLIB, zlib.compress(data, 6 if self.level is None else self.level)
+
+        # Incompressible: stocké tel quel, la lecture reste gratuite
+        if len(packed) >= len(data):
+            return PLAIN + data
+        return marker + packed
+
+    def decode(self, value):
+        """
+        Texte d'une valeur stockée
+
+        Args:
+            value: Valeur de la colonne (bytes, ou str avant migration)
+
+        Returns:
+            str: Contenu
+        """
+        if isinstance(value, str):
+            return value
+
+        value = bytes(value)
+        marker = value[:2]
+        if marker == ZLIB:
+            return zlib.decompress(value[2:]).decode('utf-8')
+        if marker == ZSTD:
+            if zstandard is None:
+                raise RuntimeError('Contenu compressé en zstd: le module zstandard est requis')
+            return self._zstd_decompressor().decompress(value[2:]).decode('utf-8')
+        if marker == PLAIN:
+            return value[2:].decode('utf-8')
+        return value.decode('utf-8')
+
+    def needs_rewrite(self, value, recompress=False):
+        """
+        Valeur à réécrire par la reprise des données
+
+        Args:
+            value: Valeur stockée
+            recompress: Réécrire aussi les contenus compressés avec un autre algorithme
+
+        Returns:
+            bool: True si texte d'avant la migration (ou autre algorithme)
+        """
+        fmt = ContentCodec.format_of(value)
+        if fmt == 'legacy':
+            return True
+        return recompress and fmt != 'plain' and fmt != self.algorithm
+
+    @staticmethod
+    def format_of(value):
+        """
+        Format d'une valeur stockée
+
+        Returns:
+            str: 'zlib', 'zstd', 'plain' ou 'legacy' (texte non marqué)
+        """
+        if isinstance(value, str):
+            return 'legacy'
+        return FORMATS.get(bytes(value[:2]), 'legacy')
+
+    def _zstd_compressor(self):
+        """Compresseur zstd du thread courant (non partageable entre threads)"""
+        compressor = getattr(self._local, 'compressor', None)
+        if compressor is None:
+            compressor = zstandard.ZstdCompressor(level=3 if self.level is None else self.level)
+            self._local.compressor = compressor
+        return compressor
+
+    def _zstd_decompressor(self):
+        """Décompresseur zstd du thread courant"""
+        decompressor = getattr(self._local, 'decompressor', None)
+        if decompressor is None:
+            decompressor = zstandard.ZstdDecompressor()
+            self._local.decompressor = decompressor
+        return decompressor
+
+
+# Instance globale (configurée dans create_app)
+content_codec = ContentCodec()
+
+
+class CompressedText(TypeDecorator):
+    """Texte stocké compressé dans une colonne binaire (voir ContentCodec)"""
+
+    impl = LargeBinary
+    cache_ok = True
+
+    def load_dialect_impl(self, dialect):
+        """LONGBLOB en MySQL (BLOB est limité à 64 Ko)"""
+        if dialect.name == 'mysql':
+            return dialect.type_descriptor(LONGBLOB())
+        return dialect.type_descriptor(LargeBinary())
+
+    def process_bind_param(self, value, dialect):
+        """Compresser à l'écriture"""
+        return None if value is None else content_codec.encode(value)
+
+    def process_result_value(self, value, dialect):
+        """Décompresser à la lecture"""
+        return None if value is None else content_codec.decode(value)
+
+    @property
+    def python_type(self):
+        return str
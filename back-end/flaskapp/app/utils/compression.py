@@ -0,0 +1,244 @@
+# ============================================
+# FICHIER: backend/app/utils/compression.py
+# Compression des Réponses
+# ============================================
+"""
+Compression des réponses - gzip / deflate / brotli négociés par Accept-Encoding
+
+    - seules les réponses JSON, HTML, texte, CSS et JS sont compressées
+    - les réponses plus petites que COMPRESSION_MIN_SIZE sont envoyées telles
+      quelles (/api/health, erreurs, ...)
+    - les réponses générées en flux (générateurs) sont compressées au fil de
+      l'eau, sans seuil de taille ni chargement complet en mémoire
+    - brotli n'est proposé que si le module 'brotli' est installé
+    - Cache-Control: no-transform exclut une réponse (flux de progression
+      dont chaque ligne doit arriver sans attendre un bloc compressé)
+
+Un ETag fort devient faible (W/"...") une fois la réponse compressée: le
+corps envoyé n'est plus identique octet pour octet.
+"""
+
+import threading
+import zlib
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - dépendance optionnelle
+    brotli = None
+
+
+class ResponseCompressor:
+    """Compression négociée des réponses Flask (after_request)"""
+
+    DEFAULT_MIMETYPES = (
+        'application/json',
+        'application/x-ndjson',
+        'text/html',
+        'text/plain',
+        'text/css',
+        'text/csv',
+        'application/javascript',
+        'image/svg+xml'
+    )
+
+    def __init__(self):
+        """Valeurs par défaut (remplacées par init_app)"""
+        self.enabled = True
+        self.min_size = 1024
+        self.level = 6
+        self.brotli_quality = 4
+        self.mimetypes = set(self.DEFAULT_MIMETYPES)
+        self._stats_lock = threading.Lock()
+        self._stats = {
+            'compressed': 0,
+            'streamed': 0,
+            'skipped_small': 0,
+            'bytes_in': 0,
+            'bytes_out': 0
+        }
+
+    def init_app(self, app):
+        """
+        Configurer la compression et enregistrer le hook after_request
+
+        Enregistré avant les autres hooks, il s'exécute en dernier
+        (Flask appelle les after_request dans l'ordre inverse).
+
+        Args:
+            app: Application Flask
+        """
+        self.enabled = app.config.get('COMPRESSION_ENABLED', True)
+        self.min_size = app.config.get('COMPRESSION_MIN_SIZE', self.min_size)
+        self.level = app.config.get('COMPRESSION_LEVEL', self.level)
+        self.brotli_quality = app.config.get('COMPRESSION_BROTLI_QUALITY', self.brotli_quality)
+        self.mimetypes = set(app.config.get('COMPRESSION_MIMETYPES', self.DEFAULT_MIMETYPES))
+
+        app.after_request(self.compress_response)
+
+    def compress_response(self, response):
+        """
+        Compresser la réponse si le client l'accepte
+
+        Args:
+            response: Réponse Flask
+
+        Returns:
+            Response: Réponse (éventuellement compressée)
+        """
+        from flask import request
+
+        if not self.enabled or not self._is_compressible(response):
+            return response
+
+        encoding = self.negotiate(request.accept_encodings)
+        if encoding is None:
+            return response
+
+        response.vary.add('Accept-Encoding')
+
+        if response.is_streamed:
+            response.response = self._compress_stream(response.response, encoding)
+            response.headers.pop('Content-Length', None)
+            self._count('streamed')
+        else:
+            data = response.get_data()
+
+            if len(data) < self.min_size:
+                self._count('skipped_small')
+                return response
+
+            compressed = self.compress(data, encoding)
+            response.set_data(compressed)
+            self._count('compressed')
+            self._count('bytes_in', len(data))
+            self._count('bytes_out', len(compressed))
+
+        response.headers['Content-Encoding'] = encoding
+
+        etag, weak = response.get_etag()
+        if etag and not weak:
+            response.set_etag(etag, weak=True)
+
+        return response
+
+    def negotiate(self, accept_encodings):
+        """
+        Choisir l'encodage préféré par le client parmi ceux supportés
+
+        Args:
+            accept_encodings: request.accept_encodings
+
+        Returns:
+            str: 'br', 'gzip', 'deflate' ou None
+        """
+        supported = ['gzip', 'deflate']
+        if brotli is not None:
+            supported.insert(0, 'br')
+
+        best = accept_encodings.best_match(supported)
+        if best is None or accept_encodings[best] == 0:
+            return None
+        return best
+
+    def compress(self, data, encoding):
+        """
+        Compresser un corps complet
+
+        Args:
+            data: Octets
+            encoding: 'br', 'gzip' ou 'deflate'
+
+        Returns:
+            bytes: Données compressées
+        """
+        if encoding == 'br':
+            return brotli.compress(data, quality=self.brotli_quality)
+
+        compressor = self._zlib_compressor(encoding)
+        return compressor.compress(data) + compressor.flush()
+
+    def stats(self):
+        """
+        Métriques de compression
+
+        Returns:
+            dict: compressed, streamed, skipped_small, bytes_in, bytes_out, bytes_saved, ratio
+        """
+        with self._stats_lock:
+            data = dict(self._stats)
+
+        data['bytes_saved'] = data['bytes_in'] - data['bytes_out']
+        data['ratio'] = round(data['bytes_out'] / data['bytes_in'], 3) if data['bytes_in'] else None
+        data['brotli_available'] = brotli is not None
+        return data
+
+    def _is_compressible(self, response):
+        """Vérifier statut, type et encodage de la réponse"""
+        if response.status_code < 200 or response.status_code in (204, 206, 304):
+            return False
+
+        if 'Content-Encoding' in response.headers:
+            return False
+
+        # Fichiers servis directement (send_file): laissés tels quels
+        if response.direct_passthrough:
+            return False
+
+        # (werkzeug 3.0: la propriété no_transform ne reflète pas la directive)
+        if 'no-transform' in response.cache_control:
+            return False
+
+        return response.mimetype in self.mimetypes
+
+    def _zlib_compressor(self, encoding):
+        """Compresseur zlib: en-tête gzip (wbits 31) ou zlib/deflate HTTP (wbits 15)"""
+        wbits = 31 if encoding == 'gzip' else 15
+        return zlib.compressobj(self.level, zlib.DEFLATED, wbits)
+
+    def _compress_stream(self, chunks, encoding):
+        """Compresser un flux morceau par morceau (ferme le flux d'origine)"""
+        try:
+            yield from self._compress_chunks(chunks, encoding)
+        finally:
+            if hasattr(chunks, 'close'):
+                chunks.close()
+
+    def _compress_chunks(self, chunks, encoding):
+        """Générateur des morceaux compressés"""
+        if encoding == 'br':
+            compressor = brotli.Compressor(quality=self.brotli_quality)
+
+            for chunk in chunks:
+                data = chunk.encode('utf-8') if isinstance(chunk, str) else chunk
+                self._count('bytes_in', len(data))
+                output = compressor.process(data)
+                self._count('bytes_out', len(output))
+                if output:
+                    yield output
+
+            output = compressor.finish()
+        else:
+            compressor = self._zlib_compressor(encoding)
+
+            for chunk in chunks:
+                data = chunk.encode('utf-8') if isinstance(chunk, str) else chunk
+                self._count('bytes_in', len(data))
+                # Sans flush par morceau: zlib émet des blocs complets (meilleur ratio)
+                output = compressor.compress(data)
+                self._count('bytes_out', len(output))
+                if output:
+                    yield output
+
+            output = compressor.flush()
+
+        self._count('bytes_out', len(output))
+        yield output
+
+    def _count(self, key, amount=1):
+        """Incrémenter un compteur"""
+        with self._stats_lock:
+            self._stats[key] += amount
+
+
+# Instance globale (configurée dans create_app)
+response_compressor = ResponseCompressor()
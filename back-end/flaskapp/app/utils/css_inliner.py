@@ -0,0 +1,724 @@
+# ============================================
+# FICHIER: backend/app/utils/css_inliner.py
+# Mise en Ligne du CSS des Emails
+# ============================================
+"""
+Mise en ligne du CSS - Report des règles dans les attributs style=""
+
+Les clients mail suppriment souvent les blocs <style>: chaque règle
+applicable est donc recopiée dans l'attribut style des éléments qu'elle
+cible, dans le respect de la cascade:
+    1. CSS de la feuille < style="" existant
+    2. !important de la feuille < !important de style=""
+    3. à importance égale: spécificité, puis ordre dans la feuille
+
+Restent dans <style> (dans <head>): les règles @media, @font-face et
+autres @-règles, et les sélecteurs impossibles à mettre en ligne
+(:hover, ::before, :not(), ...).
+
+Sélecteurs pris en charge:
+    balise, *, #id, .classe, [attr], [attr=v], [attr~=v], [attr|=v],
+    [attr^=v], [attr$=v], [attr*=v], :first-child, :last-child,
+    :only-child, combinateurs ' ', '>', '+', '~'
+
+Performance:
+    - la feuille est analysée une fois puis gardée dans stylesheet_cache
+      sous le SHA-256 du CSS;
+    - les sélecteurs sont indexés par la partie la plus à droite (id,
+      sinon classe, sinon balise): un élément n'est comparé qu'aux
+      sélecteurs qui peuvent le cibler, pas à toute la feuille;
+    - chaque élément connaît l'ensemble des balises, ids et classes de
+      ses ancêtres: 'td.prix > a' est écarté d'un lien hors d'un tel td
+      par une inclusion d'ensembles, sans remonter l'arbre; un sélecteur
+      sans id ni classe à droite est en outre indexé par (balise, clé d'un
+      ancêtre), pour ne pas comparer chaque lien à tous les 'x > a';
+    - le HTML n'est pas réécrit: seules les balises ouvrantes qui
+      reçoivent un style sont remplacées, le reste est recopié tel quel;
+    - le ramasse-miettes est suspendu pendant l'analyse du document (des
+      dizaines de milliers d'objets créés, aucun cycle à libérer): sans
+      cela, ses passes successives coûtent près de la moitié du temps.
+"""
+
+import gc
+import hashlib
+import re
+import threading
+from collections import OrderedDict
+from html import escape, unescape
+
+
+# Éléments sans balise fermante
+VOID_ELEMENTS = frozenset([
+    'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input', 'link',
+    'meta', 'param', 'source', 'track', 'wbr'
+])
+
+# Éléments dont le contenu n'est pas du HTML
+RAW_TEXT_ELEMENTS = frozenset(['script', 'style', 'textarea', 'title', 'xmp'])
+
+# Balises fermant implicitement un élément ouvert ('<li>' après '<li>')
+_IMPLICIT_CLOSE = {
+    'li': ('li',),
+    'dt': ('dt', 'dd'),
+    'dd': ('dt', 'dd'),
+    'tr': ('tr', 'td', 'th'),
+    'td': ('td', 'th'),
+    'th': ('td', 'th'),
+    'option': ('option',),
+    'p': ('p',)
+}
+
+_TOKEN = re.compile(r'''
+    <!--.*?(?:-->|\Z)
+  | <![^>]*>
+  | <\?[^>]*>
+  | </([a-zA-Z][^\s/>]*)[^>]*>
+  | <([a-zA-Z][^\s/>]*)([^'">]*(?:(?:"[^"]*"|'[^']*')[^'">]*)*)>
+''', re.S | re.X)
+
+_ATTRIBUTE = re.compile(r'''([^\s"'>/=]+)(?:\s*=\s*(?:"([^"]*)"|'([^']*)'|([^\s>]+)))?''')
+
+_COMMENT = re.compile(r'/\*.*?(?:\*/|\Z)', re.S)
+
+# Déclarations séparées par ';' hors chaînes et parenthèses (url(data:...;base64,...))
+_DECLARATION = re.compile(r'''(?:"[^"]*"|'[^']*'|\([^)]*\)|[^;"'(])+''')
+
+_IMPORTANT = re.compile(r'\s*!\s*important\s*$', re.I)
+
+# Sélecteurs
+_IDENT = r'-?(?:[_a-zA-Z]|[^\x00-\x7f])(?:[\w-]|[^\x00-\x7f])*'
+_TYPE = re.compile(rf'\*|{_IDENT}')
+_ID = re.compile(rf'#((?:[\w-]|[^\x00-\x7f])+)')
+_CLASS = re.compile(rf'\.({_IDENT})')
+_ATTR = re.compile(
+    rf'''\[\s*({_IDENT})\s*(?:([~|^$*]?=)\s*(?:({_IDENT})|"([^"]*)"|'([^']*)')\s*)?\]'''
+)
+_PSEUDO = re.compile(r':(first-child|last-child|only-child)(?![\w(-])')
+_COMBINATOR = re.compile(r'\s*([>+~])\s*|\s+')
+
+
+class _Element:
+    """Élément du document: ce qu'il faut pour comparer les sélecteurs"""
+
+    __slots__ = ('tag', 'id', 'classes', 'attrs', 'parent', 'siblings', 'index',
+                 'ancestors', 'name_end', 'style_span')
+
+    def __init__(self, tag, attrs, parent, siblings, ancestors, name_end, style_span):
+        self.tag = tag
+        self.attrs = attrs
+        self.id = attrs.get('id')
+        self.classes = attrs['class'].split() if attrs.get('class') else ()
+        self.parent = parent
+        self.siblings = siblings
+        self.index = len(siblings)
+        self.ancestors = ancestors
+        self.name_end = name_end
+        self.style_span = style_span
+
+
+class _Selector:
+    """Sélecteur compilé, comparé de droite à gauche"""
+
+    __slots__ = ('compounds', 'combinators', 'specificity', 'order', 'declarations', 'ancestor_keys')
+
+    def __init__(self, compounds, combinators, order, declarations):
+        """
+        Args:
+            compounds: Sélecteurs composés, du plus à droite au plus à gauche
+            combinators: Combinateur entre compounds[i] et compounds[i + 1]
+            order: Rang de la règle dans la feuille
+            declarations: Tuple (propriété, valeur, important)
+        """
+        self.compounds = compounds
+        self.combinators = combinators
+        self.order = order
+        self.declarations = declarations
+
+        ids = classes = tags = 0
+        for tag, id_, class_names, attributes, pseudos in compounds:
+            ids += id_ is not None
+            classes += len(class_names) + len(attributes) + len(pseudos)
+            tags += tag is not None
+        self.specificity = (ids, classes, tags)
+
+        # Parties forcément portées par un ancêtre (à gauche d'un ' ' ou '>')
+        keys = set()
+        for i, compound in enumerate(compounds[1:]):
+            if ' ' in combinators[:i + 1] or '>' in combinators[:i + 1]:
+                keys.update(_compound_keys(*compound[:3]))
+        self.ancestor_keys = frozenset(keys)
+
+    def matches(self, element, i=0):
+        """Le sélecteur (à partir de compounds[i]) cible-t-il l'élément ?"""
+        if not _match_compound(element, self.compounds[i]):
+            return False
+        if i + 1 == len(self.compounds):
+            return True
+
+        combinator = self.combinators[i]
+        if combinator == '>':
+            return element.parent is not None and self.matches(element.parent, i + 1)
+        if combinator == ' ':
+            ancestor = element.parent
+            while ancestor is not None:
+                if self.matches(ancestor, i + 1):
+                    return True
+                ancestor = ancestor.parent
+            return False
+        if combinator == '+':
+            return element.index > 0 and self.matches(element.siblings[element.index - 1], i + 1)
+
+        # '~'
+        return any(self.matches(sibling, i + 1) for sibling in element.siblings[:element.index])
+
+
+def _compound_keys(tag, id_, class_names):
+    """Clés d'un élément ou d'un sélecteur composé pour le filtre des ancêtres"""
+    keys = [f'.{class_name}' for class_name in class_names]
+    if id_ is not None:
+        keys.append(f'#{id_}')
+    if tag is not None:
+        keys.append(tag)
+    return keys
+
+
+def _match_compound(element, compound):
+    """Comparer un élément à un sélecteur composé (sans combinateur)"""
+    tag, id_, class_names, attributes, pseudos = compound
+
+    if tag is not None and tag != element.tag:
+        return False
+    if id_ is not None and id_ != element.id:
+        return False
+    for class_name in class_names:
+        if class_name not in element.classes:
+            return False
+
+    for name, operator, expected in attributes:
+        value = element.attrs.get(name)
+        if value is None:
+            return False
+        if operator is None:
+            continue
+        if operator == '=':
+            matched = value == expected
+        elif operator == '~=':
+            matched = expected in value.split()
+        elif operator == '|=':
+            matched = value == expected or value.startswith(expected + '-')
+        elif operator == '^=':
+            matched = bool(expected) and value.startswith(expected)
+        elif operator == '$=':
+            matched = bool(expected) and value.endswith(expected)
+        else:
+            matched = bool(expected) and expected in value
+        if not matched:
+            return False
+
+    for pseudo in pseudos:
+        last = len(element.siblings) - 1
+        if pseudo == 'first-child' and element.index != 0:
+            return False
+        if pseudo == 'last-child' and element.index != last:
+            return False
+        if pseudo == 'only-child' and last != 0:
+            return False
+
+    return True
+
+
+def _parse_selector(text):
+    """
+    Compiler un sélecteur
+
+    Returns:
+        tuple: (compounds de droite à gauche, combinateurs), ou None si le
+        sélecteur ne peut pas être mis en ligne
+    """
+    compounds = []
+    combinators = []
+    position, length = 0, len(text)
+
+    while True:
+        tag, id_, class_names, attributes, pseudos = None, None, [], [], []
+        start = position
+
+        match = _TYPE.match(text, position)
+        if match:
+            tag = None if match.group() == '*' else match.group().lower()
+            position = match.end()
+
+        while position < length:
+            match = _ID.match(text, position)
+            if match:
+                # Deux ids différents ne ciblent rien: non pris en charge
+                if id_ is not None:
+                    return None
+                id_ = match.group(1)
+                position = match.end()
+                continue
+
+            match = _CLASS.match(text, position)
+            if match:
+                class_names.append(match.group(1))
+                position = match.end()
+                continue
+
+            match = _ATTR.match(text, position)
+            if match:
+                name, operator = match.group(1).lower(), match.group(2)
+                expected = next((g for g in match.groups()[2:] if g is not None), None)
+                attributes.append((name, operator, expected))
+                position = match.end()
+                continue
+
+            match = _PSEUDO.match(text, position)
+            if match:
+                pseudos.append(match.group(1))
+                position = match.end()
+                continue
+
+            break
+
+        if position == start:
+            return None
+
+        compounds.append((tag, id_, tuple(class_names), tuple(attributes), tuple(pseudos)))
+
+        if position == length:
+            break
+
+        match = _COMBINATOR.match(text, position)
+        if not match or match.end() == length:
+            return None
+        combinators.append(match.group(1) or ' ')
+        position = match.end()
+
+    compounds.reverse()
+    combinators.reverse()
+    return tuple(compounds), tuple(combinators)
+
+
+def _parse_declarations(text):
+    """
+    Déclarations d'un bloc ('color: red; margin: 0 !important')
+
+    Returns:
+        list: (propriété, valeur, important)
+    """
+    declarations = []
+    for match in _DECLARATION.finditer(text):
+        prop, colon, value = match.group().partition(':')
+        prop = prop.strip().lower()
+        value = value.strip()
+        if not colon or not prop or not value:
+            continue
+
+        important = _IMPORTANT.search(value)
+        if important:
+            value = value[:important.start()]
+        declarations.append((prop, value, important is not None))
+    return declarations
+
+
+def _block_end(css, start):
+    """Position après l'accolade fermant le bloc ouvert à start (chaînes ignorées)"""
+    depth = 0
+    position = start
+    length = len(css)
+    while position < length:
+        char = css[position]
+        if char in '"\'':
+            closing = css.find(char, position + 1)
+            position = length if closing == -1 else closing + 1
+            continue
+        if char == '{':
+            depth += 1
+        elif char == '}':
+            depth -= 1
+            if depth == 0:
+                return position + 1
+        position += 1
+    return length
+
+
+def _find_outside_strings(css, chars, start):
+    """Première position d'un des caractères, hors chaînes (-1 si absent)"""
+    position = start
+    length = len(css)
+    while position < length:
+        char = css[position]
+        if char in '"\'':
+            closing = css.find(char, position + 1)
+            position = length if closing == -1 else closing + 1
+            continue
+        if char in chars:
+            return position
+        position += 1
+    return -1
+
+
+class Stylesheet:
+    """Feuille de style analysée: sélecteurs indexés et CSS restant dans <head>"""
+
+    def __init__(self, css):
+        """
+        Args:
+            css: Contenu CSS
+        """
+        self.by_id = {}
+        self.by_class = {}
+        self.by_tag = {}
+        self.by_ancestor = {}
+        self.universal = []
+        self.rule_count = 0
+
+        kept = []
+        css = _COMMENT.sub('', css or '')
+        position, length = 0, len(css)
+
+        while position < length:
+            while position < length and css[position].isspace():
+                position += 1
+            if position >= length:
+                break
+
+            # @-règle: conservée telle quelle (@media, @font-face, @import, ...)
+            if css[position] == '@':
+                stop = _find_outside_strings(css, ';{', position)
+                if stop == -1:
+                    end = length
+                elif css[stop] == ';':
+                    end = stop + 1
+                else:
+                    end = _block_end(css, stop)
+                kept.append(css[position:end].strip())
+                position = end
+                continue
+
+            brace = _find_outside_strings(css, '{', position)
+            if brace == -1:
+                break
+            end = _block_end(css, brace)
+
+            selectors = css[position:brace].strip()
+            body = css[brace + 1:end - 1]
+            position = end
+
+            declarations = tuple(_parse_declarations(body))
+            if not selectors or not declarations:
+                continue
+
+            order = self.rule_count
+            self.rule_count += 1
+
+            unsupported = []
+            for text in selectors.split(','):
+                text = text.strip()
+                parsed = _parse_selector(text) if text else None
+                if parsed is None:
+                    if text:
+                        unsupported.append(text)
+                    continue
+                self._add(_Selector(parsed[0], parsed[1], order, declarations))
+
+            if unsupported:
+                kept.append(f'{", ".join(unsupported)} {{{body.strip()}}}')
+
+        self.remaining = '\n'.join(kept)
+        self.ancestor_index = frozenset(self.by_ancestor)
+
+    def _add(self, selector):
+        """Indexer un sélecteur par sa partie la plus à droite"""
+        tag, id_, class_names, _, _ = selector.compounds[0]
+        if id_ is not None:
+            self.by_id.setdefault(id_, []).append(selector)
+        elif class_names:
+            self.by_class.setdefault(class_names[0], []).append(selector)
+        elif selector.ancestor_keys:
+            # Clé la plus sélective: id, puis classe, puis balise
+            key = min(selector.ancestor_keys, key=lambda k: (k[0] not in '#', k[0] != '.', k))
+            self.by_ancestor.setdefault(key, {}).setdefault(tag, []).append(selector)
+        elif tag is not None:
+            self.by_tag.setdefault(tag, []).append(selector)
+        else:
+            self.universal.append(selector)
+
+    def candidates(self, element):
+        """Sélecteurs pouvant cibler l'élément (à vérifier avec matches)"""
+        candidates = list(self.universal)
+        if element.id is not None and element.id in self.by_id:
+            candidates.extend(self.by_id[element.id])
+        for class_name in set(element.classes):
+            if class_name in self.by_class:
+                candidates.extend(self.by_class[class_name])
+        if element.tag in self.by_tag:
+            candidates.extend(self.by_tag[element.tag])
+        if self.by_ancestor:
+            for key in element.ancestors & self.ancestor_index:
+                by_tag = self.by_ancestor[key]
+                candidates.extend(by_tag.get(element.tag, ()))
+                candidates.extend(by_tag.get(None, ()))
+        return candidates
+
+    @property
+    def empty(self):
+        """Aucune règle à mettre en ligne"""
+        return not (self.by_id or self.by_class or self.by_tag or self.by_ancestor or self.universal)
+
+
+def _parse_attributes(text, offset):
+    """
+    Attributs d'une balise ouvrante
+
+    Returns:
+        tuple: (dict des attributs, position de style="" dans le document ou None)
+    """
+    attrs = {}
+    style_span = None
+    for match in _ATTRIBUTE.finditer(text):
+        name = match.group(1).lower()
+        if name in attrs:
+            continue
+        value = match.group(match.lastindex) if match.lastindex > 1 else ''
+        attrs[name] = unescape(value) if '&' in value else value
+        if name == 'style':
+            style_span = (offset + match.start(), offset + match.end())
+    return attrs, style_span
+
+
+def _parse_elements(html):
+    """
+    Éléments du document, dans l'ordre, avec leur parent et leurs frères
+
+    Returns:
+        list: _Element
+    """
+    elements = []
+    root_children = []
+    stack = []  # (_Element, liste de ses enfants, clés de ses ancêtres et des siennes)
+    position = 0
+
+    while True:
+        match = _TOKEN.search(html, position)
+        if not match:
+            break
+        position = match.end()
+
+        end_tag, tag, attrs_text = match.group(1), match.group(2), match.group(3)
+
+        if end_tag is not None:
+            end_tag = end_tag.lower()
+            for depth in range(len(stack) - 1, -1, -1):
+                if stack[depth][0].tag == end_tag:
+                    del stack[depth:]
+                    break
+            continue
+
+        if tag is None:
+            continue
+
+        tag = tag.lower()
+        closes = _IMPLICIT_CLOSE.get(tag)
+        while closes and stack and stack[-1][0].tag in closes:
+            stack.pop()
+
+        attrs, style_span = _parse_attributes(attrs_text, match.start(3))
+        parent, siblings, ancestors = stack[-1] if stack else (None, root_children, frozenset())
+
+        element = _Element(tag, attrs, parent, siblings, ancestors, match.start(3), style_span)
+        siblings.append(element)
+        elements.append(element)
+
+        if tag in RAW_TEXT_ELEMENTS:
+            closing = re.compile(rf'</{tag}\s*>', re.I).search(html, position)
+            position = closing.end() if closing else len(html)
+        elif tag not in VOID_ELEMENTS and not attrs_text.rstrip().endswith('/'):
+            keys = ancestors.union(_compound_keys(tag, element.id, element.classes))
+            stack.append((element, [], keys))
+
+    return elements
+
+
+def _cascade(element, stylesheet):
+    """
+    Style résultant d'un élément
+
+    Returns:
+        str: Contenu de l'attribut style, ou None si aucune règle ne le cible
+    """
+    winners = {}
+    ancestors = element.ancestors
+    for selector in stylesheet.candidates(element):
+        if not selector.ancestor_keys <= ancestors or not selector.matches(element):
+            continue
+        for index, (prop, value, important) in enumerate(selector.declarations):
+            key = (2 if important else 0, selector.specificity, selector.order, index)
+            current = winners.get(prop)
+            if current is None or key > current[0]:
+                winners[prop] = (key, value, important)
+
+    if not winners:
+        return None
+
+    for index, (prop, value, important) in enumerate(_parse_declarations(element.attrs.get('style', ''))):
+        key = (3 if important else 1, (0, 0, 0), 0, index)
+        current = winners.get(prop)
+        if current is None or key > current[0]:
+            winners[prop] = (key, value, important)
+
+    # Par priorité croissante: un raccourci (margin) précède ses propriétés
+    # détaillées plus prioritaires (margin-top)
+    ordered = sorted(winners.items(), key=lambda item: item[1][0])
+    return '; '.join(
+        f'{prop}: {value} !important' if important else f'{prop}: {value}'
+        for prop, (_, value, important) in ordered
+    )
+
+
+def inline_css(html, css):
+    """
+    Reporter le CSS dans les attributs style du HTML
+
+    Args:
+        html: Document ou fragment HTML
+        css: Contenu CSS (ou Stylesheet déjà analysée)
+
+    Returns:
+        tuple: (HTML avec styles en ligne, CSS à garder dans <style>)
+    """
+    stylesheet = css if isinstance(css, Stylesheet) else stylesheet_cache.get(css)
+    if not html or stylesheet.empty:
+        return html, stylesheet.remaining
+
+    parts = []
+    position = 0
+
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        styles = [(element, _cascade(element, stylesheet)) for element in _parse_elements(html)]
+    finally:
+        if gc_enabled:
+            gc.enable()
+
+    for element, style in styles:
+        if style is None:
+            continue
+
+        attribute = f'style="{escape(style)}"'
+        if element.style_span is not None:
+            start, end = element.style_span
+            parts.append(html[position:start])
+            parts.append(attribute)
+        else:
+            end = element.name_end
+            parts.append(html[position:end])
+            parts.append(' ' + attribute)
+        position = end
+
+    parts.append(html[position:])
+    return ''.join(parts), stylesheet.remaining
+
+
+class StylesheetCache:
+    """Cache LRU des feuilles de style analysées, indexé par SHA-256 du CSS"""
+
+    def __init__(self, max_entries=200, max_bytes=16 * 1024 * 1024):
+        """
+        Args:
+            max_entries: Nombre maximum de feuilles
+            max_bytes: Taille maximum cumulée du CSS source
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.enabled = True
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def init_app(self, app):
+        """
+        Configurer le cache à partir de la configuration Flask
+
+        Args:
+            app: Application Flask
+        """
+        self.enabled = app.config.get('CSS_INLINE_CACHE_ENABLED', True)
+        self.max_entries = app.config.get('CSS_INLINE_CACHE_MAX_ENTRIES', self.max_entries)
+        self.max_bytes = app.config.get('CSS_INLINE_CACHE_MAX_BYTES', self.max_bytes)
+        self.clear()
+
+    def get(self, css):
+        """
+        Feuille analysée, depuis le cache ou analysée puis mise en cache
+
+        Args:
+            css: Contenu CSS
+
+        Returns:
+            Stylesheet: Feuille analysée
+        """
+        css = css or ''
+        if not self.enabled:
+            return Stylesheet(css)
+
+        key = hashlib.sha256(css.encode('utf-8')).hexdigest()
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+
+        stylesheet = Stylesheet(css)
+        size = len(css)
+
+        # Une feuille plus grande que tout le cache n'est pas conservée
+        if size > self.max_bytes:
+            return stylesheet
+
+        with self._lock:
+            if key not in self._entries:
+                self._entries[key] = (stylesheet, size)
+                self._bytes += size
+
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+
+        return stylesheet
+
+    def clear(self):
+        """Vider le cache"""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        """
+        Statistiques du cache
+
+        Returns:
+            dict: Taille, octets, hits, misses
+        """
+        with self._lock:
+            return {
+                'enabled': self.enabled,
+                'size': len(self._entries),
+                'bytes': self._bytes,
+                'max_entries': self.max_entries,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses
+            }
+
+
+# Instance globale (configurée dans create_app)
+stylesheet_cache = StylesheetCache()
@@ -7,8 +7,9 @@ Décorateurs pour les routes - Authentication, Authorization, etc.
 """
 
 from functools import wraps
-from flask import request, jsonify
+from flask import request, jsonify, make_response, g
 from app.services.auth_service import AuthService
+from app.utils.rate_limiter import rate_limiter
 
 
 def token_required(f):
@@ -48,8 +49,8 @@ def token_required(f):
             # Vérifier le token
             payload = AuthService.verify_token(token)
 
-            # Récupérer l'utilisateur courant
-            current_user = AuthService.get_current_user(token)
+            # Récupérer l'utilisateur courant (sans re-décoder le token)
+            current_user = AuthService.get_current_user(token, payload=payload)
 
             # Injecter current_user dans les arguments de la fonction
             return f(current_user, *args, **kwargs)
@@ -152,48 +153,97 @@ def validate_json(*required_fields):
     return decorator
 
 
-def rate_limit(max_requests=100, window=60):
+def _rate_limit_identity(key):
+    """
+    Identité utilisée comme clé de limitation
+
+    L'adresse IP est celle de get_request_info (X-Forwarded-For derrière
+    le proxy), comme dans les journaux d'activité.
+
+    Args:
+        key: 'ip' ou 'user_or_ip'
+
+    Returns:
+        str: Identité préfixée ('user:<id>' ou 'ip:<adresse>')
+    """
+    if key == 'user_or_ip':
+        cached = g.get('_auth_user')
+        if cached:
+            return f'user:{cached[1].id}'
+
+        auth_header = request.headers.get('Authorization', '')
+        if auth_header.startswith('Bearer '):
+            try:
+                # Signature vérifiée, sans accès à la base
+                payload = AuthService.verify_token(auth_header[7:])
+                return f'user:{payload["user_id"]}'
+            except (ValueError, KeyError):
+                pass
+
+    ip_address, _ = get_request_info(request)
+    return f'ip:{ip_address}'
+
+
+def _add_rate_limit_headers(response, result):
+    """Ajouter les en-têtes X-RateLimit-* (et Retry-After si refusé)"""
+    response.headers['X-RateLimit-Limit'] = str(result.limit)
+    response.headers['X-RateLimit-Remaining'] = str(result.remaining)
+    response.headers['X-RateLimit-Reset'] = str(result.reset)
+
+    if not result.allowed:
+        response.headers['Retry-After'] = str(result.retry_after)
+
+    return response
+
+
+def rate_limit(max_requests=100, window=60, key='ip', scope=None):
     """
     Décorateur pour limiter le taux de requêtes
 
     Usage:
-        @rate_limit(max_requests=10, window=60)  # 10 requêtes par minute
+        @rate_limit(max_requests=10, window=60)  # 10 requêtes par minute et par IP
         def limited_route():
             pass
 
-    Note: Implémentation simple basée sur IP
-    En production, utiliser Redis ou une solution dédiée
-    """
-    from collections import defaultdict
-    from datetime import datetime, timedelta
+        @rate_limit(max_requests=100, window=60, key='user_or_ip')
+        def per_user_route():
+            pass
 
-    # Stockage en mémoire (remplacer par Redis en production)
-    request_counts = defaultdict(list)
+    Args:
+        max_requests: Nombre maximum de requêtes par fenêtre
+        window: Durée de la fenêtre (secondes)
+        key: 'ip' ou 'user_or_ip' (id du token, IP à défaut)
+        scope: Nom du compteur (défaut: nom de la fonction)
+
+    Note: L'état est géré par app.utils.rate_limiter (backend mémoire ou
+    SQLite partagé entre workers, voir RATE_LIMIT_BACKEND)
+    """
+    if key not in ('ip', 'user_or_ip'):
+        raise ValueError(f'Clé de limitation invalide: {key}')
 
     def decorator(f):
+        limit_scope = scope or f.__name__
+
         @wraps(f)
         def decorated(*args, **kwargs):
-            # Récupérer l'IP
-            ip_address = request.remote_addr
-
-            # Nettoyer les anciennes requêtes
-            cutoff_time = datetime.utcnow() - timedelta(seconds=window)
-            request_counts[ip_address] = [
-                req_time for req_time in request_counts[ip_address]
-                if req_time > cutoff_time
-            ]
-
-            # Vérifier la limite
-            if len(request_counts[ip_address]) >= max_requests:
-                return jsonify({
-                    'success': False,
-                    'message': 'Trop de requêtes. Veuillez réessayer plus tard'
-                }), 429
+            if not rate_limiter.enabled:
+                return f(*args, **kwargs)
 
-            # Enregistrer la requête
-            request_counts[ip_address].append(datetime.utcnow())
+            identity = _rate_limit_identity(key)
+            result = rate_limiter.hit(f'{limit_scope}:{identity}', max_requests, window)
 
-            return f(*args, **kwargs)
+            if not result.allowed:
+                response = jsonify({
+                    'success': False,
+                    'error': 'rate_limit_exceeded',
+                    'message': 'Trop de requêtes. Veuillez réessayer plus tard',
+                    'retry_after': result.retry_after
+                })
+                response.status_code = 429
+                return _add_rate_limit_headers(response, result)
+
+            response = make_response(f(*args, **kwargs))
+            return _add_rate_limit_headers(response, result)
 
         return decorated
     return decorator
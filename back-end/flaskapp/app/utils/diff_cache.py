@@ -0,0 +1,127 @@
+# ============================================
+# FICHIER: backend/app/utils/diff_cache.py
+# Cache des Comparaisons de Versions
+# ============================================
+"""
+Cache des comparaisons - Différences entre deux versions d'un template
+
+Une version n'est jamais modifiée après sa création: la comparaison de
+(template_id, v1, v2) avec les mêmes options ne change donc pas. La clé
+contient aussi la date de création des deux versions, au cas où un numéro
+de version supprimé serait réattribué: l'ancienne entrée n'est alors plus
+jamais demandée et sort du cache (LRU).
+
+Le cache est borné en nombre d'entrées et en octets (taille estimée du
+texte des blocs de modifications).
+"""
+
+import threading
+from collections import OrderedDict
+
+
+class DiffCache:
+    """Cache LRU des comparaisons de versions"""
+
+    def __init__(self, max_entries=500, max_bytes=32 * 1024 * 1024):
+        """
+        Args:
+            max_entries: Nombre maximum d'entrées
+            max_bytes: Taille maximum cumulée des comparaisons
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.enabled = True
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def init_app(self, app):
+        """
+        Configurer le cache à partir de la configuration Flask
+
+        Args:
+            app: Application Flask
+        """
+        self.enabled = app.config.get('DIFF_CACHE_ENABLED', True)
+        self.max_entries = app.config.get('DIFF_CACHE_MAX_ENTRIES', self.max_entries)
+        self.max_bytes = app.config.get('DIFF_CACHE_MAX_BYTES', self.max_bytes)
+        self.clear()
+
+    def get(self, key):
+        """
+        Récupérer une comparaison
+
+        Args:
+            key: (template_id, v1, créée le, v2, créée le, options)
+
+        Returns:
+            dict: Comparaison, ou None si absente
+        """
+        if not self.enabled:
+            return None
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key, value, size):
+        """
+        Ajouter une comparaison
+
+        Args:
+            key: (template_id, v1, créée le, v2, créée le, options)
+            value: Comparaison
+            size: Taille estimée en octets
+        """
+        # Une comparaison plus grande que tout le cache n'est pas conservée
+        if not self.enabled or size > self.max_bytes:
+            return
+
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= previous[1]
+
+            self._entries[key] = (value, size)
+            self._bytes += size
+
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+
+    def clear(self):
+        """Vider le cache"""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        """
+        Statistiques du cache
+
+        Returns:
+            dict: Taille, octets, hits, misses
+        """
+        with self._lock:
+            return {
+                'enabled': self.enabled,
+                'size': len(self._entries),
+                'bytes': self._bytes,
+                'max_entries': self.max_entries,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses
+            }
+
+
+# Instance globale (configurée dans create_app)
+diff_cache = DiffCache()
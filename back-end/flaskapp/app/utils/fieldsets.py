@@ -0,0 +1,92 @@
+# ============================================
+# FICHIER: backend/app/utils/fieldsets.py
+# Projections de Champs
+# ============================================
+"""
+Projections de champs (sparse fieldsets) - Paramètres ?fields= et ?include=
+
+    - fields=id,nom,sujet       : seulement ces champs ('id' toujours inclus)
+    - include=owner,versions    : champs ajoutés à la sélection par défaut
+                                  (ou à fields si les deux sont fournis)
+    - aucun des deux            : représentation historique (None)
+
+Chaque modèle déclare ses champs projetables et leur coût dans un
+dictionnaire FIELDS (nom -> coût). Les services en déduisent les options de
+chargement: une colonne TEXT non demandée n'est pas lue, une relation non
+demandée n'est pas jointe ni comptée.
+"""
+
+from flask import request
+
+
+def _split(value):
+    """Découper une liste 'a, b,c' en noms non vides"""
+    return [name.strip() for name in (value or '').split(',') if name.strip()]
+
+
+def parse_fieldset(fields=None, include=None, available=(), default=(), always=('id',)):
+    """
+    Construire la sélection de champs d'une requête
+
+    Args:
+        fields: Valeur de ?fields= (ou None)
+        include: Valeur de ?include= (ou None)
+        available: Champs projetables (ex: EmailTemplate.FIELDS)
+        default: Sélection par défaut, complétée par include
+        always: Champs toujours renvoyés
+
+    Returns:
+        frozenset: Champs demandés, ou None si ni fields ni include
+
+    Raises:
+        ValueError: Si un champ est inconnu
+    """
+    if fields is None and include is None:
+        return None
+
+    requested = _split(fields) if fields is not None else list(default)
+    requested += _split(include)
+
+    unknown = [name for name in requested if name not in available]
+    if unknown:
+        raise ValueError(
+            f'Champ(s) inconnu(s): {", ".join(unknown)} (disponibles: {", ".join(available)})'
+        )
+
+    return frozenset(requested) | frozenset(always)
+
+
+def wants_any(fieldset, *names):
+    """
+    Vérifier si au moins un des champs est demandé
+
+    Args:
+        fieldset: Sélection (parse_fieldset)
+        *names: Champs
+
+    Returns:
+        bool: True si un des champs est dans la sélection
+    """
+    return any(name in fieldset for name in names)
+
+
+def request_fieldset(model, default):
+    """
+    Sélection de champs de la requête HTTP courante
+
+    Args:
+        model: Modèle déclarant FIELDS (EmailTemplate, TemplateVersion, User)
+        default: Sélection par défaut (ex: model.DETAIL_FIELDS)
+
+    Returns:
+        frozenset: Champs demandés, ou None sans ?fields= ni ?include=
+
+    Raises:
+        ValueError: Si un champ est inconnu
+    """
+    return parse_fieldset(
+        request.args.get('fields'),
+        request.args.get('include'),
+        model.FIELDS,
+        default
+    )
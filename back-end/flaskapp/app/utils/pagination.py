@@ -0,0 +1,238 @@
+# ============================================
+# FICHIER: backend/app/utils/pagination.py
+# Pagination par Curseur
+# ============================================
+"""
+Pagination par curseur (keyset) - Sans OFFSET ni COUNT(*) obligatoire
+
+La page suivante est obtenue par une condition sur les clés de tri de la
+dernière ligne vue, par exemple (updated_at, id) < (dernier_updated_at,
+dernier_id). Le coût d'une page ne dépend plus de sa profondeur.
+
+Le curseur est opaque pour le client (JSON encodé en base64 url-safe).
+
+Comptage (paramètre count):
+    - 'none'     : pas de total (défaut en mode curseur)
+    - 'estimate' : COUNT borné à PAGINATION_ESTIMATE_CAP lignes
+    - 'exact'    : COUNT(*) complet
+"""
+
+import base64
+import json
+from datetime import datetime
+from flask import current_app
+from app import db
+
+
+COUNT_MODES = ('none', 'estimate', 'exact')
+
+
+def encode_cursor(values):
+    """
+    Encoder les clés de tri de la dernière ligne en curseur opaque
+
+    Args:
+        values: Valeurs des colonnes de tri
+
+    Returns:
+        str: Curseur
+    """
+    encoded = [
+        {'dt': value.isoformat()} if isinstance(value, datetime) else value
+        for value in values
+    ]
+    raw = json.dumps(encoded, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor, size):
+    """
+    Décoder un curseur
+
+    Args:
+        cursor: Curseur reçu du client
+        size: Nombre de clés attendues
+
+    Returns:
+        list: Valeurs des colonnes de tri
+
+    Raises:
+        ValueError: Si curseur invalide
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        values = json.loads(raw.decode('utf-8'))
+    except (ValueError, UnicodeDecodeError):
+        raise ValueError('Curseur invalide')
+
+    if not isinstance(values, list) or len(values) != size:
+        raise ValueError('Curseur invalide')
+
+    return [_decode_value(value) for value in values]
+
+
+def _decode_value(value):
+    """
+    Décoder une clé de curseur: scalaire (str, int, float) ou {'dt': date ISO}
+
+    Raises:
+        ValueError: Pour tout autre type (None, liste, booléen, ...)
+    """
+    if isinstance(value, dict):
+        if set(value) != {'dt'} or not isinstance(value['dt'], str):
+            raise ValueError('Curseur invalide')
+        try:
+            return datetime.fromisoformat(value['dt'])
+        except ValueError:
+            raise ValueError('Curseur invalide')
+
+    if isinstance(value, bool) or not isinstance(value, (str, int, float)):
+        raise ValueError('Curseur invalide')
+
+    return value
+
+
+def _after(columns, values):
+    """
+    Condition "strictement après" pour un tri décroissant sur columns
+
+    (a, b) < (x, y) s'écrit a < x OR (a = x AND b < y), forme utilisable
+    par les index sur MySQL comme sur SQLite.
+    """
+    conditions = []
+    for i, column in enumerate(columns):
+        equal = [columns[j] == values[j] for j in range(i)]
+        conditions.append(db.and_(*equal, column < values[i]))
+    return db.or_(*conditions)
+
+
+def count_rows(query, mode):
+    """
+    Compter les lignes d'une requête selon le mode demandé
+
+    Args:
+        query: Requête (sans tri ni limite)
+        mode: 'none', 'estimate' ou 'exact'
+
+    Returns:
+        tuple: (total ou None, True si estimation)
+    """
+    if mode == 'exact':
+        return query.order_by(None).count(), False
+
+    if mode == 'estimate':
+        cap = current_app.config.get('PAGINATION_ESTIMATE_CAP', 10000)
+        capped = query.order_by(None).limit(cap + 1).subquery()
+        total = db.session.query(db.func.count()).select_from(capped).scalar()
+        # Au-delà du plafond, le total n'est qu'une borne inférieure
+        return min(total, cap), total > cap
+
+    return None, False
+
+
+def validate_count_mode(mode, default):
+    """
+    Valider le paramètre count
+
+    Args:
+        mode: Valeur reçue (ou None)
+        default: Valeur par défaut
+
+    Returns:
+        str: Mode de comptage
+
+    Raises:
+        ValueError: Si mode inconnu
+    """
+    mode = mode or default
+    if mode not in COUNT_MODES:
+        raise ValueError(f'Paramètre count invalide (attendu: {", ".join(COUNT_MODES)})')
+    return mode
+
+
+class KeysetPage:
+    """Page de résultats obtenue par curseur"""
+
+    def __init__(self, items, next_cursor, per_page, total=None, total_is_estimate=False):
+        """
+        Args:
+            items: Lignes de la page
+            next_cursor: Curseur de la page suivante (None si dernière page)
+            per_page: Taille de page
+            total: Nombre total de lignes (optionnel)
+            total_is_estimate: True si total est une borne inférieure
+        """
+        self.items = items
+        self.next_cursor = next_cursor
+        self.per_page = per_page
+        self.total = total
+        self.total_is_estimate = total_is_estimate
+
+    @property
+    def has_more(self):
+        """True s'il reste des lignes après cette page"""
+        return self.next_cursor is not None
+
+    def to_dict(self, items_key, items):
+        """
+        Convertir en dictionnaire de réponse
+
+        Args:
+            items_key: Nom de la liste dans la réponse ('templates', 'logs', ...)
+            items: Éléments déjà sérialisés
+
+        Returns:
+            dict: Représentation JSON
+        """
+        data = {
+            items_key: items,
+            'next_cursor': self.next_cursor,
+            'has_more': self.has_more,
+            'per_page': self.per_page
+        }
+
+        if self.total is not None:
+            data['total'] = self.total
+            data['total_is_estimate'] = self.total_is_estimate
+
+        return data
+
+
+def keyset_paginate(query, columns, cursor=None, per_page=20, count=None, key=None):
+    """
+    Paginer une requête par curseur, en ordre décroissant sur columns
+
+    Args:
+        query: Requête filtrée (l'ordre existant est remplacé)
+        columns: Colonnes de tri, la dernière doit être unique (ex: id)
+        cursor: Curseur de la page précédente ('' ou None: première page)
+        per_page: Taille de page (bornée à MAX_PAGE_SIZE)
+        count: 'none' (défaut), 'estimate' ou 'exact'
+        key: Fonction ligne -> valeurs des colonnes de tri
+             (défaut: attributs de même nom que les colonnes)
+
+    Returns:
+        KeysetPage: Page de résultats
+
+    Raises:
+        ValueError: Si curseur ou mode de comptage invalide
+    """
+    count = validate_count_mode(count, 'none')
+    per_page = max(1, min(per_page, current_app.config.get('MAX_PAGE_SIZE', 100)))
+
+    total, total_is_estimate = count_rows(query, count)
+
+    page_query = query.order_by(None)
+    if cursor:
+        page_query = page_query.filter(_after(columns, decode_cursor(cursor, len(columns))))
+
+    rows = page_query.order_by(*[column.desc() for column in columns]).limit(per_page + 1).all()
+
+    next_cursor = None
+    if len(rows) > per_page:
+        rows = rows[:per_page]
+        last = rows[-1]
+        values = key(last) if key else [getattr(last, column.key) for column in columns]
+        next_cursor = encode_cursor(values)
+
+    return KeysetPage(rows, next_cursor, per_page, total, total_is_estimate)
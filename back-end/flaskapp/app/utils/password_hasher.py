@@ -0,0 +1,241 @@
+# ============================================
+# FICHIER: backend/app/utils/password_hasher.py
+# Hachage des Mots de Passe
+# ============================================
+"""
+Hachage des mots de passe - KDF dans un pool borné
+
+Les KDF (scrypt, pbkdf2) sont volontairement coûteuses en CPU. Pour qu'un pic
+de connexions ne monopolise pas tous les workers, les calculs passent par un
+pool de threads dédié de taille fixe (PASSWORD_HASH_WORKERS) avec une file
+d'attente bornée (PASSWORD_HASH_QUEUE_SIZE). Quand la file est pleine, la
+demande échoue immédiatement avec PasswordHasherBusy (HTTP 429).
+
+Les paramètres de la KDF sont configurés par PASSWORD_HASH_METHOD
+(format werkzeug, ex: 'scrypt:32768:8:1' ou 'pbkdf2:sha256:600000').
+Un hash produit avec d'autres paramètres, ou un ancien mot de passe stocké
+en clair, est signalé par needs_rehash() pour être recalculé à la connexion.
+"""
+
+import hmac
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from werkzeug.security import generate_password_hash, check_password_hash
+
+
+class PasswordHasherBusy(Exception):
+    """Pool de hachage saturé (à renvoyer en HTTP 429)"""
+
+    def __init__(self, retry_after=1):
+        super().__init__('Serveur occupé. Veuillez réessayer dans quelques instants')
+        self.retry_after = retry_after
+
+
+class PasswordHasher:
+    """Hachage et vérification des mots de passe dans un pool borné"""
+
+    KNOWN_METHODS = ('scrypt', 'pbkdf2')
+
+    def __init__(self):
+        """Valeurs par défaut (remplacées par init_app)"""
+        self.method = 'scrypt:32768:8:1'
+        self.workers = 4
+        self.queue_size = 16
+        self.timeout = 10.0
+        self.allow_plaintext = True
+        self._executor = None
+        self._slots = threading.BoundedSemaphore(self.workers + self.queue_size)
+        self._pid = None
+        self._lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._stats = {'hashed': 0, 'verified': 0, 'rejected': 0, 'timeouts': 0}
+
+    def init_app(self, app):
+        """
+        Configurer le service à partir de la configuration Flask
+
+        Args:
+            app: Application Flask
+        """
+        self.method = PasswordHasher.normalize_method(
+            app.config.get('PASSWORD_HASH_METHOD', self.method)
+        )
+        self.workers = app.config.get('PASSWORD_HASH_WORKERS', self.workers)
+        self.queue_size = app.config.get('PASSWORD_HASH_QUEUE_SIZE', self.queue_size)
+        self.timeout = app.config.get('PASSWORD_HASH_TIMEOUT', self.timeout)
+        self.allow_plaintext = app.config.get('PASSWORD_ALLOW_PLAINTEXT_LEGACY', self.allow_plaintext)
+
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False)
+            self._executor = None
+            self._slots = threading.BoundedSemaphore(self.workers + self.queue_size)
+
+    def hash(self, password, method=None):
+        """
+        Hacher un mot de passe
+
+        Args:
+            password: Mot de passe en clair
+            method: Méthode KDF (défaut: PASSWORD_HASH_METHOD)
+
+        Returns:
+            str: Hash au format werkzeug
+
+        Raises:
+            PasswordHasherBusy: Si le pool est saturé
+        """
+        result = self._submit(generate_password_hash, password, method=method or self.method)
+        self._count('hashed')
+        return result
+
+    def verify(self, stored, password):
+        """
+        Vérifier un mot de passe contre la valeur stockée
+
+        Args:
+            stored: Hash stocké (ou mot de passe en clair hérité)
+            password: Mot de passe fourni
+
+        Returns:
+            bool: True si le mot de passe est correct
+
+        Raises:
+            PasswordHasherBusy: Si le pool est saturé
+        """
+        if not stored or password is None:
+            return False
+
+        if not PasswordHasher.is_hashed(stored):
+            # Ancienne base avec mots de passe en clair
+            if not self.allow_plaintext:
+                return False
+            return hmac.compare_digest(stored.encode('utf-8'), password.encode('utf-8'))
+
+        result = self._submit(check_password_hash, stored, password)
+        self._count('verified')
+        return result
+
+    def needs_rehash(self, stored):
+        """
+        Vérifier si la valeur stockée doit être recalculée
+
+        Args:
+            stored: Hash stocké
+
+        Returns:
+            bool: True si en clair ou paramètres différents de PASSWORD_HASH_METHOD
+        """
+        if not PasswordHasher.is_hashed(stored):
+            return True
+
+        return stored.split('$', 1)[0] != self.method
+
+    def stats(self):
+        """
+        Compteurs du service
+
+        Returns:
+            dict: hashed, verified, rejected, timeouts, method, workers, queue_size
+        """
+        with self._stats_lock:
+            data = dict(self._stats)
+
+        data['method'] = self.method
+        data['workers'] = self.workers
+        data['queue_size'] = self.queue_size
+        return data
+
+    def _submit(self, fn, *args, **kwargs):
+        """Exécuter fn dans le pool, ou échouer immédiatement s'il est saturé"""
+        if not self._slots.acquire(blocking=False):
+            self._count('rejected')
+            raise PasswordHasherBusy()
+
+        try:
+            future = self._get_executor().submit(fn, *args, **kwargs)
+        except Exception:
+            self._slots.release()
+            raise
+
+        # La place est libérée à la fin du calcul, même après un timeout
+        future.add_done_callback(lambda _: self._slots.release())
+
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeoutError:
+            self._count('timeouts')
+            raise PasswordHasherBusy()
+
+    def _get_executor(self):
+        """Créer le pool (paresseusement, et après un fork de worker)"""
+        if self._executor is not None and self._pid == os.getpid():
+            return self._executor
+
+        with self._lock:
+            if self._executor is None or self._pid != os.getpid():
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.workers,
+                    thread_name_prefix='password-hasher'
+                )
+                self._pid = os.getpid()
+
+        return self._executor
+
+    def _count(self, key, amount=1):
+        """Incrémenter un compteur"""
+        with self._stats_lock:
+            self._stats[key] += amount
+
+    @staticmethod
+    def is_hashed(stored):
+        """
+        Vérifier si une valeur stockée est un hash werkzeug
+
+        Args:
+            stored: Valeur de la colonne password
+
+        Returns:
+            bool: True si hash reconnu
+        """
+        if not stored or stored.count('$') < 2:
+            return False
+
+        return stored.split(':', 1)[0] in PasswordHasher.KNOWN_METHODS
+
+    @staticmethod
+    def normalize_method(method):
+        """
+        Compléter les paramètres par défaut de werkzeug
+        ('scrypt' -> 'scrypt:32768:8:1', 'pbkdf2' -> 'pbkdf2:sha256:600000')
+
+        Args:
+            method: Méthode KDF
+
+        Returns:
+            str: Méthode avec tous ses paramètres
+
+        Raises:
+            ValueError: Si méthode inconnue
+        """
+        from werkzeug.security import DEFAULT_PBKDF2_ITERATIONS
+
+        name, *args = method.split(':')
+
+        if name == 'scrypt':
+            if not args:
+                args = ['32768', '8', '1']
+        elif name == 'pbkdf2':
+            if not args:
+                args = ['sha256']
+            if len(args) == 1:
+                args.append(str(DEFAULT_PBKDF2_ITERATIONS))
+        else:
+            raise ValueError(f'PASSWORD_HASH_METHOD invalide: {method}')
+
+        return ':'.join([name] + args)
+
+
+# Instance globale (configurée dans create_app)
+password_hasher = PasswordHasher()
@@ -0,0 +1,160 @@
+# ============================================
+# FICHIER: backend/app/utils/preview_cache.py
+# Cache des Aperçus
+# ============================================
+"""
+Cache des aperçus - HTML complet indexé par hash du contenu
+
+La clé est un SHA-256 de (RENDER_VERSION, sujet, html, css): un contenu
+modifié produit une nouvelle clé, une entrée ne peut donc jamais être
+périmée. Le même hash sert d'ETag fort pour les réponses conditionnelles
+(If-None-Match -> 304): RENDER_VERSION doit être incrémenté à chaque
+changement du HTML produit pour un même contenu (EmailTemplate.
+build_full_html), sinon un client garde l'ancien aperçu.
+
+Les anciennes entrées sont retirées dès qu'un template change de contenu
+(événement before_update sur EmailTemplate) et le cache est borné en nombre
+d'entrées et en octets (LRU).
+"""
+
+import hashlib
+import threading
+from collections import OrderedDict
+
+
+# Version du rendu de l'aperçu (2: CSS recopié dans les attributs style)
+RENDER_VERSION = 2
+
+
+class PreviewCache:
+    """Cache LRU du HTML complet des templates"""
+
+    def __init__(self, max_entries=500, max_bytes=32 * 1024 * 1024):
+        """
+        Args:
+            max_entries: Nombre maximum d'entrées
+            max_bytes: Taille maximum cumulée du HTML mis en cache
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.enabled = True
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def init_app(self, app):
+        """
+        Configurer le cache à partir de la configuration Flask
+
+        Args:
+            app: Application Flask
+        """
+        self.enabled = app.config.get('PREVIEW_CACHE_ENABLED', True)
+        self.max_entries = app.config.get('PREVIEW_CACHE_MAX_ENTRIES', self.max_entries)
+        self.max_bytes = app.config.get('PREVIEW_CACHE_MAX_BYTES', self.max_bytes)
+        self.clear()
+
+    def get_or_render(self, content_hash, render):
+        """
+        Récupérer le HTML d'un hash, ou le calculer et le mettre en cache
+
+        Args:
+            content_hash: Hash du contenu (PreviewCache.content_hash)
+            render: Fonction sans argument produisant le HTML
+
+        Returns:
+            str: HTML complet
+        """
+        if not self.enabled:
+            return render()
+
+        with self._lock:
+            html = self._entries.get(content_hash)
+            if html is not None:
+                self._entries.move_to_end(content_hash)
+                self.hits += 1
+                return html
+            self.misses += 1
+
+        html = render()
+        size = len(html)
+
+        # Un document plus grand que tout le cache n'est pas conservé
+        if size > self.max_bytes:
+            return html
+
+        with self._lock:
+            if content_hash not in self._entries:
+                self._entries[content_hash] = html
+                self._bytes += size
+
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= len(evicted)
+
+        return html
+
+    def discard(self, content_hash):
+        """
+        Retirer une entrée (contenu remplacé)
+
+        Args:
+            content_hash: Hash du contenu
+        """
+        with self._lock:
+            html = self._entries.pop(content_hash, None)
+            if html is not None:
+                self._bytes -= len(html)
+
+    def clear(self):
+        """Vider le cache"""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        """
+        Statistiques du cache
+
+        Returns:
+            dict: Taille, octets, hits, misses
+        """
+        with self._lock:
+            return {
+                'enabled': self.enabled,
+                'size': len(self._entries),
+                'bytes': self._bytes,
+                'max_entries': self.max_entries,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses
+            }
+
+    @staticmethod
+    def content_hash(sujet, html_content, css_content):
+        """
+        Hash du contenu rendu dans l'aperçu (et de la version du rendu)
+
+        Args:
+            sujet: Sujet (titre du document)
+            html_content: Contenu HTML
+            css_content: Contenu CSS
+
+        Returns:
+            str: SHA-256 hexadécimal
+        """
+        digest = hashlib.sha256(f'preview-v{RENDER_VERSION}'.encode('ascii'))
+        for part in (sujet, html_content, css_content):
+            data = (part or '').encode('utf-8')
+            # Préfixe de longueur: ('ab', 'c') et ('a', 'bc') diffèrent
+            digest.update(len(data).to_bytes(8, 'big'))
+            digest.update(data)
+        return digest.hexdigest()
+
+
+# Instance globale (configurée dans create_app)
+preview_cache = PreviewCache()
@@ -0,0 +1,274 @@
+# ============================================
+# FICHIER: backend/app/utils/rate_limiter.py
+# Limiteur de Débit
+# ============================================
+"""
+Limiteur de débit - Compteur à fenêtre glissante avec backends interchangeables
+
+Algorithme (sliding window counter): pour chaque clé on conserve seulement
+(numéro de fenêtre, compteur courant, compteur précédent). Le nombre de
+requêtes estimé sur la dernière fenêtre est:
+
+    précédent * (part restante de la fenêtre précédente) + courant
+
+L'état par clé est donc de taille fixe, quel que soit le débit.
+
+Backends (RATE_LIMIT_BACKEND):
+    - 'memory' : dictionnaire LRU borné, local au processus
+    - 'sqlite' : fichier SQLite local, partagé entre les workers gunicorn
+                 d'une même machine
+"""
+
+import math
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict, namedtuple
+
+
+RateLimitResult = namedtuple(
+    'RateLimitResult',
+    ['allowed', 'limit', 'remaining', 'reset', 'retry_after']
+)
+
+
+def sliding_window_hit(state, now, limit, window):
+    """
+    Appliquer une requête à l'état d'une clé
+
+    Args:
+        state: (fenêtre, courant, précédent) ou None
+        now: Timestamp courant (secondes)
+        limit: Nombre maximum de requêtes par fenêtre
+        window: Durée de la fenêtre (secondes)
+
+    Returns:
+        tuple: (nouvel état, RateLimitResult)
+    """
+    current_window = int(now // window)
+    window_start = current_window * window
+
+    if state is None or state[0] < current_window - 1:
+        count, previous = 0, 0
+    elif state[0] == current_window - 1:
+        count, previous = 0, state[1]
+    else:
+        count, previous = state[1], state[2]
+
+    elapsed = now - window_start
+    weight = (window - elapsed) / window
+    estimated = previous * weight + count
+    reset = int(window_start + window)
+
+    if estimated + 1 > limit:
+        if count + 1 > limit or previous == 0:
+            retry_after = window - elapsed
+        else:
+            # Instant où la part de la fenêtre précédente laisse passer une requête
+            needed_weight = (limit - count - 1) / previous
+            retry_after = window * (1 - needed_weight) - elapsed
+
+        result = RateLimitResult(False, limit, 0, reset, max(1, math.ceil(retry_after)))
+        return (current_window, count, previous), result
+
+    count += 1
+    remaining = max(0, int(limit - estimated - 1))
+
+    return (current_window, count, previous), RateLimitResult(True, limit, remaining, reset, 0)
+
+
+class MemoryBackend:
+    """État en mémoire, borné avec éviction LRU des clés inactives"""
+
+    def __init__(self, max_keys=100000):
+        """
+        Args:
+            max_keys: Nombre maximum de clés conservées
+        """
+        self.max_keys = max_keys
+        self._states = OrderedDict()
+        self._lock = threading.Lock()
+
+    def hit(self, key, limit, window, now=None):
+        """
+        Enregistrer une requête pour une clé
+
+        Returns:
+            RateLimitResult: Décision
+        """
+        now = time.time() if now is None else now
+
+        with self._lock:
+            state, result = sliding_window_hit(self._states.get(key), now, limit, window)
+            self._states[key] = state
+            self._states.move_to_end(key)
+
+            while len(self._states) > self.max_keys:
+                self._states.popitem(last=False)
+
+        return result
+
+    def reset(self):
+        """Vider l'état"""
+        with self._lock:
+            self._states.clear()
+
+    def size(self):
+        """Nombre de clés suivies"""
+        return len(self._states)
+
+
+class SQLiteBackend:
+    """État dans un fichier SQLite local, partagé entre processus"""
+
+    EVICTION_EVERY = 1000
+
+    def __init__(self, path, max_keys=100000, idle_ttl=3600):
+        """
+        Args:
+            path: Chemin du fichier SQLite
+            max_keys: Nombre maximum de clés conservées
+            idle_ttl: Durée après laquelle une clé inactive est supprimée (secondes)
+        """
+        self.path = path
+        self.max_keys = max_keys
+        self.idle_ttl = idle_ttl
+        self._local = threading.local()
+        self._hits = 0
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        conn = self._connection()
+        conn.execute(
+            'CREATE TABLE IF NOT EXISTS rate_limits ('
+            ' key TEXT PRIMARY KEY,'
+            ' window INTEGER NOT NULL,'
+            ' count INTEGER NOT NULL,'
+            ' previous INTEGER NOT NULL,'
+            ' updated_at REAL NOT NULL)'
+        )
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_rate_limits_updated ON rate_limits (updated_at)')
+
+    def _connection(self):
+        """Connexion propre au thread (et au processus après un fork)"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def hit(self, key, limit, window, now=None):
+        """
+        Enregistrer une requête pour une clé (transaction IMMEDIATE)
+
+        Returns:
+            RateLimitResult: Décision
+        """
+        now = time.time() if now is None else now
+        conn = self._connection()
+
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            row = conn.execute(
+                'SELECT window, count, previous FROM rate_limits WHERE key = ?', (key,)
+            ).fetchone()
+
+            state, result = sliding_window_hit(row, now, limit, window)
+
+            conn.execute(
+                'INSERT INTO rate_limits (key, window, count, previous, updated_at) '
+                'VALUES (?, ?, ?, ?, ?) '
+                'ON CONFLICT(key) DO UPDATE SET window = excluded.window, '
+                'count = excluded.count, previous = excluded.previous, '
+                'updated_at = excluded.updated_at',
+                (key, state[0], state[1], state[2], now)
+            )
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+
+        self._hits += 1
+        if self._hits % self.EVICTION_EVERY == 0:
+            self.evict(now)
+
+        return result
+
+    def evict(self, now=None):
+        """Supprimer les clés inactives puis les plus anciennes au-delà de max_keys"""
+        now = time.time() if now is None else now
+        conn = self._connection()
+
+        conn.execute('DELETE FROM rate_limits WHERE updated_at < ?', (now - self.idle_ttl,))
+        conn.execute(
+            'DELETE FROM rate_limits WHERE key IN ('
+            ' SELECT key FROM rate_limits ORDER BY updated_at DESC LIMIT -1 OFFSET ?)',
+            (self.max_keys,)
+        )
+
+    def reset(self):
+        """Vider l'état"""
+        self._connection().execute('DELETE FROM rate_limits')
+
+    def size(self):
+        """Nombre de clés suivies"""
+        return self._connection().execute('SELECT COUNT(*) FROM rate_limits').fetchone()[0]
+
+
+class RateLimiter:
+    """Point d'entrée du limiteur (backend choisi par configuration)"""
+
+    def __init__(self):
+        """Backend mémoire par défaut (remplacé par init_app)"""
+        self.enabled = True
+        self.backend = MemoryBackend()
+
+    def init_app(self, app):
+        """
+        Configurer le limiteur à partir de la configuration Flask
+
+        Args:
+            app: Application Flask
+        """
+        self.enabled = app.config.get('RATE_LIMIT_ENABLED', True)
+        backend = app.config.get('RATE_LIMIT_BACKEND', 'memory')
+        max_keys = app.config.get('RATE_LIMIT_MAX_KEYS', 100000)
+
+        if backend == 'sqlite':
+            self.backend = SQLiteBackend(
+                app.config.get('RATE_LIMIT_SQLITE_PATH', os.path.join(app.instance_path, 'rate_limits.sqlite')),
+                max_keys=max_keys,
+                idle_ttl=app.config.get('RATE_LIMIT_IDLE_TTL', 3600)
+            )
+        elif backend == 'memory':
+            self.backend = MemoryBackend(max_keys=max_keys)
+        else:
+            raise ValueError(f'RATE_LIMIT_BACKEND invalide: {backend}')
+
+    def hit(self, key, limit, window):
+        """
+        Enregistrer une requête
+
+        Args:
+            key: Clé (scope + identité)
+            limit: Nombre maximum de requêtes par fenêtre
+            window: Durée de la fenêtre (secondes)
+
+        Returns:
+            RateLimitResult: Décision
+        """
+        return self.backend.hit(key, limit, window)
+
+    def reset(self):
+        """Vider l'état du backend"""
+        self.backend.reset()
+
+
+# Instance globale (configurée dans create_app)
+rate_limiter = RateLimiter()
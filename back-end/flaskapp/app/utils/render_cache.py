@@ -0,0 +1,128 @@
+# ============================================
+# FICHIER: backend/app/utils/render_cache.py
+# Cache des Templates Compilés
+# ============================================
+"""
+Cache des templates compilés - Fonctions de rendu indexées par version
+
+La clé est (template_id, version_number): une version n'est jamais modifiée
+après sa création. Un rendu répété ne relit ni ne recompile le contenu.
+(RenderService compare en plus la date de création de la version, au cas
+où un numéro de version supprimé serait réattribué.) Le sujet, non
+versionné, est rangé sous (template_id, 'sujet') avec son texte source.
+
+Le cache est borné en nombre d'entrées et en octets (LRU). La taille d'une
+entrée est celle du code Python généré à la compilation, plus le CSS
+conservé tel quel.
+"""
+
+import threading
+from collections import OrderedDict
+
+
+class RenderCache:
+    """Cache LRU des templates compilés"""
+
+    def __init__(self, max_entries=1000, max_bytes=64 * 1024 * 1024):
+        """
+        Args:
+            max_entries: Nombre maximum d'entrées
+            max_bytes: Taille maximum cumulée des entrées
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.enabled = True
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def init_app(self, app):
+        """
+        Configurer le cache à partir de la configuration Flask
+
+        Args:
+            app: Application Flask
+        """
+        self.enabled = app.config.get('RENDER_CACHE_ENABLED', True)
+        self.max_entries = app.config.get('RENDER_CACHE_MAX_ENTRIES', self.max_entries)
+        self.max_bytes = app.config.get('RENDER_CACHE_MAX_BYTES', self.max_bytes)
+        self.clear()
+
+    def get(self, key):
+        """
+        Récupérer une entrée compilée
+
+        Args:
+            key: (template_id, version_number) ou (template_id, 'sujet')
+
+        Returns:
+            object: Entrée, ou None si absente
+        """
+        if not self.enabled:
+            return None
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key, value, size):
+        """
+        Ajouter une entrée compilée
+
+        Args:
+            key: (template_id, version_number) ou (template_id, 'sujet')
+            value: Entrée compilée
+            size: Taille estimée en octets
+        """
+        # Une entrée plus grande que tout le cache n'est pas conservée
+        if not self.enabled or size > self.max_bytes:
+            return
+
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= previous[1]
+
+            self._entries[key] = (value, size)
+            self._bytes += size
+
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+
+    def clear(self):
+        """Vider le cache"""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        """
+        Statistiques du cache
+
+        Returns:
+            dict: Taille, octets, hits, misses
+        """
+        with self._lock:
+            return {
+                'enabled': self.enabled,
+                'size': len(self._entries),
+                'bytes': self._bytes,
+                'max_entries': self.max_entries,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses
+            }
+
+
+# Instance globale (configurée dans create_app)
+render_cache = RenderCache()
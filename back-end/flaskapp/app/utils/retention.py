@@ -0,0 +1,166 @@
+# ============================================
+# FICHIER: backend/app/utils/retention.py
+# Politiques de Rétention des Versions
+# ============================================
+"""
+Politiques de rétention - Versions conservées d'un historique
+
+Une politique est un dictionnaire (VERSION_RETENTION pour tous les
+templates, TemplateMetadata.retention_policy pour en surcharger une partie):
+
+    keep_all        : True: rien n'est supprimé
+    keep_last       : nombre de dernières versions conservées
+    daily_days      : dernière version de chaque jour, sur N jours (0: aucune)
+    monthly_months  : dernière version de chaque mois, sur N mois
+                      (None: tous les mois, 0: aucune)
+    restore_points  : conserver les restaurations et les versions restaurées
+
+Une version est conservée si une règle au moins la retient; la version
+courante (la plus récente) l'est toujours. Ce module ne touche pas la base:
+voir VersionRetentionService.
+"""
+
+from datetime import datetime, timedelta
+
+
+DEFAULT_POLICY = {
+    'keep_all': False,
+    'keep_last': 50,
+    'daily_days': 30,
+    'monthly_months': None,
+    'restore_points': True
+}
+
+
+def _count(name, value, minimum, allow_none=False):
+    """Entier >= minimum (ou None si autorisé)"""
+    if value is None and allow_none:
+        return None
+    if isinstance(value, bool) or not isinstance(value, int) or value < minimum:
+        raise ValueError(f'{name} doit être un entier supérieur ou égal à {minimum}'
+                         + (' (ou null)' if allow_none else ''))
+    return value
+
+
+def _flag(name, value):
+    """Booléen"""
+    if not isinstance(value, bool):
+        raise ValueError(f'{name} doit être un booléen')
+    return value
+
+
+VALIDATORS = {
+    'keep_all': _flag,
+    'keep_last': lambda name, value: _count(name, value, 1),
+    'daily_days': lambda name, value: _count(name, value, 0),
+    'monthly_months': lambda name, value: _count(name, value, 0, allow_none=True),
+    'restore_points': _flag
+}
+
+
+def parse_policy(data):
+    """
+    Vérifier une politique (complète ou partielle)
+
+    Args:
+        data: Dictionnaire (clés de DEFAULT_POLICY)
+
+    Returns:
+        dict: Politique vérifiée (seulement les clés fournies)
+
+    Raises:
+        ValueError: Si clé inconnue ou valeur invalide
+    """
+    if not isinstance(data, dict):
+        raise ValueError('La politique de rétention doit être un objet')
+
+    unknown = sorted(set(data) - set(VALIDATORS))
+    if unknown:
+        raise ValueError(f'Règle de rétention inconnue: {", ".join(unknown)} '
+                         f'(attendu: {", ".join(VALIDATORS)})')
+
+    return {name: VALIDATORS[name](name, value) for name, value in data.items()}
+
+
+def merge_policy(base, override=None):
+    """
+    Politique effective: DEFAULT_POLICY, puis base (globale), puis override (template)
+
+    Args:
+        base: Politique globale (VERSION_RETENTION)
+        override: Politique partielle du template (ou None)
+
+    Returns:
+        dict: Politique complète
+    """
+    policy = dict(DEFAULT_POLICY)
+    policy.update(parse_policy(base or {}))
+    policy.update(parse_policy(override or {}))
+    return policy
+
+
+def kept_versions(versions, policy, now=None):
+    """
+    Versions retenues par une politique, avec leurs raisons
+
+    Args:
+        versions: Itérable de (version_number, created_at, restored_from)
+        policy: Politique complète (merge_policy)
+        now: Date de référence (défaut: maintenant, UTC)
+
+    Returns:
+        dict: {version_number: [raisons]} ('latest', 'last', 'daily',
+              'monthly', 'restore', 'restored', 'keep_all')
+    """
+    versions = sorted(versions, key=lambda version: version[0], reverse=True)
+    if not versions:
+        return {}
+
+    now = now or datetime.utcnow()
+    kept = {}
+
+    def keep(number, reason):
+        kept.setdefault(number, []).append(reason)
+
+    keep(versions[0][0], 'latest')
+
+    if policy['keep_all']:
+        for number, _, _ in versions:
+            keep(number, 'keep_all')
+        return kept
+
+    for number, _, _ in versions[:policy['keep_last']]:
+        keep(number, 'last')
+
+    # Versions triées de la plus récente à la plus ancienne: la première
+    # rencontrée pour un jour (un mois) est la dernière de ce jour (ce mois)
+    daily_since = now - timedelta(days=policy['daily_days'])
+    current_month = now.year * 12 + now.month
+    days, months = set(), set()
+
+    for number, created_at, _ in versions:
+        if created_at is None:
+            continue
+
+        day = created_at.date()
+        if policy['daily_days'] and created_at >= daily_since and day not in days:
+            days.add(day)
+            keep(number, 'daily')
+
+        month = created_at.year * 12 + created_at.month
+        monthly = policy['monthly_months']
+        if monthly != 0 and (monthly is None or current_month - month < monthly) and month not in months:
+            months.add(month)
+            keep(number, 'monthly')
+
+    if policy['restore_points']:
+        restored = set()
+        for number, _, restored_from in versions:
+            if restored_from is not None:
+                keep(number, 'restore')
+                restored.add(restored_from)
+        for number, _, _ in versions:
+            if number in restored:
+                keep(number, 'restored')
+
+    return kept
@@ -0,0 +1,173 @@
+# ============================================
+# FICHIER: backend/app/utils/sequence_diff.py
+# Comparaison de Séquences à Coût Borné
+# ============================================
+"""
+Comparaison de séquences - Opérations de difflib sans coût quadratique
+
+opcodes(a, b) renvoie les opérations ('equal', 'replace', 'delete',
+'insert', i1, i2, j1, j2) transformant a en b, comme
+difflib.SequenceMatcher.get_opcodes(), pour des listes de lignes ou de
+segments (éléments hashables).
+
+Le préfixe et le suffixe communs sont retirés en temps linéaire. Une zone
+restante de plus de max_cells (len(a) x len(b)) n'est pas confiée à
+difflib (quadratique): elle est découpée sur les éléments présents une
+seule fois de chaque côté (ancres, sous-suite croissante la plus longue en
+n log n), et seules les zones entre ancres assez petites sont comparées
+finement. Une zone trop grande sans ancre devient un seul remplacement: le
+résultat est alors approximatif (correct, mais pas minimal).
+
+Utilisé par DiffService (comparaison de versions) et version_delta
+(stockage des versions en deltas).
+"""
+
+from bisect import bisect_left
+from collections import Counter
+from difflib import SequenceMatcher
+
+
+DEFAULT_MAX_CELLS = 1000000
+
+
+def opcodes(a, b, max_cells=DEFAULT_MAX_CELLS):
+    """
+    Opérations transformant a en b
+
+    Args:
+        a: Séquence d'origine (liste d'éléments hashables)
+        b: Nouvelle séquence
+        max_cells: Taille maximum d'une comparaison fine (len x len)
+
+    Returns:
+        tuple: (liste de (tag, i1, i2, j1, j2) fusionnées, approximatif)
+    """
+    budget = _Budget(max_cells)
+    ops = _merge(_opcodes(a, b, 0, len(a), 0, len(b), budget))
+    return ops, budget.approximate
+
+
+class _Budget:
+    """Limite de taille des comparaisons fines, et trace des approximations"""
+
+    __slots__ = ('max_cells', 'approximate')
+
+    def __init__(self, max_cells):
+        self.max_cells = max_cells
+        self.approximate = False
+
+
+def _opcodes(a, b, i1, i2, j1, j2, budget):
+    """
+    Opérations ('equal', 'replace', 'delete', 'insert') transformant
+    a[i1:i2] en b[j1:j2], au format de difflib (tag, i1, i2, j1, j2)
+    """
+    # Préfixe et suffixe communs (cas courant: une modification localisée)
+    start_i, start_j = i1, j1
+    while i1 < i2 and j1 < j2 and a[i1] == b[j1]:
+        i1 += 1
+        j1 += 1
+    prefix = [('equal', start_i, i1, start_j, j1)] if i1 > start_i else []
+
+    end_i, end_j = i2, j2
+    while i2 > i1 and j2 > j1 and a[i2 - 1] == b[j2 - 1]:
+        i2 -= 1
+        j2 -= 1
+    suffix = [('equal', i2, end_i, j2, end_j)] if end_i > i2 else []
+
+    if i1 == i2 and j1 == j2:
+        middle = []
+    elif i1 == i2:
+        middle = [('insert', i1, i1, j1, j2)]
+    elif j1 == j2:
+        middle = [('delete', i1, i2, j1, j1)]
+    elif (i2 - i1) * (j2 - j1) <= budget.max_cells:
+        matcher = SequenceMatcher(None, a[i1:i2], b[j1:j2], autojunk=False)
+        middle = [
+            (tag, x1 + i1, x2 + i1, y1 + j1, y2 + j1)
+            for tag, x1, x2, y1, y2 in matcher.get_opcodes()
+        ]
+    else:
+        middle = _anchored_opcodes(a, b, i1, i2, j1, j2, budget)
+
+    return prefix + middle + suffix
+
+
+def _anchored_opcodes(a, b, i1, i2, j1, j2, budget):
+    """Zone trop grande pour difflib: découpage sur les lignes uniques communes"""
+    anchors = _unique_anchors(a, b, i1, i2, j1, j2)
+    if not anchors:
+        budget.approximate = True
+        return [('replace', i1, i2, j1, j2)]
+
+    ops = []
+    previous_i, previous_j = i1, j1
+    for anchor_i, anchor_j in anchors:
+        # Ancres consécutives (cas courant): rien à comparer entre elles
+        if anchor_i > previous_i or anchor_j > previous_j:
+            ops.extend(_opcodes(a, b, previous_i, anchor_i, previous_j, anchor_j, budget))
+        ops.append(('equal', anchor_i, anchor_i + 1, anchor_j, anchor_j + 1))
+        previous_i, previous_j = anchor_i + 1, anchor_j + 1
+    ops.extend(_opcodes(a, b, previous_i, i2, previous_j, j2, budget))
+    return ops
+
+
+def _unique_anchors(a, b, i1, i2, j1, j2):
+    """
+    Lignes présentes une seule fois de chaque côté, dans le même ordre
+
+    Returns:
+        list: (i, j) croissants (sous-suite croissante la plus longue)
+    """
+    count_a = Counter(a[i1:i2])
+    count_b = Counter(b[j1:j2])
+    position_b = {b[j]: j for j in range(j1, j2) if count_b[b[j]] == 1}
+
+    pairs = [
+        (i, position_b[a[i]])
+        for i in range(i1, i2)
+        if count_a[a[i]] == 1 and a[i] in position_b
+    ]
+    if not pairs:
+        return []
+
+    # Tri par patience: piles indexées par j, lien vers le sommet précédent
+    tops = []
+    top_index = []
+    previous = [None] * len(pairs)
+    for index, (_, j) in enumerate(pairs):
+        pile = bisect_left(tops, j)
+        if pile == len(tops):
+            tops.append(j)
+            top_index.append(index)
+        else:
+            tops[pile] = j
+            top_index[pile] = index
+        previous[index] = top_index[pile - 1] if pile else None
+
+    anchors = []
+    index = top_index[-1]
+    while index is not None:
+        anchors.append(pairs[index])
+        index = previous[index]
+    anchors.reverse()
+    return anchors
+
+
+def _merge(ops):
+    """Fusionner les opérations consécutives de même nature"""
+    merged = []
+    for tag, i1, i2, j1, j2 in ops:
+        if i1 == i2 and j1 == j2:
+            continue
+        if merged:
+            previous = merged[-1][0]
+            # Deux modifications voisines (suppression + ajout) forment un remplacement
+            if previous == tag or (previous != 'equal' and tag != 'equal'):
+                merged[-1] = (
+                    tag if previous == tag else 'replace',
+                    merged[-1][1], i2, merged[-1][3], j2
+                )
+                continue
+        merged.append((tag, i1, i2, j1, j2))
+    return merged
@@ -0,0 +1,177 @@
+# ============================================
+# FICHIER: backend/app/utils/version_compactor.py
+# Compactage des Versions en Tâche de Fond
+# ============================================
+"""
+Compactage en tâche de fond - Rétention appliquée après chaque nouvelle version
+
+Une modification ou une restauration planifie son template (schedule); un
+thread de fond applique la politique de rétention au template
+VERSION_COMPACTION_DELAY secondes plus tard (VersionRetentionService.
+compact_template). Les modifications rapprochées d'un même template ne
+donnent qu'un compactage.
+
+Mode désactivé (VERSION_COMPACTION_ASYNC = False, défaut): rien n'est
+planifié, la rétention est appliquée par la commande planifiée
+flask compact-versions. Les templates encore en attente à l'arrêt du
+processus sont laissés à cette commande.
+"""
+
+import atexit
+import os
+import threading
+import time
+
+
+class VersionCompactor:
+    """Templates en attente + thread d'application de la rétention"""
+
+    def __init__(self):
+        """Initialiser le compacteur (configuré par init_app)"""
+        self.app = None
+        self.async_enabled = False
+        self.delay = 60.0
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        self._pid = None
+        self._start_lock = threading.Lock()
+        self._atexit_registered = False
+        self._stats = {
+            'scheduled': 0,
+            'compacted': 0,
+            'pruned': 0,
+            'failed': 0
+        }
+
+    def init_app(self, app):
+        """
+        Configurer le compacteur à partir de la configuration Flask
+
+        Args:
+            app: Application Flask
+        """
+        self.app = app
+        self.async_enabled = app.config.get('VERSION_COMPACTION_ASYNC', False)
+        self.delay = app.config.get('VERSION_COMPACTION_DELAY', self.delay)
+
+        with self._lock:
+            self._pending.clear()
+
+        # Une seule fois par processus (create_app peut être appelé plusieurs fois)
+        if self.async_enabled and not self._atexit_registered:
+            atexit.register(self.shutdown)
+            self._atexit_registered = True
+
+    def schedule(self, template_id):
+        """
+        Planifier le compactage d'un template (mode asynchrone)
+
+        Args:
+            template_id: ID du template
+
+        Returns:
+            bool: True si planifié (False: mode désactivé ou déjà en attente)
+        """
+        if not self.async_enabled:
+            return False
+
+        with self._lock:
+            if template_id in self._pending:
+                return False
+            self._pending[template_id] = time.monotonic() + self.delay
+            self._stats['scheduled'] += 1
+
+        self._ensure_started()
+        self._wake.set()
+        return True
+
+    def shutdown(self, timeout=5.0):
+        """
+        Arrêter le thread (les templates en attente ne sont pas compactés)
+
+        Args:
+            timeout: Délai maximum d'attente du thread (secondes)
+        """
+        self._stop.set()
+        self._wake.set()
+
+        if self._thread is not None and self._thread.is_alive():
+            self._thread.join(timeout)
+
+    def stats(self):
+        """
+        Compteurs du compacteur
+
+        Returns:
+            dict: scheduled, compacted, pruned, failed, pending
+        """
+        with self._lock:
+            data = dict(self._stats)
+            data['pending'] = len(self._pending)
+
+        data['async'] = self.async_enabled
+        data['delay'] = self.delay
+        return data
+
+    def _ensure_started(self):
+        """Démarrer le thread (paresseusement, et après un fork de worker)"""
+        if self._thread is not None and self._thread.is_alive() and self._pid == os.getpid():
+            return
+
+        with self._start_lock:
+            if self._thread is not None and self._thread.is_alive() and self._pid == os.getpid():
+                return
+
+            self._pid = os.getpid()
+            self._stop.clear()
+            self._thread = threading.Thread(
+                target=self._run,
+                name='version-compactor',
+                daemon=True
+            )
+            self._thread.start()
+
+    def _due(self):
+        """Retirer les templates arrivés à échéance; délai jusqu'à la prochaine"""
+        now = time.monotonic()
+        with self._lock:
+            due = [template_id for template_id, deadline in self._pending.items() if deadline <= now]
+            for template_id in due:
+                del self._pending[template_id]
+            wait = min(self._pending.values(), default=now + self.delay) - now
+        return due, max(wait, 0.0)
+
+    def _run(self):
+        """Boucle du thread: compacter chaque template à son échéance"""
+        from app import db
+        from app.services.version_retention_service import VersionRetentionService
+
+        with self.app.app_context():
+            while not self._stop.is_set():
+                due, wait = self._due()
+
+                for template_id in due:
+                    try:
+                        summary = VersionRetentionService.compact_template(template_id)
+                        with self._lock:
+                            self._stats['compacted'] += 1
+                            self._stats['pruned'] += summary['pruned'] if summary else 0
+                    except Exception as e:
+                        db.session.rollback()
+                        with self._lock:
+                            self._stats['failed'] += 1
+                        self.app.logger.error(f'❌ Compactage des versions du template {template_id} échoué: {str(e)}')
+
+                if due:
+                    db.session.remove()
+                    continue
+
+                self._wake.wait(wait)
+                self._wake.clear()
+
+
+# Instance globale (configurée dans create_app)
+version_compactor = VersionCompactor()
@@ -0,0 +1,193 @@
+# ============================================
+# FICHIER: backend/app/utils/version_delta.py
+# Deltas entre Versions de Templates
+# ============================================
+"""
+Deltas de versions - Stocker une version comme différence avec un instantané
+
+Un delta décrit un texte à partir d'un texte de base (l'instantané), en
+JSON compact: une liste de morceaux, soit une plage copiée de la base
+[début, fin] (positions en caractères), soit une chaîne insérée telle quelle:
+    [[0, 18230], "<td>Nouveau titre</td>", [18262, 204511]]
+
+Le texte est découpé en segments (jusqu'à '>', ';', '{', '}' ou fin de
+ligne inclus) comparés par app.utils.sequence_diff: une modification
+localisée d'un HTML de 200 Ko, même minifié, donne un delta de quelques
+dizaines d'octets.
+
+Le cache des contenus reconstruits est indexé par (id, created_at) de la
+version: un id réattribué après suppression n'y retrouve pas l'ancien
+contenu.
+"""
+
+import json
+import re
+import threading
+from collections import OrderedDict
+from itertools import accumulate
+from app.utils.sequence_diff import DEFAULT_MAX_CELLS, opcodes
+
+
+_SEGMENT = re.compile(r'[^\n>;{}]*[\n>;{}]|[^\n>;{}]+')
+
+
+def encode_delta(base, text, max_cells=DEFAULT_MAX_CELLS):
+    """
+    Delta transformant base en text
+
+    Args:
+        base: Texte de l'instantané
+        text: Texte de la version
+        max_cells: Taille maximum d'une comparaison fine (segments x segments)
+
+    Returns:
+        str: Delta JSON (voir apply_delta)
+    """
+    base = base or ''
+    text = text or ''
+    base_segments = _SEGMENT.findall(base)
+    text_segments = _SEGMENT.findall(text)
+
+    base_offsets = _offsets(base_segments)
+    text_offsets = _offsets(text_segments)
+
+    chunks = []
+    ops, _ = opcodes(base_segments, text_segments, max_cells)
+    for tag, i1, i2, j1, j2 in ops:
+        if tag == 'equal':
+            chunks.append([base_offsets[i1], base_offsets[i2]])
+        elif j2 > j1:
+            chunks.append(text[text_offsets[j1]:text_offsets[j2]])
+
+    return json.dumps(chunks, ensure_ascii=False, separators=(',', ':'))
+
+
+def apply_delta(base, delta):
+    """
+    Reconstruire un texte à partir de sa base et de son delta
+
+    Args:
+        base: Texte de l'instantané
+        delta: Delta JSON (encode_delta)
+
+    Returns:
+        str: Texte de la version
+    """
+    base = base or ''
+    return ''.join(
+        chunk if isinstance(chunk, str) else base[chunk[0]:chunk[1]]
+        for chunk in json.loads(delta)
+    )
+
+
+def _offsets(segments):
+    """Position de début de chaque segment (plus la fin du texte)"""
+    return list(accumulate(map(len, segments), initial=0))
+
+
+class VersionContentCache:
+    """Cache LRU des contenus de versions reconstruits"""
+
+    def __init__(self, max_entries=200, max_bytes=64 * 1024 * 1024):
+        """
+        Args:
+            max_entries: Nombre maximum d'entrées
+            max_bytes: Taille maximum cumulée des contenus
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.enabled = True
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def init_app(self, app):
+        """
+        Configurer le cache à partir de la configuration Flask
+
+        Args:
+            app: Application Flask
+        """
+        self.enabled = app.config.get('VERSION_CACHE_ENABLED', True)
+        self.max_entries = app.config.get('VERSION_CACHE_MAX_ENTRIES', self.max_entries)
+        self.max_bytes = app.config.get('VERSION_CACHE_MAX_BYTES', self.max_bytes)
+        self.clear()
+
+    def get(self, key):
+        """
+        Récupérer un contenu
+
+        Args:
+            key: (id de la version, created_at)
+
+        Returns:
+            tuple: (html, css), ou None si absent
+        """
+        if not self.enabled:
+            return None
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key, content):
+        """
+        Ajouter un contenu
+
+        Args:
+            key: (id de la version, created_at)
+            content: (html, css)
+        """
+        size = sum(len(text or '') for text in content)
+        # Un contenu plus grand que tout le cache n'est pas conservé
+        if not self.enabled or size > self.max_bytes:
+            return
+
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= previous[1]
+
+            self._entries[key] = (content, size)
+            self._bytes += size
+
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+
+    def clear(self):
+        """Vider le cache"""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        """
+        Statistiques du cache
+
+        Returns:
+            dict: Taille, octets, hits, misses
+        """
+        with self._lock:
+            return {
+                'enabled': self.enabled,
+                'size': len(self._entries),
+                'bytes': self._bytes,
+                'max_entries': self.max_entries,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses
+            }
+
+
+# Instance globale (configurée dans create_app)
+version_content_cache = VersionContentCache()
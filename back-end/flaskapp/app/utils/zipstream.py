@@ -0,0 +1,193 @@
+# ============================================
+# FICHIER: backend/app/utils/zipstream.py
+# Écriture de ZIP en Flux
+# ============================================
+"""
+Écriture d'une archive ZIP en flux - Sans retour en arrière, mémoire constante
+
+zipfile.ZipFile garde un ZipInfo par membre jusqu'à la fermeture (environ
+500 octets chacun). Ici, l'enregistrement de l'annuaire central de chaque
+membre est sérialisé immédiatement dans un fichier temporaire (en mémoire
+jusqu'à ZIP_SPOOL_SIZE, sur disque au-delà), puis recopié à la fin.
+
+Chaque membre est compressé en entier (deflate) avant d'être émis: son CRC
+et ses tailles figurent donc dans l'en-tête local, sans descripteur de
+données. Les extensions ZIP64 sont utilisées au-delà de 4 Go ou de 65535
+membres.
+
+Usage:
+    writer = ZipStreamWriter()
+    yield writer.add('dossier/index.html', contenu)
+    yield from writer.finish()
+"""
+
+import struct
+import tempfile
+import time
+import zlib
+
+
+# Au-delà, les valeurs passent dans les enregistrements ZIP64
+ZIP64_LIMIT = 0xFFFFFFFF
+ZIP64_COUNT_LIMIT = 0xFFFF
+
+# Valeurs sentinelles des champs 32/16 bits renvoyant au ZIP64
+_MARKER = 0xFFFFFFFF
+_COUNT_MARKER = 0xFFFF
+
+ZIP_SPOOL_SIZE = 1024 * 1024
+
+_LOCAL_HEADER = struct.Struct('<IHHHHHIIIHH')
+_CENTRAL_HEADER = struct.Struct('<IHHHHHHIIIHHHHHII')
+_END_RECORD = struct.Struct('<IHHHHIIH')
+_ZIP64_END_RECORD = struct.Struct('<IQHHIIQQQQ')
+_ZIP64_LOCATOR = struct.Struct('<IIQI')
+
+# Bit 11: noms encodés en UTF-8
+_UTF8_FLAG = 0x800
+
+_DEFLATED = 8
+
+
+def _dos_datetime(timestamp):
+    """Date et heure au format MS-DOS (résolution 2 s, à partir de 1980)"""
+    t = time.localtime(timestamp)
+    year = max(t.tm_year, 1980)
+    date = (year - 1980) << 9 | t.tm_mon << 5 | t.tm_mday
+    dos_time = t.tm_hour << 11 | t.tm_min << 5 | t.tm_sec // 2
+    return date, dos_time
+
+
+def deflate_member(data, compresslevel=6):
+    """
+    Compresser le contenu d'un membre
+
+    Args:
+        data: Contenu (str encodé en UTF-8, ou octets)
+        compresslevel: Niveau deflate (0-9)
+
+    Returns:
+        tuple: (données compressées, CRC32, taille d'origine)
+
+    Raises:
+        ValueError: Si le contenu dépasse 4 Go
+    """
+    if isinstance(data, str):
+        data = data.encode('utf-8')
+    if len(data) >= _MARKER:
+        raise ValueError('Membre trop volumineux pour une archive en flux')
+
+    compressor = zlib.compressobj(compresslevel, zlib.DEFLATED, -15)
+    return compressor.compress(data) + compressor.flush(), zlib.crc32(data), len(data)
+
+
+class ZipStreamWriter:
+    """Archive ZIP produite morceau par morceau"""
+
+    def __init__(self, compresslevel=6, spool_size=ZIP_SPOOL_SIZE):
+        """
+        Args:
+            compresslevel: Niveau deflate (0-9)
+            spool_size: Taille de l'annuaire central gardée en mémoire
+        """
+        self.compresslevel = compresslevel
+        self._offset = 0
+        self._count = 0
+        self._central_size = 0
+        self._central = tempfile.SpooledTemporaryFile(max_size=spool_size)
+        self._date, self._time = _dos_datetime(time.time())
+
+    def add(self, name, data):
+        """
+        Ajouter un membre
+
+        Args:
+            name: Chemin dans l'archive ('dossier/fichier.ext')
+            data: Contenu (str encodé en UTF-8, ou octets)
+
+        Returns:
+            bytes: En-tête local et données compressées, à émettre tels quels
+
+        Raises:
+            ValueError: Si le membre dépasse 4 Go
+        """
+        return self.add_deflated(name, deflate_member(data, self.compresslevel))
+
+    def add_deflated(self, name, member):
+        """
+        Ajouter un membre déjà compressé (deflate_member, par exemple dans
+        un autre processus)
+
+        Args:
+            name: Chemin dans l'archive
+            member: (données compressées, CRC32, taille d'origine)
+
+        Returns:
+            bytes: En-tête local et données compressées
+        """
+        compressed, crc, size = member
+        filename = name.encode('utf-8')
+        flags = _UTF8_FLAG if not name.isascii() else 0
+
+        header = _LOCAL_HEADER.pack(
+            0x04034b50, 20, flags, _DEFLATED, self._time, self._date,
+            crc, len(compressed), size, len(filename), 0
+        )
+
+        self._write_central(filename, flags, crc, len(compressed), size, self._offset)
+
+        self._offset += len(header) + len(filename) + len(compressed)
+        self._count += 1
+        return header + filename + compressed
+
+    def finish(self, chunk_size=64 * 1024):
+        """
+        Terminer l'archive
+
+        Args:
+            chunk_size: Taille des morceaux de l'annuaire central
+
+        Yields:
+            bytes: Annuaire central, puis enregistrements de fin
+        """
+        self._central.seek(0)
+        try:
+            while True:
+                chunk = self._central.read(chunk_size)
+                if not chunk:
+                    break
+                yield chunk
+        finally:
+            self._central.close()
+
+        start, size, count = self._offset, self._central_size, self._count
+        end = b''
+
+        if start >= ZIP64_LIMIT or size >= ZIP64_LIMIT or count >= ZIP64_COUNT_LIMIT:
+            end += _ZIP64_END_RECORD.pack(
+                0x06064b50, _ZIP64_END_RECORD.size - 12, 45, 45, 0, 0, count, count, size, start
+            )
+            end += _ZIP64_LOCATOR.pack(0x07064b50, 0, start + size, 1)
+            start, size, count = _MARKER, _MARKER, _COUNT_MARKER
+
+        yield end + _END_RECORD.pack(0x06054b50, 0, 0, count, count, size, start, 0)
+
+    def _write_central(self, filename, flags, crc, compressed_size, file_size, offset):
+        """Sérialiser l'enregistrement d'annuaire central d'un membre"""
+        # Seul le décalage peut dépasser 4 Go (add refuse les membres plus gros)
+        extra = b''
+        version = 20
+        if offset >= ZIP64_LIMIT:
+            extra = struct.pack('<HHQ', 0x0001, 8, offset)
+            offset = _MARKER
+            version = 45
+
+        # Créé sous Unix (octet haut 3): les droits de external_attr sont lus
+        record = _CENTRAL_HEADER.pack(
+            0x02014b50, 3 << 8 | version, version, flags, _DEFLATED, self._time, self._date,
+            crc, compressed_size, file_size, len(filename), len(extra), 0, 0, 0,
+            0o100644 << 16, offset
+        ) + filename + extra
+
+        self._central.write(record)
+        self._central_size += len(record)
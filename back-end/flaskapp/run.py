@@ -7,6 +7,7 @@ Script de lancement de l'application Flask
 """
 
 import os
+import click
 from app import create_app, db
 
 # Récupérer l'environnement
@@ -31,6 +32,496 @@ def drop_db():
         print('✅ Base de données supprimée!')
 
 
+@app.cli.command()
+@click.option('--days', default=90, show_default=True, help='Conserver les logs des N derniers jours')
+@click.option('--batch-size', default=5000, show_default=True, help='Lignes supprimées par lot')
+def cleanup_db(days, batch_size):
+    """Supprimer les sessions expirées/révoquées et les vieux logs"""
+    from app.models.session import Session
+    from app.models.activity_log import ActivityLog
+
+    sessions = Session.cleanup_expired(
+        batch_size=batch_size,
+        progress=lambda total: print(f'  … {total} session(s) supprimée(s)')
+    )
+    print(f'✅ Sessions supprimées: {sessions}')
+
+    logs = ActivityLog.cleanup_old_logs(
+        days=days,
+        batch_size=batch_size,
+        progress=lambda total: print(f'  … {total} log(s) supprimé(s)')
+    )
+    print(f'✅ Logs supprimés (> {days} jours): {logs}')
+
+
+@app.cli.command()
+@click.option('--methods', default='pbkdf2:sha256:600000,scrypt:16384:8:1,scrypt:32768:8:1',
+              show_default=True, help='Méthodes KDF à comparer (séparées par des virgules)')
+@click.option('--logins', default=50, show_default=True, help='Vérifications par méthode')
+@click.option('--concurrency', default=8, show_default=True, help='Connexions simultanées simulées')
+def benchmark_passwords(methods, logins, concurrency):
+    """Mesurer les connexions/seconde selon le coût de la KDF"""
+    import time
+    from concurrent.futures import ThreadPoolExecutor
+    from app.utils.password_hasher import password_hasher, PasswordHasherBusy
+
+    print(f'Pool: {password_hasher.workers} worker(s), file de {password_hasher.queue_size}')
+
+    for method in methods.split(','):
+        stored = password_hasher.hash('Benchmark123', method=method.strip())
+
+        def attempt(_):
+            try:
+                return password_hasher.verify(stored, 'Benchmark123')
+            except PasswordHasherBusy:
+                return None
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as clients:
+            results = list(clients.map(attempt, range(logins)))
+        elapsed = time.perf_counter() - start
+
+        rejected = results.count(None)
+        print(f'{method:<28} {(logins - rejected) / elapsed:8.1f} connexions/s '
+              f'({elapsed / logins * 1000:.1f} ms/connexion, {rejected} rejetée(s) en 429)')
+
+
+@app.cli.command()
+@click.option('--renders', default=2000, show_default=True, help='Rendus par mesure')
+@click.option('--products', default=10, show_default=True, help='Éléments de la boucle du template d\'essai')
+def benchmark_render(renders, products):
+    """Mesurer les rendus/seconde avec et sans compilation mise en cache"""
+    import time
+    from app.services.render_service import RenderService
+
+    source = (
+        '<h1>Bonjour {{ prenom }} {{ nom }}</h1>'
+        '{% if premium %}<p>Merci pour votre fidélité, {{ client.ville | default("") }}</p>{% endif %}'
+        '<table>{% for produit in produits %}'
+        '<tr><td>{{ loop.index }}</td><td>{{ produit.nom }}</td><td>{{ produit.prix }} €</td></tr>'
+        '{% endfor %}</table>'
+    ) * 5
+    data = {
+        'prenom': 'Marie', 'nom': '<Durand>', 'premium': True, 'client': {'ville': 'Lyon'},
+        'produits': [{'nom': f'Produit {i}', 'prix': i * 10} for i in range(products)]
+    }
+    subject, _ = RenderService.compile_source('Bonjour {{ prenom }}', autoescape=False)
+
+    def measure(label, render_once):
+        start = time.perf_counter()
+        for _ in range(renders):
+            render_once()
+        elapsed = time.perf_counter() - start
+        print(f'{label:<32} {renders / elapsed:10.0f} rendus/s ({elapsed / renders * 1e6:.0f} µs/rendu)')
+
+    def cold():
+        body, _ = RenderService.compile_source(source)
+        RenderService.render_compiled(body, subject, data)
+
+    body, size = RenderService.compile_source(source)
+
+    print(f'Template d\'essai: {len(source)} caractères, {size} octets de code compilé')
+    measure('Compilation à chaque rendu', cold)
+    measure('Fonction compilée (cache)', lambda: RenderService.render_compiled(body, subject, data))
+
+
+@app.cli.command()
+@click.option('--rules', default=2000, show_default=True, help='Règles de la feuille d\'essai')
+@click.option('--size', default=500, show_default=True, help='Taille du HTML d\'essai (Ko)')
+def benchmark_inline(rules, size):
+    """Mesurer la mise en ligne du CSS sur un gros template"""
+    import time
+    from app.utils.css_inliner import inline_css, Stylesheet
+
+    css = '\n'.join(
+        (f'.c{i} {{ color: #{i:06x}; padding: {i % 9}px }}',
+         f'#b{i} {{ margin: {i % 7}px }}',
+         f'div .c{i - 2} span.k{i % 50} {{ font-size: {i % 20}px }}',
+         f'td.c{i % 400} > a {{ color: #333 }}')[i % 4]
+        for i in range(rules)
+    ) + '\np { line-height: 1.4 } a { text-decoration: none }\n@media (max-width: 600px) { .c0 { padding: 0 } }'
+
+    blocks = []
+    total = 0
+    while total < size * 1024:
+        i = len(blocks)
+        block = (f'<div class="c{i % rules} bloc" id="b{i}"><table><tr><td class="c{i % 400}">'
+                 f'<a href="#">Lien {i}</a></td></tr></table>'
+                 f'<p>Paragraphe <span class="k{i % 50}">{i}</span></p></div>\n')
+        blocks.append(block)
+        total += len(block)
+    html = ''.join(blocks)
+
+    start = time.perf_counter()
+    stylesheet = Stylesheet(css)
+    parse = time.perf_counter() - start
+
+    start = time.perf_counter()
+    inlined, remaining = inline_css(html, stylesheet)
+    elapsed = time.perf_counter() - start
+
+    print(f'Feuille: {rules} règles, {len(css)} caractères, analysée en {parse * 1000:.1f} ms')
+    print(f'HTML: {len(html) // 1024} Ko, {len(blocks) * 7} éléments, '
+          f'mis en ligne en {elapsed * 1000:.1f} ms ({len(inlined) // 1024} Ko produits)')
+    print(f'CSS restant dans <style>: {len(remaining)} caractères')
+
+
+@app.cli.command()
+@click.option('--batch-size', default=500, show_default=True, help='Templates indexés par transaction')
+def rebuild_search_index(batch_size):
+    """Reconstruire l'index de recherche plein texte des templates"""
+    from app.services.search_service import SearchService
+
+    total = SearchService.rebuild_index(
+        batch_size=batch_size,
+        progress=lambda total: print(f'  … {total} template(s) indexé(s)')
+    )
+    print(f'✅ Index de recherche reconstruit: {total} template(s)')
+
+
+@app.cli.command()
+@click.option('--batch-size', default=200, show_default=True, help='Lignes réécrites par transaction')
+@click.option('--recompress', is_flag=True, help='Réécrire aussi les contenus compressés avec un autre algorithme')
+def compress_content(batch_size, recompress):
+    """Compresser les contenus HTML/CSS écrits avant la migration (en service)"""
+    import time
+    from app.services.content_compression_service import ContentCompressionService
+    from app.utils.compressed_text import content_codec
+
+    print(f'Algorithme: {content_codec.algorithm}')
+    start = time.perf_counter()
+    results = ContentCompressionService.backfill(
+        batch_size=batch_size,
+        recompress=recompress,
+        progress=lambda table, rows, rewritten: print(f'  … {table}: {rows} ligne(s), {rewritten} réécrite(s)')
+    )
+    for table, stats in results.items():
+        print(f'✅ {table}: {stats["rewritten"]}/{stats["rows"]} ligne(s) réécrite(s)')
+
+    for table, columns in ContentCompressionService.report().items():
+        for name, entry in columns.items():
+            formats = ', '.join(f'{fmt}: {count}' for fmt, count in sorted(entry['formats'].items()))
+            print(f'   {table}.{name}: {entry["bytes"]} octets ({formats or "vide"})')
+    print(f'Terminé en {time.perf_counter() - start:.1f}s')
+
+
+@app.cli.command()
+@click.option('--template-id', default=None, type=int, help='Compacter un seul template')
+@click.option('--batch-size', default=200, show_default=True, help='Versions réécrites par transaction')
+def pack_versions(template_id, batch_size):
+    """Stocker l'historique des versions en instantanés + deltas"""
+    import time
+    from app.services.version_storage_service import VersionStorageService
+
+    start = time.perf_counter()
+    stats = VersionStorageService.pack(template_id=template_id, batch_size=batch_size)
+    print(f'✅ {stats["templates"]} template(s), {stats["versions"]} version(s) dont '
+          f'{stats["snapshots"]} instantané(s); {stats["rewritten"]} réécrite(s) '
+          f'en {time.perf_counter() - start:.1f}s')
+
+
+@app.cli.command()
+@click.option('--batch-size', default=500, show_default=True, help='Versions complétées par transaction')
+def fill_version_stats(batch_size):
+    """Renseigner les tailles et empreintes des versions antérieures à la migration 9"""
+    import time
+    from app.services.version_storage_service import VersionStorageService
+
+    start = time.perf_counter()
+    total = VersionStorageService.fill_stats(
+        batch_size=batch_size,
+        progress=lambda count: print(f'  … {count} version(s) complétée(s)')
+    )
+    print(f'✅ {total} version(s) complétée(s) en {time.perf_counter() - start:.1f}s')
+
+
+@app.cli.command()
+@click.option('--template-id', default=None, type=int, help='Rapport d\'un seul template')
+@click.option('--limit', default=20, show_default=True, help='Templates affichés (plus gros gains d\'abord)')
+def version_storage_report(template_id, limit):
+    """Afficher l'espace occupé par l'historique des versions, par template"""
+    from app.services.version_storage_service import VersionStorageService
+
+    report = VersionStorageService.report(template_id=template_id, limit=limit)
+
+    print(f'{"template":>10} {"versions":>9} {"instant.":>9} {"complet":>12} {"stocké":>12} {"gain":>7}')
+    for entry in report['templates'] + [dict(report['totals'], template_id='total')]:
+        print(f'{entry["template_id"]:>10} {entry["versions"]:>9} {entry["snapshots"]:>9} '
+              f'{entry["full_bytes"]:>12} {entry["stored_bytes"]:>12} {entry["saved_percent"]:>6.1f}%')
+
+
+@app.cli.command()
+@click.option('--batch-size', default=200, show_default=True, help='Lignes réécrites par transaction')
+def externalize_content(batch_size):
+    """Stocker par empreinte les grands contenus écrits avant (en service)"""
+    import time
+    from app.services.blob_service import BlobService
+
+    start = time.perf_counter()
+    results = BlobService.externalize(
+        batch_size=batch_size,
+        progress=lambda table, rows, rewritten: print(f'  … {table}: {rows} ligne(s), {rewritten} réécrite(s)')
+    )
+    for table, stats in results.items():
+        print(f'✅ {table}: {stats["rewritten"]}/{stats["rows"]} ligne(s) réécrite(s)')
+
+    report = BlobService.report()
+    print(f'   {report["blobs"]} contenu(s), {report["stored_bytes"]} octets stockés pour '
+          f'{report["referenced_bytes"]} référencés')
+    print(f'Terminé en {time.perf_counter() - start:.1f}s')
+
+
+@app.cli.command()
+@click.option('--days', default=None, type=int, help='Jours sans utilisation (défaut: CONTENT_COLD_AFTER_DAYS)')
+@click.option('--dry-run', is_flag=True, help='Compter sans rien déplacer')
+def tier_content(days, dry_run):
+    """Passer au niveau froid les contenus des templates inutilisés (et l'inverse)"""
+    from app.services.blob_service import BlobService
+
+    result = BlobService.apply_tiering(days=days, dry_run=dry_run)
+    prefix = '(simulation) ' if dry_run else ''
+    print(f'{prefix}Inutilisés depuis le {result["cutoff"][:10]} ({result["days"]} jours):')
+    print(f'   → froid: {result["frozen"]} contenu(s), {result["frozen_bytes"]} octets')
+    print(f'   → chaud: {result["thawed"]} contenu(s), {result["thawed_bytes"]} octets')
+
+
+@app.cli.command()
+@click.option('--recount', is_flag=True, help='Recalculer d\'abord les compteurs de références')
+def gc_blobs(recount):
+    """Supprimer les contenus stockés par empreinte qui ne sont plus référencés"""
+    from app.services.blob_service import BlobService
+
+    result = BlobService.collect_garbage(recount=recount)
+    if recount:
+        print(f'   {result["recounted"]} compteur(s) corrigé(s)')
+    print(f'✅ {result["deleted"]} contenu(s) supprimé(s), {result["files_removed"]} fichier(s)')
+
+
+@app.cli.command()
+@click.option('--template-id', default=None, type=int, help='Un seul template (défaut: tous)')
+@click.option('--dry-run', is_flag=True, help='Afficher ce qui serait supprimé, sans rien supprimer')
+@click.option('--batch-size', default=None, type=int, help='Templates lus par lot (défaut: VERSION_COMPACTION_BATCH_SIZE)')
+@click.option('--limit', default=20, show_default=True, help='Templates affichés (plus gros élagages d\'abord)')
+def compact_versions(template_id, dry_run, batch_size, limit):
+    """Supprimer les versions que la politique de rétention ne conserve pas (à planifier)"""
+    import time
+    from app.services.version_retention_service import VersionRetentionService
+
+    start = time.perf_counter()
+    result = VersionRetentionService.compact(
+        template_id=template_id, dry_run=dry_run, batch_size=batch_size, limit=limit,
+        progress=lambda templates, pruned: print(f'  … {templates} template(s), {pruned} version(s) élaguée(s)')
+    )
+
+    prefix = '(simulation) ' if dry_run else ''
+    for entry in result['templates']:
+        print(f'   template {entry["template_id"]}: {entry["pruned"]}/{entry["versions"]} version(s), '
+              f'{entry["pruned_bytes"]} octets')
+
+    totals = result['totals']
+    print(f'✅ {prefix}{totals["pruned"]} version(s) élaguée(s) sur {totals["versions"]} '
+          f'({totals["templates"]} template(s), {totals["pruned_bytes"]} octets) '
+          f'en {time.perf_counter() - start:.1f}s')
+    if totals['pruned'] and not dry_run:
+        print('   Contenus devenus inutiles: flask gc-blobs')
+
+
+@app.cli.command()
+@click.option('--template-id', required=True, type=int, help='Template modifié (de nouvelles versions sont créées)')
+@click.option('--threads', default=8, show_default=True, help='Clients simultanés')
+@click.option('--updates', default=25, show_default=True, help='Modifications par client')
+@click.option('--restore-every', default=5, show_default=True,
+              help='Une restauration de la version 1 toutes les N modifications (0: aucune)')
+def stress_versions(template_id, threads, updates, restore_every):
+    """
+    Créer des versions d'un même template depuis plusieurs threads et vérifier leur numérotation
+
+    Écrit de vraies versions dans la base configurée: à lancer sur une base
+    de recette (le test automatique est tests/test_version_numbers.py).
+    """
+    import time
+    from concurrent.futures import ThreadPoolExecutor
+    from app import db
+    from app.models.email_template import EmailTemplate
+    from app.models.template_version import TemplateVersion
+    from app.services.template_service import TemplateService
+    from app.services.version_service import VersionService
+
+    template = db.session.get(EmailTemplate, template_id)
+    if not template:
+        raise click.ClickException(f'Template introuvable: {template_id}')
+    owner_id, html = template.user_id, template.html_content
+    first = template.version_counter + 1
+
+    def client(number):
+        errors = []
+        with app.app_context():
+            for i in range(updates):
+                try:
+                    if restore_every and i % restore_every == restore_every - 1:
+                        VersionService.restore_version(template_id, 1, owner_id)
+                    else:
+                        TemplateService.update_template(
+                            template_id, owner_id,
+                            html_content=f'{html}\n<!-- client {number}, modification {i} -->'
+                        )
+                except Exception as e:
+                    db.session.rollback()
+                    errors.append(str(e))
+        return errors
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as clients:
+        errors = [error for result in clients.map(client, range(threads)) for error in result]
+    elapsed = time.perf_counter() - start
+
+    db.session.expire_all()
+    numbers = db.session.execute(
+        db.select(TemplateVersion.version_number).where(TemplateVersion.template_id == template_id)
+    ).scalars().all()
+    counter = db.session.get(EmailTemplate, template_id).version_counter
+    created = sorted(number for number in numbers if number >= first)
+
+    print(f'{threads * updates} opération(s) en {elapsed:.1f}s: {len(created)} version(s) créée(s), '
+          f'{len(errors)} erreur(s)')
+    for message in sorted(set(errors))[:5]:
+        print(f'  ❌ {message}')
+
+    if errors:
+        raise click.ClickException(f'{len(errors)} opération(s) en échec')
+    # Une version par opération, numéros contigus depuis le compteur initial
+    if created != list(range(first, first + threads * updates)) or counter != first + threads * updates - 1:
+        raise click.ClickException(f'Numérotation incohérente (compteur {counter}, '
+                                   f'versions {created[:1]}…{created[-1:]} pour {threads * updates} opération(s))')
+    print(f'✅ Numéros {first} à {counter} contigus, compteur à jour')
+
+
+@app.cli.command()
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--user', 'email', required=True, help='Email du propriétaire des templates')
+@click.option('--format', 'fmt', type=click.Choice(['zip', 'ndjson']), default=None,
+              help='Format (défaut: déduit de l\'extension)')
+@click.option('--chunk-size', default=None, type=int, help='Entrées par transaction (défaut: IMPORT_CHUNK_SIZE)')
+@click.option('--workers', default=None, type=int, help='Processus de validation (défaut: IMPORT_CLI_WORKERS, 0: aucun)')
+def import_templates(path, email, fmt, chunk_size, workers):
+    """Importer des templates depuis une archive ZIP ou un fichier NDJSON"""
+    import time
+    from app.models.user import User
+    from app.services.import_service import ImportService
+
+    user = User.find_by_email(email)
+    if not user:
+        raise click.ClickException(f'Utilisateur introuvable: {email}')
+
+    start = time.perf_counter()
+
+    with open(path, 'rb') as fileobj:
+        try:
+            fmt = ImportService.detect_format(path, requested=fmt)
+            entries = ImportService.iter_entries(fileobj, fmt)
+        except ValueError as e:
+            raise click.ClickException(str(e))
+
+        if workers is None:
+            workers = app.config.get('IMPORT_CLI_WORKERS', 0)
+
+        for event in ImportService.import_entries(user.id, entries, chunk_size=chunk_size, workers=workers):
+            if event['event'] == 'error':
+                print(f'  ❌ {event["source"]}: {event["message"]}')
+            elif event['event'] == 'progress':
+                print(f'  … {event["processed"]} entrée(s), {event["imported"]} importée(s), '
+                      f'{event["failed"]} en erreur')
+            else:
+                elapsed = time.perf_counter() - start
+                rate = event['imported'] / elapsed * 60 if elapsed else 0
+                print(f'✅ Import terminé: {event["imported"]} template(s), {event["failed"]} erreur(s) '
+                      f'en {elapsed:.1f}s ({rate:.0f} templates/min)')
+
+
+@app.cli.command()
+@click.argument('path', type=click.Path(dir_okay=False, writable=True))
+@click.option('--user', 'email', required=True, help='Email du propriétaire des templates')
+@click.option('--format', 'fmt', type=click.Choice(['zip', 'ndjson']), default=None,
+              help='Format (défaut: déduit de l\'extension, sinon ndjson)')
+@click.option('--versions/--no-versions', default=False, help='Inclure l\'historique des versions')
+@click.option('--metadata/--no-metadata', default=True, help='Inclure category, tags, favorite, ...')
+@click.option('--after', default=None, type=int, help='Reprendre après cet ID de template (NDJSON: ajouté au fichier existant)')
+def export_templates(path, email, fmt, versions, metadata, after):
+    """Exporter les templates d'un utilisateur en ZIP ou NDJSON"""
+    import time
+    from app.models.user import User
+    from app.services.export_service import ExportService
+
+    user = User.find_by_email(email)
+    if not user:
+        raise click.ClickException(f'Utilisateur introuvable: {email}')
+
+    fmt = fmt or ('zip' if path.lower().endswith('.zip') else 'ndjson')
+
+    start = time.perf_counter()
+    chunks = ExportService.export(user.id, fmt, include_metadata=metadata, include_versions=versions, after=after)
+
+    # NDJSON repris: les lignes manquantes sont ajoutées à la suite (un ZIP
+    # repris est une nouvelle archive, à écrire dans un autre fichier)
+    mode = 'ab' if after and fmt == 'ndjson' else 'wb'
+    written = 0
+    with open(path, mode) as output:
+        for chunk in chunks:
+            data = chunk.encode('utf-8') if isinstance(chunk, str) else chunk
+            output.write(data)
+            written += len(data)
+
+    print(f'✅ Export terminé: {path} ({written} octets en {time.perf_counter() - start:.1f}s)')
+
+
+@app.cli.command()
+@click.argument('template_id', type=int)
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--user', 'email', required=True, help='Email du propriétaire du template')
+@click.option('--output', '-o', 'output_path', required=True, type=click.Path(dir_okay=False, writable=True),
+              help='Fichier produit (.ndjson ou .zip de .eml)')
+@click.option('--input', 'fmt', type=click.Choice(['csv', 'ndjson']), default=None,
+              help='Format de la liste (défaut: déduit de l\'extension)')
+@click.option('--unordered', is_flag=True, help='Écrire les lots dès qu\'ils sont prêts')
+@click.option('--version', 'version_number', default=None, type=int, help='Version à rendre (défaut: courante)')
+@click.option('--to-field', default='email', show_default=True, help='Colonne de l\'adresse du destinataire')
+@click.option('--sender', default=None, help='Expéditeur des .eml')
+@click.option('--workers', default=None, type=int, help='Processus de rendu (défaut: BATCH_RENDER_CLI_WORKERS, 0: aucun)')
+@click.option('--chunk-size', default=None, type=int, help='Lignes par lot (défaut: BATCH_RENDER_CHUNK_SIZE)')
+def render_batch(template_id, path, email, output_path, fmt, unordered, version_number, to_field, sender,
+                 workers, chunk_size):
+    """Rendre un template pour chaque ligne d'un fichier CSV ou NDJSON"""
+    import time
+    from app.models.user import User
+    from app.services.batch_render_service import BatchRenderService
+
+    user = User.find_by_email(email)
+    if not user:
+        raise click.ClickException(f'Utilisateur introuvable: {email}')
+
+    output = 'zip' if output_path.lower().endswith('.zip') else 'ndjson'
+    if workers is None:
+        workers = app.config.get('BATCH_RENDER_CLI_WORKERS', 0)
+    start = time.perf_counter()
+
+    with open(path, 'rb') as fileobj, open(output_path, 'wb') as destination:
+        try:
+            fmt = BatchRenderService.detect_format(path, requested=fmt)
+            chunks = BatchRenderService.render_rows(
+                template_id, user.id, BatchRenderService.iter_rows(fileobj, fmt),
+                output=output, ordered=not unordered, version_number=version_number,
+                to_field=to_field, sender=sender, workers=workers, chunk_size=chunk_size
+            )
+        except ValueError as e:
+            raise click.ClickException(str(e))
+
+        for chunk in chunks:
+            destination.write(chunk.encode('utf-8') if isinstance(chunk, str) else chunk)
+
+    elapsed = time.perf_counter() - start
+    print(f'✅ Rendu terminé: {output_path} en {elapsed:.1f}s')
+
+
 @app.cli.command()
 def seed_db():
     """Peupler la base avec des données de test"""
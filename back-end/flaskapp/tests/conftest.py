@@ -0,0 +1,54 @@
+# ============================================
+# FICHIER: backend/tests/conftest.py
+# Fixtures des Tests
+# ============================================
+"""
+Fixtures communes - Application de test sur une base SQLite fichier
+
+La base est un fichier (TEST_DATABASE_URL) et non ':memory:': les tests
+de concurrence ouvrent une connexion par thread sur la même base.
+"""
+
+import os
+import sys
+import tempfile
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+_directory = tempfile.mkdtemp(prefix='email-platform-tests-')
+os.environ.setdefault('TEST_DATABASE_URL', f'sqlite:///{os.path.join(_directory, "test.db")}')
+
+from app import create_app, db  # noqa: E402
+from app.models.user import User  # noqa: E402
+
+
+@pytest.fixture
+def app():
+    """Application de test, tables créées puis supprimées à chaque test"""
+    app = create_app('testing')
+
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def user(app):
+    """Utilisateur propriétaire des templates"""
+    user = User(email='owner@example.com', password='Secret123', nom='Owner', prenom='Test')
+    db.session.add(user)
+    db.session.commit()
+    return user
+
+
+@pytest.fixture
+def auth_headers(user):
+    """En-tête Authorization d'une session de l'utilisateur"""
+    from app.services.auth_service import AuthService
+
+    token = AuthService.login('owner@example.com', 'Secret123')['token']
+    return {'Authorization': f'Bearer {token}'}
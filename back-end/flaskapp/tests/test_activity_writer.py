@@ -0,0 +1,24 @@
+# ============================================
+# FICHIER: backend/tests/test_activity_writer.py
+# Tests du Writer de Journaux d'Activité
+# ============================================
+"""
+Writer asynchrone - Enregistrement unique du vidage à l'arrêt
+"""
+
+from flask import Flask
+
+from app.utils import activity_writer as module
+
+
+def test_shutdown_registered_once(monkeypatch):
+    registered = []
+    monkeypatch.setattr(module.atexit, 'register', registered.append)
+
+    app = Flask(__name__)
+    app.config['ACTIVITY_LOG_ASYNC'] = True
+    writer = module.ActivityWriter()
+    for _ in range(3):
+        writer.init_app(app)
+
+    assert registered == [writer.shutdown]
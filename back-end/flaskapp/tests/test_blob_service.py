@@ -0,0 +1,78 @@
+# ============================================
+# FICHIER: backend/tests/test_blob_service.py
+# Tests des Contenus Stockés par Empreinte
+# ============================================
+"""
+Tests BlobService - Recomptage et nettoyage pendant que l'application écrit
+"""
+
+from app import db
+from app.models.content_blob import ContentBlob
+from app.models.email_template import EmailTemplate
+from app.services.blob_service import BlobService
+from app.services.bulk_service import BulkService
+from app.services.template_service import TemplateService
+from app.utils.blob_store import blob_store
+
+
+def _html(label):
+    """Contenu assez grand pour être stocké par empreinte"""
+    return f'<div>{label}</div>' + '<p>contenu</p>' * 500
+
+
+def _ref_count(digest):
+    return db.session.get(ContentBlob, digest).ref_count
+
+
+def test_reference_added_during_recount_survives_gc(app, user):
+    for i in range(5):
+        TemplateService.create_template(user.id, f't{i}', 's', _html(i))
+
+    added = []
+
+    def create_between_batches(seen, fixed):
+        # Une requête concurrente: un nouveau contenu et une copie d'un contenu existant
+        if not added:
+            for i in range(5):
+                added.append(TemplateService.create_template(user.id, f'new{i}', 's', _html(f'new{i}')).id)
+            added.append(TemplateService.create_template(user.id, 'copy', 's', _html(4)).id)
+
+    BlobService.recount(batch_size=1, progress=create_between_batches)
+    BlobService.collect_garbage(grace_seconds=0)
+
+    db.session.expire_all()
+    blob_store.clear()
+    for i, template_id in enumerate(added[:-1]):
+        assert db.session.get(EmailTemplate, template_id).html_content == _html(f'new{i}')
+    assert db.session.get(EmailTemplate, added[-1]).html_content == _html(4)
+    assert BlobService.recount() == 0
+
+
+def test_gc_keeps_referenced_blob_with_wrong_count(app, user):
+    template = TemplateService.create_template(user.id, 't', 's', _html('t'))
+    digest = template.html_blob
+    db.session.execute(db.update(ContentBlob.__table__).values(ref_count=0))
+    db.session.commit()
+
+    assert BlobService.collect_garbage(grace_seconds=0)['deleted'] == 0
+
+    db.session.expire_all()
+    blob_store.clear()
+    assert db.session.get(EmailTemplate, template.id).html_content == _html('t')
+    assert BlobService.recount() == 1
+    assert _ref_count(digest) == 2
+
+
+def test_bulk_hard_delete_releases_references(app, user):
+    shared = _html('shared')
+    kept = TemplateService.create_template(user.id, 'kept', 's', shared)
+    deleted = TemplateService.create_template(user.id, 'deleted', 's', shared)
+    digest = kept.html_blob
+    assert _ref_count(digest) == 4  # deux templates, deux versions 1
+
+    result = BulkService.apply(user.id, [{'op': 'delete', 'id': deleted.id, 'soft': False}])
+
+    assert result['applied']
+    db.session.expire_all()
+    assert _ref_count(digest) == 2
+    assert BlobService.recount() == 0
@@ -0,0 +1,125 @@
+# ============================================
+# FICHIER: backend/tests/test_css_inliner.py
+# Tests de la Mise en Ligne du CSS
+# ============================================
+"""
+Mise en ligne du CSS - Cascade, sélecteurs et analyse du HTML
+"""
+
+import re
+
+from app.utils.css_inliner import Stylesheet, inline_css
+
+
+def _inline(html, css):
+    return inline_css(html, Stylesheet(css))
+
+
+def _style(html, marker):
+    """Attribut style de l'élément portant id=marker"""
+    match = re.search(r'<[^>]*\bid="%s"[^>]*>' % marker, html)
+    assert match, html
+    style = re.search(r'style="([^"]*)"', match.group(0))
+    return style.group(1) if style else None
+
+
+def _declarations(style):
+    return dict(part.split(': ', 1) for part in style.split('; ')) if style else {}
+
+
+def test_specificity_orders_rules():
+    html, _ = _inline(
+        '<p id="a" class="x">t</p>',
+        '#a { color: red } .x { color: blue } p { color: green; margin: 0 }'
+    )
+    assert _declarations(_style(html, 'a')) == {'color': 'red', 'margin': '0'}
+
+
+def test_later_rule_wins_at_equal_specificity():
+    html, _ = _inline('<p id="a" class="x y">t</p>', '.x { color: red } .y { color: blue }')
+    assert _declarations(_style(html, 'a'))['color'] == 'blue'
+
+
+def test_existing_style_beats_stylesheet():
+    html, _ = _inline('<p id="a" style="color: black">t</p>', '#a { color: red; margin: 0 }')
+    assert _declarations(_style(html, 'a')) == {'color': 'black', 'margin': '0'}
+
+
+def test_important_beats_existing_style():
+    html, _ = _inline('<p id="a" style="color: black">t</p>', 'p { color: red !important }')
+    assert _declarations(_style(html, 'a'))['color'] == 'red !important'
+
+
+def test_important_existing_style_beats_important_rule():
+    html, _ = _inline(
+        '<p id="a" style="color: black !important">t</p>', '#a { color: red !important }'
+    )
+    assert _declarations(_style(html, 'a'))['color'] == 'black !important'
+
+
+def test_child_combinator():
+    html, _ = _inline(
+        '<div><p id="a">t</p><section><p id="b">t</p></section></div>',
+        'div > p { color: red }'
+    )
+    assert _style(html, 'a') == 'color: red'
+    assert _style(html, 'b') is None
+
+
+def test_descendant_combinator():
+    html, _ = _inline('<div><section><p id="a">t</p></section></div><p id="b">t</p>', 'div p { color: red }')
+    assert _style(html, 'a') == 'color: red'
+    assert _style(html, 'b') is None
+
+
+def test_sibling_combinators():
+    html, _ = _inline(
+        '<div><h1 id="h">t</h1><p id="a">t</p><p id="b">t</p></div><p id="c">t</p>',
+        'h1 + p { color: red } h1 ~ p { margin: 0 }'
+    )
+    assert _declarations(_style(html, 'a')) == {'margin': '0', 'color': 'red'}
+    assert _declarations(_style(html, 'b')) == {'margin': '0'}
+    assert _style(html, 'c') is None
+
+
+def test_first_child():
+    html, _ = _inline(
+        '<ul><li id="a">1</li><li id="b">2</li></ul>', 'li:first-child { color: red }'
+    )
+    assert _style(html, 'a') == 'color: red'
+    assert _style(html, 'b') is None
+
+
+def test_quoted_attribute_containing_gt():
+    html, _ = _inline(
+        '<a id="a" title="1 > 0" href="#">t</a><p id="b">t</p>', 'a { color: red } p { margin: 0 }'
+    )
+    assert 'title="1 > 0"' in html
+    assert _style(html, 'a') == 'color: red'
+    assert _style(html, 'b') == 'margin: 0'
+
+
+def test_attribute_selector():
+    html, _ = _inline('<a id="a" href="https://x">t</a><a id="b" href="/y">t</a>', 'a[href^="https"] { color: red }')
+    assert _style(html, 'a') == 'color: red'
+    assert _style(html, 'b') is None
+
+
+def test_comments_are_ignored():
+    html, _ = _inline(
+        '<!-- <p id="fake"> --><p id="a">t</p>',
+        '/* p { color: blue } */ p { color: red }'
+    )
+    assert html.startswith('<!-- <p id="fake"> -->')
+    assert _style(html, 'a') == 'color: red'
+
+
+def test_media_rules_stay_in_style():
+    html, remaining = _inline(
+        '<p id="a">t</p>',
+        'p { color: red } @media (max-width: 600px) { p { color: blue } } a:hover { color: green }'
+    )
+    assert _style(html, 'a') == 'color: red'
+    assert '@media (max-width: 600px)' in remaining
+    assert 'color: blue' in remaining
+    assert 'a:hover' in remaining
@@ -0,0 +1,58 @@
+# ============================================
+# FICHIER: backend/tests/test_pagination.py
+# Tests du Curseur de Pagination
+# ============================================
+"""
+Curseurs de pagination - Aller-retour et rejet des curseurs malformés
+"""
+
+import base64
+import json
+from datetime import datetime
+
+import pytest
+
+from app.utils.pagination import decode_cursor, encode_cursor
+
+
+def _raw_cursor(values):
+    """Curseur construit à la main (comme un client malveillant)"""
+    raw = json.dumps(values).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+@pytest.mark.parametrize('values', [
+    [datetime(2026, 3, 14, 15, 9, 26, 535000), 42],
+    ['Newsletter', 7],
+    [0.75, 3],
+    [datetime(2020, 1, 1)]
+])
+def test_round_trip(values):
+    assert decode_cursor(encode_cursor(values), len(values)) == values
+
+
+@pytest.mark.parametrize('values', [
+    [[1], [2]],
+    [None, None],
+    [True, 1],
+    [{'dt': 5}, 1],
+    [{'dt': 'pas une date'}, 1],
+    [{'dt': '2026-01-01', 'x': 1}, 1],
+    [{}, 1]
+])
+def test_rejects_malformed_values(values):
+    with pytest.raises(ValueError, match='Curseur invalide'):
+        decode_cursor(_raw_cursor(values), 2)
+
+
+@pytest.mark.parametrize('cursor', ['%%%', _raw_cursor({'a': 1}), _raw_cursor([1, 2, 3]), _raw_cursor('x')])
+def test_rejects_malformed_cursor(cursor):
+    with pytest.raises(ValueError, match='Curseur invalide'):
+        decode_cursor(cursor, 2)
+
+
+def test_route_rejects_malformed_cursor(app, auth_headers):
+    client = app.test_client()
+    for values in ([[1], [2]], [None, None]):
+        response = client.get(f'/api/templates/?cursor={_raw_cursor(values)}', headers=auth_headers)
+        assert response.status_code == 400
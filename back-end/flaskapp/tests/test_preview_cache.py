@@ -0,0 +1,28 @@
+# ============================================
+# FICHIER: backend/tests/test_preview_cache.py
+# Tests du Cache des Aperçus
+# ============================================
+"""
+Tests PreviewCache - Clé et ETag dépendant de la version du rendu
+"""
+
+from app.services.template_service import TemplateService
+from app.utils import preview_cache as module
+from app.utils.preview_cache import PreviewCache
+
+
+def test_content_hash_changes_with_render_version(monkeypatch):
+    before = PreviewCache.content_hash('Sujet', '<p>a</p>', 'p { color: red; }')
+
+    monkeypatch.setattr(module, 'RENDER_VERSION', module.RENDER_VERSION + 1)
+
+    assert PreviewCache.content_hash('Sujet', '<p>a</p>', 'p { color: red; }') != before
+
+
+def test_preview_etag_is_not_reused_across_render_versions(app, user, monkeypatch):
+    template = TemplateService.create_template(user.id, 't', 'Sujet', '<p>a</p>', 'p { color: red; }')
+    etag = template.preview_hash()
+
+    monkeypatch.setattr(module, 'RENDER_VERSION', module.RENDER_VERSION + 1)
+
+    assert template.preview_hash() != etag
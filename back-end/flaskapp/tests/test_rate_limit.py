@@ -0,0 +1,33 @@
+# ============================================
+# FICHIER: backend/tests/test_rate_limit.py
+# Tests de la Limitation de Débit
+# ============================================
+"""
+Limitation de débit - Identité des clients anonymes derrière le proxy
+"""
+
+import pytest
+
+from app.utils.decorators import _rate_limit_identity, rate_limit
+
+
+def test_ip_follows_forwarded_for(app):
+    with app.test_request_context(headers={'X-Forwarded-For': '203.0.113.7, 10.0.0.1'},
+                                  environ_base={'REMOTE_ADDR': '10.0.0.1'}):
+        assert _rate_limit_identity('ip') == 'ip:203.0.113.7'
+        assert _rate_limit_identity('user_or_ip') == 'ip:203.0.113.7'
+
+
+def test_ip_without_proxy(app):
+    with app.test_request_context(environ_base={'REMOTE_ADDR': '198.51.100.2'}):
+        assert _rate_limit_identity('ip') == 'ip:198.51.100.2'
+
+
+def test_user_or_ip_uses_token(app, auth_headers, user):
+    with app.test_request_context(headers=auth_headers):
+        assert _rate_limit_identity('user_or_ip') == f'user:{user.id}'
+
+
+def test_unknown_key_rejected():
+    with pytest.raises(ValueError):
+        rate_limit(key='user')
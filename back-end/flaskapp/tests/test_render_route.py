@@ -0,0 +1,32 @@
+# ============================================
+# FICHIER: backend/tests/test_render_route.py
+# Tests de la Route de Rendu
+# ============================================
+"""
+Rendu d'un template - Validation du corps de la requête
+"""
+
+import pytest
+
+from app.services.template_service import TemplateService
+
+
+@pytest.fixture
+def template(user):
+    return TemplateService.create_template(
+        user_id=user.id, nom='Bienvenue', sujet='Bonjour {{ prenom }}', html_content='<p>Bonjour {{ prenom }}</p>'
+    )
+
+
+def test_render(app, template, auth_headers):
+    response = app.test_client().post(
+        f'/api/templates/{template.id}/render', json={'data': {'prenom': 'Marie'}}, headers=auth_headers
+    )
+    assert response.status_code == 200
+    assert 'Marie' in response.get_json()['data']['html']
+
+
+@pytest.mark.parametrize('body', ['x', [], [1], 3, {'data': 'x'}, {'data': [1]}])
+def test_rejects_non_object_body(app, template, auth_headers, body):
+    response = app.test_client().post(f'/api/templates/{template.id}/render', json=body, headers=auth_headers)
+    assert response.status_code == 400
@@ -0,0 +1,42 @@
+# ============================================
+# FICHIER: backend/tests/test_search.py
+# Tests de la Recherche Plein Texte
+# ============================================
+"""
+Recherche - Pertinence par colonne (SQLite FTS5)
+"""
+
+from app.services.template_service import TemplateService
+
+
+def _create(user, nom, sujet='Sujet', html='<p>Texte</p>'):
+    return TemplateService.create_template(user_id=user.id, nom=nom, sujet=sujet, html_content=html)
+
+
+def test_name_hit_outranks_body_hit(app, user):
+    body = _create(user, 'Relance', html='<p>Offre printemps printemps printemps</p>')
+    subject = _create(user, 'Promotion', sujet='Printemps')
+    name = _create(user, 'Printemps')
+
+    result = TemplateService.search_templates(user.id, 'printemps')
+
+    assert [t['id'] for t in result['templates']] == [name.id, subject.id, body.id]
+
+
+def test_cursor_pages_follow_relevance_order(app, user):
+    for index in range(3):
+        _create(user, f'Relance {index}', html='<p>Offre printemps</p>')
+        _create(user, f'Printemps {index}')
+        _create(user, f'Promotion {index}', sujet='Printemps')
+
+    ranked = [t['id'] for t in TemplateService.search_templates(user.id, 'printemps', per_page=50)['templates']]
+
+    paged = []
+    cursor = ''
+    while cursor is not None:
+        page = TemplateService.search_templates(user.id, 'printemps', per_page=4, cursor=cursor)
+        paged.extend(t['id'] for t in page['templates'])
+        cursor = page['next_cursor']
+
+    assert len(ranked) == 9
+    assert paged == ranked
@@ -0,0 +1,117 @@
+# ============================================
+# FICHIER: backend/tests/test_version_delta.py
+# Tests des Deltas de Versions
+# ============================================
+"""
+Deltas de versions - Aller-retour encode/apply et reconstruction après
+élagage d'un instantané qui a des versions delta
+"""
+
+import random
+
+import pytest
+
+from app import db
+from app.models.template_version import TemplateVersion
+from app.services.template_service import TemplateService
+from app.services.version_retention_service import VersionRetentionService
+from app.services.version_service import VersionService
+from app.utils.blob_store import blob_store
+from app.utils.version_delta import apply_delta, encode_delta, version_content_cache
+
+
+BODY = ''.join(
+    f'<tr><td class="c{index}">Ligne {index}; prix: {index * 3} €</td></tr>\n' for index in range(60)
+)
+
+
+def _edit(rng, text):
+    """Insertion, suppression ou remplacement à une position aléatoire"""
+    start = rng.randrange(len(text) + 1)
+    end = min(len(text), start + rng.randrange(40))
+    insert = rng.choice(['', '<b>é</b>', '>;{}', '\n', 'nouveau texte ', '{{ prenom }}'])
+    return text[:start] + insert + text[end:]
+
+
+def test_round_trip_over_many_edits():
+    rng = random.Random(20261018)
+    base = BODY
+    text = BODY
+
+    for step in range(300):
+        text = _edit(rng, text)
+        assert apply_delta(base, encode_delta(base, text)) == text
+        # Nouvel instantané de temps en temps, comme l'historique
+        if step % 25 == 0:
+            base = text
+
+
+@pytest.mark.parametrize('base, text', [
+    ('', ''),
+    ('', BODY),
+    (BODY, ''),
+    (BODY, BODY),
+    (None, 'abc'),
+    (BODY, BODY[::-1])
+])
+def test_round_trip_edge_cases(base, text):
+    assert apply_delta(base, encode_delta(base, text)) == (text or '')
+
+
+def test_round_trip_without_fine_comparison():
+    rng = random.Random(7)
+    text = BODY
+    for _ in range(20):
+        text = _edit(rng, text)
+    assert apply_delta(BODY, encode_delta(BODY, text, max_cells=1)) == text
+
+
+def _contents(template_id):
+    return {
+        version.version_number: version.get_content()
+        for version in TemplateVersion.query.filter_by(template_id=template_id)
+    }
+
+
+def _forget_cached_content():
+    db.session.expire_all()
+    version_content_cache.clear()
+    blob_store.clear()
+
+
+def test_reconstruction_after_pruning_snapshot(app, user):
+    app.config['VERSION_RETENTION'] = {
+        'keep_all': False, 'keep_last': 3, 'daily_days': 0, 'monthly_months': 0, 'restore_points': True
+    }
+    rng = random.Random(42)
+    template = TemplateService.create_template(
+        user_id=user.id, nom='Catalogue', sujet='Sujet', html_content=BODY, css_content='td { color: red }'
+    )
+    html = BODY
+    for index in range(8):
+        html = _edit(rng, html)
+        TemplateService.update_template(
+            template_id=template.id, user_id=user.id, html_content=html, css_content=f'td {{ margin: {index}px }}'
+        )
+        if index == 3:
+            VersionService.restore_version(template.id, 2, user.id)
+
+    first = TemplateVersion.query.filter_by(template_id=template.id, version_number=1).one()
+    assert first.delta_base_id is None
+    assert TemplateVersion.query.filter_by(delta_base_id=first.id).count() > 3
+
+    expected = _contents(template.id)
+    summary = VersionRetentionService.compact_template(template.id)
+    assert summary['pruned'] > 0
+
+    _forget_cached_content()
+    remaining = {version.version_number: version for version in TemplateVersion.query.filter_by(template_id=template.id)}
+    assert 1 not in remaining
+    # Versions conservées: les 3 dernières, la restauration et la version restaurée
+    assert set(remaining) == {2, 6, 8, 9, 10}
+
+    ids = {version.id for version in remaining.values()}
+    for number, version in remaining.items():
+        assert version.delta_base_id is None or version.delta_base_id in ids
+        assert version.get_content() == expected[number]
+        assert TemplateVersion.load_content(template.id, number) == expected[number]
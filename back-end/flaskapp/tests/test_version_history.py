@@ -0,0 +1,77 @@
+# ============================================
+# FICHIER: backend/tests/test_version_history.py
+# Tests de l'Historique des Versions
+# ============================================
+"""
+Historique des versions - Tailles et empreintes des versions antérieures
+à la migration 9 (colonnes NULL)
+"""
+
+import pytest
+
+from app import db
+from app.models.template_version import TemplateVersion
+from app.services.template_service import TemplateService
+from app.services.version_service import VersionService
+from app.services.version_storage_service import VersionStorageService
+from app.utils.blob_store import blob_store
+
+
+BODY = ''.join(f'<p>Paragraphe {index}</p>' for index in range(40))
+
+
+@pytest.fixture
+def template(user):
+    template = TemplateService.create_template(
+        user_id=user.id, nom='Lettre', sujet='Sujet', html_content='<p>Version 0</p>', css_content='p {}'
+    )
+    for index in range(1, 6):
+        TemplateService.update_template(
+            template_id=template.id, user_id=user.id, html_content=BODY + f'<p>Modification {index}</p>'
+        )
+    return template
+
+
+def _expected(template_id):
+    versions = TemplateVersion.query.filter_by(template_id=template_id).all()
+    return {version.version_number: TemplateVersion.content_stats(*version.get_content()) for version in versions}
+
+
+def _clear_stats():
+    db.session.execute(db.update(TemplateVersion.__table__).values(
+        {name: None for name in TemplateVersion.STATS_COLUMNS}
+    ))
+    db.session.commit()
+    blob_store.clear()
+
+
+def test_history_fills_missing_stats(app, user, template):
+    assert TemplateVersion.query.filter(TemplateVersion.delta_base_id.isnot(None)).count() > 0
+    expected = _expected(template.id)
+    _clear_stats()
+
+    result = VersionService.get_template_versions(template.id, user.id, per_page=50)
+
+    for version in result['versions']:
+        for name in TemplateVersion.STATS_COLUMNS:
+            assert version[name] == expected[version['version_number']][name]
+
+    # Enregistrées: la lecture suivante ne recalcule rien
+    db.session.expire_all()
+    assert _expected(template.id) == {
+        version.version_number: {name: getattr(version, name) for name in TemplateVersion.STATS_COLUMNS}
+        for version in TemplateVersion.query.filter_by(template_id=template.id)
+    }
+
+
+def test_fill_stats(app, template):
+    expected = _expected(template.id)
+    _clear_stats()
+
+    assert VersionStorageService.fill_stats(batch_size=2) == len(expected)
+    assert VersionStorageService.fill_stats() == 0
+
+    db.session.expire_all()
+    for version in TemplateVersion.query.filter_by(template_id=template.id):
+        assert {name: getattr(version, name) for name in TemplateVersion.STATS_COLUMNS} == \
+            expected[version.version_number]
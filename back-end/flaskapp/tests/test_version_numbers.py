@@ -0,0 +1,57 @@
+# ============================================
+# FICHIER: backend/tests/test_version_numbers.py
+# Tests de la Numérotation des Versions
+# ============================================
+"""
+Tests de concurrence - Modifications et restaurations simultanées d'un template
+
+Chaque thread a son contexte d'application (sa session, sa connexion) sur
+la même base SQLite fichier (voir conftest.py).
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+
+from app import db
+from app.models.email_template import EmailTemplate
+from app.models.template_version import TemplateVersion
+from app.services.template_service import TemplateService
+from app.services.version_service import VersionService
+
+
+THREADS = 6
+UPDATES = 10
+RESTORE_EVERY = 4  # une restauration de la version 1 toutes les N opérations
+
+
+def test_concurrent_updates_and_restores_number_versions_contiguously(app, user):
+    template = TemplateService.create_template(user.id, 't', 's', '<p>version 1</p>')
+    template_id, owner_id = template.id, user.id
+
+    def client(number):
+        errors = []
+        with app.app_context():
+            for i in range(UPDATES):
+                try:
+                    if i % RESTORE_EVERY == RESTORE_EVERY - 1:
+                        VersionService.restore_version(template_id, 1, owner_id)
+                    else:
+                        TemplateService.update_template(
+                            template_id, owner_id, html_content=f'<p>client {number}, modification {i}</p>'
+                        )
+                except Exception as e:
+                    db.session.rollback()
+                    errors.append(f'{type(e).__name__}: {e}')
+            db.session.remove()
+        return errors
+
+    with ThreadPoolExecutor(max_workers=THREADS) as clients:
+        errors = [error for result in clients.map(client, range(THREADS)) for error in result]
+
+    assert errors == []
+
+    db.session.expire_all()
+    numbers = sorted(db.session.execute(
+        db.select(TemplateVersion.version_number).where(TemplateVersion.template_id == template_id)
+    ).scalars())
+    assert numbers == list(range(1, THREADS * UPDATES + 2))
+    assert db.session.get(EmailTemplate, template_id).version_counter == numbers[-1]
@@ -0,0 +1,48 @@
+# ============================================
+# FICHIER: backend/tests/test_version_retention.py
+# Tests de la Politique de Rétention
+# ============================================
+"""
+Politique de rétention d'un template - Codes HTTP de la route
+"""
+
+from app.services.template_service import TemplateService
+
+
+def _url(template_id):
+    return f'/api/templates/{template_id}/versions/retention'
+
+
+def test_update_policy(app, user, auth_headers):
+    template = TemplateService.create_template(user_id=user.id, nom='Lettre', sujet='Sujet', html_content='<p>x</p>')
+    client = app.test_client()
+
+    response = client.put(_url(template.id), json={'policy': {'keep_last': 5}}, headers=auth_headers)
+    assert response.status_code == 200
+
+    response = client.put(_url(template.id), json={'policy': {'keep_last': -1}}, headers=auth_headers)
+    assert response.status_code == 400
+
+    response = client.put(_url(template.id), json={'policy': {'inconnue': 1}}, headers=auth_headers)
+    assert response.status_code == 400
+
+
+def test_unknown_template_is_404(app, user, auth_headers):
+    response = app.test_client().put(_url(999), json={'policy': {'keep_last': 5}}, headers=auth_headers)
+    assert response.status_code == 404
+
+
+def test_compactor_shutdown_registered_once(monkeypatch):
+    from flask import Flask
+    from app.utils import version_compactor as module
+
+    registered = []
+    monkeypatch.setattr(module.atexit, 'register', registered.append)
+
+    app = Flask(__name__)
+    app.config['VERSION_COMPACTION_ASYNC'] = True
+    compactor = module.VersionCompactor()
+    for _ in range(3):
+        compactor.init_app(app)
+
+    assert registered == [compactor.shutdown]